@@ -1,5 +1,8 @@
 from binance.client import Client
+from binance.base_client import BaseClient
+from binance.ws.streams import BinanceSocketManager
 from binance.exceptions import BinanceAPIException
+from Core.API.ClienteREST import ClienteREST
 from Core.Utils.Config import Config
 import time
 
@@ -11,12 +14,28 @@ class BinanceBase:
     def __init__(self):
         # 1. Validar claves antes de intentar nada
         Config.validar_config()
+        if Config.USAR_SIMULADOR:
+            BinanceBase.apuntar_a_simulador()
         
         # 2. Inicializar cliente (Detectar si es Testnet o Real)
         self.client = Client(Config.BINANCE_API_KEY, Config.BINANCE_SECRET_KEY, testnet=Config.USAR_TESTNET)
+        # 3. Cliente REST compartido (pool keep-alive) para todas las órdenes y consultas de cuenta
+        self.rest = ClienteREST.compartido()
         
         print(f"🔌 Motor Iniciado. Testnet: {Config.USAR_TESTNET}")
 
+    @staticmethod
+    def apuntar_a_simulador():
+        """
+        Redirige python-binance (REST síncrono, AsyncClient de los WebSockets y streams)
+        al ServidorSimulado local. Cambia las URLs de clase, así que debe llamarse antes
+        de crear clientes o de arrancar el ThreadedWebsocketManager.
+        """
+        rest = Config.URL_SIMULADOR_REST.rstrip('/')
+        BaseClient.API_URL = BaseClient.API_TESTNET_URL = f"{rest}/api"
+        BaseClient.FUTURES_URL = BaseClient.FUTURES_TESTNET_URL = f"{rest}/fapi"
+        BinanceSocketManager.FSTREAM_URL = BinanceSocketManager.FSTREAM_TESTNET_URL = Config.URL_SIMULADOR_WS
+
     def validar_conectividad(self):
         """Prueba simple de ping al servidor."""
         try:
@@ -29,7 +48,7 @@ class BinanceBase:
     def obtener_saldo_usdt(self):
         """Obtiene el saldo disponible en Futures para operar."""
         try:
-            account = self.client.futures_account_balance()
+            account = self.rest.futures_account_balance()
             for asset in account:
                 if asset['asset'] == 'USDT':
                     # CORRECCIÓN: Usamos 'availableBalance' en lugar de 'withdrawAvailable'
@@ -47,7 +66,7 @@ class BinanceBase:
         try:
             # 1. Cambiar a Margin Type: CROSSED (Cruzado)
             try:
-                self.client.futures_change_margin_type(symbol=symbol, marginType='CROSSED')
+                self.rest.futures_change_margin_type(symbol=symbol, marginType='CROSSED')
                 print(f"✅ {symbol}: Modo Cruzado activado.")
             except BinanceAPIException as e:
                 # Si ya está en Cruzado, Binance devuelve error código -4046 "No need to change margin type"
@@ -57,7 +76,7 @@ class BinanceBase:
                     raise e
 
             # 2. Cambiar apalancamiento (Ej: 5x por seguridad inicial)
-            self.client.futures_change_leverage(symbol=symbol, leverage=5)
+            self.rest.futures_change_leverage(symbol=symbol, leverage=5)
             print(f"✅ {symbol}: Apalancamiento ajustado a 5x.")
             
         except Exception as e:
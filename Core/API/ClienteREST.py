@@ -0,0 +1,235 @@
+import hmac
+import time
+import hashlib
+import threading
+import requests
+from urllib.parse import urlencode
+from concurrent.futures import ThreadPoolExecutor, Future
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from binance.exceptions import BinanceAPIException, BinanceRequestException
+from Core.API.GestorPeso import GestorPeso
+from Core.Utils.Config import Config
+
+class ClienteREST:
+    """
+    Cliente REST firmado ÚNICO (por proceso) para órdenes y cuenta de Futuros.
+    - Una sola sesión keep-alive con pool de conexiones: sin handshake TLS por petición.
+    - Firma HMAC-SHA256, timeout por llamada y reintentos ante fallos de red / 5xx.
+    - en_paralelo(): varias peticiones a la vez (ej. cancelar Limit + Algo de un par).
+    - Cada petición pasa por GestorPeso (prioridad + cabeceras de peso) y los GET
+      idénticos en vuelo se fusionan en una sola petición.
+    Expone los mismos métodos futures_* que python-binance, así los gestores no cambian.
+    """
+    _instancia = None
+    _lock_instancia = threading.Lock()
+
+    # Solo se reintentan tras respuesta caída las peticiones idempotentes.
+    # Un POST de orden solo se reintenta si la conexión falló antes de enviarse.
+    METODOS_REINTENTABLES = frozenset({"GET", "DELETE", "PUT"})
+    TIPOS_CONDICIONALES = {"STOP", "STOP_MARKET", "TAKE_PROFIT", "TAKE_PROFIT_MARKET", "TRAILING_STOP_MARKET"}
+
+    def __init__(self, api_key=None, secret_key=None, url_base=None, timeout=None, reintentos=None, hilos=None,
+                 peso=None):
+        self.api_key = api_key or Config.BINANCE_API_KEY
+        self.secret_key = (secret_key or Config.BINANCE_SECRET_KEY or "").encode()
+        self.url_base = (url_base or self.url_por_defecto()).rstrip('/')
+        self.timeout = Config.TIMEOUT_REST if timeout is None else timeout
+        hilos = hilos or Config.HILOS_REST
+        reintentos = Config.REINTENTOS_REST if reintentos is None else reintentos
+
+        self.sesion = requests.Session()
+        self.sesion.headers.update({'X-MBX-APIKEY': self.api_key or ""})
+        adaptador = HTTPAdapter(
+            pool_connections=1, pool_maxsize=hilos,
+            max_retries=Retry(total=reintentos, connect=reintentos, read=reintentos, status=reintentos,
+                              backoff_factor=0.1, status_forcelist=(500, 502, 503, 504),
+                              allowed_methods=self.METODOS_REINTENTABLES, raise_on_status=False)
+        )
+        self.sesion.mount("https://", adaptador)
+        self.sesion.mount("http://", adaptador)
+        self.pool = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="rest")
+        self.peso = peso or GestorPeso(Config.PRESUPUESTO_PESO)
+        self._en_vuelo = {}   # {(ruta, params): Future} GET idénticos que ya están saliendo
+        self._lock_vuelo = threading.Lock()
+        self.fusionadas = 0   # GET que se ahorraron por ir a caballo de otro igual
+        self.llamadas = {}    # {'POST /fapi/v1/order': [peticiones, errores]} para reportes
+        self._lock_llamadas = threading.Lock()
+
+    @property
+    def peso_usado(self):
+        """Último X-MBX-USED-WEIGHT-1M devuelto por Binance."""
+        return self.peso.peso_servidor
+
+    @classmethod
+    def compartido(cls):
+        """Devuelve la instancia global (la crea la primera vez)."""
+        with cls._lock_instancia:
+            if cls._instancia is None:
+                cls._instancia = cls()
+            return cls._instancia
+
+    @staticmethod
+    def url_por_defecto():
+        if Config.USAR_SIMULADOR:
+            return Config.URL_SIMULADOR_REST
+        return Config.URL_FUTURES_TESTNET if Config.USAR_TESTNET else Config.URL_FUTURES_MAIN
+
+    # ------------------------------------------------------------------
+    # Núcleo
+    # ------------------------------------------------------------------
+    def firmar(self, params):
+        """Query string con timestamp, recvWindow y firma HMAC-SHA256."""
+        params = dict(params, timestamp=int(time.time() * 1000), recvWindow=Config.RECV_WINDOW)
+        consulta = urlencode(params)
+        firma = hmac.new(self.secret_key, consulta.encode(), hashlib.sha256).hexdigest()
+        return f"{consulta}&signature={firma}"
+
+    @staticmethod
+    def _limpiar(params):
+        """Quita los None y pasa los booleanos al formato de Binance ('true'/'false')."""
+        return {k: (str(v).lower() if isinstance(v, bool) else v) for k, v in params.items() if v is not None}
+
+    def peticion(self, metodo, ruta, params=None, firmada=True, timeout=None, prioridad=GestorPeso.NORMAL):
+        """
+        Petición a la API de Futuros. Lanza BinanceAPIException si Binance responde con error y
+        BinanceRequestException si la red falla o vence el timeout (en un POST no se sabe si llegó).
+        """
+        params = self._limpiar(params or {})
+        if metodo != "GET":
+            return self._enviar(metodo, ruta, params, firmada, timeout, prioridad)
+
+        # Coalescencia: si la misma consulta ya está en vuelo, esperamos su respuesta
+        clave = (ruta, tuple(sorted(params.items())))
+        with self._lock_vuelo:
+            futuro = self._en_vuelo.get(clave)
+            propio = futuro is None
+            if propio:
+                futuro = self._en_vuelo[clave] = Future()
+            else:
+                self.fusionadas += 1
+        if not propio:
+            return futuro.result()
+        try:
+            resultado = self._enviar(metodo, ruta, params, firmada, timeout, prioridad)
+            futuro.set_result(resultado)
+            return resultado
+        except Exception as e:
+            futuro.set_exception(e)
+            raise
+        finally:
+            with self._lock_vuelo:
+                del self._en_vuelo[clave]
+
+    def _enviar(self, metodo, ruta, params, firmada, timeout, prioridad):
+        self.peso.reservar(GestorPeso.peso_ruta(ruta, params), prioridad)
+        consulta = self.firmar(params) if firmada else urlencode(params)
+        url = f"{self.url_base}{ruta}"
+        try:
+            if metodo in ("POST", "PUT"):
+                respuesta = self.sesion.request(metodo, url, data=consulta, timeout=timeout or self.timeout,
+                                                headers={'Content-Type': 'application/x-www-form-urlencoded'})
+            else:
+                respuesta = self.sesion.request(metodo, f"{url}?{consulta}", timeout=timeout or self.timeout)
+        except requests.RequestException as e:
+            self._contar(metodo, ruta, error=True) # Caída de red / timeout
+            # Mismo tipo que python-binance: quien ya maneja errores de la API no se cae por un timeout
+            raise BinanceRequestException(f"{metodo} {ruta}: {e}") from e
+        self._contar(metodo, ruta, error=not 200 <= respuesta.status_code < 300)
+
+        peso = respuesta.headers.get('X-MBX-USED-WEIGHT-1M')
+        ordenes = respuesta.headers.get('X-MBX-ORDER-COUNT-1M')
+        self.peso.sincronizar(int(peso) if peso else None, int(ordenes) if ordenes else None)
+        if respuesta.status_code in (429, 418):
+            self.peso.pausar(int(respuesta.headers.get('Retry-After', 60)))
+        if not 200 <= respuesta.status_code < 300:
+            raise BinanceAPIException(respuesta, respuesta.status_code, respuesta.text)
+        return respuesta.json() if respuesta.text else {}
+
+    def _contar(self, metodo, ruta, error):
+        with self._lock_llamadas:
+            contador = self.llamadas.setdefault(f"{metodo} {ruta}", [0, 0])
+            contador[0] += 1
+            contador[1] += error
+
+    def en_paralelo(self, llamadas):
+        """
+        Ejecuta [(funcion, {kwargs}), ...] a la vez sobre el pool de conexiones.
+        Devuelve los resultados en el mismo orden; si una falla, en su lugar va la excepción.
+        """
+        def ejecutar(llamada):
+            funcion, kwargs = llamada
+            try:
+                return funcion(**kwargs)
+            except Exception as e:
+                return e
+        return list(self.pool.map(ejecutar, llamadas))
+
+    def en_segundo_plano(self, funcion, **kwargs):
+        """Como en_paralelo pero sin esperar: devuelve el Future (la excepción, si la hay, va dentro)."""
+        return self.pool.submit(funcion, **kwargs)
+
+    def cerrar(self):
+        self.pool.shutdown(wait=False)
+        self.sesion.close()
+
+    # ------------------------------------------------------------------
+    # Órdenes
+    # ------------------------------------------------------------------
+    def futures_create_order(self, **params):
+        """Las condicionales (STOP_MARKET...) van al endpoint de Algo Orders, igual que python-binance."""
+        tipo = params.get('type', '').upper()
+        # Stops, cierres y órdenes a mercado (solo las usamos para salir) pasan por delante
+        critica = (tipo in self.TIPOS_CONDICIONALES or tipo == 'MARKET'
+                   or params.get('reduceOnly') in (True, 'true') or params.get('closePosition') in (True, 'true'))
+        prioridad = GestorPeso.CRITICA if critica else GestorPeso.NORMAL
+        if tipo in self.TIPOS_CONDICIONALES:
+            params['algoType'] = 'CONDITIONAL'
+            if 'stopPrice' in params and 'triggerPrice' not in params:
+                params['triggerPrice'] = params.pop('stopPrice')
+            return self.peticion("POST", "/fapi/v1/algoOrder", params, prioridad=prioridad)
+        return self.peticion("POST", "/fapi/v1/order", params, prioridad=prioridad)
+
+    def futures_modify_order(self, **params):
+        """Cambia precio/cantidad de una Limit viva (pierde la prioridad en la cola del libro)."""
+        return self.peticion("PUT", "/fapi/v1/order", params)
+
+    def futures_get_order(self, **params):
+        return self.peticion("GET", "/fapi/v1/order", params, prioridad=GestorPeso.BAJA)
+
+    def futures_cancel_order(self, **params):
+        if params.pop('conditional', False) or 'algoId' in params or 'clientAlgoId' in params:
+            return self.peticion("DELETE", "/fapi/v1/algoOrder", params, prioridad=GestorPeso.CRITICA)
+        return self.peticion("DELETE", "/fapi/v1/order", params, prioridad=GestorPeso.CRITICA)
+
+    def futures_cancel_all_open_orders(self, **params):
+        if params.pop('conditional', False):
+            return self.peticion("DELETE", "/fapi/v1/algoOpenOrders", params, prioridad=GestorPeso.CRITICA)
+        return self.peticion("DELETE", "/fapi/v1/allOpenOrders", params, prioridad=GestorPeso.CRITICA)
+
+    def futures_get_open_orders(self, **params):
+        if params.pop('conditional', False):
+            return self.peticion("GET", "/fapi/v1/openAlgoOrders", params, prioridad=GestorPeso.BAJA)
+        return self.peticion("GET", "/fapi/v1/openOrders", params, prioridad=GestorPeso.BAJA)
+
+    # ------------------------------------------------------------------
+    # Mercado
+    # ------------------------------------------------------------------
+    def futures_klines(self, **params):
+        """Velas (pública, sin firma). Para rellenos en caliente: pasan por el presupuesto de peso."""
+        return self.peticion("GET", "/fapi/v1/klines", params, firmada=False)
+
+    # ------------------------------------------------------------------
+    # Cuenta
+    # ------------------------------------------------------------------
+    def futures_position_information(self, **params):
+        return self.peticion("GET", "/fapi/v3/positionRisk", params, prioridad=GestorPeso.BAJA)
+
+    def futures_account_balance(self, **params):
+        return self.peticion("GET", "/fapi/v3/balance", params, prioridad=GestorPeso.BAJA)
+
+    def futures_change_leverage(self, **params):
+        return self.peticion("POST", "/fapi/v1/leverage", params)
+
+    def futures_change_margin_type(self, **params):
+        return self.peticion("POST", "/fapi/v1/marginType", params)
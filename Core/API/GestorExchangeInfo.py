@@ -0,0 +1,130 @@
+import json
+import os
+import threading
+import time
+from Core.Utils.Config import Config
+
+RUTA_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'Data', 'exchange_info.json')
+
+class GestorExchangeInfo:
+    """
+    Caché ÚNICA (por proceso) de exchangeInfo de Futuros.
+    Se descarga una sola vez al arrancar, se indexa por símbolo y se guarda en disco
+    con TTL para que un reinicio no tenga que volver a bajar cientos de pares.
+    GestorPrecision es solo una vista ligera sobre estos filtros.
+    """
+    _instancia = None
+    _lock_instancia = threading.Lock()
+
+    def __init__(self, cliente=None, ruta_cache=RUTA_CACHE, ttl=None):
+        self.client = cliente # Cliente python-binance (se puede inyectar después)
+        # Con el simulador no se toca la caché en disco (sus filtros no son los reales)
+        self.ruta_cache = None if Config.USAR_SIMULADOR else ruta_cache
+        self.ttl = Config.TTL_EXCHANGE_INFO if ttl is None else ttl
+        self.filtros = {}     # {'BTCUSDT': {'tick_size': 0.1, 'step_size': 0.001, ...}}
+        self.cargado_en = 0
+        self.fallos = 0       # Descargas fallidas seguidas (espera exponencial entre reintentos)
+        self.reintento_en = 0 # time.monotonic() antes del cual no se vuelve a pedir tras un error
+        self.lock = threading.Lock()
+
+    @classmethod
+    def compartido(cls, cliente_api=None):
+        """Devuelve la instancia global (la crea la primera vez)."""
+        with cls._lock_instancia:
+            if cls._instancia is None:
+                cls._instancia = cls()
+            if cliente_api is not None and cls._instancia.client is None:
+                cls._instancia.client = cliente_api.client
+            return cls._instancia
+
+    def cargar(self, forzar=False):
+        """
+        Disco (si no caducó) o REST. Una sola descarga aunque lo pidan varios hilos.
+        Tras un error no se reintenta hasta pasada la espera (Config.REINTENTO_EXCHANGE_INFO, doblando
+        con cada fallo): obtener() se llama por orden y no debe martillear un endpoint de peso alto.
+        """
+        with self.lock:
+            if self.filtros and not forzar:
+                return True
+            if not forzar and self._cargar_disco():
+                print(f"✅ ExchangeInfo: {len(self.filtros)} pares desde caché en disco.")
+                return True
+            if not forzar and time.monotonic() < self.reintento_en:
+                return False
+            return self._descargar()
+
+    def _cargar_disco(self):
+        if not self.ruta_cache:
+            return False
+        try:
+            with open(self.ruta_cache, 'r') as f:
+                data = json.load(f)
+            if data.get('testnet') != Config.USAR_TESTNET:
+                return False
+            if time.time() - data.get('timestamp', 0) > self.ttl:
+                return False
+            self.filtros = data['simbolos']
+            self.cargado_en = data['timestamp']
+            return True
+        except (OSError, ValueError, KeyError):
+            return False
+
+    def _descargar(self):
+        if self.client is None:
+            # Sin cliente inyectado: creamos la conexión base una única vez
+            from Core.API.BinanceBase import BinanceBase
+            self.client = BinanceBase().client
+        try:
+            info = self.client.futures_exchange_info()
+        except Exception as e:
+            espera = min(Config.REINTENTO_EXCHANGE_INFO * 2 ** self.fallos, Config.REINTENTO_EXCHANGE_INFO_MAX)
+            self.fallos += 1
+            self.reintento_en = time.monotonic() + espera
+            print(f"⚠️ Error descargando exchangeInfo: {e} (reintento en {espera:.0f}s)")
+            return False
+
+        self.fallos = 0
+        self.reintento_en = 0
+        self.filtros = {s['symbol']: self._extraer_filtros(s) for s in info['symbols']}
+        self.cargado_en = time.time()
+        print(f"✅ ExchangeInfo: {len(self.filtros)} pares descargados (1 sola petición).")
+        self._guardar_disco()
+        return True
+
+    def _guardar_disco(self):
+        if not self.ruta_cache:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.ruta_cache), exist_ok=True)
+            temporal = self.ruta_cache + '.tmp'
+            with open(temporal, 'w') as f:
+                json.dump({'timestamp': self.cargado_en, 'testnet': Config.USAR_TESTNET, 'simbolos': self.filtros}, f)
+            os.replace(temporal, self.ruta_cache)
+        except OSError as e:
+            print(f"⚠️ No se pudo guardar la caché de exchangeInfo: {e}")
+
+    @staticmethod
+    def _extraer_filtros(s):
+        filtros = {
+            'decimales_precio': int(s['pricePrecision']),
+            'decimales_cantidad': int(s['quantityPrecision']),
+            'tick_size': 0.01,
+            'step_size': 0.001,
+            'min_qty': 0.0,
+            'min_notional': 0.0,
+        }
+        for f in s['filters']:
+            if f['filterType'] == 'PRICE_FILTER':
+                filtros['tick_size'] = float(f['tickSize'])
+            elif f['filterType'] == 'LOT_SIZE':
+                filtros['step_size'] = float(f['stepSize'])
+                filtros['min_qty'] = float(f['minQty'])
+            elif f['filterType'] == 'MIN_NOTIONAL':
+                filtros['min_notional'] = float(f.get('notional', f.get('minNotional', 0.0)))
+        return filtros
+
+    def obtener(self, symbol):
+        """Filtros del par (None si Binance no lo lista)."""
+        if not self.filtros:
+            self.cargar()
+        return self.filtros.get(symbol)
@@ -0,0 +1,140 @@
+import threading
+import time
+from collections import deque
+
+class GestorPeso:
+    """
+    Presupuesto de 'Request Weight' de Binance (ventana deslizante de 60s).
+    Antes de cada petición se reserva su peso; si la ventana está llena, el hilo espera
+    en vez de arriesgar un 429/418 que detendría el trading.
+    Planificador por prioridad: la contabilidad (balance, posiciones) solo puede gastar
+    hasta su umbral, así el hueco restante queda libre para stops y cierres.
+    """
+    # Pesos oficiales de los endpoints que usamos (Futuros USD-M)
+    PESOS = {
+        "klines_1000": 5,
+        "exchange_info": 1,
+        "position_information": 5,
+        "open_orders_todas": 40,
+        "open_orders_par": 1,
+        "account_balance": 5,
+        "change_leverage": 1,
+        "cancel_all": 1,
+        "algo_cancel": 1,
+    }
+
+    # Peso por ruta REST. Tupla = (con symbol, sin symbol)
+    PESOS_RUTA = {
+        "/fapi/v1/order": 1,
+        "/fapi/v1/algoOrder": 1,
+        "/fapi/v1/batchOrders": 5,
+        "/fapi/v1/allOpenOrders": 1,
+        "/fapi/v1/algoOpenOrders": 1,
+        "/fapi/v1/openOrders": (1, 40),
+        "/fapi/v1/openAlgoOrders": (1, 40),
+        "/fapi/v3/positionRisk": 5,
+        "/fapi/v3/balance": 5,
+        "/fapi/v1/leverage": 1,
+        "/fapi/v1/marginType": 1,
+        "/fapi/v1/exchangeInfo": 1,
+        "/fapi/v1/ticker/price": (1, 2),
+    }
+
+    # Prioridades (menor = más urgente) y fracción de la ventana que puede llenar cada una
+    CRITICA = 0  # Stops, cierres a mercado, cancelaciones
+    NORMAL = 1   # Entradas y configuración
+    BAJA = 2     # Contabilidad: balance, posiciones, órdenes abiertas
+    UMBRALES = {CRITICA: 1.0, NORMAL: 0.9, BAJA: 0.7}
+
+    def __init__(self, limite_por_minuto=1200, ventana=60):
+        self.limite = limite_por_minuto
+        self.ventana = ventana
+        self.consumos = deque() # (instante, peso)
+        self.usado = 0
+        self.lock = threading.Lock()
+        self.pausado_hasta = 0.0  # Tras un 429/418: nadie envía hasta este instante (monotonic)
+        self.peso_servidor = 0    # Último X-MBX-USED-WEIGHT-1M visto
+        self.ordenes_servidor = 0 # Último X-MBX-ORDER-COUNT-1M visto
+        self.esperas = {p: 0 for p in self.UMBRALES} # Veces que cada prioridad tuvo que esperar
+
+    @classmethod
+    def peso_ruta(cls, ruta, params=None):
+        if ruta == "/fapi/v1/klines":
+            return cls.peso_klines(int((params or {}).get('limit', 500)))
+        peso = cls.PESOS_RUTA.get(ruta, 1)
+        if isinstance(peso, tuple):
+            return peso[0] if params and 'symbol' in params else peso[1]
+        return peso
+
+    @staticmethod
+    def peso_klines(limite):
+        """Las klines pesan según 'limit': <100 -> 1, <500 -> 2, <=1000 -> 5, más -> 10."""
+        return 1 if limite < 100 else 2 if limite < 500 else 5 if limite <= 1000 else 10
+
+    def _purgar(self, ahora):
+        while self.consumos and ahora - self.consumos[0][0] >= self.ventana:
+            self.usado -= self.consumos.popleft()[1]
+
+    def reservar(self, peso, prioridad=NORMAL):
+        """Bloquea hasta que haya hueco para 'peso' dentro del umbral de su prioridad."""
+        techo = self.limite * self.UMBRALES[prioridad]
+        espero = False
+        while True:
+            with self.lock:
+                ahora = time.monotonic()
+                self._purgar(ahora)
+                if ahora >= self.pausado_hasta and (self.usado + peso <= techo or not self.consumos):
+                    self.consumos.append((ahora, peso))
+                    self.usado += peso
+                    return
+                if not espero:
+                    self.esperas[prioridad] += 1
+                    espero = True
+                if ahora < self.pausado_hasta:
+                    espera = self.pausado_hasta - ahora
+                else:
+                    espera = self.ventana - (ahora - self.consumos[0][0])
+            time.sleep(max(espera, 0.01))
+
+    def sincronizar(self, peso_servidor=None, ordenes_servidor=None):
+        """
+        Ajusta la cuenta local con las cabeceras de Binance. Si el servidor lleva más peso
+        del que vemos (klines de python-binance, otro proceso con la misma IP), la diferencia
+        se apunta como consumo para no quedarnos cortos.
+        """
+        with self.lock:
+            if ordenes_servidor is not None:
+                self.ordenes_servidor = ordenes_servidor
+            if peso_servidor is None:
+                return
+            self.peso_servidor = peso_servidor
+            ahora = time.monotonic()
+            self._purgar(ahora)
+            if peso_servidor > self.usado:
+                self.consumos.append((ahora, peso_servidor - self.usado))
+                self.usado = peso_servidor
+
+    def pausar(self, segundos):
+        """429/418: congela todas las peticiones 'segundos' (Retry-After de Binance)."""
+        with self.lock:
+            self.pausado_hasta = max(self.pausado_hasta, time.monotonic() + segundos)
+        print(f"⛔ Límite de peso de Binance alcanzado. REST en pausa {segundos}s.")
+
+    def utilizacion(self):
+        with self.lock:
+            self._purgar(time.monotonic())
+            return self.usado / self.limite
+
+    def estado(self):
+        """Foto para reportes: cuánto margen queda para añadir pares."""
+        with self.lock:
+            self._purgar(time.monotonic())
+            return {
+                'usado': self.usado,
+                'limite': self.limite,
+                'utilizacion': self.usado / self.limite,
+                'peso_servidor': self.peso_servidor,
+                'ordenes_servidor': self.ordenes_servidor,
+                'esperas': dict(self.esperas),
+                'pausado': time.monotonic() < self.pausado_hasta,
+            }
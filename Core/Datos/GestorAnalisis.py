@@ -39,4 +39,112 @@ class GestorAnalisis:
         series = pd.Series(precios)
         ema = series.ewm(span=periodo, adjust=False).mean()
         
-        return ema.iloc[-1]
\ No newline at end of file
+        return ema.iloc[-1]
+
+    def calcular_rsi_serie(self, precios, periodo=14):
+        """
+        RSI para TODA la serie de una sola pasada vectorizada (Backtest / Optimizador).
+        Misma fórmula que calcular_rsi (medias simples); devuelve NaN donde no hay datos.
+        """
+        p = np.asarray(precios, dtype=np.float64)
+        rsi = np.full(len(p), np.nan)
+        if len(p) < periodo + 1:
+            return rsi
+
+        delta = np.diff(p, prepend=np.nan)
+        ganancias = np.where(delta > 0, delta, 0.0)
+        perdidas = np.where(delta < 0, -delta, 0.0)
+
+        # Ventanas de 'periodo' variaciones (igual que rolling(window=periodo))
+        ventanas_g = np.lib.stride_tricks.sliding_window_view(ganancias, periodo).mean(axis=1)
+        ventanas_p = np.lib.stride_tricks.sliding_window_view(perdidas, periodo).mean(axis=1)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rs = ventanas_g / ventanas_p
+            rsi[periodo - 1:] = 100 - (100 / (1 + rs))
+        return rsi
+
+    def calcular_ema_serie(self, precios, periodo=50):
+        """EMA para toda la serie (vectorizada por pandas)."""
+        return pd.Series(np.asarray(precios, dtype=np.float64)).ewm(span=periodo, adjust=False).mean().values
+
+    # ------------------------------------------------------------------
+    # Modo lote: todos los pares de la lista en una sola pasada matricial
+    # ------------------------------------------------------------------
+    @staticmethod
+    def matriz_cierres(series):
+        """
+        Apila los cierres de cada par en una matriz (pares x velas) alineada por la derecha
+        (última columna = vela más reciente). Los pares con menos historia se rellenan con NaN.
+        """
+        ancho = max((len(s) for s in series), default=0)
+        matriz = np.full((len(series), ancho), np.nan)
+        for fila, s in enumerate(series):
+            if len(s):
+                matriz[fila, ancho - len(s):] = s
+        return matriz
+
+    def calcular_rsi_lote(self, matriz, periodos):
+        """
+        RSI de la última vela de cada fila (misma fórmula que calcular_rsi).
+        'periodos' puede ser un entero o un periodo por fila. NaN si la fila no tiene datos.
+        """
+        periodos = np.broadcast_to(np.asarray(periodos, dtype=np.int64), (len(matriz),))
+        rsi = np.full(len(matriz), np.nan)
+        for periodo in np.unique(periodos):
+            filas = np.flatnonzero(periodos == periodo)
+            if matriz.shape[1] < periodo + 1:
+                continue
+            delta = np.diff(matriz[filas, -(periodo + 1):], axis=1)
+            ganancias = np.where(delta > 0, delta, 0.0).mean(axis=1)
+            perdidas = np.where(delta < 0, -delta, 0.0).mean(axis=1)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                # NaN en delta (par sin historia suficiente) se propaga por la media
+                valido = ~np.isnan(delta).any(axis=1)
+                rsi[filas] = np.where(valido, 100 - (100 / (1 + ganancias / perdidas)), np.nan)
+        return rsi
+
+    def calcular_ema_lote(self, matriz, periodos):
+        """
+        EMA (span=periodo, adjust=False) de la última vela de cada fila. Recorre las columnas
+        una vez: el coste crece con las velas, no con el número de pares.
+        """
+        periodos = np.broadcast_to(np.asarray(periodos, dtype=np.float64), (len(matriz),))
+        alpha = 2 / (periodos + 1)
+        ema = np.full(len(matriz), np.nan)
+        for columna in matriz.T:
+            ema = np.where(np.isnan(ema), columna, ema + alpha * (columna - ema))
+        muestras = (~np.isnan(matriz)).sum(axis=1)
+        return np.where(muestras >= periodos, ema, np.nan)
+
+    def evaluar_lote(self, cierres_por_par, configuraciones):
+        """
+        RSI, EMA y señal de todos los pares a la vez.
+        - cierres_por_par: {'BTCUSDT': array de cierres, ...}
+        - configuraciones: {'BTCUSDT': bloque "indicadores" de estrategias.json, ...}
+        Devuelve {'BTCUSDT': {'rsi': 28.1, 'ema': None, 'senal': 1}} con
+        senal = 1 (sobreventa), -1 (sobrecompra), 0 (nada) o None si no hay RSI.
+        """
+        pares = list(cierres_por_par)
+        if not pares:
+            return {}
+        matriz = self.matriz_cierres([cierres_por_par[p] for p in pares])
+        rsi = self.calcular_rsi_lote(matriz, [configuraciones[p].get("rsi_periodo", 14) for p in pares])
+        compra = np.array([configuraciones[p].get("rsi_sobreventa", 30) for p in pares], dtype=np.float64)
+        venta = np.array([configuraciones[p].get("rsi_sobrecompra", 70) for p in pares], dtype=np.float64)
+        senal = np.where(rsi < compra, 1, np.where(rsi > venta, -1, 0))
+
+        ema = np.full(len(pares), np.nan)
+        con_ema = [i for i, p in enumerate(pares) if configuraciones[p].get("ema_periodo")]
+        if con_ema:
+            ema[con_ema] = self.calcular_ema_lote(
+                matriz[con_ema], [configuraciones[pares[i]]["ema_periodo"] for i in con_ema])
+
+        return {
+            par: {
+                'rsi': None if np.isnan(rsi[i]) else float(rsi[i]),
+                'ema': None if np.isnan(ema[i]) else float(ema[i]),
+                'senal': None if np.isnan(rsi[i]) else int(senal[i]),
+            }
+            for i, par in enumerate(pares)
+        }
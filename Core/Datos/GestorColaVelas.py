@@ -0,0 +1,167 @@
+import threading
+from collections import deque
+from concurrent.futures import Future
+from Core.Utils.Config import Config
+from Core.Utils.GestorLogs import GestorLogs
+
+log = GestorLogs.obtener("velas")
+
+class GestorColaVelas:
+    """
+    Cola acotada productor/consumidor entre el hilo del WebSocket y el procesamiento de velas.
+    - El hilo del socket solo encola (O(1)) y vuelve a leer la red.
+    - Un hilo trabajador aplica las klines en orden por par.
+    - Coalescente: de la vela abierta solo vale la última actualización (la última gana);
+      los cierres (x=True) no se fusionan nunca.
+    - Si se llena, se descarta la actualización abierta más vieja y se cuenta.
+    - Un par puede quedar retenido esperando un Future (descarga REST de velas perdidas): sus klines
+      se siguen acumulando detrás, en orden, y los demás pares no esperan. Pasa tras una reconexión
+      y cuando 'aplicar' devuelve un Future (hueco en el stream): la kline se reintenta tras el relleno.
+    """
+    def __init__(self, aplicar, capacidad=None):
+        self.aplicar = aplicar # aplicar(symbol, kline): lo que antes hacía el hilo del socket (Future si hay hueco)
+        self.capacidad = capacidad or Config.COLA_VELAS_MAX
+        self.pendientes = {}   # {'BTCUSDT': deque de klines} en orden de llegada
+        self.turnos = deque()  # Pares con trabajo pendiente (FIFO)
+        self.retenidos = set() # Pares esperando un Future: no entran en turnos hasta que se resuelva
+        self.profundidad = 0
+        candado = threading.Lock()
+        self.condicion = threading.Condition(candado) # Despierta al trabajador
+        self.vaciada = threading.Condition(candado)   # Avisa de lotes terminados
+        self.activo = False
+        self.hilo = None
+        self.contadores = {'encoladas': 0, 'fusionadas': 0, 'descartadas': 0, 'procesadas': 0,
+                           'errores': 0, 'profundidad_max': 0}
+
+    def iniciar(self):
+        self.activo = True
+        self.hilo = threading.Thread(target=self._trabajar, name="cola-velas", daemon=True)
+        self.hilo.start()
+
+    def detener(self, timeout=2):
+        with self.condicion:
+            self.activo = False
+            self.condicion.notify()
+        if self.hilo:
+            self.hilo.join(timeout)
+
+    def encolar(self, symbol, kline):
+        """Productor (hilo del socket). Nunca bloquea."""
+        with self.condicion:
+            self.contadores['encoladas'] += 1
+            cola = self.pendientes.get(symbol)
+            if cola is None:
+                cola = self.pendientes[symbol] = deque()
+                self.turnos.append(symbol)
+
+            # Misma vela aún abierta en cola: la sustituimos en su sitio
+            if cola and cola[-1]['t'] == kline['t'] and not cola[-1]['x']:
+                cola[-1] = kline
+                self.contadores['fusionadas'] += 1
+                return
+
+            if self.profundidad >= self.capacidad:
+                self._descartar()
+            cola.append(kline)
+            self.profundidad += 1
+            self.contadores['profundidad_max'] = max(self.contadores['profundidad_max'], self.profundidad)
+            self.condicion.notify()
+
+    def encolar_tarea(self, symbol, tarea, espera=None):
+        """
+        Trabajo que debe ir en orden con las klines del par (ej. relleno REST tras una reconexión):
+        lo ejecuta el trabajador antes de las klines que lleguen después. No se fusiona ni se descarta.
+        Con 'espera' (Future), al llegar a la tarea el par se retiene hasta que el Future se resuelva;
+        así la descarga corre fuera de este hilo y aquí solo se aplica.
+        """
+        with self.condicion:
+            cola = self.pendientes.get(symbol)
+            if cola is None:
+                cola = self.pendientes[symbol] = deque()
+                self.turnos.append(symbol)
+            cola.append({'t': None, 'x': True, 'tarea': tarea, 'espera': espera})
+            self.profundidad += 1
+            self.condicion.notify()
+
+    def _retener(self, symbol, resto, espera):
+        """Devuelve 'resto' (delante de lo llegado mientras tanto) y aparca el par hasta que 'espera' acabe."""
+        with self.condicion:
+            nuevas = self.pendientes.pop(symbol, None)
+            if nuevas is not None:
+                self.turnos.remove(symbol)
+                resto.extend(nuevas)
+                self.profundidad -= len(nuevas)
+            self.pendientes[symbol] = resto
+            self.profundidad += len(resto)
+            self.retenidos.add(symbol)
+        espera.add_done_callback(lambda _: self._liberar(symbol))
+
+    def _liberar(self, symbol):
+        with self.condicion:
+            self.retenidos.discard(symbol)
+            if symbol in self.pendientes and symbol not in self.turnos:
+                self.turnos.append(symbol)
+                self.condicion.notify()
+
+    def _descartar(self):
+        """Cola llena: fuera la actualización abierta más vieja (si todas son cierres, la más vieja)."""
+        victima = next((s for s in self.turnos if not self.pendientes[s][0]['x']), None) or \
+            next((s for s in self.turnos if 'tarea' not in self.pendientes[s][0]), None)
+        if victima is None:
+            return # Solo quedan tareas: nunca se descartan
+        cola = self.pendientes[victima]
+        cola.popleft()
+        self.profundidad -= 1
+        self.contadores['descartadas'] += 1
+        if not cola:
+            del self.pendientes[victima]
+            self.turnos.remove(victima)
+
+    def _trabajar(self):
+        """Consumidor: toma todo lo pendiente de un par y lo aplica fuera del candado."""
+        while True:
+            with self.condicion:
+                while self.activo and not self.turnos:
+                    self.condicion.wait()
+                if not self.turnos:
+                    return # Detenida y vacía
+                symbol = self.turnos.popleft()
+                lote = self.pendientes.pop(symbol)
+                self.profundidad -= len(lote)
+
+            while lote:
+                kline = lote[0]
+                espera = kline.get('espera')
+                if espera is not None and not espera.done():
+                    self._retener(symbol, lote, espera) # Lo que queda, incluida esta tarea, vuelve al par
+                    break
+                lote.popleft()
+                try:
+                    if 'tarea' in kline:
+                        kline['tarea']()
+                        continue
+                    espera = self.aplicar(symbol, kline)
+                    if isinstance(espera, Future): # Hueco: primero su relleno, luego esta misma kline
+                        lote.appendleft(kline)
+                        lote.appendleft({'t': None, 'x': True, 'tarea': lambda f=espera: f.result()(), 'espera': espera})
+                        continue
+                    self.contadores['procesadas'] += 1
+                except Exception as e:
+                    self.contadores['errores'] += 1
+                    log.warning("⚠️ Cola de velas: error aplicando kline/tarea de %s: %s", symbol, e)
+            with self.condicion:
+                self.vaciada.notify_all()
+
+    def esperar_vacia(self, timeout=1.0):
+        """Para tests y apagado ordenado: True si la cola se vació (sin pares retenidos) antes de 'timeout'."""
+        with self.condicion:
+            return self.vaciada.wait_for(
+                lambda: not self.turnos and not self.retenidos
+                and self.contadores['procesadas'] + self.contadores['errores'] + self.contadores['fusionadas']
+                + self.contadores['descartadas'] >= self.contadores['encoladas'],
+                timeout)
+
+    def estado(self):
+        """Profundidad y contadores: si 'profundidad' o 'descartadas' crecen, la ingesta va por detrás."""
+        with self.condicion:
+            return dict(self.contadores, profundidad=self.profundidad, capacidad=self.capacidad)
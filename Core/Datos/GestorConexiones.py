@@ -0,0 +1,177 @@
+import asyncio
+import queue
+import threading
+import time
+from Core.Utils.Config import Config
+from Core.Utils.GestorLogs import GestorLogs
+
+log = GestorLogs.obtener("conexiones")
+
+class GestorConexiones:
+    """
+    Reparte los streams de mercado en varias conexiones multiplexadas (shards).
+    - Cada conexión lleva como máximo Config.STREAMS_POR_CONEXION streams; los de un par van juntos.
+    - Una caída solo ciega a los pares de su conexión. python-binance reconecta solo (la URL
+      lleva los streams, así que la re-suscripción es automática); si se rinde (sin conexión tras
+      sus reintentos, cola desbordada) la conexión se rehace entera desde el hilo vigilante.
+    - Solo se usan métodos públicos del ThreadedWebsocketManager (stop_socket,
+      start_futures_multiplex_socket), llamados dentro de su propio event loop
+      (asyncio.run_coroutine_threadsafe); el loop se toma del primer callback recibido.
+    - Al volver los datos se llama a al_reconectar(pares) ANTES de entregar el primer mensaje,
+      para rellenar por REST las velas perdidas.
+    """
+    # Errores tras los que python-binance ya no reintenta: hay que abrir la conexión de nuevo
+    ERRORES_FATALES = {"BinanceWebsocketUnableToConnect", "BinanceWebsocketQueueOverflow", "ReadLoopClosed"}
+
+    def __init__(self, twm, callback, al_reconectar=None, streams_por_conexion=None):
+        self.twm = twm
+        self.callback = callback           # GestorMercado.procesar_msg
+        self.al_reconectar = al_reconectar # al_reconectar(pares) -> relleno de velas
+        self.streams_por_conexion = streams_por_conexion or Config.STREAMS_POR_CONEXION
+        self.conexiones = []
+        self.reabrir = queue.Queue()       # Conexiones a rehacer (las atiende el hilo vigilante)
+        self.loop = None                   # Event loop del TWM (los callbacks corren en él)
+        self.activo = False
+        self.hilo = None
+
+    @staticmethod
+    def repartir(streams_por_par, maximo):
+        """[[streams de la conexión 1], ...] sin separar los streams de un mismo par."""
+        grupos, actual = [], []
+        for streams in streams_por_par.values():
+            if actual and len(actual) + len(streams) > maximo:
+                grupos.append(actual)
+                actual = []
+            actual.extend(streams)
+        if actual:
+            grupos.append(actual)
+        return grupos
+
+    def iniciar(self, streams_por_par):
+        """Abre una conexión por grupo de streams. Llamar desde el hilo que creó el TWM."""
+        self.activo = True
+        self.agregar(streams_por_par)
+        self.hilo = threading.Thread(target=self._vigilar, name="ws-conexiones", daemon=True)
+        self.hilo.start()
+        total = sum(len(c['streams']) for c in self.conexiones)
+        print(f"🔗 {total} streams repartidos en {len(self.conexiones)} conexión(es) "
+              f"(máx {self.streams_por_conexion} por conexión).")
+
+    def agregar(self, streams_por_par):
+        """Conexiones nuevas para más pares (ej. los que promueve el scanner), sin tocar las abiertas."""
+        for streams in self.repartir(streams_por_par, self.streams_por_conexion):
+            conexion = {
+                'id': len(self.conexiones),
+                'streams': streams,
+                'pares': sorted({s.split('@', 1)[0].upper() for s in streams}),
+                'ruta': None,
+                'generacion': 0,  # Sube en cada reapertura: los mensajes del socket viejo se descartan
+                'estado': 'ok',   # ok | caida (python-binance reintenta) | rehacer (la abrimos nosotros)
+                'mensajes': 0,
+                'ultimo_mensaje': 0.0,
+                'reconexiones': 0,
+                'reaperturas': 0,
+            }
+            self.conexiones.append(conexion)
+            self._abrir(conexion)
+
+    def _abrir(self, conexion):
+        generacion = conexion['generacion']
+        conexion['ruta'] = self.twm.start_futures_multiplex_socket(
+            callback=lambda msg: self._recibir(conexion, msg, generacion), streams=conexion['streams']
+        )
+
+    def _recibir(self, conexion, msg, generacion=0):
+        """Callback de cada conexión (hilo del TWM): detecta caídas y vueltas, y reenvía los datos."""
+        if self.loop is None:
+            self.loop = asyncio.get_running_loop()
+        if generacion != conexion['generacion']:
+            return # Restos del socket viejo mientras se cierra
+        if msg.get('e') == 'error':
+            if conexion['estado'] == 'ok':
+                log.warning("⚠️ Conexión WS %s caída (%s): %d pares sin datos.", conexion['id'], msg.get('type'),
+                            len(conexion['pares']))
+            if msg.get('type') in self.ERRORES_FATALES and conexion['estado'] != 'rehacer':
+                conexion['estado'] = 'rehacer'
+                self.reabrir.put(conexion)
+            elif conexion['estado'] == 'ok':
+                conexion['estado'] = 'caida'
+            return
+
+        if conexion['estado'] == 'rehacer':
+            return # Restos del socket viejo: la conexión nueva aún no está abierta
+        if conexion['estado'] == 'caida':
+            conexion['estado'] = 'ok'
+            conexion['reconexiones'] += 1
+            log.info("🔄 Conexión WS %s recuperada. Rellenando velas de %d pares...", conexion['id'],
+                     len(conexion['pares']))
+            if self.al_reconectar:
+                self.al_reconectar(conexion['pares'])
+
+        conexion['mensajes'] += 1
+        conexion['ultimo_mensaje'] = time.time()
+        self.callback(msg)
+
+    def _vigilar(self):
+        """Rehace las conexiones que python-binance dio por perdidas."""
+        while self.activo:
+            conexion = self.reabrir.get()
+            if conexion is None:
+                return
+            time.sleep(1) # Pausa mínima para no martillear el servidor
+            if not self.activo:
+                return
+            log.info("🔌 Reabriendo conexión WS %s (%d streams)...", conexion['id'], len(conexion['streams']))
+            if self.loop is None:
+                self._reabrir(conexion) # Aún sin loop conocido (nunca llegó un mensaje): desde este hilo
+            else:
+                # python-binance ata cada socket al event loop donde se crea: se rehace dentro del del TWM
+                asyncio.run_coroutine_threadsafe(self._reabrir_en_loop(conexion), self.loop).result(10)
+
+    async def _reabrir_en_loop(self, conexion):
+        self._reabrir(conexion)
+
+    def _reabrir(self, conexion):
+        """
+        Cierra el socket viejo y abre el nuevo. El listener viejo borra su ruta al salir (hasta ~3s
+        después): la nueva lleva los streams rotados, así su ruta es otra y no se pisan.
+        """
+        self.twm.stop_socket(conexion['ruta'])
+        conexion['streams'] = conexion['streams'][1:] + conexion['streams'][:1]
+        conexion['generacion'] += 1
+        conexion['reaperturas'] += 1
+        conexion['estado'] = 'caida' # El primer mensaje de la nueva cuenta como vuelta (y rellena velas)
+        self._abrir(conexion)
+
+    def reabrir_par(self, par, mudos=()):
+        """
+        El supervisor vio el par mudo. Su conexión solo se rehace si también calla más de
+        Config.FRACCION_MUDOS_REABRIR de sus pares ('mudos'): un par quieto no ciega a los demás.
+        Una sola vez aunque caigan varios pares.
+        """
+        mudos = set(mudos) | {par}
+        for conexion in self.conexiones:
+            if par in conexion['pares'] and conexion['estado'] != 'rehacer':
+                callados = sum(1 for p in conexion['pares'] if p in mudos)
+                if callados <= len(conexion['pares']) * Config.FRACCION_MUDOS_REABRIR:
+                    continue
+                log.warning("🔌 Conexión WS %s: %d de %d pares mudos. Reabriendo...", conexion['id'], callados,
+                            len(conexion['pares']))
+                conexion['estado'] = 'rehacer'
+                self.reabrir.put(conexion)
+
+    def detener(self):
+        self.activo = False
+        self.reabrir.put(None)
+
+    def estado(self):
+        """Foto por conexión para reportes/supervisor."""
+        ahora = time.time()
+        return [
+            {
+                'id': c['id'], 'streams': len(c['streams']), 'pares': len(c['pares']), 'estado': c['estado'],
+                'mensajes': c['mensajes'], 'reconexiones': c['reconexiones'], 'reaperturas': c['reaperturas'],
+                'segundos_sin_datos': ahora - c['ultimo_mensaje'] if c['ultimo_mensaje'] else None,
+            }
+            for c in self.conexiones
+        ]
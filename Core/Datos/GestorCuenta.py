@@ -0,0 +1,252 @@
+import threading
+import time
+from Core.Utils.GestorLogs import GestorLogs
+
+log = GestorLogs.obtener("cuenta")
+
+class GestorCuenta:
+    """
+    Libro local de la cuenta (Posiciones, Órdenes Abiertas y Balance).
+    Se alimenta del User Data Stream de Futuros (ORDER_TRADE_UPDATE / ACCOUNT_UPDATE)
+    y se reconcilia por REST cada cierto tiempo como red de seguridad.
+    Los gestores leen de aquí en memoria en vez de consultar la API en cada ciclo.
+    """
+    def __init__(self, cliente_api):
+        self.api = cliente_api.rest
+        self.posiciones = {}       # {'BTCUSDT': {'positionAmt': 0.01, 'entryPrice': 95000.0, 'markPrice': ...}}
+        self.ordenes_abiertas = {} # {'BTCUSDT': {orderId: {...}}}
+        self.balance = {"balance": 0.0, "disponible": 0.0, "instante": 0.0}
+
+        self.lock = threading.RLock()
+        self.sincronizado = False
+        self.stream_activo = False
+        self.ultima_reconciliacion = 0
+        self.ultimo_evento = 0
+        self.intervalo_reconciliacion = 60
+        self._tocados = {}         # {'BTCUSDT': time.time() del último evento} (protege contra snapshots viejos)
+        self.oyentes = []          # oyente(o) por cada ORDER_TRADE_UPDATE ya aplicado (ej. GestorOrdenes)
+        self.oyentes_reconciliacion = [] # oyente(inicio) tras cada foto REST aplicada (ej. GestorRiesgo)
+        self._detener = threading.Event()
+        self._hilo = None
+
+    # ------------------------------------------------------------------
+    # Arranque
+    # ------------------------------------------------------------------
+    def iniciar_stream(self, twm):
+        """Abre el User Data Stream (python-binance gestiona el listenKey y su keepalive)."""
+        twm.start_futures_user_socket(callback=self.procesar_evento)
+        self.stream_activo = True
+        print("👤 User Data Stream de Futuros activo.")
+
+    def iniciar_reconciliacion(self, intervalo=60):
+        """Hilo de fondo que repasa el estado contra REST cada 'intervalo' segundos."""
+        self.intervalo_reconciliacion = intervalo
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._bucle_reconciliacion, daemon=True)
+        self._hilo.start()
+
+    def _bucle_reconciliacion(self):
+        while not self._detener.wait(self.intervalo_reconciliacion):
+            self.reconciliar()
+
+    def detener(self):
+        self._detener.set()
+        self.stream_activo = False
+
+    # ------------------------------------------------------------------
+    # Reconciliación REST (red de seguridad)
+    # ------------------------------------------------------------------
+    def reconciliar(self):
+        """Descarga la foto completa por REST y la aplica sobre el libro local."""
+        inicio = time.time()
+        try:
+            posiciones = self.api.futures_position_information()
+            ordenes = self.api.futures_get_open_orders()
+            balances = self.api.futures_account_balance()
+        except Exception as e:
+            log.warning("⚠️ Error reconciliando cuenta: %s", e)
+            return False
+
+        nuevas_posiciones = {}
+        for p in posiciones:
+            nuevas_posiciones[p['symbol']] = {
+                'positionAmt': float(p['positionAmt']),
+                'entryPrice': float(p['entryPrice']),
+                'markPrice': float(p.get('markPrice', 0.0)),
+            }
+
+        nuevas_ordenes = {}
+        for o in ordenes:
+            nuevas_ordenes.setdefault(o['symbol'], {})[o['orderId']] = self._normalizar_orden_rest(o)
+
+        with self.lock:
+            # Los pares que recibieron eventos mientras bajaba la foto conservan el dato del stream
+            simbolos = set(nuevas_posiciones) | set(nuevas_ordenes) | set(self.posiciones) | set(self.ordenes_abiertas)
+            for symbol in simbolos:
+                if self._tocados.get(symbol, 0) >= inicio:
+                    continue
+                if symbol in nuevas_posiciones:
+                    self.posiciones[symbol] = nuevas_posiciones[symbol]
+                else:
+                    self.posiciones.pop(symbol, None)
+                self.ordenes_abiertas[symbol] = nuevas_ordenes.get(symbol, {})
+
+            for asset in balances:
+                if asset['asset'] == 'USDT':
+                    self.balance = {
+                        "balance": float(asset['balance']),
+                        "disponible": float(asset['availableBalance']),
+                        "instante": inicio, # Las órdenes enviadas después no están descontadas
+                    }
+
+            self.ultima_reconciliacion = time.time()
+            self.sincronizado = True
+        for oyente in self.oyentes_reconciliacion:
+            oyente(inicio)
+        return True
+
+    def esta_sincronizado(self):
+        """El libro es fiable si hubo reconciliación reciente (3 intervalos de margen)."""
+        if not self.sincronizado:
+            return False
+        return time.time() - self.ultima_reconciliacion < 3 * self.intervalo_reconciliacion
+
+    # ------------------------------------------------------------------
+    # Eventos del User Data Stream
+    # ------------------------------------------------------------------
+    def procesar_evento(self, msg):
+        """Callback del socket. Acepta el evento crudo o envuelto en 'data'."""
+        payload = msg.get('data', msg) if isinstance(msg, dict) else None
+        if not payload:
+            return
+
+        evento = payload.get('e')
+        self.ultimo_evento = time.time()
+
+        if evento == 'ORDER_TRADE_UPDATE':
+            self._aplicar_orden(payload['o'])
+        elif evento == 'ACCOUNT_UPDATE':
+            self._aplicar_cuenta(payload['a'])
+        elif evento == 'listenKeyExpired':
+            # El stream dejó de ser fiable hasta la próxima foto REST
+            log.warning("⚠️ listenKey expirado. Forzando reconciliación...")
+            self.sincronizado = False
+            threading.Thread(target=self.reconciliar, daemon=True).start()
+        elif evento == 'error':
+            log.warning("⚠️ User Data Stream: %s", payload.get('m'))
+
+    def _aplicar_orden(self, o):
+        symbol = o['s']
+        order_id = o['i']
+        estado = o['X']
+        with self.lock:
+            self._tocados[symbol] = time.time()
+            libro = self.ordenes_abiertas.setdefault(symbol, {})
+            if estado in ('NEW', 'PARTIALLY_FILLED'):
+                libro[order_id] = {
+                    'orderId': order_id,
+                    'side': o['S'],
+                    'type': o['o'],
+                    'status': estado,
+                    'price': float(o['p']),
+                    'stopPrice': float(o.get('sp', 0.0)),
+                    'origQty': float(o['q']),
+                    'executedQty': float(o['z']),
+                    'reduceOnly': o.get('R', False) or o.get('cp', False), # Stops closePosition no son entradas
+                }
+            else:
+                # FILLED / CANCELED / EXPIRED / REJECTED: ya no está viva
+                libro.pop(order_id, None)
+        for oyente in self.oyentes:
+            oyente(o)
+
+    def _aplicar_cuenta(self, a):
+        with self.lock:
+            for b in a.get('B', []):
+                if b['a'] == 'USDT':
+                    # PnL realizado y comisiones mueven también el disponible
+                    nuevo = float(b['wb'])
+                    self.balance["disponible"] += nuevo - self.balance["balance"]
+                    self.balance["balance"] = nuevo
+            for p in a.get('P', []):
+                symbol = p['s']
+                self._tocados[symbol] = time.time()
+                anterior = self.posiciones.get(symbol, {})
+                self.posiciones[symbol] = {
+                    'positionAmt': float(p['pa']),
+                    'entryPrice': float(p['ep']),
+                    'markPrice': anterior.get('markPrice', 0.0), # El stream no trae markPrice
+                }
+
+    def _normalizar_orden_rest(self, o):
+        return {
+            'orderId': o['orderId'],
+            'side': o['side'],
+            'type': o['type'],
+            'status': o['status'],
+            'price': float(o['price']),
+            'stopPrice': float(o.get('stopPrice', 0.0)),
+            'origQty': float(o['origQty']),
+            'executedQty': float(o['executedQty']),
+            'reduceOnly': o.get('reduceOnly', False) or o.get('closePosition', False),
+        }
+
+    # ------------------------------------------------------------------
+    # Escrituras optimistas (respuesta REST antes de que llegue el evento)
+    # ------------------------------------------------------------------
+    def registrar_orden(self, orden):
+        """Anota la orden recién enviada para no duplicarla antes del ORDER_TRADE_UPDATE."""
+        if not orden or orden.get('status') not in ('NEW', 'PARTIALLY_FILLED'):
+            return
+        with self.lock:
+            symbol = orden['symbol']
+            self._tocados[symbol] = time.time()
+            self.ordenes_abiertas.setdefault(symbol, {})[orden['orderId']] = self._normalizar_orden_rest(orden)
+
+    def aplicar_cierre(self, symbol):
+        """Tras un cierre a mercado, damos la posición por cerrada hasta que el stream confirme."""
+        with self.lock:
+            self._tocados[symbol] = time.time()
+            if symbol in self.posiciones:
+                self.posiciones[symbol]['positionAmt'] = 0.0
+
+    # ------------------------------------------------------------------
+    # Lecturas (en memoria, sin red)
+    # ------------------------------------------------------------------
+    def obtener_posicion(self, symbol):
+        with self.lock:
+            return self.posiciones.get(symbol, {}).get('positionAmt', 0.0)
+
+    def obtener_detalle_posicion(self, symbol):
+        """Mismo formato que GestorPosicion._obtener_posicion_real (None si no hay posición)."""
+        with self.lock:
+            p = self.posiciones.get(symbol)
+            if not p or p['positionAmt'] == 0:
+                return None
+            return dict(p)
+
+    def tiene_ordenes_abiertas(self, symbol):
+        with self.lock:
+            return len(self.ordenes_abiertas.get(symbol, {})) > 0
+
+    def contar_posiciones_abiertas(self):
+        with self.lock:
+            return sum(1 for p in self.posiciones.values() if p['positionAmt'] != 0)
+
+    def contar_pares_ocupados(self):
+        """Pares con posición abierta o con una orden de ENTRADA esperando llenarse."""
+        with self.lock:
+            ocupados = {s for s, p in self.posiciones.items() if p['positionAmt'] != 0}
+            for symbol, ordenes in self.ordenes_abiertas.items():
+                if any(not o['reduceOnly'] for o in ordenes.values()):
+                    ocupados.add(symbol)
+            return len(ocupados)
+
+    def obtener_balance(self):
+        with self.lock:
+            return self.balance["balance"], self.balance["disponible"]
+
+    def obtener_foto_balance(self):
+        """Copia coherente de balance/disponible y del instante de la foto REST en que se basan."""
+        with self.lock:
+            return dict(self.balance)
@@ -0,0 +1,103 @@
+import os
+import threading
+import numpy as np
+
+RUTA_VELAS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'Data', 'velas')
+
+class GestorHistorico:
+    """
+    Almacén de Velas en Disco.
+    Un archivo binario por par/temporalidad (Data/velas/BTCUSDT_5m.bin) con registros
+    de tamaño fijo, solo-anexar. Se lee con memmap (sin cargar el archivo entero) y
+    permite guardar mucho más que las 1000 velas que viven en RAM.
+    Solo se guardan velas CERRADAS.
+    """
+    DTYPE = np.dtype([
+        ("timestamp", "<i8"), ("open", "<f8"), ("high", "<f8"),
+        ("low", "<f8"), ("close", "<f8"), ("volume", "<f8"),
+    ])
+
+    def __init__(self, carpeta=RUTA_VELAS):
+        self.carpeta = carpeta
+        self.ultimos = {}  # {('BTCUSDT', '5m'): timestamp de la última vela guardada}
+        self.lock = threading.Lock()
+        os.makedirs(self.carpeta, exist_ok=True)
+
+    def _ruta(self, symbol, timeframe):
+        return os.path.join(self.carpeta, f"{symbol}_{timeframe}.bin")
+
+    def _abrir(self, symbol, timeframe):
+        """memmap de solo lectura sobre los registros completos (ignora una escritura a medias)."""
+        ruta = self._ruta(symbol, timeframe)
+        if not os.path.exists(ruta):
+            return None
+        registros = os.path.getsize(ruta) // self.DTYPE.itemsize
+        if registros == 0:
+            return None
+        return np.memmap(ruta, dtype=self.DTYPE, mode='r', shape=(registros,))
+
+    def cargar(self, symbol, timeframe, n=None):
+        """Devuelve (copia) las últimas 'n' velas guardadas como array estructurado."""
+        mm = self._abrir(symbol, timeframe)
+        if mm is None:
+            return np.empty(0, dtype=self.DTYPE)
+        datos = np.array(mm[-n:] if n else mm)
+        del mm
+        if len(datos):
+            self.ultimos[(symbol, timeframe)] = int(datos['timestamp'][-1])
+        return datos
+
+    def ultimo_timestamp(self, symbol, timeframe):
+        clave = (symbol, timeframe)
+        if clave not in self.ultimos:
+            mm = self._abrir(symbol, timeframe)
+            self.ultimos[clave] = int(mm['timestamp'][-1]) if mm is not None else None
+            del mm
+        return self.ultimos[clave]
+
+    def agregar(self, symbol, timeframe, registros):
+        """
+        Anexa velas cerradas. Ignora las que no sean posteriores a la última guardada
+        (mensajes x=True repetidos o solapes con el snapshot REST).
+        """
+        registros = np.asarray(registros, dtype=self.DTYPE)
+        with self.lock:
+            ultimo = self.ultimo_timestamp(symbol, timeframe)
+            if ultimo is not None:
+                registros = registros[registros['timestamp'] > ultimo]
+            if len(registros) == 0:
+                return 0
+            ruta = self._ruta(symbol, timeframe)
+            # Si una escritura anterior quedó a medias, la recortamos antes de anexar
+            if os.path.exists(ruta):
+                sobrante = os.path.getsize(ruta) % self.DTYPE.itemsize
+                if sobrante:
+                    with open(ruta, 'r+b') as f:
+                        f.truncate(os.path.getsize(ruta) - sobrante)
+            with open(ruta, 'ab') as f:
+                registros.tofile(f)
+            self.ultimos[(symbol, timeframe)] = int(registros['timestamp'][-1])
+            return len(registros)
+
+    def reescribir(self, symbol, timeframe, registros):
+        """
+        Sustituye el archivo completo (ordenado y sin duplicados). Se usa al descargar
+        historia antigua, que no se puede anexar al final.
+        """
+        registros = np.asarray(registros, dtype=self.DTYPE)
+        _, unicos = np.unique(registros['timestamp'], return_index=True)
+        registros = registros[unicos]
+        with self.lock:
+            ruta = self._ruta(symbol, timeframe)
+            temporal = ruta + '.tmp'
+            registros.tofile(temporal)
+            os.replace(temporal, ruta)
+            self.ultimos[(symbol, timeframe)] = int(registros['timestamp'][-1]) if len(registros) else None
+        return len(registros)
+
+    @staticmethod
+    def buscar_huecos(timestamps, intervalo_ms):
+        """Índices i donde timestamps[i+1] - timestamps[i] != intervalo (huecos o solapes)."""
+        if len(timestamps) < 2:
+            return np.empty(0, dtype=np.int64)
+        return np.flatnonzero(np.diff(timestamps) != intervalo_ms)
@@ -0,0 +1,192 @@
+from collections import deque
+
+
+class EstadoRSI:
+    """
+    RSI incremental (misma fórmula que GestorAnalisis.calcular_rsi: medias simples).
+    Guarda las últimas 'periodo' variaciones de velas CERRADAS y sus sumas.
+    La vela abierta nunca toca el estado: su valor es 'provisional'.
+    """
+    def __init__(self, periodo):
+        self.periodo = periodo
+        self.deltas = deque(maxlen=periodo)
+        self.suma_ganancias = 0.0
+        self.suma_perdidas = 0.0
+        self.ultimo_cierre = None
+        self.commits = 0
+
+    def confirmar(self, cierre):
+        """Incorpora una vela cerrada al estado. O(1)."""
+        if self.ultimo_cierre is not None:
+            if len(self.deltas) == self.periodo:
+                viejo = self.deltas[0]
+                if viejo > 0:
+                    self.suma_ganancias -= viejo
+                else:
+                    self.suma_perdidas += viejo
+            delta = cierre - self.ultimo_cierre
+            self.deltas.append(delta)
+            if delta > 0:
+                self.suma_ganancias += delta
+            else:
+                self.suma_perdidas -= delta
+
+            # Re-sincronizamos las sumas de vez en cuando para no acumular error de coma flotante
+            self.commits += 1
+            if self.commits % 500 == 0:
+                self.suma_ganancias = sum(d for d in self.deltas if d > 0)
+                self.suma_perdidas = -sum(d for d in self.deltas if d < 0)
+        self.ultimo_cierre = cierre
+
+    def valor(self, cierre_abierto=None):
+        """
+        RSI actual. Si se pasa el cierre de la vela abierta, la ventana se desplaza
+        una posición (sale la variación más vieja, entra la de la vela en curso) sin mutar nada.
+        """
+        ganancias = self.suma_ganancias
+        perdidas = self.suma_perdidas
+        n = len(self.deltas)
+
+        if cierre_abierto is not None and self.ultimo_cierre is not None:
+            if n == self.periodo:
+                viejo = self.deltas[0]
+                if viejo > 0:
+                    ganancias -= viejo
+                else:
+                    perdidas += viejo
+            else:
+                n += 1
+            delta = cierre_abierto - self.ultimo_cierre
+            if delta > 0:
+                ganancias += delta
+            else:
+                perdidas -= delta
+
+        if n < self.periodo:
+            return None
+        if perdidas <= 0:
+            # Sin pérdidas en la ventana: RSI máximo (o indefinido si tampoco hay ganancias)
+            return 100.0 if ganancias > 0 else None
+
+        rs = ganancias / perdidas
+        return 100 - (100 / (1 + rs))
+
+
+class EstadoEMA:
+    """
+    EMA incremental (equivalente a pandas ewm(span=periodo, adjust=False)).
+    """
+    def __init__(self, periodo):
+        self.periodo = periodo
+        self.alpha = 2 / (periodo + 1)
+        self.ema = None
+        self.muestras = 0
+
+    def confirmar(self, cierre):
+        if self.ema is None:
+            self.ema = cierre
+        else:
+            self.ema += self.alpha * (cierre - self.ema)
+        self.muestras += 1
+
+    def valor(self, cierre_abierto=None):
+        if cierre_abierto is None:
+            if self.muestras < self.periodo:
+                return None
+            return self.ema
+        if self.muestras + 1 < self.periodo:
+            return None
+        if self.ema is None:
+            return cierre_abierto
+        return self.ema + self.alpha * (cierre_abierto - self.ema)
+
+
+class GestorIndicadores:
+    """
+    Motor de Indicadores en Streaming.
+    Mantiene el estado de RSI/EMA por par y lo actualiza en O(1) con cada kline del socket.
+    - Vela abierta: valor 'provisional' (no altera el estado).
+    - Vela cerrada (x=True): valor 'confirmado' (se incorpora al estado).
+    Sustituye el recálculo completo de 1000 velas en cada ciclo de la estrategia.
+    """
+    def __init__(self):
+        self.configuracion = {}   # {'BTCUSDT': {'rsi': 14, 'ema': 50}}
+        self.estados = {}         # {'BTCUSDT': {'rsi': EstadoRSI, 'ema': EstadoEMA}}
+        self.vela_abierta = {}    # {'BTCUSDT': (timestamp, close)}
+        self.ultimo_confirmado = {}  # {'BTCUSDT': timestamp de la última vela cerrada}
+        self.valores = {}         # {'BTCUSDT': {'rsi': 45.2, 'ema': 101.3}}
+
+    def registrar_par(self, symbol, rsi_periodo=14, ema_periodo=None):
+        """Declara qué indicadores queremos para el par (se llama antes de sembrar)."""
+        self.configuracion[symbol] = {"rsi": rsi_periodo, "ema": ema_periodo}
+
+    def sembrar(self, symbol, timestamps, closes):
+        """
+        Inicializa el estado con el historial descargado (una sola pasada O(n)).
+        La última vela del snapshot REST es la vela en curso: se trata como provisional.
+        """
+        config = self.configuracion.get(symbol)
+        if config is None:
+            return
+
+        estados = {}
+        if config.get("rsi"):
+            estados["rsi"] = EstadoRSI(config["rsi"])
+        if config.get("ema"):
+            estados["ema"] = EstadoEMA(config["ema"])
+        self.estados[symbol] = estados
+        self.vela_abierta.pop(symbol, None)
+        self.ultimo_confirmado.pop(symbol, None)
+        self.valores[symbol] = {}
+
+        if len(closes) == 0:
+            return
+
+        for cierre in closes[:-1]:
+            for estado in estados.values():
+                estado.confirmar(float(cierre))
+        if len(timestamps) > 1:
+            self.ultimo_confirmado[symbol] = int(timestamps[-2])
+
+        self.actualizar(symbol, int(timestamps[-1]), float(closes[-1]), False)
+
+    def actualizar(self, symbol, timestamp, cierre, cerrada):
+        """
+        Punto de entrada desde GestorVelas en cada mensaje kline. O(1).
+        """
+        estados = self.estados.get(symbol)
+        if estados is None:
+            return
+
+        if timestamp <= self.ultimo_confirmado.get(symbol, -1):
+            return  # Vela ya confirmada (mensaje duplicado o atrasado)
+
+        abierta = self.vela_abierta.get(symbol)
+
+        # Si llega una vela nueva sin haber visto el x=True de la anterior, confirmamos la anterior
+        if abierta is not None and timestamp > abierta[0]:
+            for estado in estados.values():
+                estado.confirmar(abierta[1])
+            self.ultimo_confirmado[symbol] = abierta[0]
+            abierta = None
+        elif abierta is not None and timestamp < abierta[0]:
+            return  # Mensaje atrasado, ya lo superamos
+
+        if cerrada:
+            for estado in estados.values():
+                estado.confirmar(cierre)
+            self.ultimo_confirmado[symbol] = timestamp
+            self.vela_abierta.pop(symbol, None)
+            self.valores[symbol] = {nombre: estado.valor() for nombre, estado in estados.items()}
+        else:
+            self.vela_abierta[symbol] = (timestamp, cierre)
+            self.valores[symbol] = {nombre: estado.valor(cierre) for nombre, estado in estados.items()}
+
+    def obtener_rsi(self, symbol):
+        return self.valores.get(symbol, {}).get("rsi")
+
+    def obtener_ema(self, symbol):
+        return self.valores.get(symbol, {}).get("ema")
+
+    def esta_listo(self, symbol):
+        return symbol in self.estados
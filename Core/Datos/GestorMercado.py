@@ -1,20 +1,55 @@
 from binance import ThreadedWebsocketManager
 from Core.Utils.Config import Config
+from Core.Datos.GestorColaVelas import GestorColaVelas
+from Core.Datos.GestorConexiones import GestorConexiones
+from Core.Utils.GestorLatencia import GestorLatencia
+import threading
 import time
 
 class GestorMercado:
     """
     Especialista en WebSockets.
     ARQUITECTURA HÍBRIDA:
-    1. Escucha @ticker para visualización en tiempo real y Watchdog.
+    1. Escucha un stream ligero de precio (Config.STREAM_PRECIO) para el precio y el Watchdog.
     2. Escucha @kline para alimentar el historial matemático.
-    Todo en una sola conexión multiplexada.
+    3. Con Config.GESTOR_ORDENES, @bookTicker para el mejor bid/ask (reprecio de Limits).
+    Los streams se reparten en conexiones multiplexadas de Config.STREAMS_POR_CONEXION (GestorConexiones).
     """
+    # Evento -> lector del precio: de cada mensaje solo se convierte el campo que usamos
+    LECTORES_PRECIO = {
+        '24hrTicker': lambda d: float(d['c']),
+        '24hrMiniTicker': lambda d: float(d['c']),
+        'markPriceUpdate': lambda d: float(d['p']),
+        'aggTrade': lambda d: float(d['p']),
+        'bookTicker': lambda d: (float(d['b']) + float(d['a'])) / 2, # Precio medio del libro
+    }
+
     def __init__(self):
         self.precios_actuales = {} 
         self.ultimas_actualizaciones = {} 
+        self.ultima_actividad = {} # {'BTCUSDT': time.time()} del último mensaje de cualquier stream del par (supervisor)
+        self.libros = {} # {'BTCUSDT': (mejor bid, mejor ask)} del @bookTicker (reprecio de órdenes)
+        self.timeframes = {} # {'BTCUSDT': '5m'} timeframe de la estrategia (para saber qué minuto cierra vela)
         self.stream_activo = False
         self.callback_kline = None # Canal de comunicación con GestorVelas
+        self.cola = None # GestorColaVelas: saca el procesamiento de velas del hilo del socket
+        self.conexiones = None # GestorConexiones: shards de streams con reconexión independiente
+        self.callback_rellenar = None # GestorVelas.preparar_relleno (velas perdidas en una caída): Future del paso de aplicación
+        self.pares_en_recuperacion = set() # GestorSupervisor: pares mudos o con velas aún sin rellenar
+
+        # Métricas de ingesta por stream: {'btcusdt@kline_5m': [mensajes, seg_decodificando, seg_en_callback]}
+        self.metricas = {}
+        self.inicio_metricas = time.monotonic()
+        self.trazas = GestorLatencia.compartido() # Latencia por par y etapa (red, recepción, cola, velas)
+
+        # Banderas de cambio por par (Event-Driven): {'BTCUSDT': urgente}
+        self.pares_sucios = {}
+        self.ultima_evaluacion = {}
+        self.condicion = threading.Condition()
+
+        if Config.USAR_SIMULADOR:
+            from Core.API.BinanceBase import BinanceBase
+            BinanceBase.apuntar_a_simulador()
         
         self.twm = ThreadedWebsocketManager(
             api_key=Config.BINANCE_API_KEY, 
@@ -23,17 +58,38 @@ class GestorMercado:
         )
         self.twm.start()
 
-    def iniciar_flujo_hibrido(self, estrategias_dict, callback_kline):
+    def iniciar_flujo_hibrido(self, estrategias_dict, callback_kline, callback_rellenar=None):
         """
         Genera DOS suscripciones por cada par:
-        1. par@ticker (Para precio rápido)
-        2. par@kline_T (Para indicadores)
+        1. par@<Config.STREAM_PRECIO> (Para precio rápido)
+        2. par@kline_T (Para indicadores). Con Config.AGREGAR_DESDE_1M siempre kline_1m:
+           GestorVelas deriva de ahí el timeframe de la estrategia.
+        3. par@bookTicker con Config.GESTOR_ORDENES (si no es ya el stream de precio).
         """
         self.callback_kline = callback_kline
-        streams = []
-        
+        self.callback_rellenar = callback_rellenar
+        if Config.COLA_VELAS and self.cola is None:
+            self.cola = GestorColaVelas(self._aplicar_kline)
+            self.cola.iniciar()
         print("📡 Configurando WebSockets Híbridos (Precio + Velas)...")
-        
+        streams = self._preparar_streams(estrategias_dict)
+            
+        print(f"🔗 Suscribiendo a {sum(map(len, streams.values()))} canales simultáneos...")
+
+        # Iniciamos los Multiplex Sockets (Futures, repartidos) o uno solo de Spot
+        if Config.BINANCE_API_KEY:
+            self.conexiones = GestorConexiones(self.twm, self.procesar_msg, self._al_reconectar)
+            self.conexiones.iniciar(streams)
+        else:
+            print("⚠️ Sin claves: Usando Spot para simulación")
+            self.twm.start_multiplex_socket(callback=self.procesar_msg,
+                                            streams=[s for lista in streams.values() for s in lista])
+            
+        self.stream_activo = True
+
+    def _preparar_streams(self, estrategias_dict):
+        """{'BTCUSDT': [precio, velas]} de los pares activos, con su estado inicializado."""
+        streams = {}
         for par, config in estrategias_dict.items():
             if not config.get("activo", False):
                 continue
@@ -44,23 +100,28 @@ class GestorMercado:
             
             par_lower = par.lower()
             tf = config['timeframe']
+            self.timeframes[par] = tf
             
-            # 1. Stream de Precio (Rápido, independiente)
-            streams.append(f"{par_lower}@ticker")
-            
-            # 2. Stream de Velas (Para cálculos)
-            streams.append(f"{par_lower}@kline_{tf}")
-            
-        print(f"🔗 Suscribiendo a {len(streams)} canales simultáneos...")
+            streams[par] = [
+                f"{par_lower}@{Config.STREAM_PRECIO}", # 1. Stream de Precio (Rápido, independiente)
+                f"{par_lower}@kline_{'1m' if Config.AGREGAR_DESDE_1M else tf}", # 2. Stream de Velas (Para cálculos)
+            ]
+            if Config.GESTOR_ORDENES and Config.STREAM_PRECIO != "bookTicker":
+                streams[par].append(f"{par_lower}@bookTicker") # 3. Mejor bid/ask para reprecios
+        return streams
 
-        # Iniciamos el Multiplex Socket (Futures o Spot)
-        if Config.BINANCE_API_KEY:
-            self.twm.start_futures_multiplex_socket(callback=self.procesar_msg, streams=streams)
+    def agregar_pares(self, estrategias_dict):
+        """Suscribe pares nuevos con el flujo ya en marcha (scanner). Los ya suscritos se ignoran."""
+        nuevos = {par: config for par, config in estrategias_dict.items() if par not in self.timeframes}
+        streams = self._preparar_streams(nuevos)
+        if not streams:
+            return
+        if self.conexiones:
+            self.conexiones.agregar(streams)
         else:
-            print("⚠️ Sin claves: Usando Spot para simulación")
-            self.twm.start_multiplex_socket(callback=self.procesar_msg, streams=streams)
-            
-        self.stream_activo = True
+            self.twm.start_multiplex_socket(callback=self.procesar_msg,
+                                            streams=[s for lista in streams.values() for s in lista])
+        print(f"➕ Suscritos {len(streams)} pares nuevos: {', '.join(streams)}")
 
     def procesar_msg(self, msg):
         """
@@ -70,29 +131,195 @@ class GestorMercado:
         if 'data' not in msg:
             return
 
+        inicio = time.perf_counter()
         payload = msg['data']
         evento = payload.get('e') # Tipo de evento
         symbol = payload.get('s') # Símbolo (Ej: BTCUSDT)
+        self.ultima_actividad[symbol] = time.time() # Un par ilíquido sin operaciones sigue recibiendo velas / libro
+
+        # Mejor bid/ask (GestorOrdenes reprecia contra él). Solo es precio si STREAM_PRECIO = "bookTicker":
+        # si no, es el stream más frecuente y no debe pisar el precio ni despertar al bucle de eventos
+        if evento == 'bookTicker':
+            self.libros[symbol] = (float(payload['b']), float(payload['a']))
+            if Config.STREAM_PRECIO != "bookTicker":
+                return
 
-        # CASO A: Actualización de Precio (Ticker)
-        # El evento suele llamarse '24hrTicker' en Spot o Futures
-        if evento == '24hrTicker':
+        lector = self.LECTORES_PRECIO.get(evento)
+        trazas = self.trazas.activo and symbol is not None
+        if trazas:
+            self.trazas.llegada(symbol, payload.get('E'), inicio)
+
+        # CASO A: Actualización de Precio (ticker / miniTicker / markPrice / bookTicker / aggTrade)
+        if lector is not None:
+            precio = lector(payload)
+            decodificado = time.perf_counter()
             # Actualizamos SOLO el precio visual y el Watchdog
-            self.precios_actuales[symbol] = float(payload['c'])
+            self.precios_actuales[symbol] = precio
             self.ultimas_actualizaciones[symbol] = time.time()
+            if not Config.SOLO_CIERRE_VELA:
+                self._notificar_cambio(symbol)
 
         # CASO B: Actualización de Vela (Kline)
         elif evento == 'kline':
             kline_data = payload['k']
-            # Enviamos la data cruda al GestorVelas para que él haga su magia
-            if self.callback_kline:
-                self.callback_kline(symbol, kline_data)
+            decodificado = time.perf_counter()
+            # El hilo del socket solo encola; el trabajador de la cola aplica la vela
+            if self.cola:
+                if trazas:
+                    kline_data['_llegada'] = inicio # Para medir la espera en la cola
+                self.cola.encolar(symbol, kline_data)
+            else:
+                self._aplicar_kline(symbol, kline_data)
+        else:
+            return
+
+        medida = self.metricas.get(msg.get('stream'))
+        if medida is None:
+            medida = self.metricas[msg.get('stream')] = [0, 0.0, 0.0]
+        medida[0] += 1
+        medida[1] += decodificado - inicio
+        medida[2] += time.perf_counter() - decodificado
+        if trazas:
+            self.trazas.desde(symbol, 'recepcion', inicio)
+
+    def _aplicar_kline(self, symbol, kline_data):
+        """
+        Vela -> GestorVelas y aviso a la estrategia (ya con el dato aplicado). Si GestorVelas devuelve
+        un Future (hueco en el stream, relleno REST en curso) se devuelve tal cual a la cola, que
+        retiene el par y reintenta la kline después; no se avisa a la estrategia todavía.
+        """
+        encolada = kline_data.get('_llegada')
+        if encolada is not None:
+            self.trazas.desde(symbol, 'cola', encolada)
+        # Enviamos la data cruda al GestorVelas para que él haga su magia
+        if self.callback_kline:
+            inicio = time.perf_counter()
+            espera = self.callback_kline(symbol, kline_data)
+            self.trazas.desde(symbol, 'velas', inicio)
+            if espera is not None:
+                return espera
+        # El cierre de vela es urgente: salta el debounce
+        if kline_data['x'] and self._cierra_timeframe(symbol, kline_data):
+            self._notificar_cambio(symbol, urgente=True)
+        elif not Config.SOLO_CIERRE_VELA:
+            self._notificar_cambio(symbol)
+
+    def _al_reconectar(self, pares):
+        """
+        Vuelven los datos de una conexión: relleno REST de sus pares. Las descargas salen todas a la
+        vez (pool y presupuesto de peso del ClienteREST); con cola, la aplicación de cada una entra
+        delante de las klines nuevas de su par, así las velas perdidas se aplican en orden.
+        """
+        for par in pares:
+            if par not in self.pares_en_recuperacion: # De esos se ocupa el supervisor
+                self.programar_relleno(par)
+
+    def programar_relleno(self, par, al_terminar=None):
+        """
+        Relleno REST de las velas de 'par' y aviso al terminar. Con cola, el par queda retenido hasta
+        que llega su descarga (los demás siguen procesándose) y solo la aplicación ocupa al trabajador.
+        """
+        espera = self.callback_rellenar(par) if self.callback_rellenar else None
+        def rellenar():
+            try:
+                if espera is not None:
+                    espera.result()()
+            finally:
+                if al_terminar:
+                    al_terminar()
+        if self.cola:
+            self.cola.encolar_tarea(par, rellenar, espera=espera)
+        else:
+            threading.Thread(target=rellenar, daemon=True).start()
+
+    def estado_cola(self):
+        """Profundidad y contadores de la cola de velas (None si se procesa en el hilo del socket)."""
+        return self.cola.estado() if self.cola else None
+
+    def metricas_stream(self, reiniciar=False):
+        """
+        Rendimiento de ingesta por stream desde el último reinicio:
+        {'btcusdt@miniTicker': {'mensajes', 'msg_s', 'decodificacion_us', 'callback_us'}}.
+        Si el callback medio se acerca a 1/msg_s total, el hilo del socket se queda atrás
+        (con la cola de velas, el callback de kline solo mide el encolado: ver estado_cola()).
+        """
+        duracion = max(time.monotonic() - self.inicio_metricas, 1e-9)
+        resultado = {
+            stream: {
+                'mensajes': n,
+                'msg_s': n / duracion,
+                'decodificacion_us': decodificacion / n * 1e6,
+                'callback_us': callback / n * 1e6,
+            }
+            for stream, (n, decodificacion, callback) in list(self.metricas.items()) if n
+        }
+        if reiniciar:
+            self.metricas = {}
+            self.inicio_metricas = time.monotonic()
+        return resultado
+
+    def _cierra_timeframe(self, symbol, kline):
+        """Con velas de 1m, solo el minuto que termina el periodo de la estrategia es un cierre."""
+        if kline.get('i') != "1m" or not Config.AGREGAR_DESDE_1M:
+            return True
+        return (int(kline['T']) + 1) % Config.MS_TIMEFRAME.get(self.timeframes.get(symbol), 60_000) == 0
+
+    def _notificar_cambio(self, symbol, urgente=False):
+        """Marca el par como 'sucio' y despierta al bucle de estrategia."""
+        with self.condicion:
+            self.pares_sucios[symbol] = urgente or self.pares_sucios.get(symbol, False)
+            self.condicion.notify()
+
+    def esperar_cambios(self, timeout=5, debounce=1.0):
+        """
+        Bloquea hasta que algún par tenga datos nuevos (o venza el timeout).
+        Devuelve la lista de pares a evaluar. Un par con solo ticks de precio
+        no se re-evalúa antes de 'debounce' segundos; un cierre de vela pasa directo.
+        """
+        limite = time.monotonic() + timeout
+        with self.condicion:
+            while True:
+                ahora = time.monotonic()
+                listos = [
+                    par for par, urgente in self.pares_sucios.items()
+                    if urgente or ahora - self.ultima_evaluacion.get(par, float('-inf')) >= debounce
+                ]
+                if listos:
+                    for par in listos:
+                        del self.pares_sucios[par]
+                        self.ultima_evaluacion[par] = ahora
+                    return listos
+
+                restante = limite - ahora
+                if restante <= 0:
+                    return []
+
+                # Dormimos hasta que el primer par pendiente salga del debounce (o llegue otro evento)
+                espera = restante
+                for par in self.pares_sucios:
+                    espera = min(espera, debounce - (ahora - self.ultima_evaluacion.get(par, ahora)))
+                self.condicion.wait(max(espera, 0.001))
+
+    def esperar_primeros_datos(self, symbols, timeout=5):
+        """Espera (como máximo 'timeout') a que todos los pares tengan al menos un precio."""
+        limite = time.time() + timeout
+        while time.time() < limite:
+            if all(self.ultimas_actualizaciones.get(s, 0) > 0 for s in symbols):
+                return True
+            time.sleep(0.05)
+        return False
 
     def obtener_precio(self, symbol):
         return self.precios_actuales.get(symbol, 0.0)
 
+    def obtener_libro(self, symbol):
+        """(mejor bid, mejor ask) o None si aún no llegó el @bookTicker."""
+        return self.libros.get(symbol)
+
     def verificar_salud_datos(self, symbol, max_retraso=60):
-        """Revisa la antigüedad del dato del TICKER (no de la vela)"""
+        """Revisa la antigüedad del dato del TICKER (no de la vela) y que no esté en recuperación"""
+        if symbol in self.pares_en_recuperacion:
+            return False
         last_update = self.ultimas_actualizaciones.get(symbol, 0)
         if last_update == 0: 
             return False
@@ -102,6 +329,10 @@ class GestorMercado:
         return True
 
     def detener_todo(self):
+        if self.conexiones:
+            self.conexiones.detener()
         self.twm.stop()
+        if self.cola:
+            self.cola.detener()
         self.stream_activo = False
         print("🔕 WebSockets detenidos.")
\ No newline at end of file
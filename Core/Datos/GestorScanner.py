@@ -0,0 +1,142 @@
+import threading
+import numpy as np
+from Core.Utils.Config import Config
+from Core.Datos.GestorAnalisis import GestorAnalisis
+
+class GestorScanner:
+    """
+    Scanner de todo el universo USDT-M (modo Config.MODO_SCANNER).
+    - Dos streams para todos los símbolos: !miniTicker@arr (precio + volumen 24h) y
+      !markPrice@arr (funding). Nada de un stream por par.
+    - Almacén compacto: matriz float32 (pares x muestras) en anillo con un cierre cada
+      Config.SCANNER_MUESTREO segundos. Memoria fija: 512 x 64 x 4 bytes = 128 KB.
+    - ranking(): RSI de todos los pares en una pasada matricial (GestorAnalisis.calcular_rsi_lote)
+      ordenado por fuerza de señal (cuánto se pasa de sobreventa/sobrecompra).
+    """
+    STREAMS = ["!miniTicker@arr", "!markPrice@arr"]
+
+    def __init__(self, analista=None, max_pares=None, muestras=None, muestreo=None):
+        self.analista = analista or GestorAnalisis()
+        self.max_pares = max_pares or Config.SCANNER_MAX_PARES
+        self.muestras = muestras or Config.SCANNER_MUESTRAS
+        self.ms_muestra = int((muestreo or Config.SCANNER_MUESTREO) * 1000)
+        self.indice = {}   # {'BTCUSDT': fila}
+        self.simbolos = [] # fila -> símbolo
+        self.cierres = np.full((self.max_pares, self.muestras), np.nan, dtype=np.float32)
+        self.ultimo = np.full(self.max_pares, np.nan, dtype=np.float32)   # Precio vivo (muestra en curso)
+        self.volumen = np.zeros(self.max_pares, dtype=np.float32)         # Volumen 24h en USDT (campo q)
+        self.funding = np.zeros(self.max_pares, dtype=np.float32)
+        self.columna = 0        # Próxima columna a escribir del anillo
+        self.tomadas = 0        # Muestras cerradas desde el arranque
+        self.periodo = None     # Periodo de muestreo en curso (E // ms_muestra)
+        self.mensajes = 0
+        self.ignorados = 0      # Símbolos sin fila libre
+        self.lock = threading.Lock()
+        self.twm = None
+        self.ruta = None
+
+    def iniciar(self, twm):
+        """Una sola conexión para los dos streams de array. Llamar desde el hilo que creó el TWM."""
+        self.twm = twm
+        self.ruta = twm.start_futures_multiplex_socket(callback=self.procesar_msg, streams=self.STREAMS)
+        print(f"🛰️ Scanner de mercado: hasta {self.max_pares} pares x {self.muestras} muestras de "
+              f"{self.ms_muestra // 1000}s ({self.cierres.nbytes // 1024} KB).")
+
+    def detener(self):
+        if self.twm and self.ruta:
+            self.twm.stop_socket(self.ruta)
+            self.ruta = None
+
+    def _fila(self, symbol):
+        fila = self.indice.get(symbol)
+        if fila is None:
+            if len(self.simbolos) >= self.max_pares:
+                self.ignorados += 1
+                return None
+            fila = self.indice[symbol] = len(self.simbolos)
+            self.simbolos.append(symbol)
+        return fila
+
+    def procesar_msg(self, msg):
+        """Callback del socket: un array con los símbolos que cambiaron en el último segundo."""
+        datos = msg.get('data')
+        if not isinstance(datos, list) or not datos:
+            return
+        with self.lock:
+            self.mensajes += 1
+            periodo = datos[0]['E'] // self.ms_muestra
+            if self.periodo is None:
+                self.periodo = periodo
+            elif periodo > self.periodo:
+                # Lo recibido hasta ahora es el cierre del periodo anterior (si hubo silencio, una sola muestra)
+                self._cerrar_muestra()
+                self.periodo = periodo
+
+            for d in datos:
+                symbol = d['s']
+                if not symbol.endswith('USDT'):
+                    continue # Entregas trimestrales (BTCUSDT_250328) y pares no USDT
+                fila = self._fila(symbol)
+                if fila is None:
+                    continue
+                if d['e'] == '24hrMiniTicker':
+                    self.ultimo[fila] = float(d['c'])
+                    self.volumen[fila] = float(d['q'])
+                elif d['e'] == 'markPriceUpdate':
+                    self.funding[fila] = float(d['r'] or 0)
+
+    def _cerrar_muestra(self):
+        self.cierres[:, self.columna] = self.ultimo
+        self.columna = (self.columna + 1) % self.muestras
+        self.tomadas += 1
+
+    def ventana(self, n):
+        """Últimas n muestras cerradas de todos los pares seguidos, en orden cronológico (copia)."""
+        columnas = (self.columna - n + np.arange(n)) % self.muestras
+        return self.cierres[:len(self.simbolos), columnas]
+
+    def ranking(self, top=None, rsi_periodo=None, rsi_compra=None, rsi_venta=None):
+        """
+        [{'par', 'rsi', 'senal', 'fuerza', 'volumen', 'funding'}] de los pares líquidos con señal,
+        de más a menos fuerte. senal = 1 (sobreventa -> LONG) / -1 (sobrecompra -> SHORT).
+        Vacío hasta tener rsi_periodo + 1 muestras.
+        """
+        indicadores = Config.SCANNER_PLANTILLA["indicadores"]
+        periodo = rsi_periodo or indicadores["rsi_periodo"]
+        compra = indicadores["rsi_sobreventa"] if rsi_compra is None else rsi_compra
+        venta = indicadores["rsi_sobrecompra"] if rsi_venta is None else rsi_venta
+
+        with self.lock:
+            if self.tomadas < periodo + 1 or not self.simbolos:
+                return []
+            matriz = self.ventana(periodo + 1).astype(np.float64)
+            volumen = self.volumen[:len(self.simbolos)].copy()
+            funding = self.funding[:len(self.simbolos)].copy()
+            simbolos = list(self.simbolos)
+
+        rsi = self.analista.calcular_rsi_lote(matriz, periodo)
+        with np.errstate(invalid='ignore'):
+            fuerza = np.fmax(compra - rsi, rsi - venta)
+            candidatos = np.flatnonzero((fuerza > 0) & (volumen >= Config.SCANNER_VOLUMEN_MIN))
+        candidatos = candidatos[np.argsort(-fuerza[candidatos], kind='stable')][:top]
+        return [
+            {
+                'par': simbolos[i],
+                'rsi': float(rsi[i]),
+                'senal': 1 if rsi[i] < compra else -1,
+                'fuerza': float(fuerza[i]),
+                'volumen': float(volumen[i]),
+                'funding': float(funding[i]),
+            }
+            for i in candidatos
+        ]
+
+    def estado(self):
+        with self.lock:
+            return {
+                'pares': len(self.simbolos),
+                'muestras': min(self.tomadas, self.muestras),
+                'mensajes': self.mensajes,
+                'ignorados': self.ignorados,
+                'memoria_kb': (self.cierres.nbytes + self.ultimo.nbytes * 3) // 1024,
+            }
@@ -0,0 +1,106 @@
+import threading
+import time
+from collections import deque
+from Core.Utils.Config import Config
+from Core.Utils.GestorLogs import GestorLogs
+
+log = GestorLogs.obtener("supervisor")
+
+class GestorSupervisor:
+    """
+    Vigilante de la salud de los streams por par.
+    - Detecta el par que deja de recibir mensajes de cualquiera de sus streams (Config.MAX_SILENCIO_PAR):
+      un par ilíquido puede pasar mucho sin operaciones, pero sus velas y su libro siguen llegando.
+    - Lo marca en recuperación (la estrategia no opera con él). Su conexión multiplexada lleva hasta
+      200 streams: solo se reabre si calla la mayoría de sus pares (Config.FRACCION_MUDOS_REABRIR).
+    - Cuando vuelven los datos, rellena por REST las velas perdidas y solo entonces lo da por sano.
+    - metricas(): caídas, tiempos de recuperación y huecos reparados.
+    """
+    def __init__(self, mercado, velas, max_silencio=None, intervalo=None):
+        self.mercado = mercado
+        self.velas = velas
+        self.max_silencio = max_silencio or Config.MAX_SILENCIO_PAR
+        self.intervalo = intervalo or Config.INTERVALO_SUPERVISOR
+        self.pares = []
+        self.caidos = {}        # {'BTCUSDT': instante (time.time) en que se detectó la caída}
+        self.rellenando = set() # Pares con datos de vuelta y relleno REST en curso
+        self.caidas = 0
+        self.recuperaciones = 0
+        self.tiempos = deque(maxlen=100) # Segundos desde la detección hasta volver a operar
+        self.lock = threading.Lock()
+        self.activo = False
+        self.hilo = None
+
+    def iniciar(self, pares):
+        self.pares = list(pares)
+        self.activo = True
+        self.hilo = threading.Thread(target=self._bucle, name="supervisor", daemon=True)
+        self.hilo.start()
+        print(f"🩺 Supervisor de streams: silencio máximo {self.max_silencio}s por par.")
+
+    def detener(self):
+        self.activo = False
+
+    def _bucle(self):
+        while self.activo:
+            try:
+                self.revisar()
+            except Exception as e:
+                log.warning("⚠️ Supervisor: error en la revisión: %s", e)
+            time.sleep(self.intervalo)
+
+    def revisar(self, ahora=None):
+        """Una pasada: detecta pares mudos y lanza el relleno de los que ya volvieron."""
+        ahora = ahora or time.time()
+        for par in self.pares:
+            ultima = self.mercado.ultima_actividad.get(par, 0)
+            if not ultima:
+                continue # Aún no llegó el primer mensaje: de eso se ocupa el arranque
+
+            with self.lock:
+                caido = self.caidos.get(par)
+                if caido is None and ahora - ultima > self.max_silencio:
+                    self.caidos[par] = ahora
+                    self.caidas += 1
+                    mudos = set(self.caidos)
+                    nuevo = True
+                elif caido is not None and ultima > caido and par not in self.rellenando:
+                    self.rellenando.add(par)
+                    nuevo = False
+                else:
+                    continue
+
+            if nuevo:
+                log.warning("🚨 %s: %.0fs sin datos. Fuera de operación hasta que vuelvan.", par, ahora - ultima)
+                self.mercado.pares_en_recuperacion.add(par)
+                if self.mercado.conexiones:
+                    self.mercado.conexiones.reabrir_par(par, mudos)
+            else:
+                # Volvieron los datos: el relleno va por la cola de velas, delante de las klines nuevas
+                self.mercado.programar_relleno(par, al_terminar=lambda par=par: self._recuperado(par))
+
+    def _recuperado(self, par):
+        with self.lock:
+            inicio = self.caidos.pop(par, None)
+            self.rellenando.discard(par)
+            if inicio is None:
+                return
+            self.recuperaciones += 1
+            self.tiempos.append(time.time() - inicio)
+        self.mercado.pares_en_recuperacion.discard(par)
+        log.info("✅ %s: stream recuperado y velas rellenadas en %.1fs. De vuelta a operar.", par, self.tiempos[-1])
+
+    def metricas(self):
+        """Foto para reportes / Prometheus."""
+        with self.lock:
+            tiempos = list(self.tiempos)
+            return {
+                'caidas': self.caidas,
+                'recuperaciones': self.recuperaciones,
+                'en_recuperacion': sorted(self.caidos),
+                'recuperacion_ultima_s': tiempos[-1] if tiempos else None,
+                'recuperacion_max_s': max(tiempos) if tiempos else None,
+                'recuperacion_media_s': sum(tiempos) / len(tiempos) if tiempos else None,
+                'huecos_detectados': self.velas.huecos['detectados'],
+                'velas_rellenadas': self.velas.huecos['velas_rellenadas'],
+            }
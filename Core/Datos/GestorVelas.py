@@ -1,117 +1,530 @@
+import numpy as np
 import pandas as pd
 import time
+import threading
+from concurrent.futures import Future
+from Core.Utils.Config import Config
+from Core.Datos.GestorHistorico import GestorHistorico
+from Core.Utils.GestorLogs import GestorLogs
+
+log = GestorLogs.obtener("velas")
+
+class BufferVelas:
+    """
+    Ring Buffer de capacidad fija (Structure of Arrays).
+    Cada columna es un array NumPy contiguo de tamaño 2*capacidad: cada vela se escribe
+    dos veces (posición p y p+capacidad), así la ventana [inicio, inicio+n) SIEMPRE es
+    contigua y se puede entregar como vista sin copiar.
+    Memoria constante por par, cero asignaciones por tick.
+    """
+    COLUMNAS = ("timestamp", "open", "high", "low", "close", "volume", "cerrada")
+
+    def __init__(self, capacidad):
+        self.capacidad = capacidad
+        self.timestamp = np.zeros(2 * capacidad, dtype=np.int64)
+        self.open = np.zeros(2 * capacidad, dtype=np.float64)
+        self.high = np.zeros(2 * capacidad, dtype=np.float64)
+        self.low = np.zeros(2 * capacidad, dtype=np.float64)
+        self.close = np.zeros(2 * capacidad, dtype=np.float64)
+        self.volume = np.zeros(2 * capacidad, dtype=np.float64)
+        self.cerrada = np.zeros(2 * capacidad, dtype=np.bool_)
+        self.inicio = 0
+        self.n = 0
+        self.version = 0 # Cambia con cada escritura (invalida el DataFrame perezoso)
+
+    def __len__(self):
+        return self.n
+
+    def cargar(self, timestamps, opens, highs, lows, closes, volumes, cerradas=True):
+        """Carga masiva (snapshot inicial). Conserva solo las últimas 'capacidad' velas."""
+        cap = self.capacidad
+        n = min(len(timestamps), cap)
+        self.inicio = 0
+        self.n = n
+        for nombre, datos in zip(self.COLUMNAS, (timestamps, opens, highs, lows, closes, volumes)):
+            arr = getattr(self, nombre)
+            arr[:n] = datos[-n:] if n else []
+            arr[cap:cap + n] = arr[:n]
+        self.cerrada[:n] = cerradas
+        self.cerrada[cap:cap + n] = cerradas
+        self.version += 1
+
+    def _escribir(self, pos, t, o, h, l, c, v, x):
+        for p in (pos, pos + self.capacidad):
+            self.timestamp[p] = t
+            self.open[p] = o
+            self.high[p] = h
+            self.low[p] = l
+            self.close[p] = c
+            self.volume[p] = v
+            self.cerrada[p] = x
+        self.version += 1
+
+    def sobrescribir_ultima(self, t, o, h, l, c, v, x):
+        self._escribir((self.inicio + self.n - 1) % self.capacidad, t, o, h, l, c, v, x)
+
+    def agregar(self, t, o, h, l, c, v, x):
+        if self.n < self.capacidad:
+            self.n += 1
+        else:
+            # Lleno: la vela más vieja sale por la cabeza (sin mover memoria)
+            self.inicio = (self.inicio + 1) % self.capacidad
+        self._escribir((self.inicio + self.n - 1) % self.capacidad, t, o, h, l, c, v, x)
+
+    def ultimo_timestamp(self):
+        if self.n == 0:
+            return None
+        return int(self.timestamp[self.inicio + self.n - 1])
+
+    def vista(self, columna):
+        """Vista contigua de solo lectura (zero-copy) de la ventana actual."""
+        v = getattr(self, columna)[self.inicio:self.inicio + self.n]
+        v.flags.writeable = False
+        return v
+
+    def a_dataframe(self):
+        return pd.DataFrame({col: self.vista(col).copy() for col in self.COLUMNAS})
+
+    def nbytes(self):
+        return sum(getattr(self, col).nbytes for col in self.COLUMNAS)
+
 
 class GestorVelas:
     """
     Gestor de Memoria de Mercado (Sliding Window).
-    Mantiene siempre un Dataframe de exactamente 1000 velas.
+    Mantiene siempre un Ring Buffer NumPy de exactamente 1000 velas por par.
     Optimizado para no re-procesar todo el historial, solo actualiza la punta.
+    Con Config.AGREGAR_DESDE_1M escucha solo velas de 1m y construye en memoria
+    el timeframe de la estrategia y los extra (5m/15m/1h/4h), cada uno en su buffer.
     """
-    def __init__(self, cliente_api):
+    def __init__(self, cliente_api, indicadores=None, historico=None):
         self.api = cliente_api.client
-        self.historial = {} # Diccionario: {'BTCUSDT': DataFrame, ...}
+        self.rest = getattr(cliente_api, 'rest', None) # ClienteREST: rellenos en caliente con presupuesto de peso
+        self.historial = {} # Diccionario: {'BTCUSDT': BufferVelas, ...} (timeframe de la estrategia)
         self.max_velas = 1000 # TU REQUISITO: Estandarizar a 1000 velas
+        self.indicadores = indicadores # GestorIndicadores (opcional): se alimenta en cada kline
+        self.historico = historico # GestorHistorico (opcional): velas cerradas persistidas en disco
+        self.timeframes = {} # {'BTCUSDT': '5m'}
+        self._dataframes = {} # Cache perezoso: {'BTCUSDT': (version, DataFrame)}
+        self.agregados = {}   # Modo 1m: {'BTCUSDT': {'1m': BufferVelas, '5m': BufferVelas, '1h': ...}}
+        self._acumulados = {} # Modo 1m: {('BTCUSDT', '1h'): (inicio, hasta, o, h, l, v)} minutos cerrados [inicio, hasta)
+        self.lock = threading.RLock() # Escribe el hilo de la cola de velas, lee la estrategia
+        self.huecos = {'detectados': 0, 'velas_rellenadas': 0} # Saltos en el stream reparados por REST
+        self._huecos_intentados = {} # {'BTCUSDT': t} kline cuyo hueco ya se pidió por REST (no repetir si falla)
+        self.diferir_huecos = False  # Con cola de velas: un hueco devuelve el Future del relleno en vez de esperarlo
 
-    def inicializar_par(self, symbol, timeframe):
+    def _intervalo_api(self, timeframe):
+        # Mapeo de intervalos
+        interval_map = {
+            "1m": self.api.KLINE_INTERVAL_1MINUTE,
+            "5m": self.api.KLINE_INTERVAL_5MINUTE,
+            "15m": self.api.KLINE_INTERVAL_15MINUTE,
+            "1h": self.api.KLINE_INTERVAL_1HOUR,
+            "4h": self.api.KLINE_INTERVAL_4HOUR,
+        }
+        return interval_map.get(timeframe, "5m")
+
+    @staticmethod
+    def _a_registros(klines):
+        """Convierte la respuesta cruda de la API en un array estructurado (sin DataFrame)."""
+        crudo = np.array([k[:6] for k in klines], dtype=np.float64).reshape(-1, 6)
+        registros = np.empty(len(crudo), dtype=GestorHistorico.DTYPE)
+        registros['timestamp'] = crudo[:, 0].astype(np.int64)
+        for i, col in enumerate(("open", "high", "low", "close", "volume"), start=1):
+            registros[col] = crudo[:, i]
+        return registros
+
+    def descargar_rango(self, symbol, timeframe, desde_ms, hasta_ms=None, cliente=None):
         """
-        Descarga la foto inicial (Snapshot) de 1000 velas.
+        Descarga por REST solo las velas desde 'desde_ms' hasta ahora (incluida la vela en curso),
+        o hasta 'hasta_ms' (excluida) para tapar un hueco.
+        Usa el 'limit' justo para pagar el menor peso posible.
+        'cliente': por defecto python-binance (arranque, cuyo peso ya reserva BotBase).
         """
-        try:
-            print(f"📥 Descargando {self.max_velas} velas iniciales para {symbol} ({timeframe})...")
-            
-            # Mapeo de intervalos
-            interval_map = {
-                "1m": self.api.KLINE_INTERVAL_1MINUTE,
-                "5m": self.api.KLINE_INTERVAL_5MINUTE,
-                "15m": self.api.KLINE_INTERVAL_15MINUTE,
-                "1h": self.api.KLINE_INTERVAL_1HOUR,
-                "4h": self.api.KLINE_INTERVAL_4HOUR,
-            }
-            
-            # 1. Petición API (Pesada, solo se hace una vez al inicio)
+        intervalo = Config.MS_TIMEFRAME.get(timeframe, 300_000)
+        fin = int(time.time() * 1000) if hasta_ms is None else hasta_ms
+        faltantes = (fin - desde_ms) // intervalo + (2 if hasta_ms is None else 0)
+        extra = {} if hasta_ms is None else {'endTime': hasta_ms - 1}
+        klines = (cliente or self.api).futures_klines(
+            symbol=symbol,
+            interval=self._intervalo_api(timeframe),
+            startTime=desde_ms,
+            limit=int(min(max(faltantes, 1), 1500)),
+            **extra
+        )
+        return self._a_registros(klines)
+
+    def descargar_historia(self, symbol, timeframe, dias):
+        """
+        Descarga 'dias' de historia (páginas de 1500 velas) y la funde con la caché en disco.
+        Pensado para preparar datos de Backtest; no toca el Ring Buffer en vivo.
+        """
+        intervalo = Config.MS_TIMEFRAME.get(timeframe, 300_000)
+        ahora = int(time.time() * 1000)
+        desde = ahora - int(dias * 86_400_000)
+        lotes = []
+        while desde < ahora:
+            klines = self.api.futures_klines(
+                symbol=symbol, interval=self._intervalo_api(timeframe),
+                startTime=desde, limit=1500
+            )
+            if not klines:
+                break
+            lotes.append(self._a_registros(klines))
+            desde = int(klines[-1][0]) + intervalo
+            time.sleep(0.2) # Peso 10 por página: no saturamos la API
+
+        if not lotes:
+            return 0
+        nuevos = np.concatenate(lotes)
+        nuevos = nuevos[nuevos['timestamp'] + intervalo <= ahora] # Solo velas cerradas
+        existentes = self.historico.cargar(symbol, timeframe)
+        total = self.historico.reescribir(symbol, timeframe, np.concatenate([existentes, nuevos]))
+        print(f"💾 {symbol}: {total} velas de {timeframe} en disco.")
+        return total
+
+    @staticmethod
+    def agregar_registros(registros, timeframe):
+        """
+        Agrupa velas de 1m (array GestorHistorico.DTYPE) en velas de 'timeframe'.
+        El primer periodo se descarta si la historia empieza a mitad de él.
+        """
+        intervalo = Config.MS_TIMEFRAME[timeframe]
+        if len(registros) == 0:
+            return registros[:0]
+        cubos = registros['timestamp'] - registros['timestamp'] % intervalo
+        if registros['timestamp'][0] != cubos[0]:
+            registros, cubos = registros[cubos != cubos[0]], cubos[cubos != cubos[0]]
+            if len(registros) == 0:
+                return registros
+        inicios = np.flatnonzero(np.r_[True, cubos[1:] != cubos[:-1]])
+        finales = np.r_[inicios[1:], len(registros)] - 1
+        velas = np.empty(len(inicios), dtype=GestorHistorico.DTYPE)
+        velas['timestamp'] = cubos[inicios]
+        velas['open'] = registros['open'][inicios]
+        velas['high'] = np.maximum.reduceat(registros['high'], inicios)
+        velas['low'] = np.minimum.reduceat(registros['low'], inicios)
+        velas['close'] = registros['close'][finales]
+        velas['volume'] = np.add.reduceat(registros['volume'], inicios)
+        return velas
+
+    def _cargar_desde_disco(self, symbol, timeframe, n=None):
+        """
+        Historial local + cola REST. Devuelve None si no sirve (vacío, viejo o con huecos)
+        para que se haga el snapshot completo de siempre.
+        """
+        n = n or self.max_velas
+        intervalo = Config.MS_TIMEFRAME.get(timeframe, 300_000)
+        locales = self.historico.cargar(symbol, timeframe, n)
+        # Nos quedamos solo con el tramo contiguo más reciente (un hueco viejo no invalida la cola)
+        huecos = GestorHistorico.buscar_huecos(locales['timestamp'], intervalo)
+        if len(huecos):
+            locales = locales[huecos[-1] + 1:]
+        if len(locales) < 100:
+            return None
+
+        ultimo = int(locales['timestamp'][-1])
+        if (time.time() * 1000 - ultimo) // intervalo > n:
+            return None # Caché demasiado vieja: sale más barato el snapshot completo
+
+        cola = self.descargar_rango(symbol, timeframe, ultimo + intervalo)
+        if len(cola) == 0 or int(cola['timestamp'][0]) != ultimo + intervalo:
+            print(f"⚠️ {symbol}: La cola REST no empalma con la caché local.")
+            return None
+
+        combinado = np.concatenate([locales, cola])
+        if len(GestorHistorico.buscar_huecos(combinado['timestamp'], intervalo)):
+            return None
+        print(f"💾 {symbol}: {len(locales)} velas desde disco + {len(cola)} nuevas por REST.")
+        return combinado
+
+    def _cargar_registros(self, symbol, timeframe, n):
+        """Las últimas 'n' velas: disco + cola REST si hay caché, si no, snapshot completo."""
+        registros = None
+        if self.historico:
+            registros = self._cargar_desde_disco(symbol, timeframe, n)
+
+        if registros is None:
+            print(f"📥 Descargando {n} velas iniciales para {symbol} ({timeframe})...")
+
+            # 1. Petición API (Pesada, solo se hace cuando no hay caché local)
             klines = self.api.futures_klines(
-                symbol=symbol, 
-                interval=interval_map.get(timeframe, "5m"), 
-                limit=self.max_velas
+                symbol=symbol,
+                interval=self._intervalo_api(timeframe),
+                limit=n
             )
-            
-            # 2. Convertir a DataFrame ligero
-            datos = []
-            for k in klines:
-                datos.append({
-                    "timestamp": int(k[0]),
-                    "open": float(k[1]),
-                    "high": float(k[2]),
-                    "low": float(k[3]),
-                    "close": float(k[4]),
-                    "volume": float(k[5]),
-                    "cerrada": True # Las históricas ya cerraron
-                })
-            
-            df = pd.DataFrame(datos)
-            
-            # Optimizamos tipos de datos para gastar menos RAM
-            df = df.astype({"open": "float64", "high": "float64", "low": "float64", "close": "float64", "volume": "float64"})
-            
-            self.historial[symbol] = df
-            print(f"✅ {symbol}: Memoria inicializada con {len(df)} velas.")
+            registros = self._a_registros(klines)
+
+        # Persistimos todas menos la última (la vela en curso aún no cerró)
+        if self.historico and len(registros) > 1:
+            self.historico.agregar(symbol, timeframe, registros[:-1])
+        return registros
+
+    def _crear_buffer(self, registros, capacidad):
+        """Volcado directo a los arrays del Ring Buffer (sin DataFrame intermedio)."""
+        registros = registros[-capacidad:]
+        buffer = BufferVelas(capacidad)
+        buffer.cargar(
+            registros['timestamp'], registros['open'], registros['high'],
+            registros['low'], registros['close'], registros['volume'],
+            cerradas=True # Las históricas ya cerraron
+        )
+        return buffer
+
+    def inicializar_par(self, symbol, timeframe, extras=()):
+        """
+        Carga la foto inicial de 1000 velas: desde disco + cola REST si hay caché,
+        si no, descarga el Snapshot completo.
+        'extras': timeframes adicionales (solo con Config.AGREGAR_DESDE_1M).
+        """
+        try:
+            self.timeframes[symbol] = timeframe
+            if Config.AGREGAR_DESDE_1M:
+                buffer = self._inicializar_agregado(symbol, timeframe, extras)
+            else:
+                buffer = self._crear_buffer(self._cargar_registros(symbol, timeframe, self.max_velas), self.max_velas)
+
+            self.historial[symbol] = buffer
+            if self.indicadores:
+                self.indicadores.sembrar(symbol, buffer.vista('timestamp'), buffer.vista('close'))
+            print(f"✅ {symbol}: Memoria inicializada con {len(buffer)} velas.")
             return True
 
         except Exception as e:
             print(f"❌ Error descargando velas de {symbol}: {e}")
             return False
 
+    def _inicializar_agregado(self, symbol, timeframe, extras):
+        """
+        Una sola historia de 1m alimenta todos los timeframes del par. Solo si no alcanza
+        (ej. 4h) ese timeframe baja su propia foto una vez; después también vive del stream de 1m.
+        """
+        minutos = self._cargar_registros(symbol, "1m", Config.VELAS_1M)
+        buffers = {"1m": self._crear_buffer(minutos, Config.VELAS_1M)}
+        for tf in dict.fromkeys([timeframe, *extras]):
+            if tf == "1m":
+                continue
+            derivadas = self.agregar_registros(minutos, tf)
+            if len(derivadas) < Config.MIN_VELAS_AGREGADAS:
+                derivadas = self._cargar_registros(symbol, tf, self.max_velas)
+            buffers[tf] = self._crear_buffer(derivadas, self.max_velas)
+        self.agregados[symbol] = buffers
+        print(f"🧩 {symbol}: {', '.join(buffers)} desde el stream de 1m.")
+        return buffers[timeframe]
+
     def actualizar_vela_en_tiempo_real(self, symbol, kline):
         """
-        Método Quirúrgico: Recibe el dato del socket y opera sobre la última fila.
-        NO descarga nada. NO recalcula todo el DataFrame.
+        Método Quirúrgico: Recibe el dato del socket y opera sobre la última posición del buffer.
+        NO descarga nada. NO copia nada. NO asigna memoria.
+        Excepción: si la vela salta más de un periodo (se perdieron mensajes), antes de coser
+        se rellena el hueco con una petición REST del rango justo, hecha fuera del candado.
+        Con diferir_huecos (cola de velas) no espera a la descarga: devuelve su Future sin aplicar
+        la kline y el llamador la reintenta tras aplicar el relleno.
         """
-        if symbol not in self.historial:
+        with self.lock:
+            timeframe, buffer = self._buffer_stream(symbol)
+            if buffer is None or len(buffer) == 0:
+                return None
+
+            t = int(kline['t'])
+            hueco = t - buffer.ultimo_timestamp() > Config.MS_TIMEFRAME.get(timeframe, 300_000)
+            if not hueco or self._huecos_intentados.get(symbol) == t: # Si el relleno ya falló, se cose
+                self._aplicar_kline(symbol, kline)
+                return None
+            self._huecos_intentados[symbol] = t
+
+        espera = self.preparar_relleno(symbol, hasta_ms=t)
+        if self.diferir_huecos:
+            return espera
+        espera.result()()
+        return self.actualizar_vela_en_tiempo_real(symbol, kline)
+
+    def _buffer_stream(self, symbol):
+        """(timeframe, buffer) que alimenta directamente el WebSocket: 1m si se agrega, si no el de la estrategia."""
+        if symbol in self.agregados:
+            return "1m", self.agregados[symbol]["1m"]
+        return self.timeframes.get(symbol), self.historial.get(symbol)
+
+    def _aplicar_kline(self, symbol, kline):
+        if symbol in self.agregados:
+            self._actualizar_agregados(symbol, kline)
             return
 
-        df = self.historial[symbol]
-        
         # Datos que llegan del WebSocket
-        nuevo_timestamp = int(kline['t'])
-        nueva_data = {
-            "timestamp": nuevo_timestamp,
-            "open": float(kline['o']),
-            "high": float(kline['h']),
-            "low": float(kline['l']),
-            "close": float(kline['c']),
-            "volume": float(kline['v']),
-            "cerrada": kline['x'] # Bool: ¿Se cerró la vela ya?
-        }
+        self._aplicar_vela(
+            symbol, self.timeframes[symbol], self.historial[symbol], int(kline['t']), float(kline['o']),
+            float(kline['h']), float(kline['l']), float(kline['c']), float(kline['v']), kline['x'] # x: ¿Se cerró la vela ya?
+        )
+
+    def rellenar_tras_reconexion(self, symbol):
+        """
+        Tras una caída del WebSocket: pide por REST las velas desde la última que tenemos y las
+        aplica como si hubieran llegado por el socket (las ya terminadas con x=True).
+        Versión síncrona de preparar_relleno. Devuelve cuántas velas nuevas se recuperaron.
+        """
+        return self.preparar_relleno(symbol).result()()
 
+    def preparar_relleno(self, symbol, hasta_ms=None):
+        """
+        Lanza la descarga de [última vela del buffer, hasta_ms) (o hasta ahora) y devuelve un Future
+        cuyo resultado es el paso que la aplica (se ejecuta después, en orden con las klines del par).
+        La descarga no toma el candado y va por el pool del ClienteREST (en paralelo con la de otros
+        pares y dentro del presupuesto de peso); sin ClienteREST se descarga aquí mismo.
+        """
+        with self.lock:
+            timeframe, buffer = self._buffer_stream(symbol)
+            desde = buffer.ultimo_timestamp() if buffer is not None else None
+        if desde is None:
+            futuro = Future()
+            futuro.set_result(lambda: 0)
+            return futuro
+        if self.rest is not None:
+            return self.rest.en_segundo_plano(self._descargar_relleno, symbol=symbol, timeframe=timeframe,
+                                              desde=desde, hasta_ms=hasta_ms)
+        futuro = Future()
+        futuro.set_result(self._descargar_relleno(symbol, timeframe, desde, hasta_ms))
+        return futuro
+
+    def _descargar_relleno(self, symbol, timeframe, desde, hasta_ms=None):
+        """Descarga (sin candado) y devuelve el paso de aplicación; si falla, un paso que no hace nada."""
+        try:
+            registros = self.descargar_rango(symbol, timeframe, desde, hasta_ms, cliente=self.rest)
+        except Exception as e:
+            log.error("❌ %s: no se pudo rellenar el hueco de velas por REST: %s", symbol, e)
+            return lambda: 0
+        if hasta_ms is not None:
+            registros = registros[registros['timestamp'] < hasta_ms]
+        ahora = time.time() * 1000
+        return lambda: self._aplicar_relleno(symbol, timeframe, registros, hasta_ms, ahora)
+
+    def _aplicar_relleno(self, symbol, timeframe, registros, hasta_ms, ahora):
+        """
+        Aplica lo descargado en orden, con el candado tomado: la estrategia no ve el buffer a medio
+        reparar. Lo que ya llegó por el socket mientras tanto se ignora (vela atrasada).
+        """
+        intervalo = Config.MS_TIMEFRAME.get(timeframe, 300_000)
+        with self.lock:
+            buffer = self._buffer_stream(symbol)[1]
+            if buffer is None: # El par salió de la lista (scanner) mientras se descargaba
+                return 0
+            desde = buffer.ultimo_timestamp()
+            for t, o, h, l, c, v in registros:
+                self._aplicar_kline(symbol, {'t': int(t), 'o': o, 'h': h, 'l': l, 'c': c, 'v': v,
+                                             'x': hasta_ms is not None or t + intervalo <= ahora})
+            nuevas = int(np.count_nonzero(registros['timestamp'] > desde))
+            if hasta_ms is not None:
+                self.huecos['detectados'] += 1
+            self.huecos['velas_rellenadas'] += nuevas
+        if nuevas:
+            log.info("🩹 %s: %d velas de %s recuperadas por REST.", symbol, nuevas, timeframe)
+        return nuevas
+
+    def _aplicar_vela(self, symbol, timeframe, buffer, nuevo_timestamp, o, h, l, cierre, v, cerrada):
+        """Costura de una vela sobre su buffer + disco + indicadores. False si llegó atrasada."""
         # Lógica de "Costura" (Stitching)
-        ultimo_timestamp = df.iloc[-1]['timestamp']
+        ultimo_timestamp = buffer.ultimo_timestamp()
 
         if nuevo_timestamp == ultimo_timestamp:
             # ESCENARIO A: La vela sigue abierta (Estamos en el mismo minuto/periodo)
-            # Solo actualizamos los valores de la última fila (Sobrescribir)
-            # Usamos .iloc[-1] que es muy rápido
-            for col, val in nueva_data.items():
-                df.at[df.index[-1], col] = val
-                
+            # Solo sobrescribimos la última posición
+            buffer.sobrescribir_ultima(nuevo_timestamp, o, h, l, cierre, v, cerrada)
+
         elif nuevo_timestamp > ultimo_timestamp:
             # ESCENARIO B: Vela nueva (Cambio de turno)
-            # 1. Agregamos la nueva fila al final
-            df_nueva_fila = pd.DataFrame([nueva_data])
-            # Usamos concat que es el estándar nuevo de pandas (append murió)
-            df = pd.concat([df, df_nueva_fila], ignore_index=True)
-            
-            # 2. MANTENIMIENTO: Si nos pasamos de 1000, cortamos la cabeza (la más vieja)
-            if len(df) > self.max_velas:
-                df = df.iloc[1:].reset_index(drop=True)
-                
-            # Guardamos la referencia actualizada
-            self.historial[symbol] = df
-            
+            # El buffer descarta solo la más vieja al estar lleno (1000 velas fijas)
+            buffer.agregar(nuevo_timestamp, o, h, l, cierre, v, cerrada)
+        else:
+            return False  # Mensaje atrasado: no tocamos nada
+
+        # Vela cerrada: la persistimos en disco (un registro de 48 bytes)
+        if cerrada and self.historico:
+            self.historico.agregar(symbol, timeframe, [(nuevo_timestamp, o, h, l, cierre, v)])
+
+        # Alimentamos el motor de indicadores en streaming (O(1)), solo con el timeframe de la estrategia
+        if self.indicadores and timeframe == self.timeframes[symbol]:
+            self.indicadores.actualizar(symbol, nuevo_timestamp, cierre, cerrada)
+        return True
+
+    def _actualizar_agregados(self, symbol, kline):
+        """
+        Vela de 1m -> punta de cada timeframe derivado (minutos cerrados acumulados + minuto en curso).
+        El acumulado solo sirve si termina justo en este minuto: un minuto cerrado repetido (relleno
+        tras reconexión, reenvío del socket) o un cierre perdido lo reconstruyen desde el buffer de 1m,
+        así ningún minuto se suma dos veces.
+        """
+        buffers = self.agregados[symbol]
+        t = int(kline['t'])
+        o, h, l, c, v = (float(kline[k]) for k in ('o', 'h', 'l', 'c', 'v'))
+        cerrada = kline['x']
+        if not self._aplicar_vela(symbol, "1m", buffers["1m"], t, o, h, l, c, v, cerrada):
+            return
+
+        for tf, buffer in buffers.items():
+            if tf == "1m":
+                continue
+            intervalo = Config.MS_TIMEFRAME[tf]
+            inicio = t - t % intervalo
+            acumulado = self._acumulados.get((symbol, tf))
+            if acumulado is None or acumulado[:2] != (inicio, t):
+                acumulado = self._acumular_minutos(buffers["1m"], inicio, t)
+            _, _, ao, ah, al, av = acumulado
+            vela = (inicio, o if ao is None else ao, max(h, ah), min(l, al), c, av + v)
+            self._aplicar_vela(symbol, tf, buffer, *vela, cerrada and t + 60_000 >= inicio + intervalo)
+            if cerrada:
+                acumulado = (inicio, t + 60_000, vela[1], vela[2], vela[3], vela[5])
+            self._acumulados[(symbol, tf)] = acumulado
+
+    @staticmethod
+    def _acumular_minutos(minutos, inicio, hasta):
+        """Resumen (inicio, hasta, o, h, l, v) de los minutos de [inicio, hasta) ya guardados."""
+        ts = minutos.vista('timestamp')
+        desde = int(np.searchsorted(ts, inicio))
+        fin = int(np.searchsorted(ts, hasta))
+        if fin <= desde:
+            return (inicio, hasta, None, float('-inf'), float('inf'), 0.0)
+        return (inicio, hasta, float(minutos.vista('open')[desde]), float(minutos.vista('high')[desde:fin].max()),
+                float(minutos.vista('low')[desde:fin].min()), float(minutos.vista('volume')[desde:fin].sum()))
+
     def obtener_dataframe(self, symbol):
-        return self.historial.get(symbol, None)
+        """
+        Construye el DataFrame SOLO cuando se pide explícitamente (diagnóstico, reportes).
+        Se cachea hasta la siguiente escritura en el buffer.
+        """
+        with self.lock:
+            buffer = self.historial.get(symbol)
+            if buffer is None:
+                return None
+            cache = self._dataframes.get(symbol)
+            if cache is not None and cache[0] == buffer.version:
+                return cache[1]
+            df = buffer.a_dataframe()
+            self._dataframes[symbol] = (buffer.version, df)
+            return df
+
+    def obtener_closes(self, symbol, timeframe=None):
+        """
+        Helper rápido para indicadores: foto consistente de los cierres (copia de solo lectura
+        tomada bajo el candado, la cola de velas puede estar escribiendo en ese momento).
+        'timeframe' pide otro de los timeframes derivados del 1m (ej. filtro de tendencia en 1h).
+        """
+        with self.lock:
+            if timeframe and timeframe != self.timeframes.get(symbol):
+                buffer = self.agregados.get(symbol, {}).get(timeframe)
+            else:
+                buffer = self.historial.get(symbol)
+            if buffer is None:
+                return []
+            closes = buffer.vista('close').copy()
+        closes.flags.writeable = False
+        return closes
 
-    def obtener_closes(self, symbol):
-        """Helper rápido para indicadores"""
-        if symbol in self.historial:
-            return self.historial[symbol]['close'].values
-        return []
\ No newline at end of file
+    def memoria_por_par(self):
+        """{'BTCUSDT': bytes} de los ring buffers del par (todos sus timeframes), para reportes."""
+        with self.lock:
+            resultado = {}
+            for symbol in set(self.historial) | set(self.agregados):
+                buffers = {id(b): b for b in self.agregados.get(symbol, {}).values()}
+                if symbol in self.historial: # En modo 1m es uno de los agregados: no se cuenta dos veces
+                    buffers[id(self.historial[symbol])] = self.historial[symbol]
+                resultado[symbol] = sum(b.nbytes() for b in buffers.values())
+            return resultado
@@ -1,47 +1,105 @@
+import time
+import uuid
+import threading
 from binance.enums import SIDE_BUY, SIDE_SELL, TIME_IN_FORCE_GTC, ORDER_TYPE_LIMIT
-from binance.exceptions import BinanceAPIException
+from binance.exceptions import BinanceAPIException, BinanceRequestException
 from Core.Ejecucion.GestorPrecision import GestorPrecision  # <--- IMPORTAMOS TU NUEVA ARMA
+from Core.API.GestorExchangeInfo import GestorExchangeInfo
+from Core.Utils.Config import Config
+from Core.Utils.GestorLatencia import GestorLatencia
+from Core.Utils.GestorLogs import GestorLogs
+
+log = GestorLogs.obtener("ejecucion")
 
 class GestorBasico:
     """
     Encargado de la ejecución.
     Ahora incluye GESTIÓN DE CAPITAL (Position Sizing).
     """
-    def __init__(self, cliente_api):
-        self.api = cliente_api.client
+    def __init__(self, cliente_api, cuenta=None):
+        self.api = cliente_api.rest # ClienteREST compartido (órdenes y cuenta, pool keep-alive)
+        # Libro local alimentado por el User Data Stream (GestorCuenta). Si no está, se usa REST.
+        self.cuenta = cuenta
         # Cache de gestores de precisión para no instanciar uno en cada orden
         self.precisiones = {}
+        # exchangeInfo compartido por todo el proceso (una sola descarga)
+        self.exchange_info = GestorExchangeInfo.compartido(cliente_api)
+        self.trazas = GestorLatencia.compartido() # Ida y vuelta REST de cada Limit y total desde el último dato
+
+        # Foto de balance para dimensionar en memoria (sin REST entre la señal y la orden)
+        self.foto_balance = None   # {'balance', 'disponible', 'instante'} (modo sin libro de cuenta)
+        self.reservas = {}         # {orderId: (instante, margen)} Limits enviadas después de la foto
+        self.apalancamientos = {}  # {'BTCUSDT': 10} para saber cuánto margen bloquea cada orden
+        self.lock_balance = threading.Lock()
 
     def _obtener_precision(self, symbol):
-        """Busca o crea el gestor de precisión para el par."""
-        if symbol not in self.precisiones:
-            gp = GestorPrecision(symbol)
-            gp.detectar() # Auto-detectar decimales al primer uso
-            self.precisiones[symbol] = gp
-        return self.precisiones[symbol]
+        """
+        Busca o crea el gestor de precisión para el par. Solo se guarda si detectó los filtros:
+        con exchangeInfo caído se usan los valores por defecto y se reintenta en la próxima orden.
+        """
+        gp = self.precisiones.get(symbol)
+        if gp is None:
+            gp = GestorPrecision(symbol, self.exchange_info)
+            if gp.detectar(): # Auto-detectar decimales al primer uso (lectura en memoria)
+                self.precisiones[symbol] = gp
+        return gp
 
-    def obtener_balance_usdt(self):
-        """Consulta el saldo disponible en la billetera de Futuros"""
+    def obtener_foto_balance(self):
+        """
+        Balance en memoria. Con el libro de cuenta sincronizado sale de GestorCuenta (stream +
+        reconciliación); si no, solo va a REST cuando la foto supera Config.EDAD_MAX_BALANCE.
+        """
+        if self.cuenta and self.cuenta.esta_sincronizado():
+            return self.cuenta.obtener_foto_balance()
+        foto = self.foto_balance
+        if foto is None or time.time() - foto['instante'] > Config.EDAD_MAX_BALANCE:
+            foto = self.refrescar_balance()
+        return foto
+
+    def refrescar_balance(self):
+        """Foto nueva por REST. Si falla se sigue con la anterior (o cero)."""
+        instante = time.time()
         try:
-            balances = self.api.futures_account_balance()
-            for asset in balances:
+            for asset in self.api.futures_account_balance():
                 if asset['asset'] == 'USDT':
-                    return float(asset['balance']) # O 'availableBalance' si prefieres
-            return 0.0
+                    self.foto_balance = {'balance': float(asset['balance']),
+                                         'disponible': float(asset['availableBalance']), 'instante': instante}
+                    return self.foto_balance
         except Exception as e:
-            print(f"❌ Error leyendo balance: {e}")
-            return 0.0
+            log.error("❌ Error leyendo balance: %s", e)
+        return self.foto_balance or {'balance': 0.0, 'disponible': 0.0, 'instante': 0.0}
+
+    def invalidar_balance(self):
+        """Tras un llenado/cierre: la próxima lectura (modo REST) pide una foto nueva."""
+        self.foto_balance = None
+
+    def obtener_balance_usdt(self):
+        """Saldo de la billetera de Futuros (desde la foto en memoria)"""
+        return self.obtener_foto_balance()['balance']
+
+    def margen_libre(self, foto):
+        """Disponible de la foto menos el margen de las Limits enviadas después de tomarla."""
+        with self.lock_balance:
+            # Las reservas anteriores a la foto ya vienen descontadas en 'disponible'
+            for order_id in [i for i, (t, _) in self.reservas.items() if t <= foto['instante']]:
+                del self.reservas[order_id]
+            return foto['disponible'] - sum(m for _, m in self.reservas.values())
 
     def calcular_cantidad(self, symbol, porcentaje, precio, apalancamiento, precision=3):
         """
         Calcula cuántas monedas comprar basado en el % de la cartera.
         Fórmula: (Balance * % * Apalancamiento) / Precio
+        Cálculo en memoria: varias señales del mismo barrido comparten foto y cada orden
+        descuenta el margen que ya comprometieron las anteriores.
         """
-        balance = self.obtener_balance_usdt()
+        foto = self.obtener_foto_balance()
+        balance = foto['balance']
+        self.apalancamientos[symbol] = apalancamiento
         
         # Si tienes $1000 y quieres usar 20%, asignas $200 de margen (Cost).
         # Con apalancamiento x10, tu poder de compra es $2000.
-        monto_margen = balance * (porcentaje / 100)
+        # Nunca más de lo que queda libre tras las órdenes ya enviadas.
+        monto_margen = min(balance * (porcentaje / 100), max(0.0, self.margen_libre(foto)))
         poder_compra = monto_margen * apalancamiento
         
         cantidad_cruda = poder_compra / precio
@@ -53,28 +111,107 @@ class GestorBasico:
         
         return cantidad_final, balance
 
-    def colocar_orden_limit(self, symbol, side, cantidad, precio):
+    def _crear_orden(self, symbol, **params):
+        """
+        POST de orden con newClientOrderId propio. Si la red falla o vence el timeout no se sabe
+        si Binance la recibió: se busca por ese id antes de darla por no enviada.
+        """
+        cliente = params.setdefault('newClientOrderId', f"bot_{uuid.uuid4().hex[:24]}")
+        try:
+            return self.api.futures_create_order(symbol=symbol, **params)
+        except BinanceRequestException as error:
+            log.warning("⚠️ Sin respuesta al enviar orden de %s (%s). Buscando %s...", symbol, error, cliente)
+            for intento in range(Config.REINTENTOS_REST + 1):
+                time.sleep(0.2 * intento) # El POST puede seguir en camino
+                try:
+                    orden = self.api.futures_get_order(symbol=symbol, origClientOrderId=cliente)
+                    log.info("✅ La orden %s de %s sí llegó (ID: %s)", cliente, symbol, orden.get('orderId'))
+                    return orden
+                except BinanceAPIException as e:
+                    if e.code != -2013: # -2013: no existe (todavía)
+                        break
+                except BinanceRequestException:
+                    pass
+            raise error
+
+    def colocar_orden_limit(self, symbol, side, cantidad, precio, llegada=None):
+        """Limit GTC al precio dado. 'llegada': perf_counter del dato que disparó la señal (traza dato_a_orden)."""
         try:
 
             # --- VALIDACIÓN DE PRECISIÓN ---
             gp = self._obtener_precision(symbol)
-            precio_final = gp.redondear_precio(precio)
+            precio_final = gp.ajustar_a_tick(precio) # Múltiplo del tick (texto), no solo decimales: evita -4014
             cantidad_final = gp.redondear_cantidad(cantidad)
             # -------------------------------
 
-            print(f"🚀 Enviando orden {side} para {symbol}. Cant: {cantidad_final} a ${precio_final}...")
+            log.info("🚀 Enviando orden %s para %s. Cant: %s a $%s...", side, symbol, cantidad_final, precio_final,
+                     extra={'datos': {'par': symbol, 'side': side, 'cantidad': cantidad_final, 'precio': precio_final}})
             
-            orden = self.api.futures_create_order(
-                symbol=symbol,
+            inicio = time.perf_counter()
+            orden = self._crear_orden(
+                symbol,
                 side=side,
                 type=ORDER_TYPE_LIMIT,
                 timeInForce=TIME_IN_FORCE_GTC,
                 quantity=cantidad_final,
-                price=str(precio_final)
+                price=precio_final
             )
+            self.trazas.desde(symbol, 'orden_rest', inicio)
+            self.trazas.desde_llegada(symbol, 'dato_a_orden', llegada)
+            if self.cuenta:
+                self.cuenta.registrar_orden(orden)
+            # Margen bloqueado por esta Limit hasta la próxima foto de balance
+            margen = cantidad_final * float(precio_final) / self.apalancamientos.get(symbol, 1)
+            with self.lock_balance:
+                self.reservas[orden['orderId']] = (time.time(), margen)
             return orden
-        except BinanceAPIException as e:
-            print(f"❌ Error al colocar orden: {e}")
+        except (BinanceAPIException, BinanceRequestException) as e:
+            log.error("❌ Error al colocar orden: %s", e)
+            return None
+
+    def modificar_orden(self, symbol, order_id, side, cantidad, precio, ejecutada=0.0):
+        """
+        Mueve una Limit viva a otro precio (PUT /fapi/v1/order: una petición en vez de cancelar + crear).
+        'cantidad' es la total de la orden (origQty, como la pide Binance), no lo que falta; la reserva
+        de margen queda solo sobre la parte sin llenar.
+        """
+        try:
+            gp = self._obtener_precision(symbol)
+            precio_final = gp.ajustar_a_tick(precio)
+            cantidad_final = gp.redondear_cantidad(cantidad)
+            orden = self.api.futures_modify_order(
+                symbol=symbol, orderId=order_id, side=side, quantity=cantidad_final, price=precio_final
+            )
+            if isinstance(orden, dict):
+                ejecutada = float(orden.get('executedQty', ejecutada))
+            margen = max(cantidad_final - ejecutada, 0.0) * float(precio_final) / self.apalancamientos.get(symbol, 1)
+            with self.lock_balance:
+                if order_id in self.reservas:
+                    self.reservas[order_id] = (self.reservas[order_id][0], margen)
+            return orden
+        except (BinanceAPIException, BinanceRequestException) as e:
+            log.error("❌ Error modificando orden %s de %s: %s", order_id, symbol, e)
+            return None
+
+    def colocar_orden_mercado(self, symbol, side, cantidad):
+        """Entrada a mercado (resto de una Limit vencida con Config.ACCION_TIMEOUT = 'mercado')."""
+        try:
+            cantidad_final = self._obtener_precision(symbol).redondear_cantidad(cantidad)
+            if cantidad_final <= 0:
+                return None
+            orden = self._crear_orden(symbol, side=side, type="MARKET", quantity=cantidad_final)
+            self.invalidar_balance()
+            return orden
+        except (BinanceAPIException, BinanceRequestException) as e:
+            log.error("❌ Error en orden a mercado de %s: %s", symbol, e)
+            return None
+
+    def consultar_orden(self, symbol, order_id):
+        """Estado de una orden por REST (sin User Data Stream o si el evento no llegó)."""
+        try:
+            return self.api.futures_get_order(symbol=symbol, orderId=order_id)
+        except Exception as e:
+            log.warning("⚠️ Error consultando orden %s de %s: %s", order_id, symbol, e)
             return None
 
     def configurar_apalancamiento(self, symbol, leverage):
@@ -82,15 +219,18 @@ class GestorBasico:
             leverage = int(leverage)
             # print(f"⚙️  Ajustando apalancamiento de {symbol} a x{leverage}...")
             self.api.futures_change_leverage(symbol=symbol, leverage=leverage)
+            self.apalancamientos[symbol] = leverage
             return True
         except Exception as e:
-            print(f"❌ Error leverage {symbol}: {e}")
+            log.error("❌ Error leverage %s: %s", symbol, e)
             return False
             
     def cancelar_orden(self, symbol, order_id):
         try:
-            self.api.futures_cancel_order(symbol=symbol, orderId=order_id)
-            return True
+            orden = self.api.futures_cancel_order(symbol=symbol, orderId=order_id)
+            with self.lock_balance:
+                self.reservas.pop(order_id, None)
+            return orden or True # La respuesta trae executedQty (lo llenado antes de cancelar)
         except:
             return False
         
@@ -104,6 +244,8 @@ class GestorBasico:
         - Si amt < 0: Estamos en SHORT.
         - Si amt == 0: No tenemos posición.
         """
+        if self.cuenta and self.cuenta.esta_sincronizado():
+            return self.cuenta.obtener_posicion(symbol)
         try:
             # Info de posiciones (riesgo)
             positions = self.api.futures_position_information(symbol=symbol)
@@ -113,7 +255,7 @@ class GestorBasico:
                     return float(p['positionAmt'])
             return 0.0
         except Exception as e:
-            print(f"❌ Error consultando posición de {symbol}: {e}")
+            log.error("❌ Error consultando posición de %s: %s", symbol, e)
             return 0.0
             
     def cerrar_posicion_mercado(self, symbol, cantidad_actual):
@@ -122,28 +264,33 @@ class GestorBasico:
         """
         try:
             side = SIDE_SELL if cantidad_actual > 0 else SIDE_BUY
-            print(f"🚨 CERRANDO POSICIÓN de {symbol} (Market)...")
+            log.warning("🚨 CERRANDO POSICIÓN de %s (Market)...", symbol)
             
             # Para cerrar, enviamos una orden con la misma cantidad pero lado contrario
             # Usamos abs() porque la cantidad puede venir negativa si es Short
-            orden = self.api.futures_create_order(
-                symbol=symbol,
+            orden = self._crear_orden(
+                symbol,
                 side=side,
                 type="MARKET",
                 quantity=abs(cantidad_actual)
             )
+            if self.cuenta:
+                self.cuenta.aplicar_cierre(symbol)
+            self.invalidar_balance()
             return orden
         except Exception as e:
-            print(f"❌ Error cerrando posición: {e}")
+            log.error("❌ Error cerrando posición: %s", e)
             return None
         
     def verificar_ordenes_pendientes(self, symbol):
         """
         Devuelve True si hay órdenes abiertas (Limit) esperando llenarse.
         """
+        if self.cuenta and self.cuenta.esta_sincronizado():
+            return self.cuenta.tiene_ordenes_abiertas(symbol)
         try:
             ordenes = self.api.futures_get_open_orders(symbol=symbol)
             return len(ordenes) > 0
         except Exception as e:
-            print(f"⚠️ Error verificando órdenes pendientes: {e}")
+            log.warning("⚠️ Error verificando órdenes pendientes: %s", e)
             return False
\ No newline at end of file
@@ -0,0 +1,267 @@
+import threading
+import time
+from collections import deque, OrderedDict
+from binance.enums import SIDE_BUY
+from Core.Utils.Config import Config
+from Core.Utils.GestorLogs import GestorLogs
+
+log = GestorLogs.obtener("ordenes")
+
+class GestorOrdenes:
+    """
+    Ciclo de vida de las órdenes Limit de entrada.
+    - abrir(): la Limit va al mejor precio de su lado del libro (bid para comprar, ask para vender),
+      así queda en el libro como maker en vez de cruzar el spread.
+    - Reprecio al 'touch': si el libro se aleja, la orden se mueve (PUT /fapi/v1/order) como mucho
+      Config.MAX_REPRECIOS veces y sin perseguir más de Config.MAX_DESVIO_REPRECIO % desde la señal.
+    - Timeout (Config.TIMEOUT_ORDEN_LIMIT): se cancela el resto o se completa a mercado (Config.ACCION_TIMEOUT).
+    - Llenados parciales: se acumulan desde ORDER_TRADE_UPDATE (cantidad, precio medio, maker/taker).
+      Sin User Data Stream, la orden se consulta por REST en cada revisión.
+    - metricas(): tiempo hasta el llenado y % de cantidad llenada como maker, por par.
+    """
+    FINALES = ('FILLED', 'CANCELED', 'EXPIRED', 'REJECTED', 'EXPIRED_IN_MATCH')
+
+    def __init__(self, ejecutor, mercado, cuenta=None, timeout=None, accion_timeout=None, riesgo=None):
+        self.ejecutor = ejecutor
+        self.mercado = mercado
+        self.cuenta = cuenta
+        self.riesgo = riesgo # GestorRiesgo: stop pre-armado a la vez que la entrada
+        self.timeout = timeout or Config.TIMEOUT_ORDEN_LIMIT
+        self.accion_timeout = accion_timeout or Config.ACCION_TIMEOUT
+        self.vivas = {}                 # {orderId: registro} órdenes de entrada en curso
+        self.tempranos = OrderedDict()  # {orderId: [eventos]} llegados antes que la respuesta REST
+        self.estadisticas = {}          # {'BTCUSDT': contadores + tiempos de llenado}
+        self.lock = threading.RLock()
+        self.activo = False
+        self.hilo = None
+        if cuenta:
+            cuenta.oyentes.append(self.procesar_orden)
+
+    def iniciar(self):
+        self.activo = True
+        self.hilo = threading.Thread(target=self._bucle, name="ordenes", daemon=True)
+        self.hilo.start()
+        print(f"📋 Gestor de órdenes: timeout {self.timeout}s ({self.accion_timeout}), "
+              f"hasta {Config.MAX_REPRECIOS} reprecios.")
+
+    def detener(self):
+        self.activo = False
+
+    def _bucle(self):
+        while self.activo:
+            try:
+                self.revisar()
+            except Exception as e:
+                log.warning("⚠️ Gestor de órdenes: error en la revisión: %s", e)
+            time.sleep(Config.INTERVALO_ORDENES)
+
+    # ------------------------------------------------------------------
+    # Alta
+    # ------------------------------------------------------------------
+    def _precio_touch(self, symbol, side):
+        libro = self.mercado.obtener_libro(symbol)
+        if not libro:
+            return None
+        return libro[0] if side == SIDE_BUY else libro[1]
+
+    def abrir(self, symbol, side, cantidad, precio_senal, llegada=None):
+        """
+        Coloca la Limit de entrada en el touch (o al precio de la señal si no hay libro) y la sigue.
+        'llegada': perf_counter del dato que disparó la señal (traza dato_a_orden).
+        """
+        precio = self._precio_touch(symbol, side) or precio_senal
+        armado = None
+        if self.riesgo and Config.PREARMAR_STOP:
+            # El stop sale a la vez que la entrada: dos peticiones simultáneas, un solo viaje de ida y vuelta
+            armado = threading.Thread(target=self.riesgo.armar, args=(symbol, side, precio), daemon=True)
+            armado.start()
+        orden = self.ejecutor.colocar_orden_limit(symbol, side, cantidad, precio, llegada=llegada)
+        if armado:
+            armado.join()
+            if not orden:
+                self.riesgo.desarmar(symbol)
+        if not orden:
+            return None
+        ahora = time.monotonic()
+        registro = {
+            'orderId': orden['orderId'], 'symbol': symbol, 'side': side,
+            'cantidad': float(orden.get('origQty', cantidad)), 'precio': float(orden.get('price', precio)),
+            'precio_senal': precio_senal, 'inicio': ahora, 'ultimo_reprecio': ahora, 'reprecios': 0,
+            'ejecutada': 0.0, 'coste': 0.0, 'maker': 0.0, 'taker': 0.0, 'vencida': False,
+        }
+        with self.lock:
+            self._contar(symbol, 'ordenes')
+            self.vivas[registro['orderId']] = registro
+            eventos = self.tempranos.pop(registro['orderId'], [])
+        for o in eventos:
+            self.procesar_orden(o)
+        return orden
+
+    # ------------------------------------------------------------------
+    # Eventos (hilo del User Data Stream)
+    # ------------------------------------------------------------------
+    def procesar_orden(self, o):
+        """ORDER_TRADE_UPDATE ya aplicado al libro de cuenta: llenados parciales y cierre de la orden."""
+        with self.lock:
+            registro = self.vivas.get(o['i'])
+            if registro is None:
+                # Puede adelantarse a la respuesta REST de abrir(): se guarda un momento
+                if o.get('o') == 'LIMIT' and not o.get('R'):
+                    self.tempranos.setdefault(o['i'], []).append(o)
+                    while len(self.tempranos) > 100:
+                        self.tempranos.popitem(last=False)
+                return
+            if o.get('x') == 'TRADE' and float(o.get('l', 0)):
+                self._llenado(registro, float(o['l']), float(o['L']), bool(o.get('m')))
+                if o['X'] == 'PARTIALLY_FILLED':
+                    log.info("🧩 %s: llenado parcial %s/%s @ %s", registro['symbol'], registro['ejecutada'],
+                             registro['cantidad'], float(o['L']))
+            if o['X'] in self.FINALES:
+                self._cerrar(registro, o['X'])
+
+    def _llenado(self, registro, cantidad, precio, maker):
+        registro['ejecutada'] += cantidad
+        registro['coste'] += cantidad * precio
+        registro['maker' if maker else 'taker'] += cantidad
+
+    def _cerrar(self, registro, estado):
+        """Orden terminada: fuera de las vivas y a las estadísticas del par."""
+        if self.vivas.pop(registro['orderId'], None) is None:
+            return
+        symbol = registro['symbol']
+        if estado == 'FILLED':
+            self._contar(symbol, 'llenadas')
+            self.estadisticas[symbol]['tiempos'].append(time.monotonic() - registro['inicio'])
+        elif registro['ejecutada']:
+            self._contar(symbol, 'parciales')
+        else:
+            self._contar(symbol, 'canceladas' if estado == 'CANCELED' else 'rechazadas')
+        self._contar(symbol, 'cantidad_maker', registro['maker'])
+        self._contar(symbol, 'cantidad_taker', registro['taker'])
+        if registro['ejecutada']:
+            medio = registro['coste'] / registro['ejecutada']
+            log.info("📗 %s: orden %s %s (%s/%s @ %.6g, %d reprecios).", symbol, registro['orderId'], estado,
+                     registro['ejecutada'], registro['cantidad'], medio, registro['reprecios'],
+                     extra={'datos': {'par': symbol, 'orden': registro['orderId'], 'estado': estado,
+                                      'ejecutada': registro['ejecutada'], 'precio_medio': medio}})
+
+    # ------------------------------------------------------------------
+    # Revisión periódica: reprecio y timeout
+    # ------------------------------------------------------------------
+    def revisar(self, ahora=None):
+        ahora = ahora or time.monotonic()
+        with self.lock:
+            registros = list(self.vivas.values())
+        for registro in registros:
+            if not (self.cuenta and self.cuenta.esta_sincronizado()):
+                self._consultar(registro)
+                if registro['orderId'] not in self.vivas:
+                    continue
+            if registro['vencida']:
+                continue
+            if ahora - registro['inicio'] >= self.timeout:
+                self._vencer(registro)
+            else:
+                self._repreciar(registro, ahora)
+
+    def _repreciar(self, registro, ahora):
+        touch = self._precio_touch(registro['symbol'], registro['side'])
+        if touch is None or registro['reprecios'] >= Config.MAX_REPRECIOS:
+            return
+        compra = registro['side'] == SIDE_BUY
+        if not (touch > registro['precio'] if compra else touch < registro['precio']):
+            return # Seguimos en el touch (o por delante): nada que mover
+        if ahora - registro['ultimo_reprecio'] < Config.REPRECIO_MIN_S:
+            return
+        if abs(touch / registro['precio_senal'] - 1) * 100 > Config.MAX_DESVIO_REPRECIO:
+            return # El precio se fue: no se persigue, decide el timeout
+
+        # PUT con la cantidad total (origQty): con lo que falta, Binance encogería la orden a eso
+        orden = self.ejecutor.modificar_orden(registro['symbol'], registro['orderId'], registro['side'],
+                                              registro['cantidad'], touch, ejecutada=registro['ejecutada'])
+        registro['ultimo_reprecio'] = ahora
+        if orden:
+            with self.lock:
+                registro['reprecios'] += 1
+                registro['precio'] = float(orden.get('price', touch))
+                self._contar(registro['symbol'], 'reprecios')
+            log.info("🎯 %s: orden %s repreciada a %s (%d/%d).", registro['symbol'], registro['orderId'],
+                     registro['precio'], registro['reprecios'], Config.MAX_REPRECIOS)
+
+    def _vencer(self, registro):
+        """Timeout: se cancela lo que falte y, con ACCION_TIMEOUT = 'mercado', se completa como taker."""
+        symbol = registro['symbol']
+        respuesta = self.ejecutor.cancelar_orden(symbol, registro['orderId'])
+        if not respuesta:
+            # Se llenó o canceló mientras tanto (o falló la red): su estado real por REST; si sigue viva, se reintenta
+            self._consultar(registro)
+            return
+        registro['vencida'] = True
+        ejecutada = float(respuesta.get('executedQty', registro['ejecutada'])) if isinstance(respuesta, dict) \
+            else registro['ejecutada']
+        restante = registro['cantidad'] - ejecutada
+        log.info("⌛ %s: orden %s vencida tras %ss (%s/%s llenado).", symbol, registro['orderId'], self.timeout,
+                 ejecutada, registro['cantidad'])
+        if self.accion_timeout == "mercado" and restante > 0:
+            if self.ejecutor.colocar_orden_mercado(symbol, registro['side'], restante):
+                with self.lock:
+                    self._contar(symbol, 'a_mercado')
+                    self._contar(symbol, 'cantidad_taker', restante)
+        if not (self.cuenta and self.cuenta.esta_sincronizado()):
+            with self.lock:
+                self._sincronizar_ejecutada(registro, ejecutada, float(respuesta.get('avgPrice', 0) or 0)
+                                            if isinstance(respuesta, dict) else 0.0)
+                self._cerrar(registro, 'CANCELED')
+
+    def _consultar(self, registro):
+        """Sin stream (o con el cancel fallido): estado real de la orden por REST."""
+        orden = self.ejecutor.consultar_orden(registro['symbol'], registro['orderId'])
+        if not orden:
+            return
+        with self.lock:
+            self._sincronizar_ejecutada(registro, float(orden['executedQty']), float(orden.get('avgPrice', 0) or 0))
+            if orden['status'] in self.FINALES:
+                self._cerrar(registro, orden['status'])
+
+    def _sincronizar_ejecutada(self, registro, ejecutada, precio_medio):
+        """Llenado visto por REST (sin detalle maker/taker): una Limit en el libro llena como maker."""
+        nueva = ejecutada - registro['ejecutada']
+        if nueva > 1e-12:
+            self._llenado(registro, nueva, precio_medio or registro['precio'], maker=True)
+
+    # ------------------------------------------------------------------
+    # Métricas
+    # ------------------------------------------------------------------
+    def _contar(self, symbol, clave, n=1):
+        estadistica = self.estadisticas.get(symbol)
+        if estadistica is None:
+            estadistica = self.estadisticas[symbol] = {
+                'ordenes': 0, 'llenadas': 0, 'parciales': 0, 'canceladas': 0, 'rechazadas': 0, 'a_mercado': 0,
+                'reprecios': 0, 'cantidad_maker': 0.0, 'cantidad_taker': 0.0, 'tiempos': deque(maxlen=200),
+            }
+        estadistica[clave] += n
+
+    def tiene_orden_viva(self, symbol):
+        with self.lock:
+            return any(r['symbol'] == symbol for r in self.vivas.values())
+
+    def metricas(self):
+        """
+        {'BTCUSDT': {'ordenes', 'llenadas', 'parciales', 'canceladas', 'a_mercado', 'reprecios',
+        'tasa_llenado', 'pct_maker', 'llenado_medio_s', 'llenado_max_s'}}.
+        pct_maker: % de la cantidad ejecutada que pagó comisión maker.
+        """
+        with self.lock:
+            resultado = {}
+            for symbol, e in self.estadisticas.items():
+                total = e['cantidad_maker'] + e['cantidad_taker']
+                tiempos = list(e['tiempos'])
+                cerradas = e['llenadas'] + e['parciales'] + e['canceladas'] + e['rechazadas']
+                resultado[symbol] = {
+                    **{k: v for k, v in e.items() if k != 'tiempos'},
+                    'tasa_llenado': e['llenadas'] / cerradas if cerradas else None,
+                    'pct_maker': 100 * e['cantidad_maker'] / total if total else None,
+                    'llenado_medio_s': sum(tiempos) / len(tiempos) if tiempos else None,
+                    'llenado_max_s': max(tiempos) if tiempos else None,
+                }
+            return resultado
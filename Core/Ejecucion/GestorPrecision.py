@@ -1,50 +1,43 @@
-from Core.API.BinanceBase import BinanceBase
+from Core.API.GestorExchangeInfo import GestorExchangeInfo
 
-class GestorPrecision(BinanceBase):
+class GestorPrecision:
     """
-    Gestor de Precisión (Adaptado a tu BinanceBase con python-binance).
-    Obtiene los decimales OFICIALES directamente de la API.
+    Gestor de Precisión (Vista ligera sobre GestorExchangeInfo).
+    Obtiene los decimales OFICIALES de la caché compartida de exchangeInfo:
+    no crea clientes ni descarga nada por su cuenta.
     """
-    def __init__(self, symbol):
-        # 1. Inicializamos la base (Carga Config y conecta self.client)
-        super().__init__()
-        
+    def __init__(self, symbol, exchange_info=None):
         self.symbol = symbol
-        
+        self.exchange_info = exchange_info or GestorExchangeInfo.compartido()
+
         # Valores por defecto (Seguridad)
         self.decimales_precio = 2
         self.decimales_cantidad = 3
         self.tick_size = 0.01
         self.step_size = 0.001
-        
+        self.min_notional = 0.0
+
         self.detectado = False
 
     def detectar(self):
-        """Descarga la configuración oficial del par desde Binance."""
+        """Lee la configuración oficial del par desde la caché de exchangeInfo."""
         try:
-            # USAMOS LA LIBRERÍA (python-binance) que ya instanció BinanceBase
-            info = self.client.futures_exchange_info()
-            
-            for s in info['symbols']:
-                if s['symbol'] == self.symbol:
-                    # --- AQUI ESTÁ LA RESPUESTA A TU PREGUNTA ---
-                    # Binance nos dice exactamente cuántos decimales usar
-                    self.decimales_cantidad = int(s['quantityPrecision'])
-                    self.decimales_precio = int(s['pricePrecision'])
+            filtros = self.exchange_info.obtener(self.symbol)
 
-                    # También guardamos los filtros por si acaso
-                    for f in s['filters']:
-                        if f['filterType'] == 'PRICE_FILTER':
-                            self.tick_size = float(f['tickSize'])
-                        elif f['filterType'] == 'LOT_SIZE':
-                            self.step_size = float(f['stepSize'])
-                    
-                    self.detectado = True
-                    print(f"✅ Precisión {self.symbol}: Precio={self.decimales_precio} dec, Cantidad={self.decimales_cantidad} dec")
-                    return True
-            
-            print(f"⚠️ No se encontró información para el par {self.symbol}")
-            return False
+            if filtros is None:
+                print(f"⚠️ No se encontró información para el par {self.symbol}")
+                return False
+
+            # Binance nos dice exactamente cuántos decimales usar
+            self.decimales_cantidad = filtros['decimales_cantidad']
+            self.decimales_precio = filtros['decimales_precio']
+            self.tick_size = filtros['tick_size']
+            self.step_size = filtros['step_size']
+            self.min_notional = filtros['min_notional']
+
+            self.detectado = True
+            print(f"✅ Precisión {self.symbol}: Precio={self.decimales_precio} dec, Cantidad={self.decimales_cantidad} dec")
+            return True
 
         except Exception as e:
             print(f"⚠️ Error obteniendo precisión: {e}")
@@ -58,8 +51,17 @@ class GestorPrecision(BinanceBase):
             return int(round(precio))
         return float(f"{precio:.{self.decimales_precio}f}")
 
+    def ajustar_a_tick(self, precio):
+        """
+        Precio múltiplo exacto de tick_size (PRICE_FILTER) como texto listo para la API.
+        pricePrecision puede tener más decimales que el tick (BTCUSDT: 2 decimales, tick 0.10):
+        redondear solo por decimales da precios que Binance rechaza (-4014).
+        """
+        ticks = round(precio / self.tick_size)
+        return f"{ticks * self.tick_size:.{self.decimales_precio}f}"
+
     def redondear_cantidad(self, cantidad):
         """Redondea la cantidad (monedas) al número exacto de decimales permitidos."""
         if self.decimales_cantidad == 0:
             return int(cantidad)
-        return float(f"{cantidad:.{self.decimales_cantidad}f}")
\ No newline at end of file
+        return float(f"{cantidad:.{self.decimales_cantidad}f}")
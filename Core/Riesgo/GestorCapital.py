@@ -5,23 +5,35 @@ class GestorCapital:
     Administrador de Fondos y Cupos.
     Responsabilidad: Asegurar que no se viole el límite de posiciones simultáneas.
     """
-    def __init__(self, cliente_api):
-        self.api = cliente_api.client
+    def __init__(self, cliente_api, cuenta=None):
+        self.api = cliente_api.rest
         self.max_posiciones = Config.MAX_POSICIONES # Generalmente 4
+        self.cuenta = cuenta # GestorCuenta (libro local en memoria)
+        self.entradas = set() # Pares con Limit de entrada enviada (modo sin libro: aún no son posición)
 
     def hay_cupo_disponible(self):
         """
-        Consulta a la API cuántas posiciones tienen dinero invertido.
+        Consulta cuántos pares tienen dinero invertido.
+        Cuentan también las Limits de entrada esperando: si no, varias señales del mismo barrido
+        abrirían más pares que MAX_POSICIONES. Con el libro de cuenta todo sale de memoria. Sin libro,
+        1 petición de posiciones (peso 5) y las órdenes abiertas solo de los pares de registrar_entrada()
+        que aún no son posición (peso 1 c/u; las de todos los pares pesan 40).
         Retorna True si hay espacio para operar.
         """
         try:
-            posiciones_activas = 0
-            info = self.api.futures_position_information()
-            
-            for p in info:
+            if self.cuenta and self.cuenta.esta_sincronizado():
+                posiciones_activas = self.cuenta.contar_pares_ocupados()
+            else:
+                info = self.api.futures_position_information()
                 # Si positionAmt es diferente de 0, es una posición abierta
-                if float(p['positionAmt']) != 0:
-                    posiciones_activas += 1
+                ocupados = {p['symbol'] for p in info if float(p['positionAmt']) != 0}
+
+                for symbol in list(self.entradas):
+                    if symbol not in ocupados and self.api.futures_get_open_orders(symbol=symbol):
+                        ocupados.add(symbol) # Limit de entrada todavía esperando
+                    else:
+                        self.entradas.discard(symbol) # Ya es posición, o se canceló / venció
+                posiciones_activas = len(ocupados)
             
             if posiciones_activas >= self.max_posiciones:
                 # Opcional: imprimir solo si hay intento de operación para no spammear logs
@@ -34,6 +46,10 @@ class GestorCapital:
             # Ante la duda (error de red), por seguridad decimos que NO hay cupo
             return False
 
+    def registrar_entrada(self, symbol):
+        """Limit de entrada enviada: ocupa cupo hasta llenarse o cancelarse (modo sin libro)."""
+        self.entradas.add(symbol)
+
     def obtener_apalancamiento_actual(self, symbol):
         """Auxiliar para verificar configuración"""
         try:
@@ -1,8 +1,3 @@
-import time
-import hmac
-import hashlib
-import requests
-from urllib.parse import urlencode
 from binance.enums import ORDER_TYPE_MARKET
 from Core.Utils.Config import Config
 
@@ -13,7 +8,7 @@ class GestorPosicion:
     """
     def __init__(self, gestor_basico):
         self.basico = gestor_basico
-        self.client = gestor_basico.api # Acceso directo al cliente de python-binance
+        self.client = gestor_basico.api # ClienteREST compartido (mismos métodos futures_* que python-binance)
 
     def iniciar_protocolo_seguridad(self, symbol):
         """
@@ -39,8 +34,8 @@ class GestorPosicion:
         # 3. Limpieza de Órdenes Antiguas (Doble Barrido)
         self._limpiar_ordenes_zombie(symbol)
 
-        # 4. Cálculo del Límite de Dolor (-1%)
-        porcentaje_max_loss = 0.01 
+        # 4. Cálculo del Límite de Dolor (-Config.STOP_LOSS_PCT, 1% por defecto)
+        porcentaje_max_loss = Config.STOP_LOSS_PCT / 100
         
         precio_limite = 0.0
         side_cierre = ""
@@ -57,14 +52,17 @@ class GestorPosicion:
 
         # 5. Ejecución de la Regla de Seguridad
         if esta_fuera_de_limite:
-            print(f"   🚨 {symbol}: La pérdida actual excede el 1%. CERRANDO POSICIÓN AHORA.")
+            print(f"   🚨 {symbol}: La pérdida actual excede el {Config.STOP_LOSS_PCT}%. CERRANDO POSICIÓN AHORA.")
             self._cerrar_posicion_mercado(symbol, side_cierre, abs(cantidad))
         else:
-            print(f"   🛡️ {symbol}: Posición recuperable. Colocando STOP LOSS de emergencia al -1%.")
-            print(f"      • Entrada: {precio_entrada} | Stop: {precio_limite:.2f}")
+            print(f"   🛡️ {symbol}: Posición recuperable. Colocando STOP LOSS de emergencia al -{Config.STOP_LOSS_PCT}%.")
+            print(f"      • Entrada: {precio_entrada} | Stop: {precio_limite:.6g}")
             self._colocar_stop_emergencia(symbol, side_cierre, precio_limite)
 
     def _obtener_posicion_real(self, symbol):
+        cuenta = self.basico.cuenta
+        if cuenta and cuenta.esta_sincronizado():
+            return cuenta.obtener_detalle_posicion(symbol)
         try:
             info = self.client.futures_position_information(symbol=symbol)
             for p in info:
@@ -82,58 +80,41 @@ class GestorPosicion:
     def _limpiar_ordenes_zombie(self, symbol):
         """
         Elimina TANTO órdenes estándar como 'Algo Orders' (Conditional).
-        Usa requests directo para máxima fiabilidad con el endpoint nuevo.
+        Las dos cancelaciones salen a la vez por el pool del ClienteREST.
+        En vez de dormir a ciegas, se comprueba (peso 1 por tipo) que no quede nada abierto
+        y solo si queda algo se repite la cancelación de ese tipo (Doble Barrido).
         """
         print(f"   🧹 Iniciando limpieza profunda de órdenes en {symbol}...")
-        try:
-            # A) Limpieza Estándar (Librería)
-            self.client.futures_cancel_all_open_orders(symbol=symbol)
-            
-            # B) Limpieza de Algo Orders (Manual REST para evitar bugs de librería)
-            self._borrar_algo_orders_manual(symbol)
+        estandar, algo = self._cancelar_todo(symbol, (False, True))
+        if isinstance(estandar, Exception):
+            print(f"   ❌ Error en limpieza general: {estandar}")
+            return
 
-            time.sleep(2)
-            print(f"   ✅ Mesa limpia.")
+        if not isinstance(algo, Exception):
+            print("      • Algo Orders: Eliminadas.")
+        elif getattr(algo, 'code', None) == -2011:
+            print("      • Algo Orders: Ninguna pendiente.")
+        else:
+            print(f"      • Aviso Algo: {algo}")
 
-        except Exception as e:
-            print(f"   ❌ Error en limpieza general: {e}")
+        restantes = self.client.en_paralelo([
+            (self.client.futures_get_open_orders, {'symbol': symbol}),
+            (self.client.futures_get_open_orders, {'symbol': symbol, 'conditional': True}),
+        ])
+        repetir = tuple(condicional for condicional, abiertas in zip((False, True), restantes)
+                        if abiertas and not isinstance(abiertas, Exception))
+        if repetir:
+            print("      • Quedaban órdenes abiertas: segundo barrido.")
+            self._cancelar_todo(symbol, repetir)
+        print(f"   ✅ Mesa limpia.")
 
-    def _borrar_algo_orders_manual(self, symbol):
-        """
-        Petición manual DELETE /fapi/v1/algoOpenOrders
-        """
-        try:
-            base_url = Config.URL_FUTURES_TESTNET if Config.USAR_TESTNET else Config.URL_FUTURES_MAIN
-            endpoint = "/fapi/v1/algoOpenOrders"
-            
-            params = {
-                'symbol': symbol,
-                'timestamp': int(time.time() * 1000),
-                'recvWindow': 5000
-            }
-            
-            # Firma Manual
-            query_string = urlencode(params)
-            signature = hmac.new(
-                Config.BINANCE_SECRET_KEY.encode('utf-8'),
-                query_string.encode('utf-8'),
-                hashlib.sha256
-            ).hexdigest()
-            
-            url = f"{base_url}{endpoint}?{query_string}&signature={signature}"
-            headers = {'X-MBX-APIKEY': Config.BINANCE_API_KEY}
-            
-            res = requests.delete(url, headers=headers)
-            
-            if res.status_code == 200:
-                print("      • Algo Orders: Eliminadas (REST Manual).")
-            elif res.status_code == 400 and -2011 in res.json().values():
-                 print("      • Algo Orders: Ninguna pendiente.")
-            else:
-                 print(f"      • Aviso Algo: {res.json()}")
-
-        except Exception as e:
-            print(f"      • Error Algo Manual: {e}")
+    def _cancelar_todo(self, symbol, tipos):
+        """Cancela todas las órdenes del par; tipos = (condicional?, ...). Devuelve resultado o excepción por tipo."""
+        return self.client.en_paralelo([
+            (self.client.futures_cancel_all_open_orders, {'symbol': symbol, 'conditional': True} if condicional
+             else {'symbol': symbol})
+            for condicional in tipos
+        ])
 
     def _cerrar_posicion_mercado(self, symbol, side, cantidad):
         try:
@@ -150,7 +131,8 @@ class GestorPosicion:
 
     def _colocar_stop_emergencia(self, symbol, side, precio_stop):
         try:
-            precio_str = "{:.2f}".format(precio_stop)
+            # Al tick del par: "{:.2f}" fallaba en pares de 3+ decimales y en ticks de 0.1/0.5
+            precio_str = self.basico._obtener_precision(symbol).ajustar_a_tick(precio_stop)
             
             self.client.futures_create_order(
                 symbol=symbol,
@@ -0,0 +1,313 @@
+import threading
+import time
+from collections import deque
+from binance.enums import SIDE_BUY, SIDE_SELL
+from binance.exceptions import BinanceAPIException
+from Core.Utils.Config import Config
+from Core.Utils.GestorLogs import GestorLogs
+
+log = GestorLogs.obtener("riesgo")
+
+class GestorRiesgo:
+    """
+    Protección guiada por llenados.
+    - Cada llenado (también los parciales) que llega por ORDER_TRADE_UPDATE pone el par en cola;
+      un hilo propio coloca o recoloca el STOP_MARKET (y el TAKE_PROFIT_MARKET si hay
+      Config.TAKE_PROFIT_PCT) en milisegundos, sin esperar al bucle de estrategia.
+    - Los stops son closePosition: cubren SIEMPRE el tamaño real de la posición, así un parcial
+      nunca deja cantidad sin proteger ni obliga a cancelar y recolocar por tamaño. Solo se
+      recolocan si el precio medio de entrada mueve el nivel más de Config.REAJUSTE_STOP_PCT, y
+      siempre el nuevo antes de quitar el viejo (ver _reemplazar).
+    - armar(): el stop sale en paralelo con la Limit de entrada (Config.PREARMAR_STOP), así el
+      primer llenado ya nace protegido.
+    - Precios al tick del par (GestorPrecision.ajustar_a_tick), nunca "{:.2f}".
+    - Tras cada reconciliación de GestorCuenta las posiciones se vuelven a sembrar desde el libro:
+      un llenado perdido (o un stop disparado sin evento) no deja el stop desfasado para siempre.
+    - metricas(): latencia desde que llega el llenado hasta tener la posición protegida.
+    """
+    def __init__(self, ejecutor, cuenta=None, stop_pct=None, tp_pct=None):
+        self.ejecutor = ejecutor
+        self.api = ejecutor.api
+        self.cuenta = cuenta
+        self.stop_pct = stop_pct or Config.STOP_LOSS_PCT
+        self.tp_pct = Config.TAKE_PROFIT_PCT if tp_pct is None else tp_pct
+        self.posiciones = {}   # {'BTCUSDT': [cantidad con signo, coste de entrada]} reconstruida con los llenados
+        self.protecciones = {} # {'BTCUSDT': {'lado', 'stop', 'ids': [algoId...]}}
+        self.pendientes = {}   # {'BTCUSDT': instante (monotonic) del primer llenado sin atender}
+        self.ultimos_llenados = {} # {'BTCUSDT': time.time() del último llenado} (no pisar con fotos más viejas)
+        self.latencias = deque(maxlen=500) # ms desde el llenado hasta la posición protegida
+        self.contadores = {'llenados': 0, 'colocaciones': 0, 'recolocaciones': 0, 'prearmados': 0,
+                           'fallos': 0, 'cierres_emergencia': 0, 'resiembras': 0}
+        self.condicion = threading.Condition()
+        self.activo = False
+        self.hilo = None
+        if cuenta:
+            cuenta.oyentes.append(self.procesar_orden)
+            cuenta.oyentes_reconciliacion.append(self.resembrar)
+
+    def iniciar(self):
+        self.activo = True
+        self.hilo = threading.Thread(target=self._trabajar, name="riesgo", daemon=True)
+        self.hilo.start()
+        tp = f", TP {self.tp_pct}%" if self.tp_pct else ""
+        print(f"🛡️ Protección por llenado activa: SL {self.stop_pct}%{tp}.")
+
+    def detener(self):
+        with self.condicion:
+            self.activo = False
+            self.condicion.notify()
+
+    # ------------------------------------------------------------------
+    # Niveles
+    # ------------------------------------------------------------------
+    def _niveles(self, symbol, lado_cierre, entrada):
+        """(stop, tp) como texto al tick del par para cerrar con 'lado_cierre'. tp None si no hay TP."""
+        gp = self.ejecutor._obtener_precision(symbol)
+        signo = -1 if lado_cierre == SIDE_SELL else 1 # LONG: stop por debajo; SHORT: por encima
+        stop = gp.ajustar_a_tick(entrada * (1 + signo * self.stop_pct / 100))
+        tp = gp.ajustar_a_tick(entrada * (1 - signo * self.tp_pct / 100)) if self.tp_pct else None
+        return stop, tp
+
+    def _colocar(self, symbol, lado_cierre, stop, tp):
+        """Stop (y TP) closePosition a la vez por el pool REST. Devuelve los algoId colocados."""
+        llamadas = [(self.api.futures_create_order, {'symbol': symbol, 'side': lado_cierre, 'type': "STOP_MARKET",
+                                                     'stopPrice': stop, 'closePosition': True})]
+        if tp:
+            llamadas.append((self.api.futures_create_order, {'symbol': symbol, 'side': lado_cierre,
+                                                             'type': "TAKE_PROFIT_MARKET", 'stopPrice': tp,
+                                                             'closePosition': True}))
+        resultados = self.api.en_paralelo(llamadas)
+        for r in resultados:
+            if isinstance(r, Exception):
+                raise r
+        return [r.get('algoId', r.get('orderId')) for r in resultados]
+
+    def _colocar_con_limpieza(self, symbol, lado_cierre, stop, tp):
+        """Con un stop closePosition ajeno en el libro (ej. el de emergencia del arranque) Binance
+        responde -4130: se limpian las Algo Orders del par y se reintenta una vez."""
+        try:
+            return self._colocar(symbol, lado_cierre, stop, tp)
+        except BinanceAPIException as e:
+            if e.code != -4130:
+                raise
+            self.api.futures_cancel_all_open_orders(symbol=symbol, conditional=True)
+            return self._colocar(symbol, lado_cierre, stop, tp)
+
+    def _reemplazar(self, symbol, actual, lado_cierre, stop, tp, cantidad):
+        """
+        Recoloca el stop sin dejar la posición al descubierto: primero el nuevo, después se quita el viejo.
+        Binance no admite dos closePosition en el mismo sentido (-4130): entonces un STOP_MARKET
+        reduceOnly por la cantidad actual hace de puente mientras se cambia el closePosition.
+        """
+        try:
+            ids = self._colocar(symbol, lado_cierre, stop, tp)
+        except BinanceAPIException as e:
+            if e.code != -4130:
+                raise
+            cantidad = self.ejecutor._obtener_precision(symbol).redondear_cantidad(abs(cantidad))
+            puente = self.api.futures_create_order(symbol=symbol, side=lado_cierre, type="STOP_MARKET",
+                                                   stopPrice=stop, quantity=cantidad, reduceOnly=True)
+            puente = {'ids': [puente.get('algoId', puente.get('orderId'))]}
+            self._cancelar(symbol, actual)
+            try:
+                ids = self._colocar(symbol, lado_cierre, stop, tp)
+            except Exception as e:
+                # Queda el puente (cubre la cantidad actual); el próximo llenado o reconciliación lo recoloca
+                log.warning("⚠️ %s: no se pudo recolocar el stop closePosition (%s). Sigue el puente %s.",
+                            symbol, e, stop)
+                self.contadores['fallos'] += 1
+                return puente['ids']
+            self._cancelar(symbol, puente)
+            return ids
+        self._cancelar(symbol, actual)
+        return ids
+
+    def _cancelar(self, symbol, proteccion):
+        for algo_id in proteccion['ids']:
+            try:
+                self.api.futures_cancel_order(symbol=symbol, algoId=algo_id)
+            except Exception:
+                pass # Ya disparada o cancelada
+
+    # ------------------------------------------------------------------
+    # Pre-armado con la entrada
+    # ------------------------------------------------------------------
+    def armar(self, symbol, side_entrada, precio_entrada):
+        """
+        Stop de la futura posición, enviado a la vez que la Limit de entrada (ver GestorOrdenes.abrir).
+        Los stops van al endpoint de Algo Orders, que no admite lotes junto a la entrada:
+        la alternativa es mandarlos en paralelo por el pool keep-alive (un solo viaje de ida y vuelta).
+        """
+        lado_cierre = SIDE_SELL if side_entrada == SIDE_BUY else SIDE_BUY
+        with self.condicion:
+            actual = self.protecciones.get(symbol)
+        if actual and actual['lado'] == lado_cierre:
+            return True # Ya hay stop en ese sentido (entrada que amplía una posición)
+        stop, tp = self._niveles(symbol, lado_cierre, precio_entrada)
+        try:
+            ids = self._colocar(symbol, lado_cierre, stop, tp)
+        except Exception as e:
+            log.warning("⚠️ %s: no se pudo pre-armar el stop (%s). Se colocará con el llenado.", symbol, e)
+            return False
+        with self.condicion:
+            self.protecciones[symbol] = {'lado': lado_cierre, 'stop': float(stop), 'ids': ids}
+            self.contadores['prearmados'] += 1
+        return True
+
+    def desarmar(self, symbol):
+        """La entrada no llegó a llenarse: fuera el stop pre-armado (si seguimos sin posición)."""
+        with self.condicion:
+            if self._cantidad(symbol):
+                return
+            proteccion = self.protecciones.pop(symbol, None)
+        if proteccion:
+            self._cancelar(symbol, proteccion)
+
+    # ------------------------------------------------------------------
+    # Llenados (hilo del User Data Stream)
+    # ------------------------------------------------------------------
+    def _cantidad(self, symbol):
+        posicion = self.posiciones.get(symbol)
+        return posicion[0] if posicion else 0.0
+
+    def procesar_orden(self, o):
+        """ORDER_TRADE_UPDATE: rehace la posición con cada llenado y encola el par para protegerlo."""
+        symbol = o['s']
+        if o.get('x') == 'TRADE' and float(o.get('l', 0)):
+            cantidad, precio = float(o['l']), float(o['L'])
+            with self.condicion:
+                posicion = self.posiciones.get(symbol)
+                if posicion is None:
+                    # Primera vez que vemos el par: partimos de la posición del libro (el ACCOUNT_UPDATE
+                    # de este llenado llega después del ORDER_TRADE_UPDATE)
+                    base = self.cuenta.obtener_detalle_posicion(symbol) if self.cuenta else None
+                    anterior = float(base['positionAmt']) if base else 0.0
+                    coste = abs(anterior) * float(base['entryPrice']) if base else 0.0
+                    posicion = self.posiciones[symbol] = [anterior, coste]
+                self._aplicar_llenado(posicion, cantidad if o['S'] == SIDE_BUY else -cantidad, precio)
+                self.ultimos_llenados[symbol] = time.time()
+                self.contadores['llenados'] += 1
+                self.pendientes.setdefault(symbol, time.monotonic())
+                self.condicion.notify()
+        elif o.get('X') in ('CANCELED', 'EXPIRED') and o.get('o') == 'LIMIT' and not float(o.get('z', 0)):
+            # Entrada vencida sin llenarse: el stop pre-armado sobra
+            with self.condicion:
+                if not self._cantidad(symbol) and symbol in self.protecciones:
+                    self.pendientes.setdefault(symbol, time.monotonic())
+                    self.condicion.notify()
+
+    def resembrar(self, inicio):
+        """
+        Foto REST recién aplicada en GestorCuenta (empezó a bajarse en 'inicio'): las posiciones
+        reconstruidas con llenados vuelven a partir del libro. Los pares con llenados posteriores a
+        la foto se respetan; los que cambian de tamaño se encolan para recolocar (o quitar) su stop.
+        """
+        with self.condicion:
+            for symbol in set(self.posiciones) | set(self.protecciones):
+                if self.ultimos_llenados.get(symbol, 0) >= inicio or symbol in self.pendientes:
+                    continue
+                base = self.cuenta.obtener_detalle_posicion(symbol)
+                cantidad = float(base['positionAmt']) if base else 0.0
+                coste = abs(cantidad) * float(base['entryPrice']) if base else 0.0
+                anterior = self._cantidad(symbol)
+                self.posiciones[symbol] = [cantidad, coste]
+                if cantidad != anterior:
+                    log.warning("⚠️ %s: posición %s según los llenados, %s según la cuenta. Reajustando stop.",
+                                symbol, anterior, cantidad)
+                    self.contadores['resiembras'] += 1
+                    self.pendientes[symbol] = time.monotonic()
+                    self.condicion.notify()
+
+    @staticmethod
+    def _aplicar_llenado(posicion, delta, precio):
+        anterior = posicion[0]
+        nueva = round(anterior + delta, 8)
+        if anterior == 0 or (anterior > 0) == (delta > 0):
+            posicion[1] += abs(delta) * precio # Amplía: suma al coste de entrada
+        elif nueva == 0 or (nueva > 0) == (anterior > 0):
+            posicion[1] *= abs(nueva) / abs(anterior) # Reduce: el precio medio no cambia
+        else:
+            posicion[1] = abs(nueva) * precio # Dio la vuelta: el resto entra a este precio
+        posicion[0] = nueva
+
+    # ------------------------------------------------------------------
+    # Hilo de protección
+    # ------------------------------------------------------------------
+    def _trabajar(self):
+        while True:
+            with self.condicion:
+                while self.activo and not self.pendientes:
+                    self.condicion.wait()
+                if not self.activo:
+                    return
+                symbol, recibido = self.pendientes.popitem()
+            try:
+                self.proteger(symbol, recibido)
+            except Exception as e:
+                self.contadores['fallos'] += 1
+                log.error("❌ %s: error protegiendo la posición: %s", symbol, e)
+
+    def proteger(self, symbol, recibido=None):
+        """Deja el par con el stop que corresponde a su posición actual (o sin stops si está plano)."""
+        with self.condicion:
+            posicion = list(self.posiciones.get(symbol) or [0.0, 0.0])
+            actual = self.protecciones.get(symbol)
+        cantidad, coste = posicion
+        if cantidad == 0:
+            if actual:
+                with self.condicion:
+                    self.protecciones.pop(symbol, None)
+                self._cancelar(symbol, actual)
+            return
+
+        lado_cierre = SIDE_SELL if cantidad > 0 else SIDE_BUY
+        entrada = coste / abs(cantidad)
+        stop, tp = self._niveles(symbol, lado_cierre, entrada)
+        cubierta = actual and actual['lado'] == lado_cierre and \
+            abs(float(stop) - actual['stop']) / float(stop) * 100 <= Config.REAJUSTE_STOP_PCT
+        if not cubierta:
+            try:
+                if actual and actual['lado'] == lado_cierre:
+                    ids = self._reemplazar(symbol, actual, lado_cierre, stop, tp, cantidad)
+                else:
+                    ids = self._colocar_con_limpieza(symbol, lado_cierre, stop, tp)
+                    if actual:
+                        self._cancelar(symbol, actual) # La posición dio la vuelta: el viejo cerraba al otro lado
+            except BinanceAPIException as e:
+                with self.condicion:
+                    self.protecciones.pop(symbol, None)
+                if e.code == -2021:
+                    # El precio ya pasó el stop: no hay nada que proteger, se cierra ya
+                    log.warning("🚨 %s: el precio ya superó el stop %s. Cerrando a mercado.", symbol, stop)
+                    if actual:
+                        self._cancelar(symbol, actual)
+                    self.ejecutor.cerrar_posicion_mercado(symbol, cantidad)
+                    self.contadores['cierres_emergencia'] += 1
+                    return
+                raise
+            with self.condicion:
+                self.protecciones[symbol] = {'lado': lado_cierre, 'stop': float(stop), 'ids': ids}
+                self.contadores['recolocaciones' if actual else 'colocaciones'] += 1
+            log.info("🛡️ %s: stop %s%s para %s (entrada media %.6g).", symbol, stop, f" / TP {tp}" if tp else "",
+                     abs(cantidad), entrada, extra={'datos': {'par': symbol, 'stop': stop, 'tp': tp,
+                                                              'cantidad': cantidad, 'entrada': entrada}})
+
+        if recibido is not None:
+            with self.condicion:
+                self.latencias.append((time.monotonic() - recibido) * 1000)
+
+    # ------------------------------------------------------------------
+    # Métricas
+    # ------------------------------------------------------------------
+    def metricas(self):
+        """Contadores y latencia llenado -> protección (ms): última, p50, p99 y máxima."""
+        with self.condicion:
+            latencias = sorted(self.latencias)
+            ultima = self.latencias[-1] if self.latencias else None
+            resultado = dict(self.contadores, protegidos=sorted(self.protecciones))
+        percentil = lambda p: latencias[min(len(latencias) - 1, int(p * len(latencias)))] if latencias else None
+        resultado['latencia_proteccion_ms'] = {
+            'ultima': ultima, 'p50': percentil(0.5), 'p99': percentil(0.99),
+            'max': latencias[-1] if latencias else None, 'muestras': len(latencias),
+        }
+        return resultado
@@ -0,0 +1,223 @@
+import sys
+import os
+import json
+import time
+import numpy as np
+from binance.enums import SIDE_BUY, SIDE_SELL
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from Core.Utils.Config import Config
+from Core.Datos.GestorAnalisis import GestorAnalisis
+from Core.Datos.GestorHistorico import GestorHistorico
+from Core.Simulacion.SimuladorBasico import SimuladorBasico
+from Estrategias.LogicaRSI import LogicaRSI
+
+class GestorBacktest:
+    """
+    Motor de Backtest Offline.
+    Reproduce la lógica REAL de BotTrading (LogicaRSI + cupo de posiciones + sizing de
+    GestorBasico) sobre velas guardadas, con un SimuladorBasico en lugar de Binance.
+    Rápido: el RSI se calcula vectorizado una vez por par y el bucle solo salta entre
+    velas con señal (RSI fuera de banda) o con llenados pendientes.
+    Evalúa al cierre de cada vela (equivale a Config.SOLO_CIERRE_VELA).
+    """
+    def __init__(self, estrategias, velas, balance_inicial=1000.0, timeout_velas=None, deslizamiento=0.0):
+        self.estrategias = {par: cfg for par, cfg in estrategias.items() if par in velas and len(velas[par])}
+        self.pares = list(self.estrategias)
+        self.balance_inicial = balance_inicial
+        self.timeout_velas = timeout_velas
+        self.deslizamiento = deslizamiento
+        self.analista = GestorAnalisis()
+        self._alinear(velas)
+
+    def _alinear(self, velas):
+        """Malla temporal común a todos los pares (NaN donde un par aún no cotizaba)."""
+        self.tiempos = np.unique(np.concatenate([velas[par]['timestamp'] for par in self.pares]))
+        n = len(self.tiempos)
+        self.mercado = {}
+        self.rsi = np.full((len(self.pares), n), np.nan)
+        for i, par in enumerate(self.pares):
+            v = velas[par]
+            idx = np.searchsorted(self.tiempos, v['timestamp'])
+            columnas = {}
+            for col in ('high', 'low', 'close'):
+                serie = np.full(n, np.nan)
+                serie[idx] = v[col]
+                columnas[col] = serie
+            # Cierre arrastrado para valorar posiciones en velas sin dato
+            cierre = columnas['close']
+            validos = np.where(~np.isnan(cierre), np.arange(n), 0)
+            np.maximum.accumulate(validos, out=validos)
+            columnas['close_ffill'] = cierre[validos]
+            self.mercado[par] = columnas
+
+            periodo = self.estrategias[par]["indicadores"].get("rsi_periodo", 14)
+            self.rsi[i, idx] = self.analista.calcular_rsi_serie(v['close'], periodo)
+
+    def ejecutar(self, rsi=None):
+        """
+        Corre la simulación completa. 'rsi' permite inyectar una matriz ya calculada
+        (la usa el optimizador para no recalcular por cada combinación de umbrales).
+        """
+        inicio_reloj = time.perf_counter()
+        rsi = self.rsi if rsi is None else rsi
+        sim = SimuladorBasico(
+            self.mercado, self.balance_inicial, deslizamiento=self.deslizamiento,
+            timeout_velas=self.timeout_velas
+        )
+
+        compra = np.array([[self.estrategias[p]["indicadores"]["rsi_sobreventa"]] for p in self.pares])
+        venta = np.array([[self.estrategias[p]["indicadores"]["rsi_sobrecompra"]] for p in self.pares])
+        with np.errstate(invalid='ignore'):
+            senales = (rsi < compra) | (rsi > venta)
+        tiempos_senal = np.flatnonzero(senales.any(axis=0))
+
+        k = 0
+        while True:
+            t_senal = tiempos_senal[k] if k < len(tiempos_senal) else None
+            t_orden = sim.proximo_evento()
+            candidatos = [t for t in (t_senal, t_orden) if t is not None]
+            if not candidatos:
+                break
+            t = min(candidatos)
+            t = int(t)
+            sim.avanzar(t)
+            if t_senal is None or t < t_senal:
+                continue
+            k += 1
+
+            # Mismo orden de evaluación que pares_activos en vivo
+            for i in np.flatnonzero(senales[:, t]):
+                self._evaluar(sim, self.pares[i], float(rsi[i, t]), t)
+
+        # Las posiciones que siguen abiertas se liquidan al último cierre para el reporte
+        sim.avanzar(len(self.tiempos) - 1)
+        for par in list(sim.posiciones):
+            sim.cerrar_posicion_mercado(par, sim.obtener_posicion(par), motivo="FIN")
+
+        resultado = self._resumen(sim)
+        resultado["segundos"] = time.perf_counter() - inicio_reloj
+        return resultado
+
+    def _evaluar(self, sim, par, rsi_actual, t):
+        """Réplica de BotTrading.ejecutar_estrategia para un par en la vela t."""
+        config = self.estrategias[par]
+        precio = float(self.mercado[par]['close'][t])
+        if np.isnan(precio):
+            return
+        rsi_compra = config["indicadores"]["rsi_sobreventa"]
+        rsi_venta = config["indicadores"]["rsi_sobrecompra"]
+        posicion = sim.obtener_posicion(par)
+        pendientes = sim.verificar_ordenes_pendientes(par)
+
+        accion = LogicaRSI.decidir(rsi_actual, rsi_compra, rsi_venta, posicion, pendientes)
+
+        if accion in (LogicaRSI.ABRIR_LONG, LogicaRSI.ABRIR_SHORT):
+            if not sim.hay_cupo_disponible():
+                return
+            cant, _ = sim.calcular_cantidad(
+                par, config.get("porcentaje_balance", 1), precio,
+                config.get("apalancamiento", 1), config.get("decimales", 3)
+            )
+            if cant > 0:
+                side = SIDE_BUY if accion == LogicaRSI.ABRIR_LONG else SIDE_SELL
+                sim.colocar_orden_limit(par, side, cant, precio)
+        elif accion == LogicaRSI.CERRAR:
+            sim.cerrar_posicion_mercado(par, posicion)
+
+    def _curva_capital(self, sim):
+        """Balance realizado + PnL no realizado, vela a vela (vectorizado por operación)."""
+        n = len(self.tiempos)
+        curva = np.full(n, self.balance_inicial)
+        if sim.cambios_balance:
+            cambios = sorted(sim.cambios_balance, key=lambda c: c[0])
+            t_cambio = np.array([c[0] for c in cambios])
+            saldo = np.array([c[1] for c in cambios])
+            idx = np.searchsorted(t_cambio, np.arange(n), side='right') - 1
+            curva = np.where(idx >= 0, saldo[np.maximum(idx, 0)], self.balance_inicial)
+        for op in sim.operaciones:
+            signo = 1 if op['lado'] == 'LONG' else -1
+            tramo = slice(op['t_entrada'], op['t_salida'])
+            curva[tramo] += signo * op['cantidad'] * (self.mercado[op['symbol']]['close_ffill'][tramo] - op['entrada'])
+        return curva
+
+    def _resumen(self, sim):
+        curva = self._curva_capital(sim)
+        maximo = np.maximum.accumulate(curva)
+        drawdown = (curva - maximo) / maximo
+        pnls = np.array([op['pnl'] for op in sim.operaciones])
+        por_par = {}
+        for op in sim.operaciones:
+            r = por_par.setdefault(op['symbol'], {'operaciones': 0, 'pnl': 0.0})
+            r['operaciones'] += 1
+            r['pnl'] += op['pnl']
+        return {
+            'balance_final': sim.balance,
+            'pnl': sim.balance - self.balance_inicial,
+            'pnl_pct': (sim.balance / self.balance_inicial - 1) * 100,
+            'max_drawdown_pct': float(drawdown.min() * 100) if len(drawdown) else 0.0,
+            'operaciones': len(sim.operaciones),
+            'acierto_pct': float((pnls > 0).mean() * 100) if len(pnls) else 0.0,
+            'comisiones': float(sum(op['comisiones'] for op in sim.operaciones)),
+            'por_par': por_par,
+            'curva': curva,
+            'log': sim.operaciones,
+        }
+
+    def imprimir_reporte(self, r):
+        print("\n" + "=" * 60)
+        print("📈 RESULTADO DEL BACKTEST")
+        print("=" * 60)
+        print(f"   • Velas simuladas: {len(self.tiempos)} x {len(self.pares)} pares ({r['segundos']:.2f}s)")
+        print(f"   • Balance final: ${r['balance_final']:,.2f} ({r['pnl_pct']:+.2f}%)")
+        print(f"   • Máximo Drawdown: {r['max_drawdown_pct']:.2f}%")
+        print(f"   • Operaciones: {r['operaciones']} | Acierto: {r['acierto_pct']:.1f}%")
+        print(f"   • Comisiones pagadas: ${r['comisiones']:,.2f}")
+        for par, datos in r['por_par'].items():
+            print(f"     - {par:<12} {datos['operaciones']:>5} ops | PnL ${datos['pnl']:+,.2f}")
+
+    def guardar_log(self, r, ruta):
+        """Exporta el log de operaciones a CSV."""
+        with open(ruta, 'w') as f:
+            f.write("symbol,lado,cantidad,entrada,salida,fecha_entrada,fecha_salida,pnl,comisiones,motivo\n")
+            for op in r['log']:
+                f.write(f"{op['symbol']},{op['lado']},{op['cantidad']},{op['entrada']},{op['salida']},"
+                        f"{int(self.tiempos[op['t_entrada']])},{int(self.tiempos[op['t_salida']])},"
+                        f"{op['pnl']:.6f},{op['comisiones']:.6f},{op['motivo']}\n")
+
+
+def cargar_estrategias():
+    ruta = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'Estrategias', 'estrategias.json')
+    with open(ruta, 'r') as f:
+        return json.load(f)
+
+def cargar_velas(estrategias, historico=None):
+    """Velas cerradas de cada par activo desde la caché en disco (Data/velas)."""
+    historico = historico or GestorHistorico()
+    return {
+        par: historico.cargar(par, cfg["timeframe"])
+        for par, cfg in estrategias.items() if cfg.get("activo", False)
+    }
+
+if __name__ == "__main__":
+    # Uso: python Core/Simulacion/GestorBacktest.py [--descargar DIAS]
+    estrategias = cargar_estrategias()
+    if "--descargar" in sys.argv:
+        from Core.API.BinanceBase import BinanceBase
+        from Core.Datos.GestorVelas import GestorVelas
+        dias = float(sys.argv[sys.argv.index("--descargar") + 1])
+        velas = GestorVelas(BinanceBase(), historico=GestorHistorico())
+        for par, cfg in estrategias.items():
+            if cfg.get("activo", False):
+                velas.descargar_historia(par, cfg["timeframe"], dias)
+
+    motor = GestorBacktest(estrategias, cargar_velas(estrategias))
+    if not motor.pares:
+        print("⚠️ No hay velas en Data/velas. Ejecuta con --descargar DIAS primero.")
+        sys.exit()
+    resultado = motor.ejecutar()
+    motor.imprimir_reporte(resultado)
+    ruta_log = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'Data', 'backtest_operaciones.csv')
+    motor.guardar_log(resultado, ruta_log)
+    print(f"📝 Log de operaciones: {os.path.abspath(ruta_log)}")
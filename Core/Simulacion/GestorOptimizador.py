@@ -0,0 +1,281 @@
+import sys
+import os
+import json
+import time
+import copy
+import itertools
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from Core.Utils.Config import Config
+from Core.Datos.GestorAnalisis import GestorAnalisis
+from Core.Simulacion.GestorBacktest import cargar_estrategias, cargar_velas
+
+RUTA_CANDIDATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'Estrategias', 'estrategias_candidata.json')
+
+# Espacio de búsqueda por defecto (se puede pasar otro al constructor)
+ESPACIO_DEFECTO = {
+    "rsi_periodo": [7, 9, 14, 21],
+    "rsi_sobreventa": [15, 20, 25, 30, 35],
+    "rsi_sobrecompra": [65, 70, 75, 80, 85],
+    "apalancamiento": [1, 3, 5, 8, 10],
+    "porcentaje_balance": [5, 10, 15, 20],
+}
+
+# Velas de cada par en memoria compartida: cada proceso las mapea sin copiarlas
+_VELAS_WORKER = {}
+
+def _conectar_memoria(bloques):
+    """Inicializador del proceso: abre los bloques compartidos {par: (nombre, n)} como arrays (3, n)."""
+    for par, (nombre, n) in bloques.items():
+        shm = shared_memory.SharedMemory(name=nombre)
+        _VELAS_WORKER[par] = (shm, np.ndarray((3, n), dtype=np.float64, buffer=shm.buf))
+
+def operaciones_par(high, low, close, rsi, rsi_compra, rsi_venta, timeout_velas=None):
+    """
+    Secuencia de operaciones de UN par con la misma regla que LogicaRSI + SimuladorBasico
+    (Limit al cierre de la vela de señal, llenado en la primera vela posterior que toca el
+    precio, salida a mercado al cierre de la primera vela con señal contraria).
+    No depende del tamaño de la posición, así que se calcula una vez por juego de umbrales.
+    Devuelve arrays (lado, entrada, salida) con lado = +1 LONG / -1 SHORT.
+    """
+    n = len(close)
+    with np.errstate(invalid='ignore'):
+        idx_compra = np.flatnonzero(rsi < rsi_compra)
+        idx_venta = np.flatnonzero(rsi > rsi_venta)
+        idx_senal = np.flatnonzero((rsi < rsi_compra) | (rsi > rsi_venta))
+
+    lados, entradas, salidas = [], [], []
+    t = 0
+    while True:
+        # 1. Sin posición: primera señal desde t
+        k = np.searchsorted(idx_senal, t)
+        if k >= len(idx_senal):
+            break
+        t_senal = int(idx_senal[k])
+        lado = 1 if rsi[t_senal] < rsi_compra else -1
+        precio = close[t_senal]
+
+        # 2. Llenado de la Limit (bloques crecientes, como SimuladorBasico._buscar_llenado)
+        serie = low if lado == 1 else high
+        fin = n if timeout_velas is None else min(n, t_senal + 1 + timeout_velas)
+        t_llenado, inicio, bloque = None, t_senal + 1, 256
+        while inicio < fin:
+            tramo = serie[inicio:min(fin, inicio + bloque)]
+            toca = tramo <= precio if lado == 1 else tramo >= precio
+            if toca.any():
+                t_llenado = inicio + int(np.argmax(toca))
+                break
+            inicio += bloque
+            bloque *= 4
+        if t_llenado is None:
+            if timeout_velas is None:
+                break # GTC nunca llenada: el par queda bloqueado hasta el final
+            t = t_senal + timeout_velas # Vencida: se vuelve a buscar señal desde el vencimiento
+            continue
+
+        # 3. Salida en la primera señal contraria (incluida la vela del llenado)
+        contrarias = idx_venta if lado == 1 else idx_compra
+        j = np.searchsorted(contrarias, t_llenado)
+        if j < len(contrarias):
+            t_salida = int(contrarias[j])
+            salida = close[t_salida]
+            t = t_salida + 1
+        else:
+            salida = close[n - 1] # Liquidada al final para el reporte (motivo FIN)
+            t = n
+
+        lados.append(lado)
+        entradas.append(precio)
+        salidas.append(salida)
+        if t >= n:
+            break
+
+    return np.array(lados, dtype=np.float64), np.array(entradas), np.array(salidas)
+
+def evaluar_tamanos(lados, entradas, salidas, factores, deslizamiento=0.0,
+                    comision_maker=Config.COMISION_MAKER, comision_taker=Config.COMISION_TAKER):
+    """
+    Aplica a la misma secuencia de operaciones todos los tamaños a la vez.
+    factor = apalancamiento * porcentaje / 100 (fracción del balance expuesta).
+    Con cantidad = balance * factor / entrada, cada operación multiplica el balance por
+    (1 + factor * r), así que una matriz (factores x operaciones) resuelve todo el barrido.
+    Devuelve (pnl_pct, max_drawdown_pct, acierto_pct) por factor.
+    """
+    factores = np.asarray(factores, dtype=np.float64)
+    if len(lados) == 0:
+        ceros = np.zeros(len(factores))
+        return ceros, ceros, ceros
+
+    salidas = salidas * np.where(lados > 0, 1 - deslizamiento, 1 + deslizamiento)
+    r = lados * (salidas - entradas) / entradas - comision_maker - comision_taker * salidas / entradas
+
+    multiplicadores = 1 + factores[:, None] * r[None, :]
+    multiplicadores = np.maximum(multiplicadores, 0.0) # Una pérdida mayor que el margen liquida la cuenta
+    curva = np.cumprod(multiplicadores, axis=1)
+    curva = np.concatenate([np.ones((len(factores), 1)), curva], axis=1)
+    maximo = np.maximum.accumulate(curva, axis=1)
+    drawdown = ((curva - maximo) / maximo).min(axis=1)
+
+    pnl_pct = (curva[:, -1] - 1) * 100
+    acierto = (multiplicadores > 1).mean(axis=1) * 100
+    return pnl_pct, drawdown * 100, acierto
+
+def _evaluar_periodo(tarea):
+    """Trabajo de un proceso: un par y un rsi_periodo -> todas las combinaciones restantes."""
+    par, periodo, umbrales, tamanos, timeout_velas, deslizamiento = tarea
+    _, velas = _VELAS_WORKER[par]
+    high, low, close = velas
+    rsi = GestorAnalisis().calcular_rsi_serie(close, periodo) # Una vez por periodo
+
+    factores = [lev * pct / 100 for lev, pct in tamanos]
+    resultados = []
+    for compra, venta in umbrales:
+        lados, entradas, salidas = operaciones_par(high, low, close, rsi, compra, venta, timeout_velas)
+        pnl, dd, acierto = evaluar_tamanos(lados, entradas, salidas, factores, deslizamiento)
+        for (lev, pct), p, d, a in zip(tamanos, pnl, dd, acierto):
+            resultados.append({
+                'par': par, 'rsi_periodo': periodo, 'rsi_sobreventa': compra, 'rsi_sobrecompra': venta,
+                'apalancamiento': lev, 'porcentaje_balance': pct,
+                'pnl_pct': float(p), 'max_drawdown_pct': float(d),
+                'acierto_pct': float(a), 'operaciones': len(lados),
+            })
+    return resultados
+
+class GestorOptimizador:
+    """
+    Barrido de Parámetros de estrategias.json (Grid o Aleatorio) en paralelo.
+    - Las velas viven en memoria compartida: los procesos no las copian.
+    - El RSI se calcula una vez por (par, rsi_periodo).
+    - La secuencia de operaciones se calcula una vez por juego de umbrales y los
+      tamaños (apalancamiento x porcentaje) se evalúan vectorizados sobre ella.
+    Cada par se evalúa aislado (sin el cupo global de MAX_POSICIONES); la candidata
+    final conviene validarla con GestorBacktest sobre todos los pares juntos.
+    """
+    def __init__(self, estrategias, velas, espacio=None, procesos=None, timeout_velas=None, deslizamiento=0.0):
+        self.estrategias = {par: cfg for par, cfg in estrategias.items() if par in velas and len(velas[par])}
+        self.velas = velas
+        self.espacio = espacio or ESPACIO_DEFECTO
+        self.procesos = procesos or os.cpu_count() or 1
+        self.timeout_velas = timeout_velas
+        self.deslizamiento = deslizamiento
+
+    def _tareas(self, muestras=None, semilla=None):
+        """Una tarea por (par, periodo). Con 'muestras' se sortea ese número de combinaciones por par."""
+        e = self.espacio
+        umbrales = [(c, v) for c, v in itertools.product(e["rsi_sobreventa"], e["rsi_sobrecompra"]) if c < v]
+        tamanos = list(itertools.product(e["apalancamiento"], e["porcentaje_balance"]))
+        azar = np.random.default_rng(semilla)
+
+        tareas = []
+        for par in self.estrategias:
+            if muestras is None:
+                for periodo in e["rsi_periodo"]:
+                    tareas.append((par, periodo, umbrales, tamanos, self.timeout_velas, self.deslizamiento))
+                continue
+            # Búsqueda aleatoria: se agrupa lo sorteado por periodo para seguir reutilizando el RSI
+            combos = list(itertools.product(e["rsi_periodo"], range(len(umbrales))))
+            elegidos = azar.choice(len(combos), size=min(muestras, len(combos)), replace=False)
+            por_periodo = {}
+            for i in elegidos:
+                periodo, u = combos[i]
+                por_periodo.setdefault(periodo, []).append(umbrales[u])
+            for periodo, lista in por_periodo.items():
+                tareas.append((par, periodo, lista, tamanos, self.timeout_velas, self.deslizamiento))
+        return tareas
+
+    def _compartir_velas(self):
+        """Copia una sola vez high/low/close de cada par a bloques de memoria compartida."""
+        bloques, memorias = {}, []
+        for par in self.estrategias:
+            v = self.velas[par]
+            n = len(v)
+            shm = shared_memory.SharedMemory(create=True, size=3 * n * 8)
+            destino = np.ndarray((3, n), dtype=np.float64, buffer=shm.buf)
+            destino[0], destino[1], destino[2] = v['high'], v['low'], v['close']
+            bloques[par] = (shm.name, n)
+            memorias.append(shm)
+        return bloques, memorias
+
+    def ejecutar(self, muestras=None, semilla=None):
+        """Corre el barrido y devuelve la lista plana de resultados (una fila por combinación)."""
+        inicio = time.perf_counter()
+        tareas = self._tareas(muestras, semilla)
+        bloques, memorias = self._compartir_velas()
+        resultados = []
+        try:
+            if self.procesos == 1:
+                _conectar_memoria(bloques)
+                for tarea in tareas:
+                    resultados.extend(_evaluar_periodo(tarea))
+            else:
+                with ProcessPoolExecutor(max_workers=self.procesos, initializer=_conectar_memoria,
+                                         initargs=(bloques,)) as pool:
+                    for parcial in pool.map(_evaluar_periodo, tareas):
+                        resultados.extend(parcial)
+        finally:
+            for par in bloques:
+                if par in _VELAS_WORKER:
+                    _VELAS_WORKER.pop(par)[0].close()
+            for shm in memorias:
+                shm.close()
+                shm.unlink()
+
+        self.segundos = time.perf_counter() - inicio
+        print(f"⚙️ Optimizador: {len(resultados)} combinaciones en {self.segundos:.2f}s ({self.procesos} procesos)")
+        return resultados
+
+    def mejores(self, resultados, min_operaciones=10, max_drawdown_pct=-30.0):
+        """Mejor combinación por par (mayor PnL%) entre las que superan los filtros mínimos."""
+        mejores = {}
+        for r in resultados:
+            if r['operaciones'] < min_operaciones or r['max_drawdown_pct'] < max_drawdown_pct:
+                continue
+            actual = mejores.get(r['par'])
+            if actual is None or r['pnl_pct'] > actual['pnl_pct']:
+                mejores[r['par']] = r
+        return mejores
+
+    def guardar_candidata(self, mejores, ruta=RUTA_CANDIDATA):
+        """Escribe una copia de estrategias.json con los parámetros ganadores (no toca la original)."""
+        candidata = copy.deepcopy(self.estrategias)
+        for par, r in mejores.items():
+            cfg = candidata[par]
+            cfg["apalancamiento"] = r['apalancamiento']
+            cfg["porcentaje_balance"] = r['porcentaje_balance']
+            cfg["indicadores"]["rsi_periodo"] = r['rsi_periodo']
+            cfg["indicadores"]["rsi_sobreventa"] = r['rsi_sobreventa']
+            cfg["indicadores"]["rsi_sobrecompra"] = r['rsi_sobrecompra']
+        with open(ruta, 'w') as f:
+            json.dump(candidata, f, indent=2)
+        return ruta
+
+    def imprimir_reporte(self, mejores):
+        print("\n" + "=" * 60)
+        print("🏆 MEJORES PARÁMETROS POR PAR")
+        print("=" * 60)
+        for par, r in mejores.items():
+            print(f"   • {par:<12} RSI({r['rsi_periodo']}) {r['rsi_sobreventa']}/{r['rsi_sobrecompra']} "
+                  f"x{r['apalancamiento']} {r['porcentaje_balance']}% -> PnL {r['pnl_pct']:+.2f}% "
+                  f"| DD {r['max_drawdown_pct']:.2f}% | {r['operaciones']} ops")
+        sin_resultado = set(self.estrategias) - set(mejores)
+        if sin_resultado:
+            print(f"   ⚠️ Sin combinación válida: {', '.join(sorted(sin_resultado))}")
+
+if __name__ == "__main__":
+    # Uso: python Core/Simulacion/GestorOptimizador.py [--aleatorio MUESTRAS] [--procesos N]
+    estrategias = {par: cfg for par, cfg in cargar_estrategias().items() if cfg.get("activo", False)}
+    muestras = int(sys.argv[sys.argv.index("--aleatorio") + 1]) if "--aleatorio" in sys.argv else None
+    procesos = int(sys.argv[sys.argv.index("--procesos") + 1]) if "--procesos" in sys.argv else None
+
+    optimizador = GestorOptimizador(estrategias, cargar_velas(estrategias), procesos=procesos)
+    if not optimizador.estrategias:
+        print("⚠️ No hay velas en Data/velas. Ejecuta GestorBacktest.py --descargar DIAS primero.")
+        sys.exit()
+    resultados = optimizador.ejecutar(muestras=muestras)
+    mejores = optimizador.mejores(resultados)
+    optimizador.imprimir_reporte(mejores)
+    print(f"📝 Candidata: {os.path.abspath(optimizador.guardar_candidata(mejores))}")
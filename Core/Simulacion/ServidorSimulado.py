@@ -0,0 +1,827 @@
+import sys
+import os
+import json
+import time
+import math
+import uuid
+import asyncio
+import threading
+import numpy as np
+from urllib.parse import urlparse, parse_qsl
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from websockets.asyncio.server import serve
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from Core.Utils.Config import Config
+from Core.Datos.GestorHistorico import GestorHistorico
+
+MAX_COLA_CLIENTE = 5000 # Mensajes encolados por cliente WS antes de frenar la reproducción
+
+def generar_velas(symbol, n, intervalo_ms, precio_inicial=None, semilla=None):
+    """Paseo aleatorio (GBM) con el mismo formato que GestorHistorico.DTYPE."""
+    rng = np.random.default_rng(semilla)
+    precio_inicial = precio_inicial or {"BTCUSDT": 95000.0, "ETHUSDT": 3500.0, "SOLUSDT": 200.0}.get(symbol, 100.0)
+    cierres = precio_inicial * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+    aperturas = np.concatenate([[precio_inicial], cierres[:-1]])
+    mecha = np.abs(rng.normal(0, 0.001, n)) * cierres
+    v = np.zeros(n, dtype=GestorHistorico.DTYPE)
+    ahora = int(time.time() * 1000)
+    v['timestamp'] = (ahora - ahora % intervalo_ms) - np.arange(n)[::-1] * intervalo_ms
+    v['open'] = aperturas
+    v['close'] = cierres
+    v['high'] = np.maximum(aperturas, cierres) + mecha
+    v['low'] = np.minimum(aperturas, cierres) - mecha
+    v['volume'] = rng.uniform(10, 100, n)
+    return v
+
+def _num(x):
+    """Números como los devuelve Binance (texto, sin notación científica)."""
+    return f"{x:.8f}".rstrip('0').rstrip('.') if x else "0"
+
+class ErrorBinance(Exception):
+    def __init__(self, codigo, mensaje, estado=400):
+        super().__init__(mensaje)
+        self.codigo = codigo
+        self.mensaje = mensaje
+        self.estado = estado
+
+class ServidorSimulado:
+    """
+    Doble LOCAL de Binance Futures (sin red) para medir el camino de órdenes del bot.
+    - REST (http.server): órdenes, cancelaciones, algo orders, posiciones, balance,
+      exchangeInfo, klines y listenKey.
+    - WebSockets (websockets): streams multiplexados de mercado (kline/ticker/miniTicker/aggTrade/
+      bookTicker/markPrice) y User Data Stream (ORDER_TRADE_UPDATE / ACCOUNT_UPDATE).
+    - Reproduce velas guardadas (o sintéticas) como ticks intra-vela, con latencia inyectada.
+    El bot se apunta aquí con Config.USAR_SIMULADOR (ver BinanceBase.apuntar_a_simulador).
+    """
+    def __init__(self, velas=None, timeframe="5m", latencia_ms=0.0, intervalo_tick=0.05, ticks_por_vela=4,
+                 velas_previas=1000, balance=10000.0, host="127.0.0.1", puerto_rest=0, puerto_ws=0,
+                 liquidez_limit=None):
+        self.timeframe = timeframe
+        self.intervalo_ms = Config.MS_TIMEFRAME[timeframe]
+        if velas is None:
+            velas = {s: generar_velas(s, velas_previas + 5000, self.intervalo_ms, semilla=i)
+                     for i, s in enumerate(("BTCUSDT", "ETHUSDT"))}
+        self.latencia = latencia_ms / 1000
+        self.intervalo_tick = intervalo_tick # None = modo manual (emitir_ticks)
+        self.ticks_por_vela = max(2, ticks_por_vela)
+        self.host = host
+        self.puerto_rest = puerto_rest
+        self.puerto_ws = puerto_ws
+        self.liquidez_limit = liquidez_limit # Cantidad máxima que llena una Limit maker por cruce (None: entera)
+
+        self.lock = threading.RLock()
+        self.mercados = {s: self._preparar_mercado(v, velas_previas) for s, v in velas.items() if len(v) > 1}
+        self.filtros = {s: self._filtros(m['close'][m['i']]) for s, m in self.mercados.items()}
+
+        # Cuenta simulada (modo One-Way, margen cruzado)
+        self.balance = balance
+        self.posiciones = {s: {'pa': 0.0, 'ep': 0.0} for s in self.mercados}
+        self.apalancamiento = {s: 20 for s in self.mercados}
+        self.tipo_margen = {s: 'CROSSED' for s in self.mercados}
+        self.ordenes = {}        # {orderId: orden} solo vivas
+        self.historial = {}      # {orderId: orden} todas
+        self.algo = {}           # {algoId: orden condicional} solo vivas
+        self.siguiente_id = 1
+        self.listen_keys = set()
+
+        self.clientes = []       # Conexiones WS abiertas
+        self.peso_usado = []     # [(time.time(), peso)] último minuto (cabecera X-MBX-USED-WEIGHT-1M)
+        self.estadisticas = {'ticks': 0, 'mensajes_ws': 0, 'peticiones': {}, 'ordenes': 0, 'llenados': 0}
+
+        self.loop = None
+        self.http = None
+        self._hilos = []
+        self._listo = threading.Event()
+        self._corriendo = False
+
+    # ------------------------------------------------------------------
+    # Datos de mercado
+    # ------------------------------------------------------------------
+    def _preparar_mercado(self, v, velas_previas):
+        """Arrays por columna con los tiempos desplazados para que la vela en curso sea 'ahora'."""
+        i = min(velas_previas, len(v) - 1)
+        ahora = int(time.time() * 1000)
+        desfase = (ahora - ahora % self.intervalo_ms) - int(v['timestamp'][i])
+        m = {col: np.asarray(v[col], dtype=np.float64).copy() for col in ('open', 'high', 'low', 'close', 'volume')}
+        m['timestamp'] = np.asarray(v['timestamp'], dtype=np.int64) + desfase
+        m['i'] = i      # Vela en curso
+        m['k'] = 0      # Tick dentro de la vela
+        m['precio'] = m['open'][i]
+        m['vela'] = None  # [o, h, l, c, v] parcial de la vela en curso
+        m['trayecto'] = self._trayecto(m, i)
+        return m
+
+    def _trayecto(self, m, i):
+        """Precios intra-vela: apertura -> extremo -> otro extremo -> cierre."""
+        o, h, l, c = m['open'][i], m['high'][i], m['low'][i], m['close'][i]
+        a, b = (l, h) if c >= o else (h, l)
+        return np.interp(np.linspace(0, 3, self.ticks_por_vela), [0, 1, 2, 3], [o, a, b, c])
+
+    @staticmethod
+    def _filtros(precio):
+        magnitud = int(math.floor(math.log10(max(precio, 1e-8))))
+        decimales_precio = min(6, max(0, 5 - magnitud)) # BTC ~95000 -> 0.1, ETH ~3500 -> 0.01
+        decimales_cantidad = 3 if precio >= 1000 else (2 if precio >= 10 else 0)
+        return {
+            'decimales_precio': decimales_precio,
+            'decimales_cantidad': decimales_cantidad,
+            'tick_size': 10 ** -decimales_precio,
+            'step_size': 10 ** -decimales_cantidad,
+            'min_notional': 5.0,
+        }
+
+    def _tick(self, symbol, ahora_ms):
+        """Avanza un tick del par: actualiza vela/precio, cruza órdenes y devuelve los eventos de mercado."""
+        m = self.mercados[symbol]
+        i, k = m['i'], m['k']
+        if i >= len(m['close']):
+            return None
+        precio = float(m['trayecto'][k])
+        if m['vela'] is None:
+            m['vela'] = [precio, precio, precio, precio, 0.0]
+        vela = m['vela']
+        vela[1] = max(vela[1], precio)
+        vela[2] = min(vela[2], precio)
+        vela[3] = precio
+        vela[4] += m['volume'][i] / self.ticks_por_vela
+        m['precio'] = precio
+        cerrada = k == self.ticks_por_vela - 1
+
+        self._cruzar_ordenes(symbol, precio)
+
+        t = int(m['timestamp'][i])
+        s = symbol.lower()
+        eventos = {
+            f"{s}@kline_{self.timeframe}": {
+                "e": "kline", "E": ahora_ms, "s": symbol,
+                "k": {"t": t, "T": t + self.intervalo_ms - 1, "s": symbol, "i": self.timeframe,
+                      "o": _num(vela[0]), "h": _num(vela[1]), "l": _num(vela[2]), "c": _num(vela[3]),
+                      "v": _num(vela[4]), "x": cerrada},
+            },
+            f"{s}@ticker": {"e": "24hrTicker", "E": ahora_ms, "s": symbol, "c": _num(precio),
+                            "o": _num(vela[0]), "h": _num(vela[1]), "l": _num(vela[2]), "v": _num(vela[4])},
+            f"{s}@miniTicker": {"e": "24hrMiniTicker", "E": ahora_ms, "s": symbol, "c": _num(precio),
+                                "o": _num(vela[0]), "h": _num(vela[1]), "l": _num(vela[2]), "v": _num(vela[4])},
+            f"{s}@bookTicker": {"e": "bookTicker", "E": ahora_ms, "T": ahora_ms, "s": symbol,
+                                "b": _num(precio - self.filtros[symbol]['tick_size']), "B": "1",
+                                "a": _num(precio), "A": "1"},
+            f"{s}@markPrice": {"e": "markPriceUpdate", "E": ahora_ms, "s": symbol, "p": _num(precio),
+                               "i": _num(precio), "r": "0.0001", "T": ahora_ms},
+            f"{s}@aggTrade": {"e": "aggTrade", "E": ahora_ms, "s": symbol, "a": ahora_ms, "p": _num(precio),
+                              "q": "1", "f": ahora_ms, "l": ahora_ms, "T": ahora_ms, "m": False},
+        }
+        eventos[f"{s}@markPrice@1s"] = eventos[f"{s}@markPrice"]
+        if cerrada:
+            m['i'] += 1
+            m['k'] = 0
+            m['vela'] = None
+            if m['i'] < len(m['close']):
+                m['trayecto'] = self._trayecto(m, m['i'])
+        else:
+            m['k'] += 1
+        return eventos
+
+    # ------------------------------------------------------------------
+    # Motor de cruce
+    # ------------------------------------------------------------------
+    def _cruzar_ordenes(self, symbol, precio):
+        for orden in [o for o in self.ordenes.values() if o['symbol'] == symbol]:
+            if orden['type'] != 'LIMIT':
+                continue
+            if (orden['side'] == 'BUY' and precio <= orden['price']) or (orden['side'] == 'SELL' and precio >= orden['price']):
+                self._llenar(orden, orden['price'], maker=True, maximo=self.liquidez_limit)
+        for algo in [a for a in self.algo.values() if a['symbol'] == symbol]:
+            disparo = algo['triggerPrice']
+            if (algo['side'] == 'SELL' and precio <= disparo) or (algo['side'] == 'BUY' and precio >= disparo):
+                del self.algo[algo['algoId']]
+                algo['algoStatus'] = 'FINISHED'
+                pa = self.posiciones[symbol]['pa']
+                cantidad = abs(pa) if algo['closePosition'] else algo['quantity']
+                if cantidad > 0:
+                    orden = self._nueva_orden(symbol, algo['side'], 'MARKET', cantidad, 0.0, reduce_only=True)
+                    orden['origType'] = algo['orderType']
+                    self._llenar(orden, precio, maker=False)
+
+    def _nueva_orden(self, symbol, side, tipo, cantidad, precio, reduce_only=False, cliente=None):
+        orden = {
+            'orderId': self.siguiente_id, 'symbol': symbol, 'side': side, 'type': tipo, 'origType': tipo,
+            'status': 'NEW', 'price': precio, 'avgPrice': 0.0, 'origQty': cantidad, 'executedQty': 0.0,
+            'reduceOnly': reduce_only, 'closePosition': False, 'stopPrice': 0.0,
+            'clientOrderId': cliente or f"sim_{self.siguiente_id}", 'timeInForce': 'GTC',
+            'updateTime': int(time.time() * 1000),
+        }
+        self.siguiente_id += 1
+        self.historial[orden['orderId']] = orden
+        return orden
+
+    def _llenar(self, orden, precio, maker, maximo=None):
+        """Llena lo que falta de la orden (o 'maximo' de ello: parcial, la orden sigue viva)."""
+        symbol = orden['symbol']
+        pos = self.posiciones[symbol]
+        cantidad = round(orden['origQty'] - orden['executedQty'], 8)
+        if maximo is not None:
+            cantidad = min(cantidad, maximo)
+        if orden['reduceOnly']:
+            # Solo reduce: nunca abre ni da la vuelta a la posición
+            reduce = (orden['side'] == 'SELL' and pos['pa'] > 0) or (orden['side'] == 'BUY' and pos['pa'] < 0)
+            cantidad = min(cantidad, abs(pos['pa'])) if reduce else 0.0
+            if cantidad == 0:
+                self._finalizar(orden, 'EXPIRED')
+                return
+
+        signo = 1 if orden['side'] == 'BUY' else -1
+        anterior = pos['pa']
+        nueva = anterior + signo * cantidad
+        realizado = 0.0
+        if anterior == 0 or (anterior > 0) == (signo > 0):
+            pos['ep'] = (abs(anterior) * pos['ep'] + cantidad * precio) / abs(nueva)
+        else:
+            cerrada = min(cantidad, abs(anterior))
+            realizado = cerrada * (precio - pos['ep']) * (1 if anterior > 0 else -1)
+            if abs(nueva) < 1e-12:
+                nueva, pos['ep'] = 0.0, 0.0
+            elif (nueva > 0) != (anterior > 0):
+                pos['ep'] = precio # Dio la vuelta: el resto abre al precio actual
+        pos['pa'] = round(nueva, 8)
+
+        comision = cantidad * precio * (Config.COMISION_MAKER if maker else Config.COMISION_TAKER)
+        self.balance += realizado - comision
+        previa = orden['executedQty']
+        orden['executedQty'] = round(previa + cantidad, 8)
+        orden['avgPrice'] = (previa * orden['avgPrice'] + cantidad * precio) / orden['executedQty']
+        self.estadisticas['llenados'] += 1
+        if maximo is not None and orden['executedQty'] < orden['origQty']: # Sin liquidez para el resto
+            orden['status'] = 'PARTIALLY_FILLED'
+            orden['updateTime'] = int(time.time() * 1000)
+            self._emitir_orden(orden, 'TRADE', cantidad, precio, comision, realizado, maker)
+        else:
+            self._finalizar(orden, 'FILLED', ultimo=cantidad, precio=precio, comision=comision, realizado=realizado, maker=maker)
+        self._emitir_usuario({
+            "e": "ACCOUNT_UPDATE", "E": int(time.time() * 1000), "T": int(time.time() * 1000),
+            "a": {"m": "ORDER",
+                  "B": [{"a": "USDT", "wb": _num(self.balance), "cw": _num(self.balance), "bc": "0"}],
+                  "P": [{"s": symbol, "pa": _num(pos['pa']), "ep": _num(pos['ep']), "cr": "0",
+                         "up": "0", "mt": "cross", "iw": "0", "ps": "BOTH"}]},
+        })
+
+    def _finalizar(self, orden, estado, ultimo=0.0, precio=0.0, comision=0.0, realizado=0.0, maker=False):
+        orden['status'] = estado
+        orden['updateTime'] = int(time.time() * 1000)
+        self.ordenes.pop(orden['orderId'], None)
+        self._emitir_orden(orden, 'TRADE' if estado == 'FILLED' else estado, ultimo, precio, comision, realizado, maker)
+
+    def _emitir_orden(self, orden, ejecucion, ultimo=0.0, precio=0.0, comision=0.0, realizado=0.0, maker=False):
+        ahora = int(time.time() * 1000)
+        self._emitir_usuario({
+            "e": "ORDER_TRADE_UPDATE", "E": ahora, "T": ahora,
+            "o": {"s": orden['symbol'], "c": orden['clientOrderId'], "S": orden['side'], "o": orden['type'],
+                  "f": orden['timeInForce'], "q": _num(orden['origQty']), "p": _num(orden['price']),
+                  "ap": _num(orden['avgPrice']), "sp": _num(orden['stopPrice']), "x": ejecucion,
+                  "X": orden['status'], "i": orden['orderId'], "l": _num(ultimo), "z": _num(orden['executedQty']),
+                  "L": _num(precio), "N": "USDT", "n": _num(comision), "T": ahora, "t": self.siguiente_id,
+                  "m": maker, "R": orden['reduceOnly'], "cp": orden['closePosition'], "ps": "BOTH",
+                  "ot": orden['origType'], "rp": _num(realizado)},
+        })
+
+    # ------------------------------------------------------------------
+    # REST
+    # ------------------------------------------------------------------
+    def atender(self, metodo, ruta, params):
+        """Despacha una petición REST. Devuelve (estado_http, cuerpo, peso)."""
+        clave = f"{metodo} {ruta}"
+        self.estadisticas['peticiones'][clave] = self.estadisticas['peticiones'].get(clave, 0) + 1
+        manejador = self.RUTAS.get(clave)
+        if manejador is None:
+            return 404, {"code": -5000, "msg": f"Ruta no simulada: {clave}"}, 1
+        peso = self.PESOS.get(clave, 1)
+        try:
+            with self.lock:
+                return 200, manejador(self, params), peso
+        except ErrorBinance as e:
+            return e.estado, {"code": e.codigo, "msg": e.mensaje}, peso
+        except (KeyError, ValueError) as e:
+            return 400, {"code": -1102, "msg": f"Parámetro inválido o ausente: {e}"}, peso
+
+    def _symbol(self, params):
+        symbol = params.get('symbol')
+        if symbol not in self.mercados:
+            raise ErrorBinance(-1121, "Invalid symbol.")
+        return symbol
+
+    def _validar_precision(self, valor, decimales):
+        if abs(round(valor, decimales) - valor) > 1e-9:
+            raise ErrorBinance(-1111, "Precision is over the maximum defined for this asset.")
+
+    def _formato_orden(self, o):
+        return {
+            "orderId": o['orderId'], "symbol": o['symbol'], "status": o['status'],
+            "clientOrderId": o['clientOrderId'], "price": _num(o['price']), "avgPrice": _num(o['avgPrice']),
+            "origQty": _num(o['origQty']), "executedQty": _num(o['executedQty']),
+            "cumQuote": _num(o['executedQty'] * o['avgPrice']), "timeInForce": o['timeInForce'],
+            "type": o['type'], "reduceOnly": o['reduceOnly'], "closePosition": o['closePosition'],
+            "side": o['side'], "positionSide": "BOTH", "stopPrice": _num(o['stopPrice']),
+            "workingType": "CONTRACT_PRICE", "origType": o['origType'], "updateTime": o['updateTime'],
+        }
+
+    def _margen_disponible(self):
+        usado = sum(abs(p['pa']) * self.mercados[s]['precio'] / self.apalancamiento[s] for s, p in self.posiciones.items())
+        usado += sum(o['origQty'] * o['price'] / self.apalancamiento[o['symbol']]
+                     for o in self.ordenes.values() if not o['reduceOnly'])
+        return self.balance - usado
+
+    def _crear_orden(self, params):
+        symbol = self._symbol(params)
+        tipo = params['type'].upper()
+        side = params['side'].upper()
+        filtros = self.filtros[symbol]
+        cantidad = float(params.get('quantity', 0))
+        reduce_only = str(params.get('reduceOnly', 'false')).lower() == 'true'
+        self._validar_precision(cantidad, filtros['decimales_cantidad'])
+        if cantidad <= 0:
+            raise ErrorBinance(-4003, "Quantity less than or equal to zero.")
+
+        precio_mercado = self.mercados[symbol]['precio']
+        if tipo == 'LIMIT':
+            precio = float(params['price'])
+            self._validar_precision(precio, filtros['decimales_precio'])
+        elif tipo == 'MARKET':
+            precio = precio_mercado
+        else:
+            raise ErrorBinance(-1116, "Invalid orderType.")
+
+        if not reduce_only:
+            if cantidad * precio < filtros['min_notional']:
+                raise ErrorBinance(-4164, f"Order's notional must be no smaller than {filtros['min_notional']}")
+            if cantidad * precio / self.apalancamiento[symbol] > self._margen_disponible():
+                raise ErrorBinance(-2019, "Margin is insufficient.")
+
+        orden = self._nueva_orden(symbol, side, tipo, cantidad, precio if tipo == 'LIMIT' else 0.0,
+                                  reduce_only, params.get('newClientOrderId'))
+        self.estadisticas['ordenes'] += 1
+        self.ordenes[orden['orderId']] = orden
+        self._emitir_orden(orden, 'NEW')
+
+        cruza = (side == 'BUY' and precio >= precio_mercado) or (side == 'SELL' and precio <= precio_mercado)
+        if tipo == 'MARKET' or cruza:
+            # Limit marcable: se ejecuta al momento como taker
+            self._llenar(orden, precio_mercado, maker=False)
+        return self._formato_orden(orden)
+
+    def _crear_algo(self, params):
+        symbol = self._symbol(params)
+        disparo = float(params['triggerPrice'])
+        self._validar_precision(disparo, self.filtros[symbol]['decimales_precio'])
+        algo = {
+            'algoId': self.siguiente_id, 'clientAlgoId': params.get('clientAlgoId', uuid.uuid4().hex[:22]),
+            'algoType': 'CONDITIONAL', 'orderType': params['type'].upper(), 'symbol': symbol,
+            'side': params['side'].upper(), 'triggerPrice': disparo,
+            'quantity': float(params.get('quantity', 0)),
+            'closePosition': str(params.get('closePosition', 'false')).lower() == 'true',
+            'algoStatus': 'NEW', 'createTime': int(time.time() * 1000),
+        }
+        self.siguiente_id += 1
+        self.algo[algo['algoId']] = algo
+        return self._formato_algo(algo)
+
+    @staticmethod
+    def _formato_algo(a):
+        return {**a, 'triggerPrice': _num(a['triggerPrice']), 'quantity': _num(a['quantity'])}
+
+    def _buscar_orden(self, params):
+        if 'orderId' in params:
+            orden = self.historial.get(int(params['orderId']))
+        else:
+            cliente = params.get('origClientOrderId')
+            orden = next((o for o in self.historial.values() if o['clientOrderId'] == cliente), None)
+        if orden is None or orden['symbol'] != params.get('symbol'):
+            raise ErrorBinance(-2013, "Order does not exist.")
+        return orden
+
+    def _cancelar_orden(self, params):
+        orden = self._buscar_orden(params)
+        if orden['orderId'] not in self.ordenes:
+            raise ErrorBinance(-2011, "Unknown order sent.")
+        self._finalizar(orden, 'CANCELED')
+        return self._formato_orden(orden)
+
+    def _modificar_orden(self, params):
+        orden = self._buscar_orden(params)
+        if orden['orderId'] not in self.ordenes or orden['type'] != 'LIMIT':
+            raise ErrorBinance(-2013, "Order does not exist.")
+        filtros = self.filtros[orden['symbol']]
+        precio, cantidad = float(params['price']), float(params['quantity']) # quantity: total de la orden (origQty)
+        self._validar_precision(precio, filtros['decimales_precio'])
+        self._validar_precision(cantidad, filtros['decimales_cantidad'])
+        if cantidad <= orden['executedQty']:
+            raise ErrorBinance(-4003, "Quantity less than or equal to the executed quantity.")
+        orden['price'], orden['origQty'] = precio, cantidad
+        orden['updateTime'] = int(time.time() * 1000)
+        self._emitir_orden(orden, 'AMENDMENT')
+        mercado = self.mercados[orden['symbol']]['precio']
+        if (orden['side'] == 'BUY' and precio >= mercado) or (orden['side'] == 'SELL' and precio <= mercado):
+            self._llenar(orden, mercado, maker=False)
+        return self._formato_orden(orden)
+
+    def _cancelar_todas(self, params):
+        symbol = self._symbol(params)
+        for orden in [o for o in self.ordenes.values() if o['symbol'] == symbol]:
+            self._finalizar(orden, 'CANCELED')
+        return {"code": 200, "msg": "The operation of cancel all open order is done."}
+
+    def _cancelar_algo_todas(self, params):
+        symbol = self._symbol(params)
+        for algo_id in [i for i, a in self.algo.items() if a['symbol'] == symbol]:
+            del self.algo[algo_id]
+        return {"code": 200, "msg": "success"}
+
+    def _cancelar_algo(self, params):
+        algo = self.algo.pop(int(params.get('algoId', -1)), None)
+        if algo is None:
+            raise ErrorBinance(-2011, "Unknown order sent.")
+        algo['algoStatus'] = 'CANCELED'
+        return self._formato_algo(algo)
+
+    def _lote_ordenes(self, params):
+        resultados = []
+        for p in json.loads(params['batchOrders']):
+            try:
+                if p.get('type', '').upper() in ('STOP', 'STOP_MARKET', 'TAKE_PROFIT', 'TAKE_PROFIT_MARKET'):
+                    p.setdefault('triggerPrice', p.pop('stopPrice', 0))
+                    resultados.append(self._crear_algo(p))
+                else:
+                    resultados.append(self._crear_orden(p))
+            except ErrorBinance as e:
+                resultados.append({"code": e.codigo, "msg": e.mensaje})
+        return resultados
+
+    def _posiciones(self, params):
+        simbolos = [self._symbol(params)] if 'symbol' in params else list(self.mercados)
+        return [{
+            "symbol": s, "positionSide": "BOTH", "positionAmt": _num(self.posiciones[s]['pa']),
+            "entryPrice": _num(self.posiciones[s]['ep']), "markPrice": _num(self.mercados[s]['precio']),
+            "unRealizedProfit": _num(self.posiciones[s]['pa'] * (self.mercados[s]['precio'] - self.posiciones[s]['ep'])),
+            "notional": _num(self.posiciones[s]['pa'] * self.mercados[s]['precio']),
+            "leverage": str(self.apalancamiento[s]), "marginType": self.tipo_margen[s].lower(),
+            "updateTime": int(time.time() * 1000),
+        } for s in simbolos]
+
+    def _balance(self, params):
+        return [{"accountAlias": "sim", "asset": "USDT", "balance": _num(self.balance),
+                 "crossWalletBalance": _num(self.balance), "crossUnPnl": "0",
+                 "availableBalance": _num(self._margen_disponible()),
+                 "maxWithdrawAmount": _num(self._margen_disponible()), "marginAvailable": True,
+                 "updateTime": int(time.time() * 1000)}]
+
+    def _cuenta(self, params):
+        return {"totalWalletBalance": _num(self.balance), "availableBalance": _num(self._margen_disponible()),
+                "assets": self._balance(params), "positions": self._posiciones({})}
+
+    def _apalancamiento(self, params):
+        symbol = self._symbol(params)
+        self.apalancamiento[symbol] = int(params['leverage'])
+        return {"leverage": self.apalancamiento[symbol], "maxNotionalValue": "1000000", "symbol": symbol}
+
+    def _margen(self, params):
+        symbol = self._symbol(params)
+        tipo = params['marginType'].upper()
+        if self.tipo_margen[symbol] == tipo:
+            raise ErrorBinance(-4046, "No need to change margin type.")
+        self.tipo_margen[symbol] = tipo
+        return {"code": 200, "msg": "success"}
+
+    def _exchange_info(self, params):
+        simbolos = []
+        for s, f in self.filtros.items():
+            simbolos.append({
+                "symbol": s, "status": "TRADING", "contractType": "PERPETUAL",
+                "pricePrecision": f['decimales_precio'], "quantityPrecision": f['decimales_cantidad'],
+                "filters": [
+                    {"filterType": "PRICE_FILTER", "tickSize": _num(f['tick_size'])},
+                    {"filterType": "LOT_SIZE", "stepSize": _num(f['step_size']), "minQty": _num(f['step_size'])},
+                    {"filterType": "MIN_NOTIONAL", "notional": _num(f['min_notional'])},
+                ],
+            })
+        return {"timezone": "UTC", "serverTime": int(time.time() * 1000), "symbols": simbolos}
+
+    def _klines(self, params):
+        symbol = self._symbol(params)
+        if params.get('interval') != self.timeframe:
+            raise ErrorBinance(-1120, f"El simulador solo reproduce velas de {self.timeframe}.")
+        m = self.mercados[symbol]
+        limite = min(int(params.get('limit', 500)), 1500)
+        i = min(m['i'], len(m['close']) - 1) # Vela en curso (incluida, como en Binance)
+        ts = m['timestamp'][:i + 1]
+        desde = int(np.searchsorted(ts, int(params['startTime']))) if 'startTime' in params else max(0, i + 1 - limite)
+        hasta = min(i + 1, desde + limite)
+        if 'endTime' in params:
+            hasta = min(hasta, int(np.searchsorted(ts, int(params['endTime']), side='right')))
+        filas = []
+        for j in range(desde, hasta):
+            t = int(m['timestamp'][j])
+            if j == m['i'] and m['vela'] is not None:
+                o, h, l, c, v = m['vela']
+            elif j == m['i']:
+                o = h = l = c = m['open'][j]
+                v = 0.0
+            else:
+                o, h, l, c, v = m['open'][j], m['high'][j], m['low'][j], m['close'][j], m['volume'][j]
+            filas.append([t, _num(o), _num(h), _num(l), _num(c), _num(v), t + self.intervalo_ms - 1, "0", 0, "0", "0", "0"])
+        return filas
+
+    def _precio(self, params):
+        if 'symbol' in params:
+            symbol = self._symbol(params)
+            return {"symbol": symbol, "price": _num(self.mercados[symbol]['precio']), "time": int(time.time() * 1000)}
+        return [{"symbol": s, "price": _num(m['precio']), "time": int(time.time() * 1000)} for s, m in self.mercados.items()]
+
+    def _mark_price(self, params):
+        def fila(s):
+            p = _num(self.mercados[s]['precio'])
+            return {"symbol": s, "markPrice": p, "indexPrice": p, "lastFundingRate": "0.0001",
+                    "nextFundingTime": 0, "time": int(time.time() * 1000)}
+        return fila(self._symbol(params)) if 'symbol' in params else [fila(s) for s in self.mercados]
+
+    def _listen_key(self, params):
+        clave = params.get('listenKey') or uuid.uuid4().hex
+        self.listen_keys.add(clave)
+        return {"listenKey": clave}
+
+    RUTAS = {
+        "GET /api/v3/ping": lambda self, p: {},
+        "GET /api/v3/time": lambda self, p: {"serverTime": int(time.time() * 1000)},
+        "GET /fapi/v1/ping": lambda self, p: {},
+        "GET /fapi/v1/time": lambda self, p: {"serverTime": int(time.time() * 1000)},
+        "GET /fapi/v1/exchangeInfo": _exchange_info,
+        "GET /fapi/v1/klines": _klines,
+        "GET /fapi/v1/ticker/price": _precio,
+        "GET /fapi/v2/ticker/price": _precio,
+        "GET /fapi/v1/premiumIndex": _mark_price,
+        "POST /fapi/v1/order": _crear_orden,
+        "GET /fapi/v1/order": lambda self, p: self._formato_orden(self._buscar_orden(p)),
+        "DELETE /fapi/v1/order": _cancelar_orden,
+        "PUT /fapi/v1/order": _modificar_orden,
+        "POST /fapi/v1/batchOrders": _lote_ordenes,
+        "GET /fapi/v1/openOrders": lambda self, p: [self._formato_orden(o) for o in self.ordenes.values()
+                                                    if 'symbol' not in p or o['symbol'] == p['symbol']],
+        "DELETE /fapi/v1/allOpenOrders": _cancelar_todas,
+        "POST /fapi/v1/algoOrder": _crear_algo,
+        "DELETE /fapi/v1/algoOrder": _cancelar_algo,
+        "GET /fapi/v1/openAlgoOrders": lambda self, p: [self._formato_algo(a) for a in self.algo.values()
+                                                        if 'symbol' not in p or a['symbol'] == p['symbol']],
+        "DELETE /fapi/v1/algoOpenOrders": _cancelar_algo_todas,
+        "GET /fapi/v3/positionRisk": _posiciones,
+        "GET /fapi/v2/positionRisk": _posiciones,
+        "GET /fapi/v3/balance": _balance,
+        "GET /fapi/v2/balance": _balance,
+        "GET /fapi/v2/account": _cuenta,
+        "POST /fapi/v1/leverage": _apalancamiento,
+        "POST /fapi/v1/marginType": _margen,
+        "POST /fapi/v1/listenKey": _listen_key,
+        "PUT /fapi/v1/listenKey": _listen_key,
+        "DELETE /fapi/v1/listenKey": lambda self, p: {},
+    }
+
+    # Pesos oficiales de los endpoints caros (el resto pesa 1)
+    PESOS = {
+        "GET /fapi/v1/exchangeInfo": 1, "GET /fapi/v1/klines": 5, "GET /fapi/v3/positionRisk": 5,
+        "GET /fapi/v2/positionRisk": 5, "GET /fapi/v3/balance": 5, "GET /fapi/v2/balance": 5,
+        "GET /fapi/v2/account": 5, "GET /fapi/v1/openOrders": 1, "DELETE /fapi/v1/allOpenOrders": 1,
+    }
+
+    def registrar_peso(self, peso):
+        """Suma el peso y devuelve el usado en el último minuto."""
+        ahora = time.time()
+        with self.lock:
+            self.peso_usado = [(t, p) for t, p in self.peso_usado if ahora - t < 60]
+            self.peso_usado.append((ahora, peso))
+            return sum(p for _, p in self.peso_usado)
+
+    # ------------------------------------------------------------------
+    # WebSockets
+    # ------------------------------------------------------------------
+    def _emitir_usuario(self, evento):
+        """Encola un evento del User Data Stream (se puede llamar desde cualquier hilo)."""
+        if self.loop is None:
+            return
+        texto = json.dumps(evento)
+        self.loop.call_soon_threadsafe(self._encolar, texto, lambda c: c['usuario'])
+
+    def _encolar(self, texto, filtro):
+        vence = self.loop.time() + self.latencia
+        for cliente in self.clientes:
+            if filtro(cliente):
+                cliente['cola'].put_nowait((vence, texto))
+                self.estadisticas['mensajes_ws'] += 1
+
+    async def _atender_ws(self, conexion):
+        ruta = urlparse(conexion.request.path)
+        consulta = dict(parse_qsl(ruta.query))
+        usuario = 'listenKey' in consulta or ruta.path.rstrip('/').split('/')[-1] in self.listen_keys
+        streams = set(consulta.get('streams', '').split('/')) - {''}
+        if not usuario and ruta.path.startswith('/ws/'):
+            streams.add(ruta.path[len('/ws/'):])
+        cliente = {'streams': streams, 'usuario': usuario, 'cola': asyncio.Queue(), 'multiplex': 'streams' in consulta,
+                   'conexion': conexion}
+        self.clientes.append(cliente)
+        emisor = asyncio.create_task(self._emisor_ws(conexion, cliente))
+        try:
+            async for texto in conexion:
+                await self._comando_ws(conexion, cliente, texto)
+        except Exception:
+            pass
+        finally:
+            emisor.cancel()
+            self.clientes.remove(cliente)
+
+    async def _comando_ws(self, conexion, cliente, texto):
+        """SUBSCRIBE / UNSUBSCRIBE / LIST_SUBSCRIPTIONS como en Binance."""
+        try:
+            peticion = json.loads(texto)
+        except ValueError:
+            return
+        metodo = peticion.get('method')
+        if metodo == 'SUBSCRIBE':
+            cliente['streams'].update(peticion.get('params', []))
+            respuesta = None
+        elif metodo == 'UNSUBSCRIBE':
+            cliente['streams'].difference_update(peticion.get('params', []))
+            respuesta = None
+        elif metodo == 'LIST_SUBSCRIPTIONS':
+            respuesta = sorted(cliente['streams'])
+        else:
+            return
+        await conexion.send(json.dumps({"result": respuesta, "id": peticion.get('id')}))
+
+    async def _emisor_ws(self, conexion, cliente):
+        """Envía en orden respetando la latencia inyectada de cada mensaje."""
+        while True:
+            vence, texto = await cliente['cola'].get()
+            espera = vence - self.loop.time()
+            if espera > 0:
+                await asyncio.sleep(espera)
+            await conexion.send(texto)
+
+    def _difundir_mercado(self, eventos):
+        if self.loop is None:
+            return
+        vence = self.loop.time() + self.latencia
+        for cliente in self.clientes:
+            if cliente['usuario']:
+                continue
+            for stream in cliente['streams']:
+                payload = eventos.get(stream)
+                if payload is None:
+                    continue
+                mensaje = {"stream": stream, "data": payload} if cliente['multiplex'] else payload
+                cliente['cola'].put_nowait((vence, json.dumps(mensaje)))
+                self.estadisticas['mensajes_ws'] += 1
+
+    def _ronda_ticks(self):
+        """Un tick para cada par. Devuelve False cuando ya no quedan velas que reproducir."""
+        ahora_ms = int(time.time() * 1000)
+        quedan = False
+        for symbol in self.mercados:
+            with self.lock:
+                eventos = self._tick(symbol, ahora_ms)
+            if eventos:
+                quedan = True
+                self.estadisticas['ticks'] += 1
+                self._difundir_mercado(eventos)
+        return quedan
+
+    async def _reproducir(self):
+        """Reloj de la reproducción: una ronda cada 'intervalo_tick' (sin deriva acumulada)."""
+        siguiente = self.loop.time()
+        while self._corriendo:
+            # Contrapresión: si un cliente no da abasto, esperamos en vez de inflar su cola
+            while any(c['cola'].qsize() > MAX_COLA_CLIENTE for c in self.clientes):
+                await asyncio.sleep(0.001)
+            try:
+                quedan = self._ronda_ticks()
+            except Exception as e:
+                print(f"❌ Simulador: error reproduciendo velas: {e!r}")
+                raise
+            if not quedan:
+                print("🏁 Simulador: fin de las velas a reproducir.")
+                return
+            siguiente += self.intervalo_tick
+            await asyncio.sleep(max(0.0, siguiente - self.loop.time()))
+
+    def cortar_mercado(self):
+        """Cierra todas las conexiones de mercado (simula una caída de red); el User Data Stream sigue."""
+        async def cortar():
+            for cliente in [c for c in self.clientes if not c['usuario']]:
+                await cliente['conexion'].close(code=1001) # Going away: el cliente debe reconectar
+        asyncio.run_coroutine_threadsafe(cortar(), self.loop).result(5)
+
+    def emitir_ticks(self, n=1):
+        """Modo manual (intervalo_tick=None): avanza n rondas y espera a que se encolen."""
+        for _ in range(n):
+            asyncio.run_coroutine_threadsafe(self._ronda_async(), self.loop).result()
+
+    async def _ronda_async(self):
+        self._ronda_ticks()
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------------
+    def iniciar(self):
+        """Levanta REST + WebSockets en hilos de fondo. Devuelve (url_rest, url_ws)."""
+        simulador = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1" # Keep-alive: el pool de requests reutiliza la conexión
+
+            def _responder(self, metodo):
+                url = urlparse(self.path)
+                params = dict(parse_qsl(url.query))
+                largo = int(self.headers.get('Content-Length') or 0)
+                if largo:
+                    params.update(parse_qsl(self.rfile.read(largo).decode()))
+                if simulador.latencia:
+                    time.sleep(simulador.latencia)
+                estado, cuerpo, peso = simulador.atender(metodo, url.path, params)
+                datos = json.dumps(cuerpo).encode()
+                self.send_response(estado)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(datos)))
+                self.send_header("X-MBX-USED-WEIGHT-1M", str(simulador.registrar_peso(peso)))
+                self.end_headers()
+                self.wfile.write(datos)
+
+            def do_GET(self): self._responder("GET")
+            def do_POST(self): self._responder("POST")
+            def do_PUT(self): self._responder("PUT")
+            def do_DELETE(self): self._responder("DELETE")
+            def log_message(self, *args): pass
+
+        self.http = ThreadingHTTPServer((self.host, self.puerto_rest), Manejador)
+        self.http.daemon_threads = True
+        self.puerto_rest = self.http.server_address[1]
+        self._corriendo = True
+        self._hilos = [
+            threading.Thread(target=self.http.serve_forever, daemon=True),
+            threading.Thread(target=self._hilo_ws, daemon=True),
+        ]
+        for hilo in self._hilos:
+            hilo.start()
+        self._listo.wait(5)
+        print(f"🧪 Simulador Binance: REST {self.url_rest} | WS {self.url_ws} | latencia {self.latencia * 1000:.0f}ms")
+        return self.url_rest, self.url_ws
+
+    def _hilo_ws(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self._servir_ws())
+
+    async def _servir_ws(self):
+        async with serve(self._atender_ws, self.host, self.puerto_ws, max_size=None, compression=None) as servidor:
+            self.puerto_ws = servidor.sockets[0].getsockname()[1]
+            self._detener_ws = asyncio.Event()
+            self._listo.set()
+            reproduccion = asyncio.create_task(self._reproducir()) if self.intervalo_tick is not None else None
+            await self._detener_ws.wait()
+            if reproduccion:
+                reproduccion.cancel()
+
+    @property
+    def url_rest(self):
+        return f"http://{self.host}:{self.puerto_rest}"
+
+    @property
+    def url_ws(self):
+        return f"ws://{self.host}:{self.puerto_ws}/"
+
+    def detener(self):
+        self._corriendo = False
+        if self.loop:
+            self.loop.call_soon_threadsafe(self._detener_ws.set)
+        if self.http:
+            self.http.shutdown()
+            self.http.server_close()
+
+if __name__ == "__main__":
+    # Uso: python Core/Simulacion/ServidorSimulado.py [--latencia MS] [--intervalo SEG]
+    # Luego arrancar el bot con Config.USAR_SIMULADOR = True.
+    from Core.Simulacion.GestorBacktest import cargar_estrategias, cargar_velas
+    latencia = float(sys.argv[sys.argv.index("--latencia") + 1]) if "--latencia" in sys.argv else 0.0
+    intervalo = float(sys.argv[sys.argv.index("--intervalo") + 1]) if "--intervalo" in sys.argv else 0.5
+    estrategias = {p: c for p, c in cargar_estrategias().items() if c.get("activo", False)}
+    guardadas = {p: v for p, v in cargar_velas(estrategias).items() if len(v) > 1100}
+    intervalo_ms = Config.MS_TIMEFRAME[Config.TIMEFRAME_DEFECTO]
+    velas = {p: guardadas.get(p, generar_velas(p, 20000, intervalo_ms, semilla=i)) for i, p in enumerate(estrategias)}
+    rest = urlparse(Config.URL_SIMULADOR_REST)
+    ws = urlparse(Config.URL_SIMULADOR_WS)
+    servidor = ServidorSimulado(velas, Config.TIMEFRAME_DEFECTO, latencia_ms=latencia, intervalo_tick=intervalo,
+                                host=rest.hostname, puerto_rest=rest.port, puerto_ws=ws.port)
+    servidor.iniciar()
+    try:
+        while True:
+            time.sleep(10)
+            e = servidor.estadisticas
+            print(f"   • ticks={e['ticks']} ws={e['mensajes_ws']} órdenes={e['ordenes']} llenados={e['llenados']}")
+    except KeyboardInterrupt:
+        servidor.detener()
@@ -0,0 +1,140 @@
+import numpy as np
+from binance.enums import SIDE_BUY, SIDE_SELL
+from Core.Utils.Config import Config
+
+class SimuladorBasico:
+    """
+    Doble de GestorBasico para Backtest (misma interfaz, sin red).
+    - Órdenes Limit: se llenan en la primera vela POSTERIOR cuyo rango toca el precio (comisión maker).
+    - Cierres a Mercado: al cierre de la vela actual (comisión taker + deslizamiento).
+    - Cupo: respeta Config.MAX_POSICIONES como GestorCapital (posiciones + órdenes de entrada).
+    El motor de Backtest mueve el reloj con avanzar(t).
+    """
+    def __init__(self, mercado, balance_inicial=1000.0, comision_maker=None, comision_taker=None,
+                 deslizamiento=0.0, max_posiciones=None, timeout_velas=None):
+        self.mercado = mercado # {'BTCUSDT': {'high': array, 'low': array, 'close': array}} alineados
+        self.balance = balance_inicial
+        self.comision_maker = Config.COMISION_MAKER if comision_maker is None else comision_maker
+        self.comision_taker = Config.COMISION_TAKER if comision_taker is None else comision_taker
+        self.deslizamiento = deslizamiento
+        self.max_posiciones = Config.MAX_POSICIONES if max_posiciones is None else max_posiciones
+        self.timeout_velas = timeout_velas # None = GTC (igual que el bot en vivo)
+
+        self.t = 0
+        self.posiciones = {} # {'BTCUSDT': {'cantidad': +-x, 'entrada': p, 't': i, 'comision': c}}
+        self.ordenes = {}    # {'BTCUSDT': {'side', 'cantidad', 'precio', 't', 't_llenado', 't_vence'}}
+        self.operaciones = []
+        self.cambios_balance = [] # [(t, balance)] para reconstruir la curva de capital
+        self.siguiente_id = 1
+
+    # ------------------------------------------------------------------
+    # Reloj del simulador
+    # ------------------------------------------------------------------
+    def proximo_evento(self):
+        """Índice de la próxima vela en la que se llena o vence alguna orden (None si no hay)."""
+        tiempos = []
+        for o in self.ordenes.values():
+            if o['t_llenado'] is not None:
+                tiempos.append(o['t_llenado'])
+            elif o['t_vence'] is not None:
+                tiempos.append(o['t_vence'])
+        return min(tiempos) if tiempos else None
+
+    def avanzar(self, t):
+        """Mueve el reloj a la vela t aplicando llenados y vencimientos ocurridos hasta ella."""
+        self.t = t
+        for symbol in list(self.ordenes):
+            o = self.ordenes[symbol]
+            if o['t_llenado'] is not None and o['t_llenado'] <= t:
+                self._llenar(symbol, o)
+            elif o['t_llenado'] is None and o['t_vence'] is not None and o['t_vence'] <= t:
+                del self.ordenes[symbol]
+
+    def _buscar_llenado(self, symbol, side, precio, desde):
+        """Primera vela >= desde cuyo rango toca el precio límite (búsqueda por bloques)."""
+        serie = self.mercado[symbol]['low'] if side == SIDE_BUY else self.mercado[symbol]['high']
+        fin = len(serie) if self.timeout_velas is None else min(len(serie), desde + self.timeout_velas)
+        bloque = 256
+        inicio = desde
+        while inicio < fin:
+            tramo = serie[inicio:min(fin, inicio + bloque)]
+            toca = tramo <= precio if side == SIDE_BUY else tramo >= precio
+            if toca.any():
+                return inicio + int(np.argmax(toca))
+            inicio += bloque
+            bloque *= 4
+        return None
+
+    def _llenar(self, symbol, o):
+        del self.ordenes[symbol]
+        comision = o['cantidad'] * o['precio'] * self.comision_maker
+        self.balance -= comision
+        self.cambios_balance.append((o['t_llenado'], self.balance))
+        signo = 1 if o['side'] == SIDE_BUY else -1
+        self.posiciones[symbol] = {
+            'cantidad': signo * o['cantidad'],
+            'entrada': o['precio'],
+            't': o['t_llenado'],
+            'comision': comision,
+        }
+
+    # ------------------------------------------------------------------
+    # Interfaz de GestorBasico / GestorCapital
+    # ------------------------------------------------------------------
+    def obtener_balance_usdt(self):
+        return self.balance
+
+    def calcular_cantidad(self, symbol, porcentaje, precio, apalancamiento, precision=3):
+        """Misma fórmula que GestorBasico: (Balance * % * Apalancamiento) / Precio."""
+        balance = self.obtener_balance_usdt()
+        cantidad_cruda = balance * (porcentaje / 100) * apalancamiento / precio
+        if precision == 0:
+            return int(cantidad_cruda), balance
+        return float(f"{cantidad_cruda:.{precision}f}"), balance
+
+    def colocar_orden_limit(self, symbol, side, cantidad, precio, llegada=None):
+        t_llenado = self._buscar_llenado(symbol, side, precio, self.t + 1)
+        t_vence = None if self.timeout_velas is None else self.t + self.timeout_velas
+        self.ordenes[symbol] = {
+            'side': side, 'cantidad': cantidad, 'precio': precio,
+            't': self.t, 't_llenado': t_llenado, 't_vence': t_vence,
+        }
+        orden = {'symbol': symbol, 'orderId': self.siguiente_id, 'status': 'NEW'}
+        self.siguiente_id += 1
+        return orden
+
+    def obtener_posicion(self, symbol):
+        p = self.posiciones.get(symbol)
+        return p['cantidad'] if p else 0.0
+
+    def verificar_ordenes_pendientes(self, symbol):
+        return symbol in self.ordenes
+
+    def hay_cupo_disponible(self):
+        """Igual que GestorCapital: cuentan posiciones y órdenes de entrada pendientes."""
+        return len(set(self.posiciones) | set(self.ordenes)) < self.max_posiciones
+
+    def cerrar_posicion_mercado(self, symbol, cantidad_actual, motivo="SEÑAL"):
+        p = self.posiciones.pop(symbol, None)
+        if p is None:
+            return None
+        precio = float(self.mercado[symbol]['close'][self.t])
+        # El deslizamiento siempre juega en contra
+        precio *= (1 - self.deslizamiento) if p['cantidad'] > 0 else (1 + self.deslizamiento)
+        comision = abs(p['cantidad']) * precio * self.comision_taker
+        bruto = p['cantidad'] * (precio - p['entrada'])
+        self.balance += bruto - comision
+        self.cambios_balance.append((self.t, self.balance))
+        self.operaciones.append({
+            'symbol': symbol,
+            'lado': 'LONG' if p['cantidad'] > 0 else 'SHORT',
+            'cantidad': abs(p['cantidad']),
+            'entrada': p['entrada'],
+            'salida': precio,
+            't_entrada': p['t'],
+            't_salida': self.t,
+            'pnl': bruto - comision - p['comision'],
+            'comisiones': comision + p['comision'],
+            'motivo': motivo,
+        })
+        return {'symbol': symbol, 'status': 'FILLED'}
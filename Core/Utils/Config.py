@@ -19,17 +19,132 @@ class Config:
     URL_FUTURES_MAIN = "https://fapi.binance.com"
     URL_FUTURES_TESTNET = "https://testnet.binancefuture.com"
 
+    TTL_EXCHANGE_INFO = 6 * 3600  # Segundos que vale la caché en disco de exchangeInfo
+    REINTENTO_EXCHANGE_INFO = 5   # Segundos de espera tras un fallo de descarga (se dobla con cada fallo)
+    REINTENTO_EXCHANGE_INFO_MAX = 300 # Tope de esa espera
+
+    # --- Cliente REST de Órdenes y Cuenta (Core/API/ClienteREST.py) ---
+    TIMEOUT_REST = 5          # Segundos máximos por petición (conexión + respuesta)
+    REINTENTOS_REST = 2       # Reintentos ante fallos de red o 5xx (las órdenes nuevas solo si no llegaron a enviarse)
+    HILOS_REST = 8            # Conexiones keep-alive del pool y peticiones simultáneas en en_paralelo()
+    RECV_WINDOW = 5000        # Milisegundos de validez de cada petición firmada
+
+    # --- Simulador Local de Binance (Core/Simulacion/ServidorSimulado.py) ---
+    USAR_SIMULADOR = False    # True: REST y WebSockets apuntan al servidor local (sin red)
+    URL_SIMULADOR_REST = "http://127.0.0.1:8801"
+    URL_SIMULADOR_WS = "ws://127.0.0.1:8802/"
+
     # --- Configuración del Bot ---
     NOMBRE_BOT = "BinanceBot-ARM-t4g"
     TIMEFRAME_DEFECTO = "5m"  # Scalping 5m
+    MS_TIMEFRAME = {"1m": 60_000, "5m": 300_000, "15m": 900_000, "1h": 3_600_000, "4h": 14_400_000}
+
+    # --- Stream de Precio (GestorMercado) ---
+    STREAM_PRECIO = "miniTicker" # ticker | miniTicker | markPrice@1s | bookTicker | aggTrade (solo se lee el precio)
+
+    # --- Conexiones WebSocket de Mercado (GestorConexiones) ---
+    STREAMS_POR_CONEXION = 200 # Streams por conexión multiplexada (límite de Binance Futures: 200)
+
+    # --- Supervisor de Streams (GestorSupervisor) ---
+    SUPERVISOR_STREAMS = True   # Detectar pares sin datos, reabrir su conexión y rellenar velas antes de operar
+    MAX_SILENCIO_PAR = 60       # Segundos sin ningún mensaje del par (precio, vela o libro) para darlo por caído
+    FRACCION_MUDOS_REABRIR = 0.5 # Se reabre una conexión solo si calla más de esta fracción de sus pares
+    INTERVALO_SUPERVISOR = 1.0  # Segundos entre revisiones
+
+    # --- Scanner de Mercado (GestorScanner) ---
+    MODO_SCANNER = False           # True: ranking de todo USDT-M y rotación de los mejores a la lista de vigilancia
+    SCANNER_MAX_PARES = 512        # Filas del almacén (memoria fija: pares x muestras x float32)
+    SCANNER_MUESTRAS = 64          # Cierres guardados por par
+    SCANNER_MUESTREO = 60          # Segundos por muestra (60 = cierres de 1m sacados del miniTicker)
+    SCANNER_VOLUMEN_MIN = 20_000_000 # Volumen 24h mínimo (USDT) para entrar al ranking
+    INTERVALO_SCANNER = 60         # Segundos entre rotaciones
+    SCANNER_PLANTILLA = {          # Configuración de los pares que entran por el scanner
+        "timeframe": "5m",
+        "apalancamiento": 5,
+        "porcentaje_balance": 10,
+        "indicadores": {"rsi_periodo": 14, "rsi_sobreventa": 30, "rsi_sobrecompra": 70},
+    }
+
+    # --- Cola de Velas (hilo del socket -> hilo trabajador) ---
+    COLA_VELAS = True         # False: las klines se procesan dentro del hilo del WebSocket (comportamiento antiguo)
+    COLA_VELAS_MAX = 5000     # Actualizaciones pendientes máximas; al llenarse se descarta la abierta más vieja
+
+    # --- Velas Multi-Timeframe (derivadas de un solo stream de 1m) ---
+    AGREGAR_DESDE_1M = False  # True: un solo @kline_1m por par; 5m/15m/1h/4h se construyen en memoria
+    VELAS_1M = 1500           # Historia de 1m al arrancar (una sola petición de klines)
+    MIN_VELAS_AGREGADAS = 200 # Si la historia de 1m da menos velas de un timeframe, foto REST propia (solo al arrancar)
+
+    # --- Caché de Velas en Disco (Data/velas) ---
+    USAR_CACHE_VELAS = True   # Recargar historial local y pedir a REST solo la cola que falta
     
+    # --- Arranque en Paralelo ---
+    HILOS_ARRANQUE = 4                # Peticiones REST simultáneas durante el arranque
+    PRESUPUESTO_PESO = 1200           # Peso/minuto máximo de todo el proceso (Binance permite 2400)
+
+    # --- Bucle de Estrategia (Event-Driven) ---
+    MODO_EVENTOS = True       # True: evaluar solo los pares que cambiaron, al instante
+    DEBOUNCE_EVENTOS = 1.0    # Segundos mínimos entre evaluaciones del mismo par (ticks de precio)
+    SOLO_CIERRE_VELA = False  # True: solo dispara al cerrar vela (x=True), ignora ticks intermedios
+    INTERVALO_BARRIDO = 5     # Barrido completo de respaldo si no llega ningún evento
+    ANALISIS_EN_LOTE = False  # True: RSI/EMA de todos los pares del barrido en una sola pasada matricial (50+ pares)
+
+    # --- Libro Local de Cuenta (User Data Stream) ---
+    USAR_USER_STREAM = True        # Posiciones/órdenes en memoria en vez de REST por ciclo
+    INTERVALO_RECONCILIACION = 60  # Segundos entre fotos REST de seguridad
+    EDAD_MAX_BALANCE = 30          # Sin libro de cuenta: segundos que vale la foto de balance para dimensionar
+
+    # --- Ciclo de Vida de Órdenes Limit (GestorOrdenes) ---
+    GESTOR_ORDENES = True          # Seguir cada Limit de entrada: reprecio al mejor bid/ask, timeout y parciales
+    ACCION_TIMEOUT = "cancelar"    # Al vencer TIMEOUT_ORDEN_LIMIT: cancelar | mercado (completar el resto como taker)
+    MAX_REPRECIOS = 3              # Veces que se mueve una orden detrás del libro
+    REPRECIO_MIN_S = 2.0           # Segundos mínimos entre reprecios de la misma orden
+    MAX_DESVIO_REPRECIO = 0.3      # % máximo que se persigue el precio desde el de la señal
+    INTERVALO_ORDENES = 0.5        # Segundos entre revisiones de las órdenes vivas
+
+    # --- Protección por Llenado (GestorRiesgo) ---
+    PROTECCION_EN_LLENADO = True   # Stop closePosition colocado/ajustado con cada llenado (también parciales). Requiere USAR_USER_STREAM
+    STOP_LOSS_PCT = 1.0            # % desde el precio medio de entrada (también el stop de emergencia del arranque)
+    TAKE_PROFIT_PCT = None         # % de TP closePosition (None: la salida la decide la estrategia)
+    PREARMAR_STOP = True           # El stop sale en paralelo con la Limit de entrada (el primer llenado nace protegido)
+    REAJUSTE_STOP_PCT = 0.1        # Solo se recoloca el stop si el nuevo nivel se aleja más de este % del actual
+
+    # --- Trazas de Latencia (GestorLatencia) ---
+    TRAZAS_LATENCIA = True         # Latencia por etapa y par: red, recepción, cola, velas, RSI, decisión, REST de la orden
+    MUESTRAS_LATENCIA = 2048       # Muestras recientes por (par, etapa) para p50/p99 (volcado con SIGUSR1)
+
+    # --- Métricas del Proceso (GestorReportes) ---
+    METRICAS_HTTP = True           # Endpoint Prometheus en http://HOST_METRICAS:PUERTO_METRICAS/metrics
+    HOST_METRICAS = "127.0.0.1"    # Solo local (para scrapes remotos: túnel SSH o proxy)
+    PUERTO_METRICAS = 9108
+    ARCHIVO_METRICAS = None        # Ruta .prom para el textfile collector de node_exporter (None: sin archivo)
+    INTERVALO_METRICAS = 15        # Segundos entre escrituras del archivo
+
+    # --- Registro (GestorLogs) ---
+    NIVEL_LOG = "INFO"             # Nivel general de los loggers bot.*
+    NIVELES_LOG = {}               # Nivel por módulo, ej. {"estrategia": "WARNING", "ejecucion": "DEBUG"}
+    LOG_COLA_MAX = 10_000          # Registros pendientes máximos; con la cola llena se descarta (nunca se espera)
+    LOG_INTERVALO_ESCRITURA = 0.05 # Segundos entre lotes del hilo escritor
+    LOG_LIMITE_REPETIDOS = 60      # Segundos: las líneas repetitivas (💤 Esperando...) salen una vez por par y periodo
+    LOG_MAX_BYTES = 10 * 1024 * 1024 # Tamaño de Logs/bot.jsonl antes de rotar
+    LOG_COPIAS = 5                 # Archivos rotados que se conservan
+
+    # --- Comisiones de Binance Futures (Backtest / Simulación) ---
+    COMISION_MAKER = 0.0002   # 0.02% órdenes Limit que quedan en el libro
+    COMISION_TAKER = 0.0005   # 0.05% órdenes a Mercado
+
     # --- Gestión de Riesgo Global ---
     MAX_POSICIONES = 4        
-    TIMEOUT_ORDEN_LIMIT = 15  
+    TIMEOUT_ORDEN_LIMIT = 15  # Segundos de vida de una Limit de entrada sin llenarse (GestorOrdenes)
 
     @staticmethod
     def validar_config():
         """Verifica que las claves críticas existan antes de arrancar."""
+        if Config.USAR_SIMULADOR:
+            # El simulador no valida firmas: basta con claves de relleno
+            Config.BINANCE_API_KEY = Config.BINANCE_API_KEY or "simulador"
+            Config.BINANCE_SECRET_KEY = Config.BINANCE_SECRET_KEY or "simulador"
+            print(f"🧪 Configuración cargada. Modo SIMULADOR: {Config.URL_SIMULADOR_REST}")
+            return
         if not Config.BINANCE_API_KEY or not Config.BINANCE_SECRET_KEY:
             raise EnvironmentError("❌ ERROR CRÍTICO: No se encontraron las claves API en el archivo .env")
         print(f"✅ Configuración cargada correctamente. Modo Testnet: {Config.USAR_TESTNET}")
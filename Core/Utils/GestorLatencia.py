@@ -0,0 +1,130 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from Core.Utils.Config import Config
+
+RUTA_VOLCADO = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'Data', 'latencias.json')
+
+class GestorLatencia:
+    """
+    Trazas de latencia de punta a punta, por par y por etapa (ÚNICA por proceso, ver compartido()):
+      red          E del exchange -> llegada del mensaje (reloj de pared: incluye el desfase del reloj local)
+      recepcion    procesar_msg: decodificar y despachar en el hilo del socket
+      cola         kline encolada -> aplicada por el trabajador de GestorColaVelas
+      velas        GestorVelas.actualizar_vela_en_tiempo_real
+      indicadores  RSI del par (streaming, lote o clásico)
+      decision     evaluación completa del par en ejecutar_estrategia
+      orden_rest   ida y vuelta REST de la Limit (colocar_orden_limit)
+      dato_a_decision / dato_a_orden   desde el último mensaje del par hasta decidir / tener la orden aceptada
+    Todo lo local se mide con perf_counter (monotónico). Registrar es O(1) y sin candado: cada
+    (par, etapa) guarda sus últimas Config.MUESTRAS_LATENCIA muestras y los percentiles se calculan
+    solo al pedir el resumen (volcar() o SIGUSR1 en BotBase).
+    """
+    ETAPAS = ("red", "recepcion", "cola", "velas", "indicadores", "decision", "orden_rest",
+              "dato_a_decision", "dato_a_orden")
+    _instancia = None
+    _lock_instancia = threading.Lock()
+
+    def __init__(self, muestras=None, activo=None):
+        self.muestras = muestras or Config.MUESTRAS_LATENCIA
+        self.activo = Config.TRAZAS_LATENCIA if activo is None else activo
+        self.series = {}   # {('BTCUSDT', 'velas'): [deque de ms, muestras desde el arranque, máximo]}
+        self.llegadas = {} # {'BTCUSDT': perf_counter del último mensaje del par}
+
+    @classmethod
+    def compartido(cls):
+        """Devuelve la instancia global (la crea la primera vez)."""
+        with cls._lock_instancia:
+            if cls._instancia is None:
+                cls._instancia = cls()
+            return cls._instancia
+
+    # ------------------------------------------------------------------
+    # Registro (caminos calientes)
+    # ------------------------------------------------------------------
+    def registrar(self, symbol, etapa, ms):
+        if not self.activo:
+            return
+        serie = self.series.get((symbol, etapa))
+        if serie is None:
+            serie = self.series[(symbol, etapa)] = [deque(maxlen=self.muestras), 0, ms]
+        serie[0].append(ms)
+        serie[1] += 1
+        if ms > serie[2]:
+            serie[2] = ms
+
+    def desde(self, symbol, etapa, inicio):
+        """Registra el tramo desde 'inicio' (perf_counter) hasta ahora."""
+        if self.activo:
+            self.registrar(symbol, etapa, (time.perf_counter() - inicio) * 1000)
+
+    @contextmanager
+    def tramo(self, symbol, etapa):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.desde(symbol, etapa, inicio)
+
+    def llegada(self, symbol, evento_ms=None, instante=None):
+        """Llega un mensaje del par: lo anota como 'último dato' y mide la red contra su E/T (ms del exchange)."""
+        if not self.activo:
+            return
+        self.llegadas[symbol] = instante or time.perf_counter()
+        if evento_ms:
+            self.registrar(symbol, "red", time.time() * 1000 - evento_ms)
+
+    def ultima_llegada(self, symbol):
+        """perf_counter del último mensaje del par (None si no hubo o las trazas están apagadas)."""
+        return self.llegadas.get(symbol)
+
+    def desde_llegada(self, symbol, etapa, llegada):
+        """
+        Tramo total desde 'llegada' (ej. dato_a_decision). Se toma con ultima_llegada() al empezar a
+        evaluar el par y se pasa hasta el final: un tick posterior no debe acortar la medida.
+        """
+        if llegada is not None:
+            self.desde(symbol, etapa, llegada)
+
+    # ------------------------------------------------------------------
+    # Lectura
+    # ------------------------------------------------------------------
+    def resumen(self, symbol=None):
+        """{'BTCUSDT': {'velas': {'muestras', 'p50_ms', 'p99_ms', 'max_ms'}}}; p50/p99 de la ventana, max y muestras desde el arranque."""
+        resultado = {}
+        for (par, etapa), (serie, n, maximo) in list(self.series.items()):
+            if symbol is not None and par != symbol:
+                continue
+            valores = sorted(serie)
+            percentil = lambda p: valores[min(len(valores) - 1, int(p * len(valores)))]
+            resultado.setdefault(par, {})[etapa] = {
+                'muestras': n, 'p50_ms': percentil(0.5), 'p99_ms': percentil(0.99), 'max_ms': maximo,
+            }
+        return resultado
+
+    def volcar(self, ruta=RUTA_VOLCADO):
+        """Imprime la tabla de latencias y (si hay ruta) la guarda en JSON. Devuelve el resumen."""
+        resumen = self.resumen()
+        orden = {etapa: i for i, etapa in enumerate(self.ETAPAS)}
+        print("\n⏱️  LATENCIAS POR ETAPA (ms)")
+        print(f"   {'par':<12} {'etapa':<16} {'n':>8} {'p50':>9} {'p99':>9} {'max':>9}")
+        for par in sorted(resumen):
+            for etapa in sorted(resumen[par], key=lambda e: orden.get(e, len(orden))):
+                m = resumen[par][etapa]
+                print(f"   {par:<12} {etapa:<16} {m['muestras']:>8} {m['p50_ms']:>9.3f} "
+                      f"{m['p99_ms']:>9.3f} {m['max_ms']:>9.3f}")
+        if ruta:
+            try:
+                os.makedirs(os.path.dirname(ruta), exist_ok=True)
+                with open(ruta, 'w') as f:
+                    json.dump({'timestamp': time.time(), 'latencias': resumen}, f, indent=1)
+                print(f"💾 Latencias guardadas en {os.path.normpath(ruta)}")
+            except OSError as e:
+                print(f"⚠️ No se pudo guardar el volcado de latencias: {e}")
+        return resumen
+
+    def reiniciar(self):
+        self.series = {}
@@ -0,0 +1,215 @@
+import atexit
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from Core.Utils.Config import Config
+
+RUTA_LOGS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'Logs', 'bot.jsonl')
+
+class FiltroRepetidos(logging.Filter):
+    """
+    Líneas repetitivas (💤 Esperando..., sin cupo, orden pendiente): los registros con extra={'clave': ...}
+    salen como mucho una vez cada 'periodo' segundos por clave. El siguiente que pasa lleva
+    'suprimidos' con cuántos se callaron entre medias.
+    """
+    def __init__(self, periodo):
+        super().__init__()
+        self.periodo = periodo
+        self.ultimos = {} # {clave: [instante, suprimidos]}
+        self.suprimidos = 0
+
+    def filter(self, record):
+        clave = getattr(record, 'clave', None)
+        if clave is None:
+            return True
+        ahora = time.monotonic()
+        ultimo = self.ultimos.get(clave)
+        if ultimo is not None and ahora - ultimo[0] < self.periodo:
+            ultimo[1] += 1
+            self.suprimidos += 1
+            return False
+        if ultimo is not None and ultimo[1]:
+            record.suprimidos = ultimo[1]
+        self.ultimos[clave] = [ahora, 0]
+        return True
+
+class _ManejadorCola(logging.Handler):
+    """Lado productor: filtro de repetidos y append. No formatea, no toca disco y nunca bloquea."""
+    def __init__(self, gestor):
+        super().__init__()
+        self.gestor = gestor
+
+    def handle(self, record):
+        # Sin el candado de Handler.handle: deque.append ya es atómico
+        if self.gestor.filtro.filter(record):
+            self.gestor.encolar(record)
+        return True
+
+    def emit(self, record):
+        self.gestor.encolar(record)
+
+class GestorLogs:
+    """
+    Registro NO bloqueante (ÚNICO por proceso, ver compartido()).
+    - Los módulos piden su logger con GestorLogs.obtener('estrategia') -> 'bot.estrategia'.
+    - En los caminos calientes (bucle de estrategia, hilos de sockets, ejecución) una línea es crear
+      el registro y un deque.append (sin candados): el mensaje se formatea y se escribe en el hilo
+      escritor, por lotes cada Config.LOG_INTERVALO_ESCRITURA, a consola y a un JSONL rotativo
+      (Config.LOG_MAX_BYTES x Config.LOG_COPIAS).
+    - Cola acotada (Config.LOG_COLA_MAX): si se llena se descarta y se cuenta, jamás se espera.
+    - Niveles por módulo en Config.NIVELES_LOG; lo que está por debajo ni siquiera crea el registro.
+    - extra={'clave': ...} limita las líneas repetitivas (Config.LOG_LIMITE_REPETIDOS) y
+      extra={'datos': {...}} añade campos estructurados al JSONL.
+    Hasta iniciar() (tests, scripts sueltos) los mensajes salen directos por consola como un print.
+    Los mensajes de arranque siguen siendo print: salen una vez, antes de operar.
+    """
+    _instancia = None
+    _lock_instancia = threading.Lock()
+
+    RAIZ = logging.getLogger("bot")
+
+    def __init__(self, ruta=RUTA_LOGS, consola=True, capacidad=None, limite_repetidos=None, max_bytes=None,
+                 copias=None):
+        self.ruta = ruta
+        self.consola = consola
+        self.max_bytes = max_bytes or Config.LOG_MAX_BYTES
+        self.copias = copias or Config.LOG_COPIAS
+        self.cola = deque()
+        self.capacidad = capacidad or Config.LOG_COLA_MAX
+        self.parada = threading.Event()
+        self.filtro = FiltroRepetidos(Config.LOG_LIMITE_REPETIDOS if limite_repetidos is None else limite_repetidos)
+        self.manejador = _ManejadorCola(self)
+        self.contadores = {'escritos': 0, 'descartados': 0, 'lotes': 0}
+        self.archivo = None
+        self.hilo = None
+
+    @classmethod
+    def compartido(cls):
+        """Devuelve la instancia global (la crea la primera vez)."""
+        with cls._lock_instancia:
+            if cls._instancia is None:
+                cls._instancia = cls()
+            return cls._instancia
+
+    @staticmethod
+    def obtener(modulo):
+        return logging.getLogger(f"bot.{modulo}")
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------------
+    def iniciar(self):
+        """Cambia la salida directa por la cola + hilo escritor."""
+        if self.hilo:
+            return
+        for modulo, nivel in Config.NIVELES_LOG.items():
+            self.obtener(modulo).setLevel(nivel)
+        self.RAIZ.setLevel(Config.NIVEL_LOG)
+        # Lo que el JSONL no usa no se calcula en cada línea (optimizaciones documentadas de logging)
+        logging._srcfile = None # Sin findCaller: ni archivo ni línea de origen
+        logging.logProcesses = False
+        logging.logMultiprocessing = False
+        if self.ruta:
+            os.makedirs(os.path.dirname(self.ruta), exist_ok=True)
+            self.archivo = open(self.ruta, 'a', encoding='utf-8')
+        self.parada.clear()
+        self.hilo = threading.Thread(target=self._escribir, name="logs", daemon=True)
+        self.hilo.start()
+        self.RAIZ.removeHandler(_DIRECTO)
+        self.RAIZ.addHandler(self.manejador)
+        atexit.register(self.detener)
+
+    def detener(self, timeout=2):
+        """Vacía la cola y vuelve a la salida directa."""
+        if not self.hilo:
+            return
+        self.RAIZ.removeHandler(self.manejador)
+        self.RAIZ.addHandler(_DIRECTO)
+        self.parada.set() # El escritor vacía lo pendiente y termina
+        self.hilo.join(timeout)
+        self.hilo = None
+        if self.archivo:
+            self.archivo.close()
+            self.archivo = None
+
+    def encolar(self, record):
+        if len(self.cola) >= self.capacidad:
+            self.contadores['descartados'] += 1
+            return
+        self.cola.append(record)
+
+    # ------------------------------------------------------------------
+    # Hilo escritor
+    # ------------------------------------------------------------------
+    def _escribir(self):
+        """Sondea la cola (el productor no avisa: avisar costaría un candado por línea) y escribe por lotes."""
+        while True:
+            fin = self.parada.wait(Config.LOG_INTERVALO_ESCRITURA)
+            while self.cola:
+                lote = [self.cola.popleft() for _ in range(min(len(self.cola), 500))]
+                try:
+                    self._volcar(lote)
+                except Exception as e:
+                    sys.stderr.write(f"⚠️ GestorLogs: error escribiendo {len(lote)} registros: {e}\n")
+            if fin:
+                return
+
+    @staticmethod
+    def _texto(record):
+        texto = record.getMessage()
+        if getattr(record, 'suprimidos', 0):
+            texto += f" (+{record.suprimidos} similares)"
+        if record.exc_info:
+            texto += "\n" + logging.Formatter().formatException(record.exc_info)
+        return texto
+
+    def _volcar(self, registros):
+        textos = [self._texto(r) for r in registros]
+        if self.consola:
+            sys.stdout.write("\n".join(textos) + "\n")
+            sys.stdout.flush()
+        if self.archivo:
+            lineas = []
+            for record, texto in zip(registros, textos):
+                linea = {'ts': round(record.created, 6), 'nivel': record.levelname, 'modulo': record.name[4:],
+                         'hilo': record.threadName, 'msg': texto}
+                datos = getattr(record, 'datos', None)
+                if datos:
+                    linea['datos'] = datos
+                lineas.append(json.dumps(linea, ensure_ascii=False, default=str))
+            self.archivo.write("\n".join(lineas) + "\n")
+            self.archivo.flush()
+            if self.archivo.tell() >= self.max_bytes:
+                self._rotar()
+        self.contadores['escritos'] += len(registros)
+        self.contadores['lotes'] += 1
+
+    def _rotar(self):
+        """bot.jsonl -> bot.jsonl.1 -> ... -> bot.jsonl.N (se pierde la más vieja)."""
+        self.archivo.close()
+        for i in range(self.copias - 1, 0, -1):
+            if os.path.exists(f"{self.ruta}.{i}"):
+                os.replace(f"{self.ruta}.{i}", f"{self.ruta}.{i + 1}")
+        os.replace(self.ruta, f"{self.ruta}.1")
+        self.archivo = open(self.ruta, 'a', encoding='utf-8')
+
+    def estado(self):
+        """Contadores para reportes: si 'descartados' crece, el escritor no da abasto."""
+        return dict(self.contadores, suprimidos=self.filtro.suprimidos, pendientes=len(self.cola))
+
+class _Consola(logging.StreamHandler):
+    """Como print(): escribe en el sys.stdout de ese momento (puede haberse redirigido)."""
+    def emit(self, record):
+        self.stream = sys.stdout
+        super().emit(record)
+
+# Salida directa hasta que arranque el escritor (mismo aspecto que un print)
+_DIRECTO = _Consola()
+_DIRECTO.setFormatter(logging.Formatter("%(message)s"))
+GestorLogs.RAIZ.addHandler(_DIRECTO)
+GestorLogs.RAIZ.setLevel(logging.INFO)
+GestorLogs.RAIZ.propagate = False
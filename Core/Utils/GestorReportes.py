@@ -0,0 +1,224 @@
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from Core.Utils.Config import Config
+
+class GestorReportes:
+    """
+    Métricas del proceso en texto de Prometheus (sin dependencias externas).
+    - Endpoint HTTP local (Config.METRICAS_HTTP): http://HOST_METRICAS:PUERTO_METRICAS/metrics
+    - y/o archivo .prom cada Config.INTERVALO_METRICAS (textfile collector de node_exporter).
+    Todo se calcula al pedir las métricas a partir de contadores que los gestores ya llevan:
+    en el camino caliente solo quedan los incrementos de registrar_barrido() y contar_omitido().
+    Sin estado entre lecturas: las tasas (CPU %, mensajes/s) se sacan con rate() de los contadores
+    *_total, así varios lectores a la vez (scrapers, archivo .prom) no se pisan la base.
+    """
+    def __init__(self, bot, puerto=None, archivo=None, intervalo=None):
+        self.bot = bot # BotBase: de él se leen mercado, velas, REST, supervisor, órdenes, riesgo...
+        self.puerto = Config.PUERTO_METRICAS if puerto is None else puerto
+        self.archivo = Config.ARCHIVO_METRICAS if archivo is None else archivo
+        self.intervalo = intervalo or Config.INTERVALO_METRICAS
+        self.barridos = {'total': 0, 'excedidos': 0, 'ultimo_s': 0.0, 'max_s': 0.0, 'pares': 0}
+        self.omitidos = {} # {'BTCUSDT': veces que verificar_salud_datos lo dejó fuera}
+        self.servidor = None
+        self.parada = threading.Event()
+
+    # ------------------------------------------------------------------
+    # Registro desde el bucle de estrategia
+    # ------------------------------------------------------------------
+    def registrar_barrido(self, segundos, pares):
+        """Duración de una pasada de ejecutar_estrategia contra su presupuesto (Config.INTERVALO_BARRIDO)."""
+        b = self.barridos
+        b['total'] += 1
+        b['ultimo_s'], b['pares'] = segundos, pares
+        b['max_s'] = max(b['max_s'], segundos)
+        if segundos > Config.INTERVALO_BARRIDO:
+            b['excedidos'] += 1
+
+    def contar_omitido(self, par):
+        self.omitidos[par] = self.omitidos.get(par, 0) + 1
+
+    # ------------------------------------------------------------------
+    # Proceso
+    # ------------------------------------------------------------------
+    @staticmethod
+    def memoria_rss():
+        """RSS actual en bytes (/proc en Linux); fuera de Linux, el pico de getrusage o None."""
+        try:
+            with open('/proc/self/statm') as f:
+                return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        except (OSError, ValueError, AttributeError):
+            pass
+        try:
+            import resource
+        except ImportError:
+            return None # Windows
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return pico if sys.platform == 'darwin' else pico * 1024
+
+    # ------------------------------------------------------------------
+    # Formato Prometheus
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _serie(lineas, nombre, tipo, ayuda, valores):
+        """valores: número, o [(etiquetas dict, número)]. Los None se omiten."""
+        if not isinstance(valores, list):
+            valores = [({}, valores)]
+        valores = [(e, v) for e, v in valores if v is not None]
+        if not valores:
+            return
+        lineas.append(f"# HELP {nombre} {ayuda}")
+        lineas.append(f"# TYPE {nombre} {tipo}")
+        for etiquetas, valor in valores:
+            texto = ",".join(f'{k}="{v}"' for k, v in etiquetas.items())
+            lineas.append(f"{nombre}{{{texto}}} {float(valor)!r}" if texto else f"{nombre} {float(valor)!r}")
+
+    def generar(self):
+        """Texto de exposición de Prometheus con la foto actual del bot."""
+        inicio = time.perf_counter()
+        lineas = []
+        s = self._serie
+        bot = self.bot
+
+        # Proceso
+        mercado = bot.mercado
+        mensajes = {stream: m[0] for stream, m in list(mercado.metricas.items())}
+        s(lineas, "bot_cpu_segundos_total", "counter",
+          "CPU de usuario+sistema consumida por el proceso (rate() = núcleos en uso)", time.process_time())
+        s(lineas, "bot_memoria_rss_bytes", "gauge", "Memoria residente del proceso", self.memoria_rss())
+        s(lineas, "bot_hilos", "gauge", "Hilos vivos del proceso", threading.active_count())
+
+        # Velas en memoria
+        s(lineas, "bot_velas_memoria_bytes", "gauge", "Bytes de los ring buffers de velas por par",
+          [({'par': par}, n) for par, n in sorted(bot.velas.memoria_por_par().items())])
+
+        # Bucle de estrategia
+        b = self.barridos
+        s(lineas, "bot_barrido_segundos", "gauge", "Duración de la última pasada de ejecutar_estrategia", b['ultimo_s'])
+        s(lineas, "bot_barrido_max_segundos", "gauge", "Pasada más lenta desde el arranque", b['max_s'])
+        s(lineas, "bot_barrido_presupuesto_segundos", "gauge", "Presupuesto de cada pasada (INTERVALO_BARRIDO)",
+          Config.INTERVALO_BARRIDO)
+        s(lineas, "bot_barrido_pares", "gauge", "Pares evaluados en la última pasada", b['pares'])
+        s(lineas, "bot_barridos_total", "counter", "Pasadas de ejecutar_estrategia", b['total'])
+        s(lineas, "bot_barridos_excedidos_total", "counter", "Pasadas que superaron el presupuesto", b['excedidos'])
+        s(lineas, "bot_pares_activos", "gauge", "Pares en la lista de vigilancia", len(bot.pares_activos))
+        s(lineas, "bot_pares_omitidos_total", "counter", "Evaluaciones saltadas por datos viejos o en recuperación",
+          [({'par': par}, n) for par, n in sorted(self.omitidos.items())])
+
+        # REST
+        rest = bot.api.rest
+        llamadas = sorted(rest.llamadas.items())
+        s(lineas, "bot_rest_peticiones_total", "counter", "Peticiones REST por endpoint",
+          [({'endpoint': e}, n) for e, (n, _) in llamadas])
+        s(lineas, "bot_rest_errores_total", "counter", "Respuestas no 2xx y caídas de red por endpoint",
+          [({'endpoint': e}, n) for e, (_, n) in llamadas])
+        peso = bot.peso.estado()
+        s(lineas, "bot_rest_peso_utilizacion", "gauge", "Fracción usada del presupuesto de peso por minuto",
+          peso['utilizacion'])
+        s(lineas, "bot_rest_peso_servidor", "gauge", "Último X-MBX-USED-WEIGHT-1M de Binance", peso['peso_servidor'])
+
+        # WebSockets
+        s(lineas, "bot_ws_mensajes_total", "counter", "Mensajes de mercado por stream (rate() = mensajes/s)",
+          [({'stream': stream}, n) for stream, n in sorted(mensajes.items())])
+        if mercado.conexiones:
+            estado = mercado.conexiones.estado()
+            s(lineas, "bot_ws_conexion_activa", "gauge", "1 si la conexión está recibiendo",
+              [({'conexion': c['id']}, c['estado'] == 'ok') for c in estado])
+            s(lineas, "bot_ws_reconexiones_total", "counter", "Reconexiones por conexión",
+              [({'conexion': c['id']}, c['reconexiones']) for c in estado])
+        cola = mercado.estado_cola()
+        if cola:
+            s(lineas, "bot_cola_velas_profundidad", "gauge", "Klines pendientes de aplicar", cola['profundidad'])
+            s(lineas, "bot_cola_velas_descartadas_total", "counter", "Klines descartadas con la cola llena",
+              cola['descartadas'])
+        if bot.supervisor:
+            sup = bot.supervisor.metricas()
+            s(lineas, "bot_streams_caidas_total", "counter", "Pares dados por caídos", sup['caidas'])
+            s(lineas, "bot_streams_en_recuperacion", "gauge", "Pares sin operar hasta rellenar velas",
+              len(sup['en_recuperacion']))
+
+        # Ejecución y riesgo
+        if bot.ordenes:
+            ordenes = sorted(bot.ordenes.metricas().items())
+            s(lineas, "bot_ordenes_tasa_llenado", "gauge", "Limits llenadas / cerradas por par",
+              [({'par': par}, m['tasa_llenado']) for par, m in ordenes])
+            s(lineas, "bot_ordenes_maker_porcentaje", "gauge", "% de la cantidad ejecutada como maker",
+              [({'par': par}, m['pct_maker']) for par, m in ordenes])
+        if bot.riesgo:
+            riesgo = bot.riesgo.metricas()
+            s(lineas, "bot_proteccion_latencia_ms", "gauge", "Llenado -> stop colocado (ms)",
+              [({'cuantil': c}, riesgo['latencia_proteccion_ms'][k]) for c, k in (("0.5", 'p50'), ("0.99", 'p99'))])
+            s(lineas, "bot_proteccion_fallos_total", "counter", "Errores colocando stops", riesgo['fallos'])
+
+        # Latencias por etapa (GestorLatencia)
+        s(lineas, "bot_latencia_ms", "gauge", "Latencia por par y etapa (ventana reciente)",
+          [({'par': par, 'etapa': etapa, 'cuantil': c}, m[k])
+           for par, etapas in sorted(bot.trazas.resumen().items()) for etapa, m in etapas.items()
+           for c, k in (("0.5", 'p50_ms'), ("0.99", 'p99_ms'))])
+
+        if bot.logs:
+            logs = bot.logs.estado()
+            s(lineas, "bot_logs_pendientes", "gauge", "Registros esperando al escritor", logs['pendientes'])
+            s(lineas, "bot_logs_descartados_total", "counter", "Registros perdidos con la cola llena", logs['descartados'])
+            s(lineas, "bot_logs_suprimidos_total", "counter", "Líneas repetitivas silenciadas", logs['suprimidos'])
+
+        s(lineas, "bot_metricas_generacion_segundos", "gauge", "Coste de generar esta página",
+          time.perf_counter() - inicio)
+        return "\n".join(lineas) + "\n"
+
+    # ------------------------------------------------------------------
+    # Exposición
+    # ------------------------------------------------------------------
+    def iniciar(self):
+        if Config.METRICAS_HTTP:
+            reportes = self
+
+            class Manejador(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.split('?')[0] != '/metrics':
+                        self.send_error(404)
+                        return
+                    cuerpo = reportes.generar().encode()
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                    self.send_header('Content-Length', str(len(cuerpo)))
+                    self.end_headers()
+                    self.wfile.write(cuerpo)
+
+                def log_message(self, *args):
+                    pass # Sin una línea por scrape en la consola
+
+            try:
+                self.servidor = ThreadingHTTPServer((Config.HOST_METRICAS, self.puerto), Manejador)
+            except OSError as e:
+                print(f"⚠️ No se pudo abrir el endpoint de métricas en el puerto {self.puerto}: {e}")
+            else:
+                self.servidor.daemon_threads = True
+                self.puerto = self.servidor.server_address[1]
+                threading.Thread(target=self.servidor.serve_forever, name="metricas", daemon=True).start()
+                print(f"📈 Métricas en http://{Config.HOST_METRICAS}:{self.puerto}/metrics")
+        if self.archivo:
+            threading.Thread(target=self._escribir_periodicamente, name="metricas-archivo", daemon=True).start()
+            print(f"📈 Métricas en {self.archivo} cada {self.intervalo}s")
+
+    def _escribir_periodicamente(self):
+        while not self.parada.wait(self.intervalo):
+            self.escribir_archivo()
+
+    def escribir_archivo(self):
+        """Escritura atómica (tmp + replace): el lector nunca ve un archivo a medias."""
+        try:
+            temporal = self.archivo + '.tmp'
+            with open(temporal, 'w') as f:
+                f.write(self.generar())
+            os.replace(temporal, self.archivo)
+        except Exception as e:
+            print(f"⚠️ Error escribiendo métricas: {e}")
+
+    def detener(self):
+        self.parada.set()
+        if self.servidor:
+            self.servidor.shutdown()
+            self.servidor.server_close()
@@ -2,16 +2,31 @@ import time
 import sys
 import json
 import os
+import copy
+import signal
+from concurrent.futures import ThreadPoolExecutor
 from Core.Utils.Config import Config
+from Core.Utils.GestorLatencia import GestorLatencia
+from Core.Utils.GestorReportes import GestorReportes
+from Core.Utils.GestorLogs import GestorLogs
 from Core.API.BinanceBase import BinanceBase
+from Core.API.GestorExchangeInfo import GestorExchangeInfo
+from Core.API.GestorPeso import GestorPeso
 from Core.Datos.GestorMercado import GestorMercado
 from Core.Datos.GestorAnalisis import GestorAnalisis
 from Core.Datos.GestorVelas import GestorVelas
+from Core.Datos.GestorIndicadores import GestorIndicadores
+from Core.Datos.GestorCuenta import GestorCuenta
+from Core.Datos.GestorHistorico import GestorHistorico
+from Core.Datos.GestorSupervisor import GestorSupervisor
+from Core.Datos.GestorScanner import GestorScanner
 from Core.Ejecucion.GestorBasico import GestorBasico
+from Core.Ejecucion.GestorOrdenes import GestorOrdenes
 
 # --- NUEVOS COMPONENTES DE SEGURIDAD ---
 from Core.Riesgo.GestorPosicion import GestorPosicion
 from Core.Riesgo.GestorCapital import GestorCapital
+from Core.Riesgo.GestorRiesgo import GestorRiesgo
 # ---------------------------------------
 
 class BotBase:
@@ -22,6 +37,9 @@ class BotBase:
     """
     def __init__(self):
         print("🏗️  Inicializando BotBase v4 (Con Seguridad Integrada)...")
+        # Registro no bloqueante: desde aquí los caminos calientes solo encolan (consola + Logs/bot.jsonl)
+        self.logs = GestorLogs.compartido()
+        self.logs.iniciar()
         
         # 1. Cargar Configuración
         try:
@@ -40,16 +58,36 @@ class BotBase:
             sys.exit()
             
         # 4. Inicializar Componentes Especialistas
+        self.trazas = GestorLatencia.compartido() # Latencia por etapa: del tick a la orden aceptada
+        if Config.TRAZAS_LATENCIA and hasattr(signal, "SIGUSR1"): # kill -USR1 <pid>: volcado bajo demanda
+            signal.signal(signal.SIGUSR1, lambda *_: self.trazas.volcar())
         self.mercado = GestorMercado()      # Ojos (WebSockets)
         self.analista = GestorAnalisis()    # Cerebro (Indicadores)
-        self.velas = GestorVelas(self.api)  # Memoria (Historial)
+        self.indicadores = GestorIndicadores()  # Cerebro en streaming (RSI/EMA O(1) por tick)
+        # Memoria en disco (no se mezclan velas reproducidas por el simulador con las reales)
+        self.historico = GestorHistorico() if Config.USAR_CACHE_VELAS and not Config.USAR_SIMULADOR else None
+        self.velas = GestorVelas(self.api, indicadores=self.indicadores, historico=self.historico)  # Memoria (Historial)
+        self.supervisor = GestorSupervisor(self.mercado, self.velas) if Config.SUPERVISOR_STREAMS else None
+        self.scanner = GestorScanner(self.analista) if Config.MODO_SCANNER else None # Radar de todo USDT-M
         
         # --- NUEVA ESTRUCTURA DE EJECUCIÓN Y RIESGO ---
+        # 0. Libro local de la cuenta (User Data Stream + reconciliación REST)
+        self.cuenta = GestorCuenta(self.api) if Config.USAR_USER_STREAM else None
+
         # A. Ejecutor (Manos)
-        self.ejecutor = GestorBasico(self.api) 
+        self.ejecutor = GestorBasico(self.api, cuenta=self.cuenta) 
+        # A2. Stop guiado por llenados (cada llenado o parcial -> stop al tamaño real en milisegundos)
+        if Config.PROTECCION_EN_LLENADO and not self.cuenta:
+            # Los llenados solo llegan por el User Data Stream: sin él la protección nunca actuaría
+            print("❌ Error de Configuración: PROTECCION_EN_LLENADO requiere USAR_USER_STREAM = True.")
+            sys.exit()
+        self.riesgo = GestorRiesgo(self.ejecutor, cuenta=self.cuenta) if Config.PROTECCION_EN_LLENADO else None
+        # A3. Ciclo de vida de las Limit de entrada (reprecio, timeout, parciales)
+        self.ordenes = GestorOrdenes(self.ejecutor, self.mercado, cuenta=self.cuenta,
+                                     riesgo=self.riesgo) if Config.GESTOR_ORDENES else None
         
         # B. Guardián de Cupos (Evita abrir más de 4 posiciones o duplicar)
-        self.capital = GestorCapital(self.api)
+        self.capital = GestorCapital(self.api, cuenta=self.cuenta)
         
         # C. Guardián de Posición (Coloca SL, limpia órdenes zombies)
         # Nota: GestorPosicion necesita al ejecutor para operar
@@ -58,6 +96,11 @@ class BotBase:
         
         # 5. Configurar cuenta (Apalancamiento)
         self.pares_activos = []
+        self.tiempos_arranque = {} # {'fase': segundos} para el reporte de arranque
+        self.promovidos = set() # Pares que entraron por el scanner (no están activos en estrategias.json)
+        self.proxima_rotacion = time.monotonic() + Config.INTERVALO_SCANNER
+        self.peso = self.api.rest.peso # Mismo presupuesto que usa el ClienteREST en cada petición
+        self.reportes = GestorReportes(self) # Métricas Prometheus: CPU, RSS, barridos, REST, WebSockets
         self.configurar_cuenta()
         
     def cargar_json_estrategias(self):
@@ -74,48 +117,171 @@ class BotBase:
             sys.exit()
 
     def configurar_cuenta(self):
-        """Configura apalancamiento inicial."""
+        """Configura apalancamiento inicial (en paralelo para todos los pares)."""
         print("🔧 Ajustando apalancamiento en Binance...")
         for par, config in self.estrategias.items():
             if config.get("activo", False):
                 self.pares_activos.append(par)
-                if Config.BINANCE_API_KEY:
-                    leverage = config.get("apalancamiento", 1)
-                    self.ejecutor.configurar_apalancamiento(par, leverage)
+                self.indicadores.registrar_par(
+                    par,
+                    rsi_periodo=config["indicadores"].get("rsi_periodo", 14),
+                    ema_periodo=config["indicadores"].get("ema_periodo")
+                )
+
+        if Config.BINANCE_API_KEY:
+            inicio = time.perf_counter()
+            # Peso 0: el ClienteREST ya lo reserva al enviar cada petición
+            self._en_paralelo([
+                (0, self.ejecutor.configurar_apalancamiento, (par, self.estrategias[par].get("apalancamiento", 1)))
+                for par in self.pares_activos
+            ])
+            self.tiempos_arranque["apalancamiento"] = time.perf_counter() - inicio
         print(f"✅ BotBase listo. Pares activos: {len(self.pares_activos)}")
 
+    def _en_paralelo(self, tareas):
+        """
+        Ejecuta [(peso, funcion, args), ...] en un pool de hilos respetando el
+        presupuesto de peso de la API. Devuelve los resultados en el mismo orden.
+        Las tareas que van por el ClienteREST llevan peso 0 (lo reserva él mismo).
+        """
+        def ejecutar(tarea):
+            peso, funcion, args = tarea
+            if peso:
+                self.peso.reservar(peso)
+            return funcion(*args)
+
+        with ThreadPoolExecutor(max_workers=Config.HILOS_ARRANQUE) as pool:
+            return list(pool.map(ejecutar, tareas))
+
     def iniciar_servicios(self):
-        """Secuencia de Arranque: Snapshot + WebSockets + Auditoría Inicial"""
+        """Secuencia de Arranque PARALELA: Snapshot + WebSockets + Auditoría Inicial"""
         if not self.pares_activos:
             print("⚠️ No hay pares activos.")
             return
+        inicio_total = time.perf_counter()
 
-        # FASE 1: Snapshot Histórico
-        print("\n📚 FASE 1: Cargando historial (Memoria)...")
+        # FASE 1: exchangeInfo + libro de cuenta + historial de TODOS los pares a la vez
+        print("\n📚 FASE 1: Cargando historial, filtros y cuenta (en paralelo)...")
+        inicio = time.perf_counter()
+        tareas = [(GestorPeso.PESOS["exchange_info"], GestorExchangeInfo.compartido(self.api).cargar, ())]
+        if self.cuenta:
+            tareas.append((0, self.cuenta.reconciliar, ()))
         for par in self.pares_activos:
             tf = self.estrategias[par]["timeframe"]
-            self.velas.inicializar_par(par, tf)
-            time.sleep(0.5)
+            extras = self.estrategias[par].get("timeframes_extra", [])
+            tareas.append((GestorPeso.PESOS["klines_1000"], self.velas.inicializar_par, (par, tf, extras)))
+        self._en_paralelo(tareas)
+        self.tiempos_arranque["historial"] = time.perf_counter() - inicio
 
         # FASE 2: WebSockets
         print("\n📡 FASE 2: Iniciando WebSockets...")
+        inicio = time.perf_counter()
+        self.velas.diferir_huecos = Config.COLA_VELAS # La cola retiene el par mientras se rellena un hueco
         self.mercado.iniciar_flujo_hibrido(
             self.estrategias, 
-            callback_kline=self.velas.actualizar_vela_en_tiempo_real
+            callback_kline=self.velas.actualizar_vela_en_tiempo_real,
+            callback_rellenar=self.velas.preparar_relleno
         )
         
-        print("⏳ Sincronizando flujos (5s)...")
-        time.sleep(5)
+        # Libro de cuenta: stream de usuario + reconciliación periódica
+        if self.cuenta:
+            self.cuenta.iniciar_stream(self.mercado.twm)
+            self.cuenta.iniciar_reconciliacion(Config.INTERVALO_RECONCILIACION)
+
+        # En vez de dormir 5s fijos, esperamos solo hasta que llegue el primer precio de cada par
+        print("⏳ Sincronizando flujos...")
+        self.mercado.esperar_primeros_datos(self.pares_activos, timeout=5)
+        if self.supervisor:
+            self.supervisor.iniciar(self.pares_activos)
+        if self.scanner:
+            self.scanner.iniciar(self.mercado.twm)
+        if self.riesgo:
+            self.riesgo.iniciar()
+        if self.ordenes:
+            self.ordenes.iniciar()
+        self.reportes.iniciar()
+        self.tiempos_arranque["websockets"] = time.perf_counter() - inicio
         
-        # FASE 3: Auditoría de Seguridad (NUEVO)
+        # FASE 3: Auditoría de Seguridad (todos los pares a la vez)
         # Al arrancar, revisamos si ya teníamos posiciones abiertas para protegerlas
         print("\n🛡️  FASE 3: Auditoría de Posiciones Abiertas...")
-        for par in self.pares_activos:
-            # Esto colocará el SL si el bot se reinició con una posición abierta
-            self.posicion.iniciar_protocolo_seguridad(par)
-            
+        inicio = time.perf_counter()
+        # Esto colocará el SL si el bot se reinició con una posición abierta
+        self._en_paralelo([
+            (0, self.posicion.iniciar_protocolo_seguridad, (par,))
+            for par in self.pares_activos
+        ])
+        self.tiempos_arranque["auditoria"] = time.perf_counter() - inicio
+        self.tiempos_arranque["total"] = time.perf_counter() - inicio_total
+
+        self.imprimir_reporte_arranque()
         print("🚀 SISTEMA OPERATIVO.\n")
 
+    def imprimir_reporte_arranque(self):
+        print("\n⏱️  REPORTE DE ARRANQUE")
+        for fase, segundos in self.tiempos_arranque.items():
+            print(f"   • {fase:<15} {segundos:6.2f}s")
+        estado = self.peso.estado()
+        print(f"   • Peso API usado: {estado['utilizacion'] * 100:.0f}% del presupuesto "
+              f"({estado['usado']}/{estado['limite']} por minuto, Binance reporta {estado['peso_servidor']})")
+
+    def rotar_pares(self):
+        """
+        Modo scanner (cada Config.INTERVALO_SCANNER): los mejores del ranking entran a la lista de
+        vigilancia, como mucho Config.MAX_POSICIONES a la vez; los promovidos que dejaron de
+        puntuar salen si no tienen posición ni órdenes. Los pares de estrategias.json no se tocan.
+        """
+        if not self.scanner or time.monotonic() < self.proxima_rotacion:
+            return
+        self.proxima_rotacion = time.monotonic() + Config.INTERVALO_SCANNER
+
+        mejores = [c['par'] for c in self.scanner.ranking(top=Config.MAX_POSICIONES)]
+        for par in list(self.promovidos):
+            if par in mejores:
+                continue
+            if self.ejecutor.obtener_posicion(par) == 0 and not self.ejecutor.verificar_ordenes_pendientes(par):
+                self.promovidos.discard(par)
+                self.pares_activos.remove(par)
+                print(f"🔻 Scanner: {par} sale de la lista de vigilancia.")
+
+        for par in mejores:
+            if par not in self.pares_activos:
+                self._promover(par)
+
+    def _promover(self, par):
+        """Alta en caliente de un par del scanner: apalancamiento, historial, indicadores y streams."""
+        if par not in self.mercado.timeframes: # Primera vez (los que salieron siguen suscritos)
+            if par in self.estrategias:
+                return # Desactivado a mano en estrategias.json: el scanner no lo reactiva
+            config = copy.deepcopy(Config.SCANNER_PLANTILLA)
+            config["activo"] = True
+            self.ejecutor.configurar_apalancamiento(par, config["apalancamiento"])
+            self.indicadores.registrar_par(par, rsi_periodo=config["indicadores"]["rsi_periodo"])
+            if not self.velas.inicializar_par(par, config["timeframe"]):
+                print(f"⚠️ Scanner: no se pudo cargar el historial de {par}; se reintentará en el próximo barrido.")
+                return
+            self.estrategias[par] = config # Solo ya inicializado: si no, parecería desactivado a mano
+            self.mercado.agregar_pares({par: config})
+            if self.supervisor:
+                self.supervisor.pares.append(par)
+        self.pares_activos.append(par)
+        self.promovidos.add(par)
+        print(f"🔺 Scanner: {par} entra a la lista de vigilancia.")
+
     def detener_servicios(self):
+        self.reportes.detener()
+        if self.ordenes:
+            self.ordenes.detener()
+        if self.riesgo:
+            self.riesgo.detener()
+        if self.scanner:
+            self.scanner.detener()
+        if self.supervisor:
+            self.supervisor.detener()
+        if self.cuenta:
+            self.cuenta.detener()
         self.mercado.detener_todo()
-        print("🛑 Servicios detenidos.")
\ No newline at end of file
+        if Config.TRAZAS_LATENCIA:
+            self.trazas.volcar()
+        print("🛑 Servicios detenidos.")
+        self.logs.detener() # Vacía lo pendiente antes de salir
\ No newline at end of file
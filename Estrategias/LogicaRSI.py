@@ -0,0 +1,35 @@
+class LogicaRSI:
+    """
+    Regla de decisión RSI (pura, sin red ni estado).
+    La usan tanto BotTrading.ejecutar_estrategia (en vivo) como el Backtest,
+    así lo que se prueba offline es exactamente lo que opera en Binance.
+    """
+    ABRIR_LONG = "ABRIR_LONG"
+    ABRIR_SHORT = "ABRIR_SHORT"
+    CERRAR = "CERRAR"
+    MANTENER = "MANTENER"     # En posición, sin señal de salida
+    ESPERAR = "ESPERAR"       # Sin posición, sin señal de entrada
+    PENDIENTE = "PENDIENTE"   # Orden límite esperando llenarse
+
+    @staticmethod
+    def decidir(rsi, rsi_compra, rsi_venta, posicion, ordenes_pendientes):
+        """
+        - Sin posición ni órdenes: LONG si RSI < sobreventa, SHORT si RSI > sobrecompra.
+        - En LONG: cerrar si RSI > sobrecompra. En SHORT: cerrar si RSI < sobreventa.
+        - Con orden pendiente: no hacer nada.
+        """
+        if posicion == 0 and not ordenes_pendientes:
+            if rsi < rsi_compra:
+                return LogicaRSI.ABRIR_LONG
+            if rsi > rsi_venta:
+                return LogicaRSI.ABRIR_SHORT
+            return LogicaRSI.ESPERAR
+
+        if posicion != 0:
+            if posicion > 0 and rsi > rsi_venta:
+                return LogicaRSI.CERRAR
+            if posicion < 0 and rsi < rsi_compra:
+                return LogicaRSI.CERRAR
+            return LogicaRSI.MANTENER
+
+        return LogicaRSI.PENDIENTE
@@ -0,0 +1,120 @@
+import sys
+import os
+import time
+import threading
+import _thread
+import numpy as np
+
+# Ajuste de rutas para importar desde la carpeta raíz
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Core.Utils.Config import Config
+from Core.Simulacion.ServidorSimulado import ServidorSimulado, generar_velas
+from Core.Simulacion.GestorBacktest import cargar_estrategias
+
+def benchmark(segundos=20, intervalo_tick=0.01, latencia_ms=0.0):
+    """
+    Corre BotTrading COMPLETO contra el simulador local y mide:
+    - Ticks por segundo que procesa el bot (mensajes de mercado que pasan por GestorMercado).
+    - Latencia señal -> orden: desde que llega el mensaje que evaluó la estrategia
+      hasta que el exchange confirma la orden Limit.
+    """
+    print("🧪 BENCHMARK: BotTrading end-to-end contra el simulador local")
+    print("-" * 60)
+    estrategias = {p: c for p, c in cargar_estrategias().items() if c.get("activo", False)}
+    intervalo_ms = Config.MS_TIMEFRAME[Config.TIMEFRAME_DEFECTO]
+    velas = {p: generar_velas(p, 30000, intervalo_ms, semilla=i) for i, p in enumerate(estrategias)}
+    servidor = ServidorSimulado(velas, Config.TIMEFRAME_DEFECTO, latencia_ms=latencia_ms, intervalo_tick=intervalo_tick)
+    rest, ws = servidor.iniciar()
+
+    Config.USAR_SIMULADOR = True
+    Config.URL_SIMULADOR_REST = rest
+    Config.URL_SIMULADOR_WS = ws
+    from main import BotTrading
+    bot = BotTrading()
+
+    # --- Instrumentación (solo envoltorios, la lógica del bot no cambia) ---
+    recibidos = {'n': 0}
+    ultimo_mensaje = {}  # {par: perf_counter del último mensaje recibido}
+    leido = {}           # {par: perf_counter del mensaje que está evaluando la estrategia}
+    latencias = []
+
+    procesar_original = bot.mercado.procesar_msg
+    def procesar_msg(msg):
+        # Los errores del socket se quedan en GestorConexiones: aquí solo llegan datos
+        ultimo_mensaje[msg['data'].get('s')] = time.perf_counter()
+        recibidos['n'] += 1
+        procesar_original(msg)
+    bot.mercado.procesar_msg = procesar_msg
+
+    obtener_precio_original = bot.mercado.obtener_precio
+    def obtener_precio(par):
+        leido[par] = ultimo_mensaje.get(par, time.perf_counter())
+        return obtener_precio_original(par)
+    bot.mercado.obtener_precio = obtener_precio
+
+    colocar_original = bot.ejecutor.colocar_orden_limit
+    def colocar_orden_limit(par, side, cantidad, precio, llegada=None):
+        orden = colocar_original(par, side, cantidad, precio, llegada=llegada)
+        if orden:
+            latencias.append(time.perf_counter() - leido[par])
+        return orden
+    bot.ejecutor.colocar_orden_limit = colocar_orden_limit
+
+    resultado = {}
+    def medir():
+        while not bot.mercado.stream_activo:
+            time.sleep(0.05)
+        time.sleep(1) # Dejamos pasar el arranque antes de medir
+        inicio_n, inicio_t = recibidos['n'], time.perf_counter()
+        bot.mercado.metricas_stream(reiniciar=True)
+        time.sleep(segundos)
+        resultado['procesados'] = recibidos['n'] - inicio_n
+        resultado['streams'] = bot.mercado.metricas_stream()
+        resultado['cola'] = bot.mercado.estado_cola()
+        resultado['conexiones'] = bot.mercado.conexiones.estado()
+        resultado['duracion'] = time.perf_counter() - inicio_t
+        _thread.interrupt_main() # Mismo camino que Ctrl+C: el bot detiene sus servicios
+
+    # El bot corre en el hilo principal (igual que main.py): el TWM ata sus sockets
+    # al event loop del hilo que los crea.
+    threading.Thread(target=medir, daemon=True).start()
+    bot.iniciar()
+    procesados, duracion = resultado['procesados'], resultado['duracion']
+
+    print("\n" + "=" * 60)
+    print("📊 RESULTADOS")
+    print("=" * 60)
+    print(f"   • Pares: {len(estrategias)} | intervalo tick: {intervalo_tick * 1000:.0f}ms | latencia inyectada: {latencia_ms:.0f}ms")
+    print(f"   • Ticks procesados por el bot: {procesados / duracion:,.0f} msg/s ({procesados} en {duracion:.1f}s)")
+    print(f"   • Mensajes emitidos por el simulador: {servidor.estadisticas['mensajes_ws']}")
+    conexiones = resultado['conexiones']
+    print(f"   • Conexiones WS: {len(conexiones)} | reconexiones {sum(c['reconexiones'] for c in conexiones)} | "
+          f"reaperturas {sum(c['reaperturas'] for c in conexiones)}")
+    for tipo in sorted({s.split('@', 1)[1] for s in resultado['streams']}):
+        medidas = [m for s, m in resultado['streams'].items() if s.split('@', 1)[1] == tipo]
+        print(f"   • @{tipo}: {sum(m['msg_s'] for m in medidas):,.0f} msg/s | "
+              f"decodificación {np.mean([m['decodificacion_us'] for m in medidas]):.1f}µs | "
+              f"callback {np.mean([m['callback_us'] for m in medidas]):.1f}µs")
+    if resultado['cola']:
+        cola = resultado['cola']
+        print(f"   • Cola de velas: profundidad máx {cola['profundidad_max']}/{cola['capacidad']} | "
+              f"fusionadas {cola['fusionadas']} | descartadas {cola['descartadas']} | procesadas {cola['procesadas']}")
+    if latencias:
+        ms = np.array(latencias) * 1000
+        print(f"   • Señal -> orden ({len(ms)} órdenes): p50 {np.percentile(ms, 50):.2f}ms | "
+              f"p99 {np.percentile(ms, 99):.2f}ms | máx {ms.max():.2f}ms")
+    else:
+        print("   • Señal -> orden: ninguna orden en la ventana medida")
+    print(f"   • Órdenes aceptadas: {servidor.estadisticas['ordenes']} | Llenados: {servidor.estadisticas['llenados']}")
+
+    time.sleep(0.5)
+    servidor.detener()
+    return procesados / duracion, latencias
+
+if __name__ == "__main__":
+    # Uso: python Tests/benchmark_simulador.py [--segundos S] [--intervalo SEG] [--latencia MS]
+    segundos = float(sys.argv[sys.argv.index("--segundos") + 1]) if "--segundos" in sys.argv else 20
+    intervalo = float(sys.argv[sys.argv.index("--intervalo") + 1]) if "--intervalo" in sys.argv else 0.01
+    latencia = float(sys.argv[sys.argv.index("--latencia") + 1]) if "--latencia" in sys.argv else 0.0
+    benchmark(segundos, intervalo, latencia)
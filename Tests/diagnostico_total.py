@@ -106,14 +106,14 @@ def diagnostico_profundo():
         
         # Cálculo del Bot
         # Hackeamos temporalmente el obtener_balance para testear con la simulación si es necesario
-        original_get_balance = bot.ejecutor.obtener_balance_usdt
+        original_get_balance = bot.ejecutor.obtener_foto_balance
         if balance < 10:
-            bot.ejecutor.obtener_balance_usdt = lambda: 1000.0
+            bot.ejecutor.obtener_foto_balance = lambda: {'balance': 1000.0, 'disponible': 1000.0, 'instante': 0.0}
             
         cantidad_bot, _ = bot.ejecutor.calcular_cantidad(par, porcentaje, precio, leverage, decimales)
         
         # Restauramos
-        bot.ejecutor.obtener_balance_usdt = original_get_balance
+        bot.ejecutor.obtener_foto_balance = original_get_balance
 
         print(f"Risk {par}:")
         print(f"   • Estrategia: {porcentaje}% de la cuenta x{leverage} apalancamiento")
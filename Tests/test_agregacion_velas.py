@@ -0,0 +1,138 @@
+import sys
+import os
+import tempfile
+import numpy as np
+
+# Ajuste de rutas para importar desde la carpeta raíz
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Core.Datos.GestorVelas import GestorVelas
+from Core.Datos.GestorHistorico import GestorHistorico
+from Core.Utils.Config import Config
+
+MINUTO = 60_000
+HORA = 3_600_000
+
+def vela_1m(t):
+    """Vela sintética determinista: el precio sube 0.1 por minuto, con mecha de ±0.5."""
+    c = 100 + (t // MINUTO % 10_000) * 0.1
+    return [t, str(c - 0.05), str(c + 0.5), str(c - 0.5), str(c), "2", t + MINUTO - 1, "0", 0, "0", "0", "0"]
+
+class ClienteFalso:
+    """Sirve 1m desde 'ahora' hacia atrás; cualquier otro timeframe, alineado a su periodo."""
+    KLINE_INTERVAL_1MINUTE = "1m"
+    KLINE_INTERVAL_5MINUTE = "5m"
+    KLINE_INTERVAL_15MINUTE = "15m"
+    KLINE_INTERVAL_1HOUR = "1h"
+    KLINE_INTERVAL_4HOUR = "4h"
+
+    def __init__(self, ahora):
+        self.ahora = ahora
+        self.peticiones = []
+
+    def futures_klines(self, symbol, interval, limit, startTime=None):
+        self.peticiones.append((interval, limit))
+        paso = Config.MS_TIMEFRAME[interval]
+        ultima = self.ahora - self.ahora % paso
+        tiempos = range(ultima - (limit - 1) * paso, ultima + 1, paso)
+        if interval == "1m":
+            return [vela_1m(t) for t in tiempos]
+        return [[t, "100", "101", "99", "100", "1", t + paso - 1, "0", 0, "0", "0", "0"] for t in tiempos]
+
+class ApiFalsa:
+    def __init__(self, cliente):
+        self.client = cliente
+
+def kline_ws(t, cerrada):
+    v = vela_1m(t)
+    return {'t': t, 'T': t + MINUTO - 1, 'i': '1m', 'o': v[1], 'h': v[2], 'l': v[3], 'c': v[4], 'v': v[5], 'x': cerrada}
+
+def test_arranque_desde_1m():
+    print("\n🧪 TEST: Una sola historia de 1m siembra la 5m; 15m y 4h (sin velas suficientes) bajan su foto una vez")
+    Config.AGREGAR_DESDE_1M = True
+    try:
+        ahora = 1000 * HORA + 7 * MINUTO
+        cliente = ClienteFalso(ahora)
+        velas = GestorVelas(ApiFalsa(cliente))
+        assert velas.inicializar_par("BTCUSDT", "5m", ["15m", "4h"])
+        assert cliente.peticiones == [("1m", Config.VELAS_1M), ("15m", 1000), ("4h", 1000)], cliente.peticiones
+
+        # La 5m agregada coincide con agrupar a mano los 5 minutos
+        cinco = velas.historial["BTCUSDT"]
+        t = int(cinco.vista('timestamp')[-2])
+        minutos = [vela_1m(t + i * MINUTO) for i in range(5)]
+        assert cinco.vista('open')[-2] == float(minutos[0][1])
+        assert cinco.vista('close')[-2] == float(minutos[-1][4])
+        assert cinco.vista('high')[-2] == max(float(m[2]) for m in minutos)
+        assert cinco.vista('volume')[-2] == 10.0
+        # La historia empieza a mitad de un periodo: ese primer periodo incompleto no entra
+        minutos = GestorVelas._a_registros([vela_1m(HORA + i * MINUTO) for i in range(7, 60)])
+        quince = GestorVelas.agregar_registros(minutos, "15m")
+        assert list(quince['timestamp'] - HORA) == [900_000, 1_800_000, 2_700_000]
+        assert len(velas.obtener_closes("BTCUSDT", "4h")) == 1000
+        print(f"✅ Peticiones: {cliente.peticiones} (la 5m sin REST propia)")
+    finally:
+        Config.AGREGAR_DESDE_1M = False
+
+def test_stream_1m_construye_periodos():
+    print("\n🧪 TEST: El stream de 1m mantiene la punta de cada timeframe y cierra al terminar el periodo")
+    Config.AGREGAR_DESDE_1M = True
+    try:
+        ahora = 1000 * HORA + 4 * MINUTO # Arranque con la 5m en curso en su 5º minuto
+        velas = GestorVelas(ApiFalsa(ClienteFalso(ahora)))
+        assert velas.inicializar_par("ETHUSDT", "5m", ["15m"])
+        cinco = velas.historial["ETHUSDT"]
+        total = len(cinco)
+
+        # Minuto en curso (el último de la 5m) y su cierre
+        velas.actualizar_vela_en_tiempo_real("ETHUSDT", kline_ws(ahora, False))
+        assert not cinco.vista('cerrada')[-1]
+        velas.actualizar_vela_en_tiempo_real("ETHUSDT", kline_ws(ahora, True))
+        assert len(cinco) == total and cinco.vista('cerrada')[-1]
+        assert cinco.vista('close')[-1] == float(vela_1m(ahora)[4])
+
+        # Minuto siguiente: abre 5m nueva; la 15m sigue siendo la misma y acumula
+        quince = velas.agregados["ETHUSDT"]["15m"]
+        ts_15m = int(quince.ultimo_timestamp())
+        siguiente = ahora + MINUTO
+        velas.actualizar_vela_en_tiempo_real("ETHUSDT", kline_ws(siguiente, False))
+        assert cinco.ultimo_timestamp() == siguiente and cinco.vista('open')[-1] == float(vela_1m(siguiente)[1])
+        assert quince.ultimo_timestamp() == ts_15m
+        assert quince.vista('volume')[-1] == 12.0 # 5 minutos cerrados + el que está en curso
+        assert quince.vista('low')[-1] == float(vela_1m(ts_15m)[3])
+        assert np.all(np.diff(cinco.vista('timestamp')) == 300_000)
+        print("✅ 5m cerrada en el minuto 5, nueva 5m abierta, 15m acumulando sin huecos")
+    finally:
+        Config.AGREGAR_DESDE_1M = False
+
+def test_minuto_cerrado_repetido_no_suma_dos_veces():
+    print("\n🧪 TEST: Un x=True repetido (reenvío o relleno tras reconexión) no duplica volumen")
+    Config.AGREGAR_DESDE_1M = True
+    try:
+        ahora = 1000 * HORA + 5 * MINUTO # Arranque en el 1er minuto de una 5m
+        historico = GestorHistorico(tempfile.mkdtemp())
+        velas = GestorVelas(ApiFalsa(ClienteFalso(ahora)), historico=historico)
+        assert velas.inicializar_par("ETHUSDT", "5m")
+        cinco = velas.historial["ETHUSDT"]
+
+        for i in range(5):
+            t = ahora + i * MINUTO
+            velas.actualizar_vela_en_tiempo_real("ETHUSDT", kline_ws(t, False))
+            velas.actualizar_vela_en_tiempo_real("ETHUSDT", kline_ws(t, True))
+            velas.actualizar_vela_en_tiempo_real("ETHUSDT", kline_ws(t, True)) # Repetido
+            assert cinco.vista('volume')[-1] == 2.0 * (i + 1), (i, cinco.vista('volume')[-1])
+        velas._aplicar_kline("ETHUSDT", kline_ws(ahora + 4 * MINUTO, True)) # Relleno re-aplica la última
+        assert cinco.vista('volume')[-1] == 10.0 and cinco.vista('cerrada')[-1]
+
+        velas.actualizar_vela_en_tiempo_real("ETHUSDT", kline_ws(ahora + 5 * MINUTO, False))
+        assert cinco.vista('volume')[-1] == 2.0 and cinco.vista('volume')[-2] == 10.0
+        guardada = historico.cargar("ETHUSDT", "5m")
+        assert int(guardada['timestamp'][-1]) == ahora and guardada['volume'][-1] == 10.0
+        print("✅ 5 minutos con cierres repetidos -> 5m de volumen 10 (en memoria y en disco)")
+    finally:
+        Config.AGREGAR_DESDE_1M = False
+
+if __name__ == "__main__":
+    test_arranque_desde_1m()
+    test_stream_1m_construye_periodos()
+    test_minuto_cerrado_repetido_no_suma_dos_veces()
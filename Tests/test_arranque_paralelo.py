@@ -0,0 +1,107 @@
+import sys
+import os
+import time
+import threading
+from types import SimpleNamespace
+
+# Ajuste de rutas para importar desde la carpeta raíz
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Core.API.GestorExchangeInfo import GestorExchangeInfo
+from Core.API.GestorPeso import GestorPeso
+from Core.Ejecucion.GestorPrecision import GestorPrecision
+from Core.Riesgo.GestorPosicion import GestorPosicion
+from Core.Utils.Config import Config
+from Estrategias.BotBase import BotBase
+
+def test_ventana_de_peso():
+    print("\n🧪 TEST: La ventana de peso bloquea al llenarse y se libera al deslizar")
+    peso = GestorPeso(limite_por_minuto=10, ventana=0.3)
+    peso.reservar(10)
+    assert peso.utilizacion() == 1.0
+    inicio = time.monotonic()
+    peso.reservar(5) # Ventana llena: espera a que caduque el primer consumo
+    espera = time.monotonic() - inicio
+    assert 0.25 <= espera < 1.0
+    assert peso.estado()['usado'] == 5
+    time.sleep(0.35)
+    peso.reservar(40) # Más que el límite con la ventana vacía: pasa (si no, esperaría para siempre)
+    assert peso.estado()['usado'] == 40
+    print(f"✅ Esperó {espera * 1000:.0f} ms con la ventana llena")
+
+def test_arranque_en_paralelo():
+    print("\n🧪 TEST: Las tareas de arranque salen a la vez, en orden y con su peso reservado")
+    bot = SimpleNamespace(peso=GestorPeso(limite_por_minuto=1200))
+    activos, pico = [0], [0]
+    candado = threading.Lock()
+
+    def descargar(par):
+        with candado:
+            activos[0] += 1
+            pico[0] = max(pico[0], activos[0])
+        time.sleep(0.1) # Un viaje REST
+        with candado:
+            activos[0] -= 1
+        return par
+
+    pares = [f"PAR{i}USDT" for i in range(8)]
+    inicio = time.perf_counter()
+    resultado = BotBase._en_paralelo(bot, [(GestorPeso.PESOS["klines_1000"], descargar, (p,)) for p in pares])
+    duracion = time.perf_counter() - inicio
+
+    assert resultado == pares
+    assert pico[0] == Config.HILOS_ARRANQUE
+    assert duracion < 0.8 * 0.6 # En serie serían 0.8 s
+    assert bot.peso.estado()['usado'] == 8 * GestorPeso.PESOS["klines_1000"]
+    print(f"✅ 8 descargas en {duracion:.2f}s con {pico[0]} simultáneas")
+
+class ClienteFalso:
+    """Tras la primera cancelación aún aparece una Algo Order (llegó tarde al motor)."""
+    def __init__(self):
+        self.cancelaciones = []
+        self.stops = []
+        self.algo_rezagada = True
+
+    def en_paralelo(self, llamadas):
+        return [funcion(**kwargs) for funcion, kwargs in llamadas]
+
+    def futures_position_information(self, **params):
+        return [{'positionAmt': '0.5', 'entryPrice': '100', 'markPrice': '99.8'}]
+
+    def futures_cancel_all_open_orders(self, **params):
+        self.cancelaciones.append(params.get('conditional', False))
+        return {'code': 200}
+
+    def futures_get_open_orders(self, **params):
+        if params.get('conditional') and self.algo_rezagada:
+            self.algo_rezagada = False
+            return [{'algoId': 7}]
+        return []
+
+    def futures_create_order(self, **params):
+        self.stops.append(params)
+        return {'orderId': 1}
+
+def test_auditoria_sin_esperas_fijas():
+    print("\n🧪 TEST: La auditoría re-comprueba las órdenes en vez de dormir")
+    cliente = ClienteFalso()
+    info = GestorExchangeInfo(ruta_cache=None)
+    info.filtros = {"BTCUSDT": {'decimales_precio': 1, 'decimales_cantidad': 3, 'tick_size': 0.1,
+                                'step_size': 0.001, 'min_qty': 0.001, 'min_notional': 5.0}}
+    precision = GestorPrecision("BTCUSDT", info)
+    precision.detectar()
+    basico = SimpleNamespace(api=cliente, cuenta=None, _obtener_precision=lambda symbol: precision)
+
+    inicio = time.perf_counter()
+    GestorPosicion(basico).iniciar_protocolo_seguridad("BTCUSDT")
+    duracion = time.perf_counter() - inicio
+
+    assert duracion < 0.5
+    assert cliente.cancelaciones == [False, True, True] # Segundo barrido solo de las Algo
+    assert cliente.stops[0]['type'] == "STOP_MARKET" and cliente.stops[0]['stopPrice'] == "99.0"
+    print(f"✅ Auditoría con posición en {duracion * 1000:.1f} ms (antes 2 s fijos por par)")
+
+if __name__ == "__main__":
+    test_ventana_de_peso()
+    test_arranque_en_paralelo()
+    test_auditoria_sin_esperas_fijas()
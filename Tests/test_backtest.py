@@ -0,0 +1,76 @@
+import sys
+import os
+import numpy as np
+
+# Ajuste de rutas para importar desde la carpeta raíz
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Core.Simulacion.GestorBacktest import GestorBacktest
+from Core.Datos.GestorHistorico import GestorHistorico
+from Core.Utils.Config import Config
+
+INTERVALO = 300_000
+
+def velas_sinteticas(cierres):
+    """Array estructurado como el de GestorHistorico (high/low a +-0.5 del cierre)."""
+    cierres = np.asarray(cierres, dtype=float)
+    v = np.zeros(len(cierres), dtype=GestorHistorico.DTYPE)
+    v['timestamp'] = np.arange(len(cierres)) * INTERVALO
+    v['open'] = cierres
+    v['close'] = cierres
+    v['high'] = cierres + 0.5
+    v['low'] = cierres - 0.5
+    v['volume'] = 1.0
+    return v
+
+def estrategia(rsi_periodo=14):
+    return {
+        "activo": True, "timeframe": "5m", "apalancamiento": 1, "porcentaje_balance": 10, "decimales": 3,
+        "indicadores": {"rsi_periodo": rsi_periodo, "rsi_sobrecompra": 70, "rsi_sobreventa": 30},
+    }
+
+def test_caida_llenado_y_subida():
+    print("🧪 TEST: Backtest caída -> LONG -> rebote -> cierre")
+    print("-" * 60)
+    # Lateral, caída fuerte (RSI < 30), rebote fuerte (RSI > 70)
+    cierres = np.concatenate([
+        100 + 0.3 * np.sin(np.arange(40)), np.linspace(100, 80, 20), np.linspace(80, 110, 30), np.full(10, 110.0)
+    ])
+    motor = GestorBacktest({"TESTUSDT": estrategia()}, {"TESTUSDT": velas_sinteticas(cierres)}, balance_inicial=1000)
+    r = motor.ejecutar()
+    print(f"   • Operaciones: {r['operaciones']} | PnL: {r['pnl']:+.4f} | DD: {r['max_drawdown_pct']:.2f}%")
+
+    assert r['operaciones'] >= 1
+    primera = r['log'][0]
+    assert primera['lado'] == 'LONG' and primera['motivo'] == 'SEÑAL'
+    assert 40 < primera['t_entrada'] < 60 # Se llena durante la caída
+    assert 60 <= primera['t_salida'] < 90 # Se cierra durante el rebote
+    bruto = primera['cantidad'] * (primera['salida'] - primera['entrada'])
+    assert abs(primera['pnl'] - (bruto - primera['comisiones'])) < 1e-9
+    assert abs(r['balance_final'] - (1000 + sum(op['pnl'] for op in r['log']))) < 1e-9
+    assert len(r['curva']) == len(cierres)
+    print("✅ La operación se abre en la caída, se cierra en el rebote y el PnL cuadra con las comisiones.")
+
+def test_cupo_respetado():
+    print("\n🧪 TEST: Backtest respeta MAX_POSICIONES con más pares que cupo")
+    print("-" * 60)
+    cierres = np.concatenate([np.full(20, 100.0), np.linspace(100, 70, 30), np.full(30, 70.0)])
+    n_pares = Config.MAX_POSICIONES + 3
+    pares = [f"PAR{i}USDT" for i in range(n_pares)]
+    motor = GestorBacktest(
+        {p: estrategia() for p in pares}, {p: velas_sinteticas(cierres) for p in pares}
+    )
+    r = motor.ejecutar()
+
+    # Máximo de pares ocupados (posición u orden) en cualquier vela
+    ocupacion = np.zeros(len(cierres), dtype=int)
+    for op in r['log']:
+        ocupacion[op['t_entrada']:op['t_salida'] + 1] += 1
+    print(f"   • Pares que operaron: {len(r['por_par'])} de {n_pares} | Ocupación máxima: {ocupacion.max()}")
+    assert len(r['por_par']) == Config.MAX_POSICIONES
+    assert ocupacion.max() <= Config.MAX_POSICIONES
+    print("✅ Las señales sobrantes se descartan por falta de cupo.")
+
+if __name__ == "__main__":
+    test_caida_llenado_y_subida()
+    test_cupo_respetado()
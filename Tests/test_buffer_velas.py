@@ -0,0 +1,67 @@
+import sys
+import os
+import numpy as np
+
+# Ajuste de rutas para importar desde la carpeta raíz
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Core.Datos.GestorVelas import GestorVelas
+
+class ClienteFalso:
+    """Imita lo mínimo de python-binance que usa GestorVelas (sin red)."""
+    KLINE_INTERVAL_1MINUTE = "1m"
+    KLINE_INTERVAL_5MINUTE = "5m"
+    KLINE_INTERVAL_15MINUTE = "15m"
+    KLINE_INTERVAL_1HOUR = "1h"
+    KLINE_INTERVAL_4HOUR = "4h"
+
+    def futures_klines(self, symbol, interval, limit):
+        return [[i * 300_000, "1", "2", "0.5", str(100 + i), "10", 0, "0", 0, "0", "0", "0"] for i in range(limit)]
+
+class ApiFalsa:
+    def __init__(self):
+        self.client = ClienteFalso()
+
+def kline(t, c, x):
+    return {'t': t, 'o': c, 'h': c, 'l': c, 'c': c, 'v': 1.0, 'x': x}
+
+def test_ring_buffer_velas():
+    print("🧪 TEST: Ring Buffer NumPy de GestorVelas (offline)")
+    print("-" * 60)
+
+    velas = GestorVelas(ApiFalsa())
+    assert velas.inicializar_par("TESTUSDT", "5m")
+
+    referencia = [100.0 + i for i in range(1000)]
+
+    # Damos más de una vuelta completa al anillo
+    for i in range(1000, 2600):
+        t = i * 300_000
+        velas.actualizar_vela_en_tiempo_real("TESTUSDT", kline(t, 100.0 + i - 0.5, False))
+        velas.actualizar_vela_en_tiempo_real("TESTUSDT", kline(t, 100.0 + i, True))
+        referencia = referencia[1:] + [100.0 + i]
+
+    # Mensaje atrasado: debe ignorarse
+    velas.actualizar_vela_en_tiempo_real("TESTUSDT", kline(5 * 300_000, -1.0, True))
+
+    closes = velas.obtener_closes("TESTUSDT")
+    df = velas.obtener_dataframe("TESTUSDT")
+
+    ok_longitud = len(closes) == 1000 and len(df) == 1000
+    ok_valores = np.array_equal(closes, np.array(referencia))
+    ok_contigua = closes.flags['C_CONTIGUOUS'] and not closes.flags['WRITEABLE']
+    ok_orden = bool(np.all(np.diff(df['timestamp'].values) == 300_000))
+
+    print(f"   • Longitud fija: {ok_longitud}")
+    print(f"   • Valores correctos tras dar la vuelta: {ok_valores}")
+    print(f"   • Vista contigua y de solo lectura: {ok_contigua}")
+    print(f"   • DataFrame perezoso ordenado: {ok_orden}")
+
+    if ok_longitud and ok_valores and ok_contigua and ok_orden:
+        print("✅ Ring Buffer correcto.")
+    else:
+        print("❌ Ring Buffer con errores.")
+    assert ok_longitud and ok_valores and ok_contigua and ok_orden
+
+if __name__ == "__main__":
+    test_ring_buffer_velas()
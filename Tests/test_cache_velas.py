@@ -0,0 +1,85 @@
+import sys
+import os
+import time
+import tempfile
+import numpy as np
+
+# Ajuste de rutas para importar desde la carpeta raíz
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Core.Datos.GestorVelas import GestorVelas
+from Core.Datos.GestorHistorico import GestorHistorico
+
+INTERVALO = 300_000
+
+class ClienteFalso:
+    """Sirve velas sintéticas alineadas con el reloj real y registra cada petición."""
+    KLINE_INTERVAL_1MINUTE = "1m"
+    KLINE_INTERVAL_5MINUTE = "5m"
+    KLINE_INTERVAL_15MINUTE = "15m"
+    KLINE_INTERVAL_1HOUR = "1h"
+    KLINE_INTERVAL_4HOUR = "4h"
+
+    def __init__(self):
+        self.peticiones = []
+        ahora = int(time.time() * 1000)
+        self.ultima = ahora - ahora % INTERVALO # Vela en curso
+        self.primera = self.ultima - 3000 * INTERVALO
+
+    def vela(self, t):
+        c = 100 + ((t - self.primera) // INTERVALO) * 0.01
+        return [t, str(c), str(c + 1), str(c - 1), str(c), "10", t + INTERVALO - 1, "0", 0, "0", "0", "0"]
+
+    def futures_klines(self, symbol, interval, limit, startTime=None):
+        self.peticiones.append(limit)
+        if startTime is None:
+            desde = self.ultima - (limit - 1) * INTERVALO
+        else:
+            desde = startTime
+        tiempos = range(desde, min(self.ultima, desde + (limit - 1) * INTERVALO) + 1, INTERVALO)
+        return [self.vela(t) for t in tiempos]
+
+class ApiFalsa:
+    def __init__(self, cliente):
+        self.client = cliente
+
+def test_cache_en_disco_con_relleno_de_cola():
+    print("🧪 TEST: Caché de velas en disco + relleno incremental (offline)")
+    print("-" * 60)
+
+    carpeta = tempfile.mkdtemp()
+    cliente = ClienteFalso()
+    vela_actual = cliente.ultima
+    cliente.ultima -= 7 * INTERVALO # El primer arranque ocurrió hace 35 minutos
+
+    # 1. Primer arranque: snapshot completo, se persisten las velas cerradas
+    velas = GestorVelas(ApiFalsa(cliente), historico=GestorHistorico(carpeta))
+    assert velas.inicializar_par("TESTUSDT", "5m")
+    print(f"   • Arranque en frío: peticiones={cliente.peticiones}")
+
+    # 2. Volvemos al presente: faltan 7 velas (el bot estuvo apagado 35 minutos)
+    cliente.ultima = vela_actual
+    cliente.peticiones = []
+
+    velas2 = GestorVelas(ApiFalsa(cliente), historico=GestorHistorico(carpeta))
+    assert velas2.inicializar_par("TESTUSDT", "5m")
+    print(f"   • Reinicio en caliente: peticiones={cliente.peticiones}")
+
+    ts = velas2.obtener_dataframe("TESTUSDT")['timestamp'].values
+    continuo = len(GestorHistorico.buscar_huecos(ts, INTERVALO)) == 0
+    al_dia = int(ts[-1]) == cliente.ultima
+    solo_cola = len(cliente.peticiones) == 1 and cliente.peticiones[0] < 100
+    en_disco = len(GestorHistorico(carpeta).cargar("TESTUSDT", "5m")) == 1006
+
+    print(f"   • Continuidad temporal: {continuo} | Al día: {al_dia}")
+    print(f"   • Solo se pidió la cola (peso mínimo): {solo_cola}")
+    print(f"   • Velas cerradas en disco: {en_disco}")
+
+    if continuo and al_dia and solo_cola and en_disco:
+        print("✅ El reinicio reutiliza la caché y solo rellena el hueco.")
+    else:
+        print("❌ La caché en disco no funciona como se espera.")
+    assert continuo and al_dia and solo_cola and en_disco
+
+if __name__ == "__main__":
+    test_cache_en_disco_con_relleno_de_cola()
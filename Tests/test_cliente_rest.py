@@ -0,0 +1,115 @@
+import sys
+import os
+import hmac
+import hashlib
+import time
+
+# Ajuste de rutas para importar desde la carpeta raíz
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from types import SimpleNamespace
+from binance.exceptions import BinanceAPIException, BinanceRequestException
+from Core.API.ClienteREST import ClienteREST
+from Core.Ejecucion.GestorBasico import GestorBasico
+from Core.Simulacion.ServidorSimulado import ServidorSimulado
+
+SECRETO = "NhqPtmdSJYdKjVHjA7PZj4Mge3R5YNiP1e3UZjInClVN65XAbvqqM6A7H5fATj0j" # Ejemplo de la doc de Binance
+
+def test_firma_hmac():
+    print("\n🧪 TEST: Firma HMAC-SHA256 de la query")
+    cliente = ClienteREST("clave", SECRETO, url_base="http://127.0.0.1:1")
+    consulta = cliente.firmar({'symbol': 'LTCBTC', 'side': 'BUY', 'quantity': 1})
+    cuerpo, firma = consulta.rsplit("&signature=", 1)
+    assert cuerpo.startswith("symbol=LTCBTC&side=BUY&quantity=1&timestamp=") and "recvWindow=" in cuerpo
+    assert firma == hmac.new(SECRETO.encode(), cuerpo.encode(), hashlib.sha256).hexdigest()
+    assert ClienteREST._limpiar({'reduceOnly': True, 'price': None}) == {'reduceOnly': 'true'}
+    cliente.cerrar()
+    print("✅ Firma correcta, booleanos como 'true' y None descartados")
+
+def test_contra_simulador():
+    print("\n🧪 TEST: Órdenes, algo orders y fan-out contra el simulador local")
+    sim = ServidorSimulado(intervalo_tick=None)
+    url, _ = sim.iniciar()
+    cliente = ClienteREST("clave", "secreto", url_base=url)
+    try:
+        precio = float(cliente.peticion("GET", "/fapi/v1/ticker/price", {'symbol': 'ETHUSDT'}, firmada=False)['price'])
+        orden = cliente.futures_create_order(symbol='ETHUSDT', side='BUY', type='LIMIT', timeInForce='GTC',
+                                             quantity=0.1, price=f"{precio * 0.9:.2f}")
+        assert orden['status'] == 'NEW'
+        # STOP_MARKET va a /fapi/v1/algoOrder con triggerPrice, como en python-binance
+        cliente.futures_create_order(symbol='ETHUSDT', side='SELL', type='STOP_MARKET',
+                                     stopPrice=f"{precio * 0.8:.2f}", closePosition=True)
+        assert len(cliente.futures_get_open_orders(symbol='ETHUSDT', conditional=True)) == 1
+
+        # Las dos cancelaciones salen a la vez; si una falla, devuelve la excepción en su sitio
+        inicio = time.perf_counter()
+        estandar, algo, error = cliente.en_paralelo([
+            (cliente.futures_cancel_all_open_orders, {'symbol': 'ETHUSDT'}),
+            (cliente.futures_cancel_all_open_orders, {'symbol': 'ETHUSDT', 'conditional': True}),
+            (cliente.futures_cancel_all_open_orders, {'symbol': 'NOEXISTE'}),
+        ])
+        duracion = time.perf_counter() - inicio
+        assert not isinstance(estandar, Exception) and not isinstance(algo, Exception)
+        assert isinstance(error, BinanceAPIException) and error.code == -1121
+        assert cliente.futures_get_open_orders(symbol='ETHUSDT') == []
+        assert cliente.futures_get_open_orders(symbol='ETHUSDT', conditional=True) == []
+        assert cliente.peso_usado > 0
+        print(f"✅ Limit + Stop creados y cancelados en paralelo ({duracion * 1000:.1f}ms), peso usado {cliente.peso_usado}")
+    finally:
+        cliente.cerrar()
+        sim.detener()
+
+def test_timeout_como_error_de_binance():
+    print("\n🧪 TEST: Caída de red / timeout -> BinanceRequestException (la manejan los gestores)")
+    cliente = ClienteREST("clave", "secreto", url_base="http://127.0.0.1:1", timeout=0.5, reintentos=0)
+    try:
+        cliente.futures_create_order(symbol='ETHUSDT', side='BUY', type='MARKET', quantity=0.1)
+        assert False, "Debió fallar"
+    except BinanceRequestException as e:
+        assert "/fapi/v1/order" in str(e)
+    finally:
+        cliente.cerrar()
+    print("✅ El error de red sale como BinanceRequestException")
+
+class RestSinRespuesta:
+    """Reenvía al simulador pero pierde la respuesta del POST (como un timeout tras enviar)."""
+    def __init__(self, cliente, llega=True):
+        self.cliente = cliente
+        self.llega = llega
+
+    def futures_create_order(self, **params):
+        if self.llega:
+            self.cliente.futures_create_order(**params)
+        raise BinanceRequestException("POST /fapi/v1/order: Read timed out.")
+
+    def __getattr__(self, nombre):
+        return getattr(self.cliente, nombre)
+
+def test_orden_sin_respuesta_se_recupera():
+    print("\n🧪 TEST: Limit enviada sin respuesta: se busca por newClientOrderId antes de darla por perdida")
+    sim = ServidorSimulado(intervalo_tick=None)
+    url, _ = sim.iniciar()
+    cliente = ClienteREST("clave", "secreto", url_base=url)
+    try:
+        precio = float(cliente.peticion("GET", "/fapi/v1/ticker/price", {'symbol': 'ETHUSDT'}, firmada=False)['price'])
+        precio = round(precio * 0.9, sim.filtros['ETHUSDT']['decimales_precio'])
+        rest = RestSinRespuesta(cliente)
+        basico = GestorBasico(SimpleNamespace(rest=rest, client=None))
+        orden = basico.colocar_orden_limit('ETHUSDT', 'BUY', 0.1, precio)
+        assert orden is not None and orden['status'] == 'NEW'
+        assert orden['clientOrderId'].startswith("bot_")
+        assert orden['orderId'] in basico.reservas # Su margen queda reservado como cualquier Limit
+
+        rest.llega = False # Nunca llegó: no hay orden y tampoco excepción hacia la estrategia
+        assert basico.colocar_orden_limit('ETHUSDT', 'BUY', 0.1, precio) is None
+        assert len(cliente.futures_get_open_orders(symbol='ETHUSDT')) == 1
+    finally:
+        cliente.cerrar()
+        sim.detener()
+    print("✅ La orden que llegó se recupera y la que no, devuelve None sin tirar el bot")
+
+if __name__ == "__main__":
+    test_firma_hmac()
+    test_contra_simulador()
+    test_timeout_como_error_de_binance()
+    test_orden_sin_respuesta_se_recupera()
@@ -0,0 +1,54 @@
+import sys
+import os
+import threading
+
+# Ajuste de rutas para importar desde la carpeta raíz
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Core.Datos.GestorColaVelas import GestorColaVelas
+
+def kline(t, c, x=False):
+    return {'t': t, 'c': c, 'x': x}
+
+def test_fusion_y_cierres():
+    print("\n🧪 TEST: La vela abierta se fusiona (la última gana), los cierres nunca")
+    aplicadas = []
+    cola = GestorColaVelas(lambda s, k: aplicadas.append((s, k['t'], k['c'], k['x'])), capacidad=100)
+    # Sin trabajador todavía: se acumula como si el hilo de velas fuera por detrás
+    for c in range(10):
+        cola.encolar("BTCUSDT", kline(0, c))
+    cola.encolar("BTCUSDT", kline(0, 10, True))
+    cola.encolar("BTCUSDT", kline(300, 11))
+    cola.encolar("BTCUSDT", kline(300, 12))
+    cola.encolar("ETHUSDT", kline(0, 1))
+    assert cola.estado()['profundidad'] == 3 # El cierre sustituye a la abierta de su misma vela
+
+    cola.iniciar()
+    assert cola.esperar_vacia(1.0)
+    cola.detener()
+    assert aplicadas == [("BTCUSDT", 0, 10, True), ("BTCUSDT", 300, 12, False), ("ETHUSDT", 0, 1, False)], aplicadas
+    estado = cola.estado()
+    assert estado['fusionadas'] == 11 and estado['procesadas'] == 3 and estado['profundidad'] == 0
+    print(f"✅ 14 mensajes -> 3 aplicaciones, cierre conservado ({estado})")
+
+def test_cola_llena_descarta_abierta_mas_vieja():
+    print("\n🧪 TEST: Cola llena: se descarta la actualización abierta más vieja, no un cierre")
+    cola = GestorColaVelas(lambda s, k: None, capacidad=3)
+    cola.encolar("BTCUSDT", kline(0, 1, True))
+    cola.encolar("ETHUSDT", kline(0, 1))
+    cola.encolar("SOLUSDT", kline(0, 1))
+    cola.encolar("ADAUSDT", kline(0, 1)) # Desborda
+    estado = cola.estado()
+    assert estado['descartadas'] == 1 and estado['profundidad'] == 3
+    assert set(cola.pendientes) == {"BTCUSDT", "SOLUSDT", "ADAUSDT"}
+
+    # El productor nunca se bloquea aunque el trabajador esté parado
+    hilo = threading.Thread(target=lambda: [cola.encolar("XRPUSDT", kline(t, 1)) for t in range(1000)])
+    hilo.start()
+    hilo.join(1.0)
+    assert not hilo.is_alive() and cola.estado()['profundidad'] == 3
+    print(f"✅ Acotada a {cola.capacidad}, {cola.estado()['descartadas']} descartadas, cierre de BTCUSDT intacto")
+
+if __name__ == "__main__":
+    test_fusion_y_cierres()
+    test_cola_llena_descarta_abierta_mas_vieja()
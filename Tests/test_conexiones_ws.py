@@ -0,0 +1,181 @@
+import sys
+import os
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+# Ajuste de rutas para importar desde la carpeta raíz
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from binance import ThreadedWebsocketManager
+from binance.client import BaseClient
+from binance.ws.streams import BinanceSocketManager
+from Core.API.BinanceBase import BinanceBase
+from Core.API.GestorPeso import GestorPeso
+from Core.Datos.GestorColaVelas import GestorColaVelas
+from Core.Datos.GestorMercado import GestorMercado
+from Core.Datos.GestorVelas import GestorVelas
+from Core.Datos.GestorConexiones import GestorConexiones
+from Core.Simulacion.ServidorSimulado import ServidorSimulado
+from Core.Utils.Config import Config
+
+def streams_de(pares):
+    return {p: [f"{p.lower()}@miniTicker", f"{p.lower()}@kline_5m"] for p in pares}
+
+def test_reparto_por_pares():
+    print("\n🧪 TEST: Reparto de streams en conexiones sin partir un par")
+    grupos = GestorConexiones.repartir(streams_de(["A", "B", "C", "D", "E"]), 5)
+    assert [len(g) for g in grupos] == [4, 4, 2]
+    assert grupos[0] == ["a@miniTicker", "a@kline_5m", "b@miniTicker", "b@kline_5m"]
+    assert GestorConexiones.repartir({}, 5) == []
+    print(f"✅ 10 streams -> {len(grupos)} conexiones de {[len(g) for g in grupos]}")
+
+class TwmFalso:
+    def start_futures_multiplex_socket(self, callback, streams):
+        return f"ruta-{streams[0]}"
+
+def test_par_quieto_no_reabre_su_conexion():
+    print("\n🧪 TEST: Un par mudo no tumba su conexión; la mayoría muda sí")
+    conexiones = GestorConexiones(TwmFalso(), lambda msg: None, streams_por_conexion=8)
+    conexiones.agregar(streams_de(["A", "B", "C", "D"])) # Una conexión con 4 pares
+    conexiones.reabrir_par("A", {"A"})
+    conexiones.reabrir_par("B", {"A", "B"}) # La mitad: aún no es mayoría
+    assert conexiones.reabrir.empty() and conexiones.conexiones[0]['estado'] == 'ok'
+    conexiones.reabrir_par("C", {"A", "B", "C"})
+    conexiones.reabrir_par("D", {"A", "B", "C", "D"}) # Ya marcada: no se encola dos veces
+    assert conexiones.reabrir.qsize() == 1 and conexiones.conexiones[0]['estado'] == 'rehacer'
+    print("✅ 1 y 2 de 4 pares mudos: conexión intacta; 3 de 4: se reabre una vez")
+
+def test_caida_reconexion_y_relleno():
+    print("\n🧪 TEST: Cada conexión se recupera sola y pide el relleno de sus pares")
+    urls = (BaseClient.API_URL, BaseClient.API_TESTNET_URL, BaseClient.FUTURES_URL, BaseClient.FUTURES_TESTNET_URL,
+            BinanceSocketManager.FSTREAM_URL, BinanceSocketManager.FSTREAM_TESTNET_URL,
+            Config.URL_SIMULADOR_REST, Config.URL_SIMULADOR_WS)
+    sim = ServidorSimulado(intervalo_tick=0.05)
+    Config.URL_SIMULADOR_REST, Config.URL_SIMULADOR_WS = sim.iniciar()
+    BinanceBase.apuntar_a_simulador()
+    twm = ThreadedWebsocketManager(api_key="clave", api_secret="secreto")
+    twm.start()
+    recibidos, rellenos = [], []
+    conexiones = GestorConexiones(twm, recibidos.append, rellenos.extend, streams_por_conexion=2)
+    try:
+        pares = list(sim.mercados) # Un par por conexión
+        conexiones.iniciar(streams_de(pares))
+        assert len(conexiones.conexiones) == len(pares) > 1
+
+        limite = time.time() + 5
+        while time.time() < limite and not all(c['mensajes'] for c in conexiones.conexiones):
+            time.sleep(0.05)
+        assert all(c['mensajes'] for c in conexiones.conexiones)
+
+        sim.cortar_mercado()
+        limite = time.time() + 10
+        while time.time() < limite and not all(c['reconexiones'] for c in conexiones.conexiones):
+            time.sleep(0.1)
+        estado = conexiones.estado()
+        assert all(c['reconexiones'] == 1 and c['estado'] == 'ok' for c in estado), estado
+        assert sorted(rellenos) == sorted(pares), rellenos
+        assert all('data' in m for m in recibidos) # Los errores del socket no llegan al router
+        print(f"✅ {len(estado)} conexiones recuperadas, relleno pedido para {sorted(rellenos)}")
+
+        # Reapertura forzada (supervisor): métodos públicos del TWM dentro de su loop, ruta nueva
+        conexion = conexiones.conexiones[0]
+        ruta_vieja, mensajes = conexion['ruta'], conexion['mensajes']
+        conexiones.reabrir_par(conexion['pares'][0], conexion['pares'])
+        limite = time.time() + 10
+        while time.time() < limite and not (conexion['reaperturas'] and conexion['mensajes'] > mensajes + 5):
+            time.sleep(0.1)
+        assert conexion['reaperturas'] == 1 and conexion['estado'] == 'ok' and conexion['ruta'] != ruta_vieja
+        assert conexion['mensajes'] > mensajes + 5 and rellenos.count(conexion['pares'][0]) == 2
+        print(f"✅ Conexión {conexion['id']} reabierta por el supervisor y recibiendo de nuevo")
+    finally:
+        conexiones.detener()
+        twm.stop()
+        sim.detener()
+        (BaseClient.API_URL, BaseClient.API_TESTNET_URL, BaseClient.FUTURES_URL, BaseClient.FUTURES_TESTNET_URL,
+         BinanceSocketManager.FSTREAM_URL, BinanceSocketManager.FSTREAM_TESTNET_URL,
+         Config.URL_SIMULADOR_REST, Config.URL_SIMULADOR_WS) = urls
+
+INTERVALO = 300_000
+
+class ClienteFalso:
+    """Velas sintéticas de 5m hasta 'ultima' (arranque por python-binance)."""
+    KLINE_INTERVAL_1MINUTE = "1m"
+    KLINE_INTERVAL_5MINUTE = "5m"
+    KLINE_INTERVAL_15MINUTE = "15m"
+    KLINE_INTERVAL_1HOUR = "1h"
+    KLINE_INTERVAL_4HOUR = "4h"
+
+    def __init__(self, ultima):
+        self.ultima = ultima
+
+    def futures_klines(self, symbol, interval, limit, startTime=None, endTime=None):
+        desde = self.ultima - (limit - 1) * INTERVALO if startTime is None else startTime
+        return [[t, "1", "2", "0.5", "1", "3", t + INTERVALO - 1] + ["0"] * 5
+                for t in range(desde, self.ultima + 1, INTERVALO)][:limit]
+
+class RestFalso:
+    """ClienteREST falso: pool propio, peso reservado por petición y 'latencia' segundos de ida y vuelta."""
+    def __init__(self, cliente, latencia):
+        self.cliente = cliente
+        self.latencia = latencia
+        self.peso = GestorPeso(1200)
+        self.pool = ThreadPoolExecutor(max_workers=8)
+
+    def en_segundo_plano(self, funcion, **kwargs):
+        return self.pool.submit(funcion, **kwargs)
+
+    def futures_klines(self, **params):
+        self.peso.reservar(GestorPeso.peso_ruta("/fapi/v1/klines", params))
+        time.sleep(self.latencia)
+        return self.cliente.futures_klines(**params)
+
+def test_relleno_en_paralelo_tras_reconexion():
+    print("\n🧪 TEST: Tras reconectar, los rellenos se descargan a la vez y solo la aplicación entra en la cola")
+    ahora = int(time.time() * 1000)
+    inicio = ahora - ahora % INTERVALO - 3 * INTERVALO # La vela en curso queda 3 por delante
+    cliente = ClienteFalso(inicio)
+    rest = RestFalso(cliente, latencia=0.2)
+    velas = GestorVelas(type("Api", (), {'client': cliente, 'rest': rest})())
+    pares = [f"PAR{i}USDT" for i in range(8)]
+    for par in pares:
+        assert velas.inicializar_par(par, "5m")
+
+    mercado = GestorMercado()
+    aplicadas = {}
+    def aplicar(symbol, kline):
+        aplicadas.setdefault(symbol, time.monotonic())
+        velas.actualizar_vela_en_tiempo_real(symbol, kline)
+    mercado.callback_kline = aplicar
+    mercado.callback_rellenar = velas.preparar_relleno
+    mercado.cola = GestorColaVelas(mercado._aplicar_kline)
+    mercado.cola.iniciar()
+    try:
+        cliente.ultima = inicio + 3 * INTERVALO # 3 velas nuevas mientras la conexión estuvo caída
+        caidos, vivo = pares[:7], pares[7]
+        empiece = time.monotonic()
+        mercado._al_reconectar(caidos)
+        kline = {'t': inicio + 3 * INTERVALO, 'o': '1', 'h': '2', 'l': '0.5', 'c': '1', 'v': '3', 'x': False}
+        mercado.cola.encolar(caidos[0], dict(kline)) # Llega antes de que termine su relleno
+        mercado.cola.encolar(vivo, dict(kline, t=inicio)) # Par de otra conexión
+        assert mercado.cola.esperar_vacia(timeout=3)
+        duracion = time.monotonic() - empiece
+
+        assert aplicadas[vivo] - empiece < rest.latencia # No esperó a ningún relleno
+        assert duracion < 7 * rest.latencia / 2 # En serie serían 7 viajes de ida y vuelta
+        assert velas.huecos['velas_rellenadas'] == 7 * 3
+        for par in caidos:
+            ts = velas.historial[par].vista('timestamp')
+            assert ts[-1] == inicio + 3 * INTERVALO and np.all(np.diff(ts) == INTERVALO)
+        assert rest.peso.estado()['usado'] == 7 * GestorPeso.peso_klines(4) # Solo las que faltan: peso 1
+        print(f"✅ 7 rellenos en {duracion:.2f}s (latencia {rest.latencia}s c/u); el par vivo siguió al instante")
+    finally:
+        mercado.cola.detener()
+        mercado.twm.stop()
+        rest.pool.shutdown()
+
+if __name__ == "__main__":
+    test_reparto_por_pares()
+    test_par_quieto_no_reabre_su_conexion()
+    test_caida_reconexion_y_relleno()
+    test_relleno_en_paralelo_tras_reconexion()
@@ -0,0 +1,108 @@
+import sys
+import os
+import time
+import threading
+
+# Ajuste de rutas para importar desde la carpeta raíz
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Core.Datos.GestorCuenta import GestorCuenta
+from Core.Ejecucion.GestorBasico import GestorBasico
+from Core.Riesgo.GestorCapital import GestorCapital
+
+class ClienteFalso:
+    """REST falso: cuenta las llamadas para demostrar que el ciclo ya no las usa."""
+    def __init__(self):
+        self.llamadas = 0
+
+    def futures_position_information(self, **kwargs):
+        self.llamadas += 1
+        return [{'symbol': 'BTCUSDT', 'positionAmt': '0', 'entryPrice': '0', 'markPrice': '95000'}]
+
+    def futures_get_open_orders(self, **kwargs):
+        self.llamadas += 1
+        return []
+
+    def futures_account_balance(self):
+        self.llamadas += 1
+        return [{'asset': 'USDT', 'balance': '1000', 'availableBalance': '1000'}]
+
+class ApiFalsa:
+    def __init__(self):
+        self.client = ClienteFalso()
+        self.rest = self.client
+
+class StreamFalso:
+    """Sustituto local del ThreadedWebsocketManager: reproduce eventos del User Data Stream."""
+    def __init__(self, eventos):
+        self.eventos = eventos
+        self.hilo = None
+
+    def start_futures_user_socket(self, callback):
+        def emitir():
+            for evento in self.eventos:
+                callback(evento)
+                time.sleep(0.01)
+        self.hilo = threading.Thread(target=emitir, daemon=True)
+        self.hilo.start()
+        return "userData"
+
+def orden(estado, z="0"):
+    return {'e': 'ORDER_TRADE_UPDATE', 'o': {
+        's': 'BTCUSDT', 'i': 42, 'X': estado, 'S': 'BUY', 'o': 'LIMIT',
+        'p': '95000', 'sp': '0', 'q': '0.010', 'z': z, 'R': False}}
+
+def cuenta_evento(pa, ep, wb):
+    return {'e': 'ACCOUNT_UPDATE', 'a': {
+        'B': [{'a': 'USDT', 'wb': wb, 'cw': wb}],
+        'P': [{'s': 'BTCUSDT', 'pa': pa, 'ep': ep, 'up': '0', 'ps': 'BOTH'}]}}
+
+def test_libro_local_con_stream_falso():
+    print("🧪 TEST: Libro local de cuenta con User Data Stream falso (offline)")
+    print("-" * 60)
+
+    api = ApiFalsa()
+    cuenta = GestorCuenta(api)
+    basico = GestorBasico(api, cuenta=cuenta)
+    capital = GestorCapital(api, cuenta=cuenta)
+
+    assert cuenta.reconciliar()
+    llamadas_iniciales = api.client.llamadas
+
+    # Secuencia real: orden nueva -> llenado parcial -> llenado total
+    stream = StreamFalso([
+        orden('NEW'),
+        orden('PARTIALLY_FILLED', z="0.004"),
+        cuenta_evento("0.004", "95000", "999.9"),
+        orden('FILLED', z="0.010"),
+        cuenta_evento("0.010", "95000", "999.8"),
+    ])
+    cuenta.iniciar_stream(stream)
+
+    # Mientras llegan los eventos, la estrategia consulta en memoria
+    vio_pendiente = False
+    for _ in range(200):
+        vio_pendiente = vio_pendiente or basico.verificar_ordenes_pendientes('BTCUSDT')
+        time.sleep(0.001)
+    stream.hilo.join()
+
+    posicion = basico.obtener_posicion('BTCUSDT')
+    pendientes = basico.verificar_ordenes_pendientes('BTCUSDT')
+    cupo = capital.hay_cupo_disponible()
+    balance, _ = cuenta.obtener_balance()
+    llamadas_rest = api.client.llamadas - llamadas_iniciales
+
+    print(f"   • Orden pendiente vista durante el llenado: {vio_pendiente}")
+    print(f"   • Posición final: {posicion} | Órdenes pendientes: {pendientes}")
+    print(f"   • Cupo disponible: {cupo} | Balance: {balance}")
+    print(f"   • Llamadas REST durante el ciclo: {llamadas_rest}")
+
+    ok = vio_pendiente and posicion == 0.010 and not pendientes and cupo and balance == 999.8 and llamadas_rest == 0
+    if ok:
+        print("✅ El libro local refleja el stream sin tocar la API.")
+    else:
+        print("❌ El libro local no refleja el stream.")
+    assert ok
+
+if __name__ == "__main__":
+    test_libro_local_con_stream_falso()
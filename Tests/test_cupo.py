@@ -0,0 +1,141 @@
+import sys
+import os
+from types import SimpleNamespace
+
+# Ajuste de rutas para importar desde la carpeta raíz
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Core.API.GestorExchangeInfo import GestorExchangeInfo
+from Core.Datos.GestorCuenta import GestorCuenta
+from Core.Ejecucion.GestorBasico import GestorBasico
+from Core.Ejecucion.GestorPrecision import GestorPrecision
+from Core.Riesgo.GestorCapital import GestorCapital
+from Core.Utils.Config import Config
+from Core.Utils.GestorLatencia import GestorLatencia
+from main import BotTrading
+
+PARES = [f"PAR{i}USDT" for i in range(Config.MAX_POSICIONES + 3)]
+
+class ClienteFalso:
+    """REST falso: cuenta llamadas por endpoint y acepta cualquier Limit."""
+    def __init__(self, posiciones=(), ordenes=()):
+        self.posiciones = list(posiciones)
+        self.ordenes = list(ordenes)
+        self.llamadas = {}
+        self.enviadas = []
+
+    def _contar(self, nombre):
+        self.llamadas[nombre] = self.llamadas.get(nombre, 0) + 1
+
+    def futures_position_information(self, **kwargs):
+        self._contar('posiciones')
+        return self.posiciones
+
+    def futures_get_open_orders(self, symbol=None, **kwargs):
+        self._contar('ordenes')
+        return [o for o in self.ordenes if symbol in (None, o['symbol'])]
+
+    def futures_account_balance(self):
+        self._contar('balance')
+        return [{'asset': 'USDT', 'balance': '1000', 'availableBalance': '1000'}]
+
+    def futures_create_order(self, **params):
+        self.enviadas.append(params['symbol'])
+        nueva = {'orderId': len(self.enviadas), 'symbol': params['symbol'], 'status': 'NEW', 'side': params['side'],
+                 'type': 'LIMIT', 'price': params['price'], 'origQty': str(params['quantity']), 'executedQty': '0'}
+        self.ordenes.append(nueva) # Queda esperando en el libro
+        return nueva
+
+def posicion(symbol, cantidad):
+    return {'symbol': symbol, 'positionAmt': str(cantidad), 'entryPrice': '100', 'markPrice': '100'}
+
+def orden(symbol, order_id, **extra):
+    return dict({'symbol': symbol, 'orderId': order_id, 'side': 'BUY', 'type': 'LIMIT', 'status': 'NEW',
+                 'price': '99', 'origQty': '1', 'executedQty': '0'}, **extra)
+
+def test_libro_cuenta_entradas_pendientes():
+    print("\n🧪 TEST: Con libro de cuenta, las Limits de entrada ocupan cupo; los stops no")
+    rest = ClienteFalso(
+        posiciones=[posicion("PAR0USDT", 1), posicion("PAR1USDT", 0)],
+        ordenes=[orden("PAR1USDT", 1), orden("PAR0USDT", 2, side='SELL', type='STOP_MARKET', closePosition=True),
+                 orden("PAR2USDT", 3, type='STOP_MARKET', closePosition=True), orden("PAR3USDT", 4, reduceOnly=True)])
+    api = SimpleNamespace(rest=rest)
+    cuenta = GestorCuenta(api)
+    assert cuenta.reconciliar()
+    assert cuenta.contar_posiciones_abiertas() == 1
+    assert cuenta.contar_pares_ocupados() == 2 # PAR0 (posición) y PAR1 (entrada pendiente)
+
+    capital = GestorCapital(api, cuenta=cuenta)
+    capital.max_posiciones = 3
+    antes = dict(rest.llamadas)
+    assert capital.hay_cupo_disponible()
+    cuenta.registrar_orden(rest.futures_create_order(symbol="PAR4USDT", side="BUY", price="10", quantity=1))
+    assert not capital.hay_cupo_disponible() # La tercera Limit llena el cupo antes de llenarse
+    assert rest.llamadas == antes # Todo en memoria
+    print("✅ 1 posición + 2 entradas pendientes = 3 pares ocupados; stops closePosition ignorados")
+
+def test_sin_libro_una_sola_peticion():
+    print("\n🧪 TEST: Sin libro de cuenta el cupo cuesta una petición de posiciones (sin órdenes de todos los pares)")
+    rest = ClienteFalso(posiciones=[posicion(p, 1) for p in PARES[:Config.MAX_POSICIONES]])
+    capital = GestorCapital(SimpleNamespace(rest=rest))
+    assert not capital.hay_cupo_disponible()
+    rest.posiciones.pop()
+    assert capital.hay_cupo_disponible()
+    assert rest.llamadas == {'posiciones': 2}
+    print("✅ 2 comprobaciones -> 2 peticiones de peso 5, 0 de peso 40")
+
+def barrer(rest, cuenta=None):
+    """Un ejecutar_estrategia real con sobreventa en todos los PARES."""
+    api = SimpleNamespace(client=None, rest=rest)
+    ejecutor = GestorBasico(api, cuenta=cuenta)
+    info = GestorExchangeInfo(ruta_cache=None)
+    info.filtros = {p: {'decimales_precio': 2, 'decimales_cantidad': 3, 'tick_size': 0.01,
+                        'step_size': 0.001, 'min_qty': 0.001, 'min_notional': 5.0} for p in PARES}
+    for par in PARES:
+        ejecutor.precisiones[par] = GestorPrecision(par, info)
+        ejecutor.precisiones[par].detectar()
+
+    config = {'porcentaje_balance': 5, 'apalancamiento': 1,
+              'indicadores': {'rsi_periodo': 14, 'rsi_sobreventa': 30, 'rsi_sobrecompra': 70}}
+    bot = SimpleNamespace(
+        pares_activos=PARES, estrategias={par: config for par in PARES}, ejecutor=ejecutor, ordenes=None,
+        capital=GestorCapital(api, cuenta=cuenta), trazas=GestorLatencia(activo=False),
+        mercado=SimpleNamespace(verificar_salud_datos=lambda par: True, obtener_precio=lambda par: 100.0),
+        velas=SimpleNamespace(obtener_closes=lambda par: [100.0] * 60),
+        indicadores=SimpleNamespace(esta_listo=lambda par: False),
+        analista=SimpleNamespace(calcular_rsi=lambda cierres, periodo: 20.0), # Sobreventa en todos
+        reportes=SimpleNamespace(contar_omitido=lambda par: None, registrar_barrido=lambda segundos, n: None),
+    )
+    BotTrading.ejecutar_estrategia(bot)
+    return bot
+
+def test_barrido_respeta_max_posiciones():
+    print(f"\n🧪 TEST: {len(PARES)} señales en el mismo barrido abren solo {Config.MAX_POSICIONES} pares")
+    rest = ClienteFalso()
+    cuenta = GestorCuenta(SimpleNamespace(rest=rest))
+    assert cuenta.reconciliar()
+    barrer(rest, cuenta)
+
+    assert rest.enviadas == PARES[:Config.MAX_POSICIONES]
+    assert cuenta.contar_pares_ocupados() == Config.MAX_POSICIONES
+    print(f"✅ Enviadas {len(rest.enviadas)} Limits; {len(PARES) - len(rest.enviadas)} señales sin cupo")
+
+def test_barrido_sin_libro_cuenta_entradas():
+    print("\n🧪 TEST: Sin libro de cuenta, las Limits enviadas en el barrido también ocupan cupo")
+    rest = ClienteFalso()
+    bot = barrer(rest)
+    assert rest.enviadas == PARES[:Config.MAX_POSICIONES]
+    assert bot.capital.entradas == set(PARES[:Config.MAX_POSICIONES])
+
+    # Una Limit se cancela y otra se llena: la cancelada libera su cupo, la llena sigue ocupándolo
+    rest.ordenes = [o for o in rest.ordenes if o['symbol'] not in PARES[:2]]
+    rest.posiciones = [posicion(PARES[1], 1)]
+    assert bot.capital.hay_cupo_disponible()
+    assert bot.capital.entradas == set(PARES[2:Config.MAX_POSICIONES])
+    print(f"✅ {Config.MAX_POSICIONES} entradas pendientes llenan el cupo; al cancelarse una, se libera")
+
+if __name__ == "__main__":
+    test_libro_cuenta_entradas_pendientes()
+    test_sin_libro_una_sola_peticion()
+    test_barrido_respeta_max_posiciones()
+    test_barrido_sin_libro_cuenta_entradas()
@@ -0,0 +1,67 @@
+import sys
+import os
+import time
+import threading
+
+# Ajuste de rutas para importar desde la carpeta raíz
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Core.Datos.GestorMercado import GestorMercado
+
+def tick(symbol, precio):
+    return {'stream': f'{symbol.lower()}@miniTicker', 'data': {'e': '24hrMiniTicker', 's': symbol, 'c': str(precio)}}
+
+def cierre(symbol):
+    return {'stream': f'{symbol.lower()}@kline_5m', 'data': {'e': 'kline', 's': symbol, 'k': {'x': True, 'i': '5m'}}}
+
+def test_debounce_agrupa_ticks():
+    print("\n🧪 TEST: Los ticks de un par se agrupan en una sola evaluación por debounce")
+    mercado = GestorMercado()
+    try:
+        mercado.procesar_msg(tick("BTCUSDT", 100))
+        assert mercado.esperar_cambios(timeout=1, debounce=0.2) == ["BTCUSDT"] # Nunca evaluado: pasa directo
+
+        for i in range(20): # Ráfaga de ticks justo después de evaluar
+            mercado.procesar_msg(tick("BTCUSDT", 100 + i))
+        mercado.procesar_msg(tick("ETHUSDT", 2000))
+        assert mercado.esperar_cambios(timeout=1, debounce=0.2) == ["ETHUSDT"] # BTC sigue en debounce
+
+        inicio = time.monotonic()
+        pares = mercado.esperar_cambios(timeout=1, debounce=0.2)
+        espera = time.monotonic() - inicio
+        assert pares == ["BTCUSDT"] and 0.15 <= espera < 0.5 # 20 ticks -> 1 evaluación al salir del debounce
+        assert mercado.esperar_cambios(timeout=0.05, debounce=0.2) == [] # Nada pendiente: vence el timeout
+        print(f"✅ 20 ticks -> 1 evaluación tras {espera * 1000:.0f} ms de debounce")
+    finally:
+        mercado.twm.stop()
+
+def test_cierre_de_vela_despierta_al_instante():
+    print("\n🧪 TEST: El cierre de vela salta el debounce y despierta al bucle dormido")
+    mercado = GestorMercado()
+    try:
+        mercado.callback_kline = lambda symbol, k: None
+        mercado.procesar_msg(tick("BTCUSDT", 100))
+        mercado.esperar_cambios(timeout=1, debounce=10)
+        mercado.procesar_msg(tick("BTCUSDT", 101)) # Pendiente, pero con 10 s de debounce por delante
+
+        resultado = {}
+        def bucle():
+            inicio = time.monotonic()
+            resultado['pares'] = mercado.esperar_cambios(timeout=5, debounce=10)
+            resultado['espera'] = time.monotonic() - inicio
+        hilo = threading.Thread(target=bucle)
+        hilo.start()
+        time.sleep(0.1) # El bucle ya está dormido en la condición
+        mercado.procesar_msg(cierre("BTCUSDT"))
+        hilo.join(2)
+
+        assert resultado['pares'] == ["BTCUSDT"]
+        assert resultado['espera'] < 0.5
+        assert mercado.pares_sucios == {}
+        print(f"✅ Despertó {resultado['espera'] * 1000:.0f} ms después de dormirse (debounce de 10 s ignorado)")
+    finally:
+        mercado.twm.stop()
+
+if __name__ == "__main__":
+    test_debounce_agrupa_ticks()
+    test_cierre_de_vela_despierta_al_instante()
@@ -0,0 +1,112 @@
+import sys
+import os
+import json
+import time
+import tempfile
+
+# Ajuste de rutas para importar desde la carpeta raíz
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from types import SimpleNamespace
+from Core.API.GestorExchangeInfo import GestorExchangeInfo
+from Core.Ejecucion.GestorBasico import GestorBasico
+from Core.Utils.Config import Config
+
+SIMBOLO = {'symbol': 'BTCUSDT', 'pricePrecision': 2, 'quantityPrecision': 3, 'filters': [
+    {'filterType': 'PRICE_FILTER', 'tickSize': '0.10'},
+    {'filterType': 'LOT_SIZE', 'stepSize': '0.001', 'minQty': '0.001'},
+    {'filterType': 'MIN_NOTIONAL', 'notional': '100'},
+]}
+
+class ClienteFalso:
+    """futures_exchange_info falso: cuenta descargas y puede fallar a demanda."""
+    def __init__(self, falla=False):
+        self.descargas = 0
+        self.falla = falla
+
+    def futures_exchange_info(self):
+        self.descargas += 1
+        if self.falla:
+            raise ConnectionError("sin red")
+        return {'symbols': [SIMBOLO]}
+
+def test_cache_en_disco_y_ttl():
+    print("\n🧪 TEST: exchangeInfo se baja una vez, se reutiliza de disco y caduca con el TTL")
+    ruta = os.path.join(tempfile.mkdtemp(), "exchange_info.json")
+    cliente = ClienteFalso()
+    info = GestorExchangeInfo(cliente, ruta_cache=ruta, ttl=3600)
+    assert info.obtener("BTCUSDT")['tick_size'] == 0.1
+    assert info.obtener("BTCUSDT")['min_notional'] == 100.0
+    assert info.obtener("XXXUSDT") is None
+    assert cliente.descargas == 1 # Una sola descarga aunque se consulte varias veces
+
+    reinicio = GestorExchangeInfo(cliente, ruta_cache=ruta, ttl=3600) # Otro proceso/arranque
+    assert reinicio.obtener("BTCUSDT")['step_size'] == 0.001
+    assert cliente.descargas == 1 # Salió del disco
+
+    with open(ruta) as f:
+        data = json.load(f)
+    data['timestamp'] = time.time() - 3601 # Caché de hace más de una hora
+    with open(ruta, 'w') as f:
+        json.dump(data, f)
+    caducado = GestorExchangeInfo(cliente, ruta_cache=ruta, ttl=3600)
+    assert caducado.obtener("BTCUSDT") is not None
+    assert cliente.descargas == 2
+    print("✅ 3 arranques -> 2 descargas (la segunda por TTL vencido)")
+
+def test_fallo_con_espera():
+    print("\n🧪 TEST: Tras un fallo de descarga no se reintenta en cada consulta")
+    cliente = ClienteFalso(falla=True)
+    info = GestorExchangeInfo(cliente, ruta_cache=None)
+    for _ in range(50): # Cada orden consulta filtros
+        assert info.obtener("BTCUSDT") is None
+    assert cliente.descargas == 1
+    espera = info.reintento_en - time.monotonic()
+    assert 0 < espera <= Config.REINTENTO_EXCHANGE_INFO
+
+    info.reintento_en = 0 # Pasó la espera: nuevo intento, que vuelve a fallar y dobla la espera
+    assert info.obtener("BTCUSDT") is None
+    assert cliente.descargas == 2
+    assert info.reintento_en - time.monotonic() > Config.REINTENTO_EXCHANGE_INFO
+
+    cliente.falla = False
+    info.reintento_en = 0
+    assert info.obtener("BTCUSDT") is not None
+    assert cliente.descargas == 3 and info.fallos == 0
+    print("✅ 50 consultas con la red caída -> 1 petición; espera exponencial y recuperación")
+
+def test_instancia_compartida():
+    print("\n🧪 TEST: Una sola caché por proceso; el cliente se inyecta la primera vez")
+    previa = GestorExchangeInfo._instancia
+    GestorExchangeInfo._instancia = None
+    try:
+        api = type("Api", (), {'client': ClienteFalso()})()
+        primera = GestorExchangeInfo.compartido(api)
+        assert GestorExchangeInfo.compartido() is primera
+        assert GestorExchangeInfo.compartido(type("Api", (), {'client': object()})()).client is api.client
+        print("✅ Misma instancia y mismo cliente")
+    finally:
+        GestorExchangeInfo._instancia = previa
+
+def test_precision_no_se_queda_en_los_valores_por_defecto():
+    print("\n🧪 TEST: Sin exchangeInfo el par usa valores por defecto, pero al recuperarse toma los reales")
+    cliente = ClienteFalso(falla=True)
+    basico = GestorBasico(SimpleNamespace(rest=None, client=None))
+    basico.exchange_info = GestorExchangeInfo(cliente, ruta_cache=None)
+
+    gp = basico._obtener_precision("BTCUSDT")
+    assert not gp.detectado and gp.tick_size == 0.01 # Por defecto
+    assert "BTCUSDT" not in basico.precisiones # No se guarda: se reintenta en la próxima orden
+
+    cliente.falla = False
+    basico.exchange_info.reintento_en = 0 # Pasó la espera de la caché
+    gp = basico._obtener_precision("BTCUSDT")
+    assert gp.detectado and gp.tick_size == 0.1
+    assert basico._obtener_precision("BTCUSDT") is gp
+    print("✅ Tras el fallo, la siguiente orden ya usa el tick real (0.1)")
+
+if __name__ == "__main__":
+    test_cache_en_disco_y_ttl()
+    test_fallo_con_espera()
+    test_instancia_compartida()
+    test_precision_no_se_queda_en_los_valores_por_defecto()
@@ -0,0 +1,91 @@
+import sys
+import os
+
+# Ajuste de rutas para importar desde la carpeta raíz
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Core.API.GestorExchangeInfo import GestorExchangeInfo
+from Core.Datos.GestorCuenta import GestorCuenta
+from Core.Ejecucion.GestorBasico import GestorBasico
+from Core.Ejecucion.GestorPrecision import GestorPrecision
+
+PARES = ("BTCUSDT", "ETHUSDT", "SOLUSDT")
+
+class ClienteFalso:
+    """REST falso: cuenta las lecturas de balance y acepta cualquier Limit."""
+    def __init__(self):
+        self.lecturas_balance = 0
+        self.siguiente_id = 1
+
+    def futures_account_balance(self):
+        self.lecturas_balance += 1
+        return [{'asset': 'USDT', 'balance': '1000', 'availableBalance': '1000'}]
+
+    def futures_position_information(self, **kwargs):
+        return []
+
+    def futures_get_open_orders(self, **kwargs):
+        return []
+
+    def futures_create_order(self, **params):
+        self.siguiente_id += 1
+        return {'orderId': self.siguiente_id, 'symbol': params['symbol'], 'status': 'NEW', 'side': params['side'],
+                'type': 'LIMIT', 'price': params['price'], 'origQty': str(params['quantity']), 'executedQty': '0'}
+
+class ApiFalsa:
+    def __init__(self):
+        self.client = None
+        self.rest = ClienteFalso()
+
+def ejecutor(cuenta=None, api=None):
+    api = api or ApiFalsa()
+    basico = GestorBasico(api, cuenta=cuenta)
+    info = GestorExchangeInfo(ruta_cache=None)
+    info.filtros = {p: {'decimales_precio': 2, 'decimales_cantidad': 3, 'tick_size': 0.01,
+                        'step_size': 0.001, 'min_qty': 0.001, 'min_notional': 5.0} for p in PARES}
+    for par in PARES:
+        basico.precisiones[par] = GestorPrecision(par, info)
+        basico.precisiones[par].detectar()
+    return basico, api.rest
+
+def test_barrido_con_una_foto():
+    print("\n🧪 TEST: Tres señales en el mismo barrido comparten foto y margen")
+    basico, rest = ejecutor()
+    cantidades = []
+    for par in PARES:
+        # 40% x1 cada una: la tercera solo puede usar el 20% que queda libre
+        cantidad, balance = basico.calcular_cantidad(par, 40, 100.0, 1)
+        basico.colocar_orden_limit(par, "BUY", cantidad, 100.0)
+        cantidades.append(cantidad)
+    assert rest.lecturas_balance == 1, rest.lecturas_balance
+    assert cantidades == [4.0, 4.0, 2.0], cantidades
+
+    # Cancelar devuelve el margen; un cierre fuerza foto nueva
+    basico.api.futures_cancel_order = lambda **kwargs: {}
+    basico.cancelar_orden("SOLUSDT", max(basico.reservas))
+    basico.invalidar_balance()
+    basico.calcular_cantidad("SOLUSDT", 10, 100.0, 1)
+    assert rest.lecturas_balance == 2
+    print(f"✅ Cantidades {cantidades} con 1 sola lectura REST")
+
+def test_libro_de_cuenta_sin_rest():
+    print("\n🧪 TEST: Con libro de cuenta el dimensionado no toca la red")
+    api = ApiFalsa()
+    cuenta = GestorCuenta(api)
+    assert cuenta.reconciliar()
+    basico, rest = ejecutor(cuenta, api)
+    lecturas = rest.lecturas_balance
+
+    # Pérdida realizada de 100 USDT: el ACCOUNT_UPDATE baja también el disponible
+    cuenta.procesar_evento({'e': 'ACCOUNT_UPDATE', 'a': {'B': [{'a': 'USDT', 'wb': '900', 'cw': '900'}], 'P': []}})
+    cantidad, balance = basico.calcular_cantidad("BTCUSDT", 50, 100.0, 2)
+    assert balance == 900.0 and cantidad == 9.0, (balance, cantidad)
+    basico.colocar_orden_limit("BTCUSDT", "BUY", cantidad, 100.0)
+    cantidad, _ = basico.calcular_cantidad("ETHUSDT", 100, 100.0, 2)
+    assert cantidad == 9.0, cantidad # Quedan 450 de margen libre
+    assert rest.lecturas_balance == lecturas
+    print("✅ Balance del stream, margen comprometido descontado, 0 peticiones REST")
+
+if __name__ == "__main__":
+    test_barrido_con_una_foto()
+    test_libro_de_cuenta_sin_rest()
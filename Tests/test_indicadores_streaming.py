@@ -0,0 +1,77 @@
+import sys
+import os
+import numpy as np
+
+# Ajuste de rutas para importar desde la carpeta raíz
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Core.Datos.GestorAnalisis import GestorAnalisis
+from Core.Datos.GestorIndicadores import GestorIndicadores
+
+def test_rsi_ema_streaming_vs_recalculo():
+    print("🧪 TEST: Motor de Indicadores en Streaming vs Recálculo Completo (offline)")
+    print("-" * 60)
+
+    rng = np.random.default_rng(7)
+    closes = 100 + np.cumsum(rng.normal(0, 0.5, 1200))
+    timestamps = np.arange(len(closes)) * 300_000
+
+    analista = GestorAnalisis()
+    motor = GestorIndicadores()
+    motor.registrar_par("TESTUSDT", rsi_periodo=14, ema_periodo=50)
+
+    # Sembramos con 1000 velas (la última es la vela en curso)
+    motor.sembrar("TESTUSDT", timestamps[:1000], closes[:1000])
+
+    max_error_rsi = 0.0
+    max_error_ema = 0.0
+    ventana = list(closes[:1000])
+
+    for i in range(1000, len(closes)):
+        # 1. Cerramos la vela anterior (x=True) con su precio final
+        motor.actualizar("TESTUSDT", int(timestamps[i - 1]), float(closes[i - 1]), True)
+
+        # 2. Abre la vela nueva con varios ticks provisionales
+        for tick in (closes[i] - 0.3, closes[i] + 0.2, closes[i]):
+            motor.actualizar("TESTUSDT", int(timestamps[i]), float(tick), False)
+            referencia = ventana[-999:] + [tick]
+            max_error_rsi = max(max_error_rsi, abs(motor.obtener_rsi("TESTUSDT") - analista.calcular_rsi(referencia, 14)))
+            max_error_ema = max(max_error_ema, abs(motor.obtener_ema("TESTUSDT") - analista.calcular_ema(referencia, 50)))
+        ventana = referencia
+
+    print(f"   • Error máximo RSI: {max_error_rsi:.2e}")
+    print(f"   • Error máximo EMA: {max_error_ema:.2e}")
+
+    # La EMA depende de todo el historial: la ventana móvil de pandas la recorta, así que toleramos algo más
+    if max_error_rsi < 1e-6 and max_error_ema < 1e-3:
+        print("✅ El motor incremental coincide con GestorAnalisis.")
+    else:
+        print("❌ DISCREPANCIA entre el motor incremental y el recálculo.")
+    assert max_error_rsi < 1e-6
+    assert max_error_ema < 1e-3
+
+def test_lote_vs_par_a_par():
+    print("\n🧪 TEST: Modo lote (matriz de pares) vs cálculo par a par")
+    rng = np.random.default_rng(11)
+    analista = GestorAnalisis()
+    cierres = {f"PAR{i}USDT": 100 + np.cumsum(rng.normal(0, 0.5, 1000)) for i in range(20)}
+    cierres["NUEVOUSDT"] = cierres["PAR0USDT"][:40] # Recién listado: menos historia que el resto
+    configuraciones = {par: {"rsi_periodo": 7 if i % 2 else 14, "ema_periodo": 50,
+                             "rsi_sobreventa": 30, "rsi_sobrecompra": 70}
+                       for i, par in enumerate(cierres)}
+
+    lote = analista.evaluar_lote(cierres, configuraciones)
+    for par, serie in cierres.items():
+        rsi = analista.calcular_rsi(serie, configuraciones[par]["rsi_periodo"])
+        assert abs(lote[par]['rsi'] - rsi) < 1e-9, (par, lote[par]['rsi'], rsi)
+        esperada = 1 if rsi < 30 else (-1 if rsi > 70 else 0)
+        assert lote[par]['senal'] == esperada
+        ema = analista.calcular_ema(serie, 50)
+        assert (ema is None) == (lote[par]['ema'] is None)
+        assert ema is None or abs(lote[par]['ema'] - ema) < 1e-9
+    assert lote["NUEVOUSDT"]['ema'] is None # 40 velas < periodo 50
+    print(f"✅ {len(lote)} pares en una pasada, idénticos al cálculo individual")
+
+if __name__ == "__main__":
+    test_rsi_ema_streaming_vs_recalculo()
+    test_lote_vs_par_a_par()
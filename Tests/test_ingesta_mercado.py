@@ -0,0 +1,67 @@
+import sys
+import os
+
+# Ajuste de rutas para importar desde la carpeta raíz
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Core.Datos.GestorMercado import GestorMercado
+from Core.Utils.Config import Config
+
+def test_streams_ligeros_y_metricas():
+    print("\n🧪 TEST: Precio desde streams ligeros + contadores por stream")
+    mercado = GestorMercado()
+    try:
+        mensajes = [
+            {'stream': 'btcusdt@miniTicker', 'data': {'e': '24hrMiniTicker', 's': 'BTCUSDT', 'c': '100.5'}},
+            {'stream': 'ethusdt@markPrice@1s', 'data': {'e': 'markPriceUpdate', 's': 'ETHUSDT', 'p': '2000.1'}},
+            {'stream': 'solusdt@ticker', 'data': {'e': '24hrTicker', 's': 'SOLUSDT', 'c': '150.1'}},
+            {'stream': 'adausdt@aggTrade', 'data': {'e': 'aggTrade', 's': 'ADAUSDT', 'p': '0.45'}},
+            {'stream': 'btcusdt@miniTicker', 'data': {'e': '24hrMiniTicker', 's': 'BTCUSDT', 'c': '101'}},
+        ]
+        velas = []
+        mercado.callback_kline = lambda symbol, k: velas.append(symbol)
+        mercado.metricas_stream(reiniciar=True)
+        for msg in mensajes:
+            mercado.procesar_msg(msg)
+        mercado.procesar_msg({'stream': 'btcusdt@kline_5m', 'data': {'e': 'kline', 's': 'BTCUSDT', 'k': {'x': False}}})
+        mercado.procesar_msg({'e': 'error', 'm': 'Queue overflow'}) # Errores del socket: ni precio ni métricas
+
+        assert mercado.obtener_precio("BTCUSDT") == 101.0
+        assert mercado.obtener_precio("ETHUSDT") == 2000.1
+        assert abs(mercado.obtener_precio("SOLUSDT") - 150.1) < 1e-9
+        assert mercado.obtener_precio("ADAUSDT") == 0.45
+        assert velas == ["BTCUSDT"]
+
+        metricas = mercado.metricas_stream()
+        assert metricas['btcusdt@miniTicker']['mensajes'] == 2
+        assert set(metricas) == {m['stream'] for m in mensajes} | {'btcusdt@kline_5m'}
+        assert all(m['msg_s'] > 0 and m['decodificacion_us'] >= 0 for m in metricas.values())
+        print(f"✅ 4 tipos de stream de precio leídos, {len(metricas)} streams medidos")
+    finally:
+        mercado.twm.stop()
+
+def test_book_ticker_solo_libro():
+    print("\n🧪 TEST: @bookTicker de reprecio solo actualiza el libro (no el precio ni el bucle)")
+    mercado = GestorMercado()
+    original = Config.STREAM_PRECIO
+    try:
+        libro = {'stream': 'btcusdt@bookTicker', 'data': {'e': 'bookTicker', 's': 'BTCUSDT', 'b': '99.0', 'a': '99.4'}}
+        mercado.procesar_msg({'stream': 'btcusdt@miniTicker', 'data': {'e': '24hrMiniTicker', 's': 'BTCUSDT', 'c': '100'}})
+        mercado.pares_sucios.clear()
+        Config.STREAM_PRECIO = "miniTicker"
+        mercado.procesar_msg(libro)
+        assert mercado.obtener_libro("BTCUSDT") == (99.0, 99.4)
+        assert mercado.obtener_precio("BTCUSDT") == 100.0 # Sigue el último precio del miniTicker
+        assert not mercado.pares_sucios and 'btcusdt@bookTicker' not in mercado.metricas
+
+        Config.STREAM_PRECIO = "bookTicker" # Elegido como stream de precio: da el precio medio
+        mercado.procesar_msg(libro)
+        assert abs(mercado.obtener_precio("BTCUSDT") - 99.2) < 1e-9 and "BTCUSDT" in mercado.pares_sucios
+        print("✅ Con miniTicker el libro no pisa el precio; con bookTicker da el precio medio")
+    finally:
+        Config.STREAM_PRECIO = original
+        mercado.twm.stop()
+
+if __name__ == "__main__":
+    test_streams_ligeros_y_metricas()
+    test_book_ticker_solo_libro()
@@ -0,0 +1,105 @@
+import sys
+import os
+import json
+import time
+import tempfile
+from types import SimpleNamespace
+
+# Ajuste de rutas para importar desde la carpeta raíz
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Core.Utils.GestorLatencia import GestorLatencia
+from Core.Datos.GestorMercado import GestorMercado
+from Core.Datos.GestorColaVelas import GestorColaVelas
+from main import BotTrading
+
+def test_percentiles_y_volcado():
+    print("\n🧪 TEST: p50/p99/max por par y etapa + volcado a JSON")
+    trazas = GestorLatencia(muestras=100, activo=True)
+    for ms in range(1, 201): # La ventana se queda con 101..200; max y muestras cuentan todo
+        trazas.registrar("BTCUSDT", "orden_rest", float(ms))
+    trazas.llegada("ETHUSDT", evento_ms=time.time() * 1000 - 30) # E del exchange 30 ms atrás
+    with trazas.tramo("ETHUSDT", "velas"):
+        time.sleep(0.002)
+    trazas.desde_llegada("ETHUSDT", "dato_a_decision", trazas.ultima_llegada("ETHUSDT"))
+    trazas.desde_llegada("SOLUSDT", "dato_a_decision", trazas.ultima_llegada("SOLUSDT")) # Sin datos: nada
+
+    m = trazas.resumen("BTCUSDT")["BTCUSDT"]["orden_rest"]
+    assert m == {'muestras': 200, 'p50_ms': 151.0, 'p99_ms': 200.0, 'max_ms': 200.0}
+    eth = trazas.resumen()["ETHUSDT"]
+    assert 29 <= eth["red"]["p50_ms"] < 1000
+    assert eth["velas"]["max_ms"] >= 2 and eth["dato_a_decision"]["max_ms"] >= eth["velas"]["max_ms"]
+    assert "SOLUSDT" not in trazas.resumen()
+
+    ruta = os.path.join(tempfile.mkdtemp(), "latencias.json")
+    trazas.volcar(ruta)
+    with open(ruta) as f:
+        assert json.load(f)["latencias"]["BTCUSDT"]["orden_rest"]["muestras"] == 200
+
+    apagadas = GestorLatencia(activo=False)
+    apagadas.registrar("BTCUSDT", "velas", 1.0)
+    apagadas.llegada("BTCUSDT", evento_ms=1)
+    assert apagadas.resumen() == {} and apagadas.llegadas == {}
+    print(f"✅ p50 {m['p50_ms']} ms, p99 {m['p99_ms']} ms; red ETH {eth['red']['p50_ms']:.1f} ms")
+
+def test_etapas_de_ingesta():
+    print("\n🧪 TEST: Un kline pasa por red -> recepción -> cola -> velas")
+    mercado = GestorMercado()
+    try:
+        mercado.trazas = GestorLatencia(activo=True)
+        mercado.callback_kline = lambda symbol, k: time.sleep(0.001)
+        mercado.cola = GestorColaVelas(mercado._aplicar_kline)
+        mercado.cola.iniciar()
+        evento = int(time.time() * 1000)
+        mercado.procesar_msg({'stream': 'btcusdt@kline_5m', 'data': {
+            'e': 'kline', 'E': evento, 's': 'BTCUSDT', 'k': {'t': evento, 'x': False}}})
+        assert mercado.cola.esperar_vacia(timeout=2)
+
+        etapas = mercado.trazas.resumen("BTCUSDT")["BTCUSDT"]
+        assert set(etapas) == {"red", "recepcion", "cola", "velas"}
+        assert etapas["velas"]["max_ms"] >= 1
+        print("✅ " + ", ".join(f"{e} {m['max_ms']:.3f} ms" for e, m in etapas.items()))
+    finally:
+        mercado.cola.detener()
+        mercado.twm.stop()
+
+def test_ancla_fija_durante_la_evaluacion():
+    print("\n🧪 TEST: dato_a_orden se mide desde el dato que disparó la evaluación, no desde el último tick")
+    trazas = GestorLatencia(activo=True)
+    trazas.llegada("BTCUSDT")
+    disparo = trazas.ultima_llegada("BTCUSDT")
+    time.sleep(0.02) # El dato lleva 20 ms esperando cuando se evalúa
+
+    def obtener_precio(par):
+        trazas.llegada(par) # Llega otro tick mientras se evalúa el par
+        return 100.0
+    recibidas = []
+    def colocar_orden_limit(par, side, cantidad, precio, llegada=None):
+        recibidas.append(llegada)
+        trazas.desde_llegada(par, 'dato_a_orden', llegada)
+        return {'orderId': 1}
+
+    config = {'porcentaje_balance': 5, 'apalancamiento': 1,
+              'indicadores': {'rsi_periodo': 14, 'rsi_sobreventa': 30, 'rsi_sobrecompra': 70}}
+    bot = SimpleNamespace(
+        pares_activos=["BTCUSDT"], estrategias={"BTCUSDT": config}, ordenes=None, trazas=trazas,
+        ejecutor=SimpleNamespace(obtener_posicion=lambda par: 0, verificar_ordenes_pendientes=lambda par: False,
+                                 calcular_cantidad=lambda *args: (1.0, 1000.0), colocar_orden_limit=colocar_orden_limit),
+        capital=SimpleNamespace(hay_cupo_disponible=lambda: True, registrar_entrada=lambda par: None),
+        mercado=SimpleNamespace(verificar_salud_datos=lambda par: True, obtener_precio=obtener_precio),
+        velas=SimpleNamespace(obtener_closes=lambda par: [100.0] * 60),
+        indicadores=SimpleNamespace(esta_listo=lambda par: False),
+        analista=SimpleNamespace(calcular_rsi=lambda cierres, periodo: 20.0), # Sobreventa: LONG
+        reportes=SimpleNamespace(contar_omitido=lambda par: None, registrar_barrido=lambda segundos, n: None),
+    )
+    BotTrading.ejecutar_estrategia(bot)
+
+    assert recibidas == [disparo] and trazas.ultima_llegada("BTCUSDT") > disparo
+    btc = trazas.resumen("BTCUSDT")["BTCUSDT"]
+    assert btc["dato_a_decision"]["max_ms"] >= 20 and btc["dato_a_orden"]["max_ms"] >= 20
+    print(f"✅ dato_a_orden {btc['dato_a_orden']['max_ms']:.1f} ms pese al tick llegado a mitad de evaluación")
+
+if __name__ == "__main__":
+    test_percentiles_y_volcado()
+    test_etapas_de_ingesta()
+    test_ancla_fija_durante_la_evaluacion()
@@ -0,0 +1,79 @@
+import sys
+import os
+import json
+import time
+import tempfile
+import threading
+
+# Ajuste de rutas para importar desde la carpeta raíz
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Core.Utils.GestorLogs import GestorLogs
+from Core.Utils.Config import Config
+
+def leer(ruta):
+    with open(ruta, encoding='utf-8') as f:
+        return [json.loads(linea) for linea in f]
+
+def test_jsonl_repetidos_y_niveles():
+    print("\n🧪 TEST: JSONL estructurado, 💤 repetidos limitados y nivel por módulo")
+    ruta = os.path.join(tempfile.mkdtemp(), "bot.jsonl")
+    niveles = Config.NIVELES_LOG
+    Config.NIVELES_LOG = {"prueba_silencio": "WARNING"}
+    gestor = GestorLogs(ruta=ruta, consola=False, limite_repetidos=60)
+    gestor.iniciar()
+    try:
+        log = GestorLogs.obtener("prueba")
+        for _ in range(50):
+            log.info("🤖 %-8s | RSI: %.2f | 💤 Esperando...", "BTCUSDT", 45.0,
+                     extra={'clave': ('esperando', 'BTCUSDT'), 'datos': {'par': 'BTCUSDT', 'rsi': 45.0}})
+        gestor.filtro.ultimos[('esperando', 'BTCUSDT')][0] -= 61 # Pasó el periodo
+        log.info("🤖 BTCUSDT | 💤 Esperando...", extra={'clave': ('esperando', 'BTCUSDT')})
+        log.warning("🚨 %s: sin datos", "ETHUSDT")
+        GestorLogs.obtener("prueba_silencio").info("no debe salir")
+    finally:
+        gestor.detener()
+        Config.NIVELES_LOG = niveles
+
+    lineas = leer(ruta)
+    assert [l['msg'] for l in lineas] == ["🤖 BTCUSDT  | RSI: 45.00 | 💤 Esperando...",
+                                         "🤖 BTCUSDT | 💤 Esperando... (+49 similares)", "🚨 ETHUSDT: sin datos"]
+    assert lineas[0]['datos'] == {'par': 'BTCUSDT', 'rsi': 45.0} and lineas[0]['modulo'] == "prueba"
+    assert lineas[2]['nivel'] == "WARNING"
+    assert gestor.estado()['suprimidos'] == 49
+    print(f"✅ 53 llamadas -> {len(lineas)} líneas; {gestor.estado()['suprimidos']} repetidas silenciadas")
+
+def test_nunca_bloquea_y_rota():
+    print("\n🧪 TEST: Con el escritor atascado el hilo caliente no espera (descarta); rotación por tamaño")
+    carpeta = tempfile.mkdtemp()
+    ruta = os.path.join(carpeta, "bot.jsonl")
+    gestor = GestorLogs(ruta=ruta, consola=False, capacidad=100, max_bytes=2000, copias=2)
+    atasco = threading.Event()
+    volcar = gestor._volcar
+    gestor._volcar = lambda registros: (atasco.wait(), volcar(registros)) # Disco/terminal colgados
+    gestor.iniciar()
+    try:
+        log = GestorLogs.obtener("prueba")
+        time.sleep(0.01)
+        inicio = time.perf_counter()
+        for i in range(1000):
+            log.info("🚀 Enviando orden %d", i)
+        duracion = time.perf_counter() - inicio
+        assert duracion < 0.5 # ~microsegundos por línea aunque nadie esté escribiendo
+        assert gestor.estado()['descartados'] >= 800
+        atasco.set()
+        for lote in range(5): # Cada lote supera max_bytes: rota y solo se guardan 2 copias
+            for i in range(30):
+                log.info("📗 Orden %d llenada", i)
+            time.sleep(Config.LOG_INTERVALO_ESCRITURA * 4)
+    finally:
+        gestor.detener()
+
+    archivos = sorted(os.listdir(carpeta))
+    assert archivos == ["bot.jsonl", "bot.jsonl.1", "bot.jsonl.2"]
+    print(f"✅ 1000 líneas en {duracion * 1000:.1f} ms con el escritor parado; "
+          f"{gestor.estado()['descartados']} descartadas y archivos {archivos}")
+
+if __name__ == "__main__":
+    test_jsonl_repetidos_y_niveles()
+    test_nunca_bloquea_y_rota()
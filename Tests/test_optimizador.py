@@ -0,0 +1,60 @@
+import sys
+import os
+import tempfile
+import json
+import numpy as np
+
+# Ajuste de rutas para importar desde la carpeta raíz
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Core.Simulacion.GestorBacktest import GestorBacktest
+from Core.Simulacion.GestorOptimizador import GestorOptimizador
+from test_backtest import velas_sinteticas, estrategia
+
+def mercado_aleatorio(n=20000, semilla=1):
+    rng = np.random.default_rng(semilla)
+    return velas_sinteticas(100 * np.exp(np.cumsum(rng.normal(0, 0.003, n))))
+
+def test_optimizador_coincide_con_backtest():
+    print("🧪 TEST: Optimizador (atajo vectorizado) == Backtest completo")
+    print("-" * 60)
+    velas = mercado_aleatorio()
+    espacio = {"rsi_periodo": [14], "rsi_sobreventa": [30], "rsi_sobrecompra": [70],
+               "apalancamiento": [5], "porcentaje_balance": [10]}
+    r_opt = GestorOptimizador({"X": estrategia()}, {"X": velas}, espacio=espacio, procesos=1).ejecutar()[0]
+
+    config = estrategia()
+    config.update({"apalancamiento": 5, "porcentaje_balance": 10, "decimales": 10}) # Sin redondeo de cantidad
+    r_bt = GestorBacktest({"X": config}, {"X": velas}).ejecutar()
+    print(f"   • Optimizador: {r_opt['operaciones']} ops {r_opt['pnl_pct']:+.6f}% | Backtest: {r_bt['operaciones']} ops {r_bt['pnl_pct']:+.6f}%")
+
+    assert r_opt['operaciones'] == r_bt['operaciones']
+    assert abs(r_opt['pnl_pct'] - r_bt['pnl_pct']) < 1e-6
+    assert abs(r_opt['acierto_pct'] - r_bt['acierto_pct']) < 1e-9
+    print("✅ Misma secuencia de operaciones y mismo PnL.")
+
+def test_barrido_en_paralelo():
+    print("\n🧪 TEST: Barrido con procesos + memoria compartida")
+    print("-" * 60)
+    estrategias = {"X": estrategia(), "Y": estrategia()}
+    velas = {"X": mercado_aleatorio(semilla=1), "Y": mercado_aleatorio(semilla=2)}
+    optimizador = GestorOptimizador(estrategias, velas, procesos=2)
+    resultados = optimizador.ejecutar()
+    aleatorio = optimizador.ejecutar(muestras=10, semilla=7)
+
+    mejores = optimizador.mejores(resultados, min_operaciones=1, max_drawdown_pct=-100)
+    ruta = optimizador.guardar_candidata(mejores, os.path.join(tempfile.mkdtemp(), "candidata.json"))
+    with open(ruta) as f:
+        candidata = json.load(f)
+
+    print(f"   • Grid: {len(resultados)} combinaciones | Aleatorio: {len(aleatorio)}")
+    assert len(resultados) == 2 * 4 * 25 * 20 # pares x periodos x umbrales x tamaños
+    assert len(aleatorio) == 2 * 10 * 20
+    for par, r in mejores.items():
+        assert candidata[par]["indicadores"]["rsi_periodo"] == r['rsi_periodo']
+        assert candidata[par]["apalancamiento"] == r['apalancamiento']
+    print("✅ Barrido completo y candidata escrita.")
+
+if __name__ == "__main__":
+    test_optimizador_coincide_con_backtest()
+    test_barrido_en_paralelo()
@@ -0,0 +1,189 @@
+import sys
+import os
+import time
+from types import SimpleNamespace
+
+# Ajuste de rutas para importar desde la carpeta raíz
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Core.API.ClienteREST import ClienteREST
+from Core.API.GestorExchangeInfo import GestorExchangeInfo
+from Core.Ejecucion.GestorBasico import GestorBasico
+from Core.Ejecucion.GestorOrdenes import GestorOrdenes
+from Core.Ejecucion.GestorPrecision import GestorPrecision
+from Core.Simulacion.ServidorSimulado import ServidorSimulado
+from Core.Utils.Config import Config
+
+class CuentaFalsa:
+    def __init__(self):
+        self.oyentes = []
+
+    def esta_sincronizado(self):
+        return True
+
+    def registrar_orden(self, orden):
+        pass
+
+    def emitir(self, order_id, ejecucion, estado, ultimo=0.0, precio=0.0, maker=True):
+        for oyente in self.oyentes:
+            oyente({'i': order_id, 'o': 'LIMIT', 'R': False, 'x': ejecucion, 'X': estado,
+                    'l': str(ultimo), 'L': str(precio), 'm': maker})
+
+class MercadoFalso:
+    def __init__(self, bid, ask):
+        self.libro = (bid, ask)
+
+    def obtener_libro(self, symbol):
+        return self.libro
+
+class EjecutorFalso:
+    """Registra las llamadas; 'al_colocar' simula un evento del stream que llega antes que la respuesta REST."""
+    def __init__(self):
+        self.llamadas = []
+        self.al_colocar = None
+
+    def colocar_orden_limit(self, symbol, side, cantidad, precio, llegada=None):
+        self.llamadas.append(('limit', side, cantidad, precio))
+        if self.al_colocar:
+            self.al_colocar()
+        return {'orderId': 7, 'symbol': symbol, 'origQty': str(cantidad), 'price': str(precio), 'status': 'NEW'}
+
+    def modificar_orden(self, symbol, order_id, side, cantidad, precio, ejecutada=0.0):
+        self.llamadas.append(('modificar', side, cantidad, precio))
+        return {'orderId': order_id, 'price': str(precio)}
+
+    def cancelar_orden(self, symbol, order_id):
+        self.llamadas.append(('cancelar', order_id))
+        return {'orderId': order_id, 'status': 'CANCELED', 'executedQty': '0.4'}
+
+    def colocar_orden_mercado(self, symbol, side, cantidad):
+        self.llamadas.append(('mercado', side, round(cantidad, 8)))
+        return {'orderId': 8}
+
+def test_touch_reprecio_y_parciales():
+    print("\n🧪 TEST: Limit en el touch, reprecio tras el bid y llenado en dos partes")
+    cuenta, ejecutor = CuentaFalsa(), EjecutorFalso()
+    mercado = MercadoFalso(99.9, 100.0)
+    ordenes = GestorOrdenes(ejecutor, mercado, cuenta=cuenta, timeout=15)
+    ordenes.abrir("BTCUSDT", "BUY", 1.0, precio_senal=100.0)
+    assert ejecutor.llamadas[0] == ('limit', 'BUY', 1.0, 99.9) # Bid, no el último precio
+
+    inicio = ordenes.vivas[7]['inicio']
+    mercado.libro = (100.1, 100.2) # El bid se aleja
+    ordenes.revisar(ahora=inicio + 1) # Aún dentro de REPRECIO_MIN_S
+    assert len(ejecutor.llamadas) == 1
+    ordenes.revisar(ahora=inicio + Config.REPRECIO_MIN_S + 0.1)
+    assert ejecutor.llamadas[-1] == ('modificar', 'BUY', 1.0, 100.1)
+
+    mercado.libro = (101.0, 101.1) # Se fue más del MAX_DESVIO_REPRECIO: no se persigue
+    ordenes.revisar(ahora=inicio + 2 * Config.REPRECIO_MIN_S + 0.2)
+    assert len(ejecutor.llamadas) == 2
+
+    cuenta.emitir(7, 'TRADE', 'PARTIALLY_FILLED', 0.3, 100.1, maker=True)
+    assert ordenes.tiene_orden_viva("BTCUSDT") and ordenes.vivas[7]['ejecutada'] == 0.3
+    cuenta.emitir(7, 'TRADE', 'FILLED', 0.7, 100.1, maker=True)
+    assert not ordenes.tiene_orden_viva("BTCUSDT")
+
+    m = ordenes.metricas()["BTCUSDT"]
+    assert m['llenadas'] == 1 and m['reprecios'] == 1 and m['pct_maker'] == 100 and m['tasa_llenado'] == 1
+    print(f"✅ Llenado maker al 100% tras {m['reprecios']} reprecio")
+
+def test_timeout_completa_a_mercado():
+    print("\n🧪 TEST: Timeout con llenado parcial -> cancelar y completar el resto a mercado")
+    cuenta, ejecutor = CuentaFalsa(), EjecutorFalso()
+    ordenes = GestorOrdenes(ejecutor, MercadoFalso(50.0, 50.1), cuenta=cuenta, timeout=15, accion_timeout="mercado")
+    # El parcial llega por el stream antes de que vuelva la respuesta REST de la orden
+    ejecutor.al_colocar = lambda: cuenta.emitir(7, 'TRADE', 'PARTIALLY_FILLED', 0.4, 50.0, maker=True)
+    ordenes.abrir("ETHUSDT", "BUY", 1.0, precio_senal=50.05)
+    assert ordenes.vivas[7]['ejecutada'] == 0.4
+
+    inicio = ordenes.vivas[7]['inicio']
+    ordenes.revisar(ahora=inicio + 16)
+    assert ejecutor.llamadas[-2:] == [('cancelar', 7), ('mercado', 'BUY', 0.6)]
+    ordenes.revisar(ahora=inicio + 17) # Esperando el CANCELED: no se cancela dos veces
+    assert ejecutor.llamadas.count(('cancelar', 7)) == 1
+    cuenta.emitir(7, 'CANCELED', 'CANCELED')
+
+    m = ordenes.metricas()["ETHUSDT"]
+    assert m['parciales'] == 1 and m['a_mercado'] == 1 and abs(m['pct_maker'] - 40) < 1e-9
+    print(f"✅ 40% maker, resto a mercado; parciales={m['parciales']}")
+
+def test_reprecio_tras_parcial_conserva_cantidad():
+    print("\n🧪 TEST: Reprecio tras un parcial: el PUT lleva la cantidad total y la reserva solo lo que falta")
+    sim = ServidorSimulado(intervalo_tick=None, liquidez_limit=0.4) # Cada cruce llena como mucho 0.4
+    url, _ = sim.iniciar()
+    rest = ClienteREST("clave", "secreto", url_base=url)
+    try:
+        cuenta = CuentaFalsa()
+        ejecutor = GestorBasico(SimpleNamespace(rest=rest, client=None), cuenta=cuenta)
+        info = GestorExchangeInfo(ruta_cache=None)
+        info.filtros = {"ETHUSDT": dict(sim.filtros["ETHUSDT"], min_qty=sim.filtros["ETHUSDT"]['step_size'])}
+        ejecutor.precisiones["ETHUSDT"] = GestorPrecision("ETHUSDT", info)
+        ejecutor.precisiones["ETHUSDT"].detectar()
+        decimales = sim.filtros["ETHUSDT"]['decimales_precio']
+        mercado_sim = sim.mercados["ETHUSDT"]['precio']
+        bid = round(mercado_sim * 0.998, decimales)
+        mercado = MercadoFalso(bid, round(mercado_sim * 0.999, decimales))
+        ordenes = GestorOrdenes(ejecutor, mercado, cuenta=cuenta, timeout=60)
+        orden = ordenes.abrir("ETHUSDT", "BUY", 1.0, precio_senal=mercado_sim)
+        order_id = orden['orderId']
+
+        with sim.lock:
+            sim._cruzar_ordenes("ETHUSDT", bid) # El precio toca la Limit: solo hay liquidez para 0.4
+        _, estado, _ = sim.atender("GET", "/fapi/v1/order", {"symbol": "ETHUSDT", "orderId": order_id})
+        assert estado['status'] == 'PARTIALLY_FILLED' and float(estado['executedQty']) == 0.4
+        cuenta.emitir(order_id, 'TRADE', 'PARTIALLY_FILLED', 0.4, bid)
+
+        nuevo = round(mercado_sim * 0.999, decimales)
+        mercado.libro = (nuevo, round(mercado_sim * 0.9995, decimales)) # El bid se aleja
+        ordenes.revisar(ahora=ordenes.vivas[order_id]['inicio'] + Config.REPRECIO_MIN_S + 0.1)
+        assert ordenes.vivas[order_id]['reprecios'] == 1
+
+        _, estado, _ = sim.atender("GET", "/fapi/v1/order", {"symbol": "ETHUSDT", "orderId": order_id})
+        assert float(estado['origQty']) == 1.0 and float(estado['executedQty']) == 0.4 # No encogió a 0.6
+        assert float(estado['price']) == nuevo and estado['status'] == 'PARTIALLY_FILLED'
+        assert abs(ejecutor.reservas[order_id][1] - 0.6 * nuevo) < 1e-6 # Margen solo de lo que falta (x1)
+
+        # Binance no deja dejar la orden por debajo de lo ya llenado
+        estado_http, error, _ = sim.atender("PUT", "/fapi/v1/order", {"symbol": "ETHUSDT", "orderId": order_id,
+                                                                      "side": "BUY", "quantity": "0.4", "price": str(nuevo)})
+        assert estado_http == 400 and error['code'] == -4003
+        print(f"✅ Repreciada a {nuevo}: origQty 1.0, 0.4 llenado, reserva {ejecutor.reservas[order_id][1]:.2f} USDT")
+    finally:
+        rest.cerrar()
+        sim.detener()
+
+class RestCaptura:
+    """Guarda los parámetros de cada Limit / PUT enviados."""
+    def __init__(self):
+        self.enviadas = []
+
+    def futures_create_order(self, **params):
+        self.enviadas.append(params)
+        return {'orderId': len(self.enviadas), 'symbol': params['symbol'], 'price': params['price'], 'status': 'NEW'}
+
+    def futures_modify_order(self, **params):
+        self.enviadas.append(params)
+        return {'orderId': params['orderId'], 'price': params['price'], 'executedQty': '0'}
+
+def test_limit_y_reprecio_al_tick():
+    print("\n🧪 TEST: Entrada y reprecio salen múltiplos del tick (no solo redondeados a decimales)")
+    rest = RestCaptura()
+    ejecutor = GestorBasico(SimpleNamespace(rest=rest, client=None))
+    info = GestorExchangeInfo(ruta_cache=None)
+    info.filtros = {"BTCUSDT": {'decimales_precio': 2, 'decimales_cantidad': 3, 'tick_size': 0.1,
+                                'step_size': 0.001, 'min_qty': 0.001, 'min_notional': 5.0}} # Como BTCUSDT
+    ejecutor.precisiones["BTCUSDT"] = GestorPrecision("BTCUSDT", info)
+    ejecutor.precisiones["BTCUSDT"].detectar()
+
+    orden = ejecutor.colocar_orden_limit("BTCUSDT", "BUY", 0.01, 65000.07)
+    ejecutor.modificar_orden("BTCUSDT", orden['orderId'], "BUY", 0.01, 65000.13)
+    assert [p['price'] for p in rest.enviadas] == ["65000.10", "65000.10"] # 65000.07 -> .07 sería -4014
+    assert abs(ejecutor.reservas[orden['orderId']][1] - 650.001) < 1e-9
+    print("✅ 65000.07 y 65000.13 salen como 65000.10 (tick 0.1)")
+
+if __name__ == "__main__":
+    test_touch_reprecio_y_parciales()
+    test_timeout_completa_a_mercado()
+    test_reprecio_tras_parcial_conserva_cantidad()
+    test_limit_y_reprecio_al_tick()
@@ -0,0 +1,56 @@
+import sys
+import os
+import time
+import threading
+
+# Ajuste de rutas para importar desde la carpeta raíz
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Core.API.GestorPeso import GestorPeso
+from Core.API.ClienteREST import ClienteREST
+from Core.Simulacion.ServidorSimulado import ServidorSimulado
+
+def reserva_en_hilo(peso, cantidad, prioridad):
+    hecho = threading.Event()
+    threading.Thread(target=lambda: (peso.reservar(cantidad, prioridad), hecho.set()), daemon=True).start()
+    return hecho
+
+def test_prioridades_y_cabeceras():
+    print("\n🧪 TEST: La contabilidad deja hueco a los stops; las cabeceras de Binance mandan")
+    peso = GestorPeso(limite_por_minuto=100, ventana=0.5)
+    peso.reservar(70, GestorPeso.BAJA)
+
+    # BAJA ya llenó su 70%: espera. CRITICA pasa al momento.
+    baja = reserva_en_hilo(peso, 5, GestorPeso.BAJA)
+    critica = reserva_en_hilo(peso, 25, GestorPeso.CRITICA)
+    assert critica.wait(0.2) and not baja.is_set()
+    assert baja.wait(1.0) # Al vaciarse la ventana entra
+    assert peso.estado()['esperas'][GestorPeso.BAJA] == 1
+
+    # El servidor ve más peso del que contamos (otro proceso en la IP): se adopta su cifra
+    peso.sincronizar(peso_servidor=95, ordenes_servidor=3)
+    estado = peso.estado()
+    assert estado['usado'] == 95 and estado['ordenes_servidor'] == 3
+    assert GestorPeso.peso_ruta("/fapi/v1/openOrders") == 40
+    assert GestorPeso.peso_ruta("/fapi/v1/openOrders", {'symbol': 'BTCUSDT'}) == 1
+    print(f"✅ Stop sin espera, contabilidad en cola, peso servidor adoptado ({estado['usado']})")
+
+def test_get_duplicados_se_fusionan():
+    print("\n🧪 TEST: GET idénticos en vuelo salen una sola vez")
+    sim = ServidorSimulado(intervalo_tick=None, latencia_ms=100)
+    url, _ = sim.iniciar()
+    cliente = ClienteREST("clave", "secreto", url_base=url)
+    try:
+        resultados = cliente.en_paralelo([(cliente.futures_position_information, {}) for _ in range(6)])
+        assert all(r == resultados[0] for r in resultados)
+        enviadas = sim.estadisticas['peticiones']["GET /fapi/v3/positionRisk"]
+        assert enviadas < 6 and cliente.fusionadas == 6 - enviadas, (enviadas, cliente.fusionadas)
+        assert cliente.peso.estado()['peso_servidor'] == 5 * enviadas
+        print(f"✅ 6 consultas -> {enviadas} petición(es) al exchange")
+    finally:
+        cliente.cerrar()
+        sim.detener()
+
+if __name__ == "__main__":
+    test_prioridades_y_cabeceras()
+    test_get_duplicados_se_fusionan()
@@ -0,0 +1,180 @@
+import sys
+import os
+import time
+from types import SimpleNamespace
+
+# Ajuste de rutas para importar desde la carpeta raíz
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from binance.exceptions import BinanceAPIException
+from Core.Datos.GestorCuenta import GestorCuenta
+from Core.Ejecucion.GestorPrecision import GestorPrecision
+from Core.Riesgo.GestorRiesgo import GestorRiesgo
+
+class ApiFalsa:
+    """
+    REST mínimo: registra stops colocados/cancelados; 'error' fuerza un código de Binance en el próximo stop.
+    Como Binance, rechaza un segundo closePosition del mismo tipo y sentido (-4130).
+    """
+    def __init__(self):
+        self.stops = {}
+        self.colocados = [] # Todo lo que llegó a colocarse, en orden
+        self.cancelados = []
+        self.siguiente = 1
+        self.error = None
+        self.descubiertos = 0 # Cancelaciones que dejaron al par sin ningún STOP_MARKET
+
+    @staticmethod
+    def _rechazar(codigo):
+        raise BinanceAPIException(None, 400, f'{{"code": {codigo}, "msg": "simulado"}}')
+
+    def futures_create_order(self, **p):
+        if self.error:
+            codigo, self.error = self.error, None
+            self._rechazar(codigo)
+        if p.get('closePosition') and any(o.get('closePosition') and (o['symbol'], o['side'], o['type']) ==
+                                          (p['symbol'], p['side'], p['type']) for o in self.stops.values()):
+            self._rechazar(-4130)
+        self.stops[self.siguiente] = p
+        self.colocados.append(p)
+        self.siguiente += 1
+        return {'algoId': self.siguiente - 1}
+
+    def futures_cancel_order(self, symbol, algoId):
+        self.cancelados.append(algoId)
+        self.stops.pop(algoId)
+        if not any(o['symbol'] == symbol and o['type'] == "STOP_MARKET" for o in self.stops.values()):
+            self.descubiertos += 1
+
+    def en_paralelo(self, llamadas):
+        resultados = []
+        for funcion, kwargs in llamadas:
+            try:
+                resultados.append(funcion(**kwargs))
+            except Exception as e:
+                resultados.append(e)
+        return resultados
+
+class EjecutorFalso:
+    def __init__(self):
+        self.api = ApiFalsa()
+        self.cierres = []
+
+    def _obtener_precision(self, symbol):
+        gp = GestorPrecision(symbol, exchange_info=object())
+        gp.decimales_precio, gp.tick_size = 2, 0.1 # Como BTCUSDT: 2 decimales pero tick de 0.10
+        return gp
+
+    def cerrar_posicion_mercado(self, symbol, cantidad):
+        self.cierres.append((symbol, cantidad))
+
+def llenado(symbol, side, cantidad, precio, estado='PARTIALLY_FILLED'):
+    return {'s': symbol, 'i': 1, 'o': 'LIMIT', 'S': side, 'x': 'TRADE', 'X': estado,
+            'l': str(cantidad), 'L': str(precio), 'z': str(cantidad)}
+
+def esperar(condicion, limite=2.0):
+    fin = time.time() + limite
+    while time.time() < fin and not condicion():
+        time.sleep(0.005)
+    return condicion()
+
+def test_prearmado_y_parciales_al_tick():
+    print("\n🧪 TEST: Stop pre-armado con la entrada; los parciales ya nacen cubiertos")
+    ejecutor = EjecutorFalso()
+    riesgo = GestorRiesgo(ejecutor, stop_pct=1.0, tp_pct=0)
+    riesgo.iniciar()
+    try:
+        assert riesgo.armar("BTCUSDT", "BUY", 100.05)
+        stop = ejecutor.api.stops[1]
+        assert stop['stopPrice'] == "99.00" and stop['side'] == "SELL" and stop['closePosition'] # 99.0495 al tick 0.1
+
+        riesgo.procesar_orden(llenado("BTCUSDT", "BUY", 0.3, 100.0))
+        riesgo.procesar_orden(llenado("BTCUSDT", "BUY", 0.7, 100.0, 'FILLED'))
+        assert esperar(lambda: riesgo.metricas()['latencia_proteccion_ms']['muestras'] >= 1)
+        assert list(ejecutor.api.stops) == [1] # closePosition ya cubre el tamaño real: nada que recolocar
+
+        riesgo.procesar_orden(llenado("BTCUSDT", "SELL", 1.0, 101.0, 'FILLED')) # Salida: posición plana
+        assert esperar(lambda: not ejecutor.api.stops)
+        m = riesgo.metricas()
+        assert m['prearmados'] == 1 and m['colocaciones'] == 0 and m['protegidos'] == []
+        print(f"✅ Llenado -> protegido en {m['latencia_proteccion_ms']['max']:.2f} ms (stop ya pre-armado)")
+    finally:
+        riesgo.detener()
+
+def test_stop_con_el_llenado_y_recolocacion():
+    print("\n🧪 TEST: Sin pre-armado el stop sale con el primer parcial y sigue al precio medio")
+    ejecutor = EjecutorFalso()
+    riesgo = GestorRiesgo(ejecutor, stop_pct=1.0, tp_pct=2.0)
+    riesgo.iniciar()
+    try:
+        riesgo.procesar_orden(llenado("ETHUSDT", "SELL", 1.0, 2000.0))
+        assert esperar(lambda: len(ejecutor.api.stops) == 2)
+        tipos = {p['type']: p['stopPrice'] for p in ejecutor.api.stops.values()}
+        assert tipos == {"STOP_MARKET": "2020.00", "TAKE_PROFIT_MARKET": "1960.00"} # SHORT: SL arriba, TP abajo
+
+        riesgo.procesar_orden(llenado("ETHUSDT", "SELL", 1.0, 2010.0)) # Medio 2005: el stop se mueve >0.1%
+        assert esperar(lambda: riesgo.metricas()['recolocaciones'] == 1)
+        # -4130 con el viejo vivo: puente reduceOnly (3) -> fuera el viejo -> closePosition nuevo -> fuera el puente
+        puente = ejecutor.api.colocados[2]
+        assert puente['reduceOnly'] and puente['quantity'] == 2.0 and puente['stopPrice'] == "2025.00"
+        assert ejecutor.api.cancelados == [1, 2, 3] and ejecutor.api.descubiertos == 0
+        assert sorted(p['stopPrice'] for p in ejecutor.api.stops.values()) == ["1964.90", "2025.00"] # 2025.05 al tick 0.1
+
+        ejecutor.api.error = -2021 # El precio ya saltó el stop nuevo
+        riesgo.procesar_orden(llenado("ETHUSDT", "SELL", 3.0, 2200.0, 'FILLED'))
+        assert esperar(lambda: ejecutor.cierres)
+        assert ejecutor.cierres == [("ETHUSDT", -5.0)]
+        m = riesgo.metricas()
+        assert m['colocaciones'] == 1 and m['cierres_emergencia'] == 1 and m['latencia_proteccion_ms']['p99'] is not None
+        print(f"✅ Protección en p50 {m['latencia_proteccion_ms']['p50']:.2f} ms; -2021 -> cierre a mercado")
+    finally:
+        riesgo.detener()
+
+class RestCuenta:
+    """Foto REST de la cuenta para GestorCuenta.reconciliar()."""
+    def __init__(self):
+        self.posiciones = {}
+
+    def futures_position_information(self):
+        return [{'symbol': s, 'positionAmt': str(c), 'entryPrice': str(p), 'markPrice': str(p)}
+                for s, (c, p) in self.posiciones.items()]
+
+    def futures_get_open_orders(self):
+        return []
+
+    def futures_account_balance(self):
+        return [{'asset': 'USDT', 'balance': '1000', 'availableBalance': '1000'}]
+
+def test_reconciliacion_resiembra_posiciones():
+    print("\n🧪 TEST: Cada reconciliación resiembra las posiciones de la protección desde el libro")
+    ejecutor = EjecutorFalso()
+    rest = RestCuenta()
+    cuenta = GestorCuenta(SimpleNamespace(rest=rest))
+    riesgo = GestorRiesgo(ejecutor, cuenta=cuenta, stop_pct=1.0, tp_pct=0)
+    riesgo.iniciar()
+    try:
+        riesgo.procesar_orden(llenado("BTCUSDT", "BUY", 1.0, 100.0, 'FILLED'))
+        riesgo.procesar_orden(llenado("ETHUSDT", "BUY", 1.0, 2000.0, 'FILLED'))
+        assert esperar(lambda: len(ejecutor.api.stops) == 2)
+
+        # El stop de BTC disparó y el evento se perdió; ETH se amplió a 3 sin que llegara el llenado
+        rest.posiciones = {"ETHUSDT": (3.0, 2000.0)}
+        assert cuenta.reconciliar()
+        assert esperar(lambda: riesgo.metricas()['protegidos'] == ["ETHUSDT"])
+        assert riesgo.posiciones["BTCUSDT"] == [0.0, 0.0] and riesgo.posiciones["ETHUSDT"] == [3.0, 6000.0]
+        assert riesgo.metricas()['resiembras'] == 2
+
+        # Un llenado posterior al inicio de la foto no se pisa con ella
+        antes = time.time() - 1
+        riesgo.procesar_orden(llenado("ETHUSDT", "SELL", 3.0, 2010.0, 'FILLED'))
+        assert esperar(lambda: riesgo.metricas()['protegidos'] == [])
+        riesgo.resembrar(antes)
+        assert riesgo.posiciones["ETHUSDT"][0] == 0.0
+        print(f"✅ Stop huérfano retirado y ETH reprotegido al tamaño del libro ({riesgo.metricas()['resiembras']} resiembras)")
+    finally:
+        riesgo.detener()
+
+if __name__ == "__main__":
+    test_prearmado_y_parciales_al_tick()
+    test_stop_con_el_llenado_y_recolocacion()
+    test_reconciliacion_resiembra_posiciones()
@@ -0,0 +1,100 @@
+import sys
+import os
+import time
+import tempfile
+import urllib.request
+from types import SimpleNamespace
+
+# Ajuste de rutas para importar desde la carpeta raíz
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Core.API.ClienteREST import ClienteREST
+from Core.API.GestorPeso import GestorPeso
+from Core.Datos.GestorVelas import GestorVelas, BufferVelas
+from Core.Utils.GestorLatencia import GestorLatencia
+from Core.Utils.GestorReportes import GestorReportes
+from Core.Utils.Config import Config
+
+class MercadoFalso:
+    def __init__(self):
+        self.metricas = {'btcusdt@miniTicker': [120, 0.0, 0.0], 'btcusdt@kline_5m': [30, 0.0, 0.0]}
+        self.conexiones = None
+
+    def estado_cola(self):
+        return {'profundidad': 3, 'descartadas': 0}
+
+def bot_falso():
+    velas = GestorVelas(SimpleNamespace(client=None))
+    velas.historial["BTCUSDT"] = BufferVelas(1000)
+    rest = ClienteREST(api_key="x", secret_key="x", url_base="http://127.0.0.1:1", hilos=1)
+    rest._contar("POST", "/fapi/v1/order", error=False)
+    rest._contar("POST", "/fapi/v1/order", error=True)
+    trazas = GestorLatencia(activo=True)
+    trazas.registrar("BTCUSDT", "orden_rest", 42.0)
+    return SimpleNamespace(mercado=MercadoFalso(), velas=velas, api=SimpleNamespace(rest=rest), peso=GestorPeso(1200),
+                           supervisor=None, ordenes=None, riesgo=None, trazas=trazas, logs=None,
+                           pares_activos=["BTCUSDT"])
+
+def test_endpoint_prometheus():
+    print("\n🧪 TEST: /metrics expone CPU, RSS, velas, barridos, REST y WebSockets")
+    bot = bot_falso()
+    reportes = GestorReportes(bot, puerto=0, archivo="")
+    reportes.registrar_barrido(0.02, 1)
+    reportes.registrar_barrido(Config.INTERVALO_BARRIDO + 1, 1) # Se pasó del presupuesto
+    reportes.contar_omitido("BTCUSDT")
+    reportes.iniciar()
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{reportes.puerto}/metrics", timeout=2) as r:
+            texto = r.read().decode()
+        lineas = dict(l.rsplit(" ", 1) for l in texto.splitlines() if not l.startswith("#"))
+        assert float(lineas["bot_memoria_rss_bytes"]) > 0
+        assert float(lineas["bot_cpu_segundos_total"]) > 0
+        assert float(lineas['bot_velas_memoria_bytes{par="BTCUSDT"}']) == bot.velas.historial["BTCUSDT"].nbytes()
+        assert lineas["bot_barridos_excedidos_total"] == "1.0" and lineas["bot_barridos_total"] == "2.0"
+        assert lineas['bot_pares_omitidos_total{par="BTCUSDT"}'] == "1.0"
+        assert lineas['bot_rest_peticiones_total{endpoint="POST /fapi/v1/order"}'] == "2.0"
+        assert lineas['bot_rest_errores_total{endpoint="POST /fapi/v1/order"}'] == "1.0"
+        assert lineas['bot_ws_mensajes_total{stream="btcusdt@miniTicker"}'] == "120.0"
+        assert lineas['bot_latencia_ms{par="BTCUSDT",etapa="orden_rest",cuantil="0.99"}'] == "42.0"
+        assert "# TYPE bot_cola_velas_profundidad gauge" in texto
+        coste = float(lineas["bot_metricas_generacion_segundos"])
+        assert coste < 0.05 # Barato: se puede dejar siempre encendido
+        print(f"✅ {len(lineas)} series; generar la página costó {coste * 1000:.2f} ms")
+    finally:
+        reportes.detener()
+        bot.api.rest.cerrar()
+
+def test_archivo_textfile():
+    print("\n🧪 TEST: Escritura atómica del archivo .prom")
+    bot = bot_falso()
+    ruta = os.path.join(tempfile.mkdtemp(), "bot.prom")
+    reportes = GestorReportes(bot, archivo=ruta, intervalo=60)
+    reportes.escribir_archivo()
+    with open(ruta) as f:
+        assert "bot_barridos_total 0.0" in f.read()
+    assert not os.path.exists(ruta + ".tmp")
+    bot.api.rest.cerrar()
+    print("✅ Archivo listo para el textfile collector")
+
+def test_lecturas_concurrentes_idempotentes():
+    print("\n🧪 TEST: Dos lectores a la vez (scraper + archivo .prom) ven las mismas series, sin estado entre lecturas")
+    bot = bot_falso()
+    reportes = GestorReportes(bot, archivo="")
+    serie = lambda texto: {l.rsplit(" ", 1)[0]: l.rsplit(" ", 1)[1] for l in texto.splitlines()
+                           if l.startswith("bot_ws_") or l.startswith("# TYPE bot_cpu")}
+    primera = serie(reportes.generar())
+    bot.mercado.metricas['btcusdt@miniTicker'][0] += 50 # Llegan mensajes entre lecturas
+    segunda, tercera = serie(reportes.generar()), serie(reportes.generar())
+    assert segunda == tercera # Leer no consume nada: el segundo lector no ve una tasa distinta
+    assert segunda['bot_ws_mensajes_total{stream="btcusdt@miniTicker"}'] == "170.0"
+    assert primera['bot_ws_mensajes_total{stream="btcusdt@miniTicker"}'] == "120.0"
+    texto = reportes.generar()
+    assert "bot_cpu_porcentaje" not in texto and "bot_ws_mensajes_por_segundo" not in texto
+    assert "# TYPE bot_cpu_segundos_total counter" in texto
+    bot.api.rest.cerrar()
+    print("✅ Solo contadores monótonos: las tasas, con rate() en Prometheus")
+
+if __name__ == "__main__":
+    test_endpoint_prometheus()
+    test_archivo_textfile()
+    test_lecturas_concurrentes_idempotentes()
@@ -0,0 +1,98 @@
+import sys
+import os
+import time
+from types import SimpleNamespace
+
+# Ajuste de rutas para importar desde la carpeta raíz
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Core.Datos.GestorScanner import GestorScanner
+from Core.Utils.Config import Config
+from Estrategias.BotBase import BotBase
+
+def mensaje(minuto, precios, volumen=None):
+    """!miniTicker@arr sintético: un evento por símbolo en el segundo 30 del minuto (50M USDT por defecto)."""
+    E = minuto * 60_000 + 30_000
+    volumen = volumen or {}
+    return {'stream': '!miniTicker@arr', 'data': [
+        {'e': '24hrMiniTicker', 'E': E, 's': s, 'c': str(p), 'q': str(volumen.get(s, 50_000_000))}
+        for s, p in precios.items()]}
+
+def test_ranking_por_fuerza_de_senal():
+    print("\n🧪 TEST: Ranking del universo por fuerza de señal RSI")
+    scanner = GestorScanner(max_pares=8, muestras=32, muestreo=60)
+    volumen = {"ILIQUSDT": 1_000}
+    for m in range(20):
+        ruido = 0.2 if m % 2 else -0.2 # Pares con algo de rebote: RSI no extremo del todo
+        scanner.procesar_msg(mensaje(m, {
+            "BAJAUSDT": 100 - 2 * m + ruido,   # Caída fuerte -> sobreventa (LONG)
+            "SUAVEUSDT": 100 - 0.5 * m + 3 * ruido, # Caída leve con rebotes
+            "SUBEUSDT": 50 + m,                # Subida limpia -> sobrecompra (SHORT)
+            "PLANOUSDT": 10 + ruido,           # Sin tendencia
+            "ILIQUSDT": 5 - 0.1 * m,           # Con señal pero sin volumen
+            "BTCUSDT_250328": 60_000 - m,      # Entrega trimestral: fuera del universo
+        }, volumen))
+        scanner.procesar_msg({'stream': '!markPrice@arr', 'data': [
+            {'e': 'markPriceUpdate', 'E': m * 60_000 + 31_000, 's': 'SUBEUSDT', 'p': str(50 + m), 'r': '0.0003'}]})
+
+    ranking = scanner.ranking()
+    pares = [c['par'] for c in ranking]
+    assert set(pares[:2]) == {"SUBEUSDT", "BAJAUSDT"} and pares[2] == "SUAVEUSDT", ranking
+    assert "PLANOUSDT" not in pares and "ILIQUSDT" not in pares and "BTCUSDT_250328" not in scanner.indice
+    assert all(a['fuerza'] >= b['fuerza'] for a, b in zip(ranking, ranking[1:]))
+    sube = next(c for c in ranking if c['par'] == "SUBEUSDT")
+    baja = next(c for c in ranking if c['par'] == "BAJAUSDT")
+    assert sube['senal'] == -1 and baja['senal'] == 1 and abs(sube['funding'] - 0.0003) < 1e-9
+    assert len(scanner.ranking(top=1)) == 1
+    print(f"✅ {[(c['par'], round(c['rsi'], 1)) for c in ranking]}")
+
+def test_calentamiento_y_memoria_fija():
+    print("\n🧪 TEST: Sin ranking hasta tener muestras; memoria fija aunque lleguen más pares")
+    scanner = GestorScanner(max_pares=4, muestras=16, muestreo=60)
+    for m in range(10):
+        scanner.procesar_msg(mensaje(m, {f"P{i}USDT": 100 - m * (i + 1) for i in range(6)}))
+    assert scanner.ranking() == [] # 9 muestras cerradas < RSI 14 + 1
+    estado = scanner.estado()
+    assert estado['pares'] == 4 and estado['ignorados'] > 0 and scanner.cierres.shape == (4, 16)
+
+    # Un silencio de varios minutos cierra una sola muestra (el último precio conocido)
+    scanner.procesar_msg(mensaje(15, {"P0USDT": 1.0}))
+    assert scanner.tomadas == 10
+
+    inicio = time.perf_counter()
+    grande = GestorScanner(max_pares=Config.SCANNER_MAX_PARES)
+    for m in range(Config.SCANNER_MUESTRAS):
+        grande.procesar_msg(mensaje(m, {f"S{i}USDT": 100 + (i % 7) - m * (i % 3) for i in range(400)}))
+    ingesta = (time.perf_counter() - inicio) / Config.SCANNER_MUESTRAS
+    inicio = time.perf_counter()
+    grande.ranking()
+    print(f"✅ 400 pares: {ingesta * 1000:.2f} ms por mensaje, ranking {(time.perf_counter() - inicio) * 1000:.2f} ms, "
+          f"{grande.estado()['memoria_kb']} KB")
+
+def test_promocion_fallida_se_reintenta():
+    print("\n🧪 TEST: Si el historial de un par promovido falla, el siguiente barrido lo vuelve a intentar")
+    historial_ok = [False]
+    suscritos = {}
+    bot = SimpleNamespace(
+        estrategias={"MANUALUSDT": {"activo": False}}, pares_activos=[], promovidos=set(), supervisor=None,
+        ejecutor=SimpleNamespace(configurar_apalancamiento=lambda par, x: True),
+        indicadores=SimpleNamespace(registrar_par=lambda par, rsi_periodo: None),
+        velas=SimpleNamespace(inicializar_par=lambda par, tf: historial_ok[0]),
+        mercado=SimpleNamespace(timeframes=suscritos, agregar_pares=lambda pares: suscritos.update(pares)))
+
+    BotBase._promover(bot, "NUEVOUSDT") # Falla la descarga (REST caído, peso agotado...)
+    assert "NUEVOUSDT" not in bot.estrategias and bot.pares_activos == []
+
+    historial_ok[0] = True
+    BotBase._promover(bot, "NUEVOUSDT")
+    assert bot.estrategias["NUEVOUSDT"]["activo"] and "NUEVOUSDT" in suscritos
+    assert bot.pares_activos == ["NUEVOUSDT"] and bot.promovidos == {"NUEVOUSDT"}
+
+    BotBase._promover(bot, "MANUALUSDT") # Desactivado en estrategias.json: sigue fuera
+    assert "MANUALUSDT" not in bot.pares_activos
+    print("✅ Promoción fallida no deja el par marcado como desactivado")
+
+if __name__ == "__main__":
+    test_ranking_por_fuerza_de_senal()
+    test_calentamiento_y_memoria_fija()
+    test_promocion_fallida_se_reintenta()
@@ -0,0 +1,73 @@
+import sys
+import os
+import time
+import numpy as np
+
+# Ajuste de rutas para importar desde la carpeta raíz
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Core.Utils.Config import Config
+from Core.Datos.GestorHistorico import GestorHistorico
+from Core.Simulacion.ServidorSimulado import ServidorSimulado
+
+INTERVALO = 300_000
+
+def velas_escalera(cierres):
+    """Velas sin mechas: cada una abre en el cierre anterior y cierra en el valor dado."""
+    n = len(cierres)
+    v = np.zeros(n, dtype=GestorHistorico.DTYPE)
+    ahora = int(time.time() * 1000)
+    v['timestamp'] = (ahora - ahora % INTERVALO) - np.arange(n)[::-1] * INTERVALO
+    v['close'] = cierres
+    v['open'] = np.concatenate([[cierres[0]], cierres[:-1]])
+    v['high'] = np.maximum(v['open'], v['close'])
+    v['low'] = np.minimum(v['open'], v['close'])
+    v['volume'] = 10.0
+    return v
+
+def servidor(cierres):
+    # Sin iniciar(): se usa el despacho REST en proceso y el reloj manual
+    return ServidorSimulado({"ETHUSDT": velas_escalera(cierres)}, "5m", intervalo_tick=None, velas_previas=2)
+
+def test_limit_maker_y_cierre():
+    print("\n🧪 TEST: Limit se llena al tocar precio (maker) y reduceOnly cierra")
+    sim = servidor([100.0, 100.0, 100.0, 98.0, 102.0, 102.0])
+    estado, orden, _ = sim.atender("POST", "/fapi/v1/order",
+                                   {"symbol": "ETHUSDT", "side": "BUY", "type": "LIMIT", "quantity": "1", "price": "99"})
+    assert estado == 200 and orden['status'] == 'NEW', orden
+
+    for _ in range(2 * sim.ticks_por_vela):
+        sim._ronda_ticks()
+    _, orden, _ = sim.atender("GET", "/fapi/v1/order", {"symbol": "ETHUSDT", "orderId": orden['orderId']})
+    assert orden['status'] == 'FILLED' and float(orden['avgPrice']) == 99.0, orden
+    _, posiciones, _ = sim.atender("GET", "/fapi/v3/positionRisk", {"symbol": "ETHUSDT"})
+    assert float(posiciones[0]['positionAmt']) == 1.0
+
+    # Cierre a mercado mayor que la posición: reduceOnly lo recorta a 1
+    estado, cierre, _ = sim.atender("POST", "/fapi/v1/order",
+                                    {"symbol": "ETHUSDT", "side": "SELL", "type": "MARKET", "quantity": "3", "reduceOnly": "true"})
+    assert estado == 200 and float(cierre['executedQty']) == 1.0, cierre
+    salida = float(cierre['avgPrice'])
+    esperado = 10000 + (salida - 99) - 99 * Config.COMISION_MAKER - salida * Config.COMISION_TAKER
+    assert abs(sim.balance - esperado) < 1e-9, (sim.balance, esperado)
+    print(f"✅ Entrada 99 (maker), salida {salida} (taker), balance {sim.balance:.4f}")
+
+def test_validaciones_binance():
+    print("\n🧪 TEST: Errores con los mismos códigos que Binance")
+    sim = servidor([100.0] * 6)
+    casos = [
+        ({"quantity": "1", "price": "99.123456789"}, -1111),  # Precisión de precio
+        ({"quantity": "0.01", "price": "99"}, -4164),         # Notional mínimo
+        ({"quantity": "5000", "price": "99"}, -2019),         # Margen insuficiente
+    ]
+    for extra, codigo in casos:
+        estado, cuerpo, _ = sim.atender("POST", "/fapi/v1/order",
+                                        {"symbol": "ETHUSDT", "side": "BUY", "type": "LIMIT", **extra})
+        assert estado == 400 and cuerpo['code'] == codigo, (extra, cuerpo)
+    estado, cuerpo, _ = sim.atender("GET", "/fapi/v1/noExiste", {})
+    assert estado == 404
+    print("✅ -1111 / -4164 / -2019 y rutas desconocidas")
+
+if __name__ == "__main__":
+    test_limit_maker_y_cierre()
+    test_validaciones_binance()
@@ -0,0 +1,189 @@
+import sys
+import os
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+# Ajuste de rutas para importar desde la carpeta raíz
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Core.API.GestorPeso import GestorPeso
+from Core.Datos.GestorColaVelas import GestorColaVelas
+from Core.Datos.GestorVelas import GestorVelas
+from Core.Datos.GestorSupervisor import GestorSupervisor
+
+INTERVALO = 300_000
+
+class ClienteFalso:
+    """Velas sintéticas de 5m hasta 'ultima'; registra los parámetros de cada petición."""
+    KLINE_INTERVAL_1MINUTE = "1m"
+    KLINE_INTERVAL_5MINUTE = "5m"
+    KLINE_INTERVAL_15MINUTE = "15m"
+    KLINE_INTERVAL_1HOUR = "1h"
+    KLINE_INTERVAL_4HOUR = "4h"
+
+    def __init__(self, ultima):
+        self.ultima = ultima
+        self.peticiones = []
+
+    def futures_klines(self, symbol, interval, limit, startTime=None, endTime=None):
+        self.peticiones.append({'limit': limit, 'startTime': startTime, 'endTime': endTime})
+        fin = self.ultima if endTime is None else min(self.ultima, endTime)
+        desde = fin - (limit - 1) * INTERVALO if startTime is None else startTime
+        return [[t, "1", "2", "0.5", str(t / INTERVALO), "3", t + INTERVALO - 1] + ["0"] * 5
+                for t in range(desde, fin + 1, INTERVALO)][:limit]
+
+class ApiFalsa:
+    def __init__(self, cliente, rest=None):
+        self.client = cliente
+        self.rest = rest
+
+class RestFalso:
+    """ClienteREST falso: pool propio, peso por petición y 'latencia' segundos; puede fallar a demanda."""
+    def __init__(self, cliente, latencia, falla=False):
+        self.cliente = cliente
+        self.latencia = latencia
+        self.falla = falla
+        self.peso = GestorPeso(1200)
+        self.pool = ThreadPoolExecutor(max_workers=4)
+
+    def en_segundo_plano(self, funcion, **kwargs):
+        return self.pool.submit(funcion, **kwargs)
+
+    def futures_klines(self, **params):
+        self.peso.reservar(GestorPeso.peso_ruta("/fapi/v1/klines", params))
+        time.sleep(self.latencia)
+        if self.falla:
+            raise ConnectionError("sin red")
+        return self.cliente.futures_klines(**params)
+
+def kline(t, cerrada=False):
+    return {'t': t, 'o': '1', 'h': '2', 'l': '0.5', 'c': str(t / INTERVALO), 'v': '3', 'x': cerrada}
+
+def test_hueco_se_rellena_antes_de_coser():
+    print("\n🧪 TEST: Un salto en el stream se tapa con el rango REST justo")
+    inicio = 1_000 * INTERVALO
+    cliente = ClienteFalso(inicio)
+    velas = GestorVelas(ApiFalsa(cliente))
+    assert velas.inicializar_par("BTCUSDT", "5m")
+
+    # Se perdieron 3 velas completas: llega directamente la 4ª
+    cliente.ultima = inicio + 4 * INTERVALO
+    velas.actualizar_vela_en_tiempo_real("BTCUSDT", kline(inicio + 4 * INTERVALO))
+    peticion = cliente.peticiones[-1]
+    assert peticion == {'limit': 4, 'startTime': inicio, 'endTime': inicio + 4 * INTERVALO - 1}, peticion
+
+    ts = velas.historial["BTCUSDT"].vista('timestamp')
+    assert np.all(np.diff(ts) == INTERVALO) and ts[-1] == inicio + 4 * INTERVALO
+    assert velas.historial["BTCUSDT"].vista('cerrada')[-2]
+    assert velas.huecos == {'detectados': 1, 'velas_rellenadas': 3}
+    print(f"✅ 3 velas recuperadas con limit={peticion['limit']}, buffer contiguo")
+
+class MercadoFalso:
+    def __init__(self, base):
+        self.ultima_actividad = {"BTCUSDT": base, "ETHUSDT": base}
+        self.pares_en_recuperacion = set()
+        self.conexiones = self
+        self.reabiertos = []
+        self.rellenos = []
+
+    def reabrir_par(self, par, mudos=()):
+        self.reabiertos.append((par, sorted(mudos)))
+
+    def programar_relleno(self, par, al_terminar=None):
+        self.rellenos.append(par)
+        al_terminar()
+
+    def verificar_salud_datos(self, par):
+        return par not in self.pares_en_recuperacion
+
+class VelasFalsas:
+    huecos = {'detectados': 0, 'velas_rellenadas': 0}
+
+def test_supervisor_reabre_y_rellena_antes_de_operar():
+    print("\n🧪 TEST: Par mudo -> fuera de operación, aviso a su conexión, relleno y vuelta")
+    base = time.time() - 10 # Reloj del test: 10s en el pasado
+    mercado = MercadoFalso(base)
+    supervisor = GestorSupervisor(mercado, VelasFalsas(), max_silencio=5)
+    supervisor.pares = ["BTCUSDT", "ETHUSDT"]
+
+    mercado.ultima_actividad["ETHUSDT"] = base + 4
+    supervisor.revisar(ahora=base + 6) # BTC lleva 6s mudo; ETH sigue vivo
+    assert mercado.reabiertos == [("BTCUSDT", ["BTCUSDT"])] and not mercado.verificar_salud_datos("BTCUSDT")
+    supervisor.revisar(ahora=base + 7) # Sigue caído: no se reabre dos veces
+    assert len(mercado.reabiertos) == 1 and mercado.rellenos == []
+
+    mercado.ultima_actividad["BTCUSDT"] = base + 8 # Vuelven los datos
+    supervisor.revisar(ahora=base + 8.5)
+    assert mercado.rellenos == ["BTCUSDT"] and mercado.verificar_salud_datos("BTCUSDT")
+    metricas = supervisor.metricas()
+    assert metricas['caidas'] == 1 and metricas['recuperaciones'] == 1 and metricas['en_recuperacion'] == []
+    assert 0 < metricas['recuperacion_ultima_s'] < 10
+    print(f"✅ Recuperado en {metricas['recuperacion_ultima_s']:.1f}s desde la detección")
+
+def test_hueco_con_cola_sin_candado():
+    print("\n🧪 TEST: Con cola, el hueco se descarga fuera del candado y del trabajador, con peso reservado")
+    inicio = 1_000 * INTERVALO
+    cliente = ClienteFalso(inicio)
+    rest = RestFalso(cliente, latencia=0.3)
+    velas = GestorVelas(ApiFalsa(cliente, rest))
+    velas.diferir_huecos = True
+    assert velas.inicializar_par("BTCUSDT", "5m") and velas.inicializar_par("ETHUSDT", "5m")
+    aplicadas = []
+    def aplicar(symbol, kline):
+        aplicadas.append((symbol, kline['t']))
+        return velas.actualizar_vela_en_tiempo_real(symbol, kline)
+    cola = GestorColaVelas(aplicar)
+    cola.iniciar()
+    try:
+        cliente.ultima = inicio + 4 * INTERVALO
+        cola.encolar("BTCUSDT", kline(inicio + 4 * INTERVALO)) # Se perdieron 3 velas
+        cola.encolar("BTCUSDT", kline(inicio + 4 * INTERVALO, cerrada=True))
+        time.sleep(0.05)
+        cola.encolar("ETHUSDT", kline(inicio))
+        time.sleep(0.05)
+
+        # En plena descarga: otro par ya aplicado y el candado libre para la estrategia
+        assert ("ETHUSDT", inicio) in aplicadas
+        assert velas.lock.acquire(blocking=False)
+        velas.lock.release()
+        assert velas.historial["BTCUSDT"].ultimo_timestamp() == inicio # BTC aún sin coser
+
+        assert cola.esperar_vacia(timeout=2)
+        ts = velas.historial["BTCUSDT"].vista('timestamp')
+        assert np.all(np.diff(ts) == INTERVALO) and ts[-1] == inicio + 4 * INTERVALO
+        assert velas.historial["BTCUSDT"].vista('cerrada')[-1]
+        assert velas.huecos == {'detectados': 1, 'velas_rellenadas': 3}
+        assert rest.peso.estado()['usado'] == GestorPeso.peso_klines(4)
+        print(f"✅ Hueco rellenado en segundo plano; ETHUSDT y la estrategia no esperaron ({rest.latencia}s de REST)")
+    finally:
+        cola.detener()
+        rest.pool.shutdown()
+
+def test_hueco_con_rest_caido_no_reintenta_en_bucle():
+    print("\n🧪 TEST: Si el relleno falla, la kline se cose igualmente y no se vuelve a pedir el mismo hueco")
+    inicio = 1_000 * INTERVALO
+    cliente = ClienteFalso(inicio)
+    rest = RestFalso(cliente, latencia=0, falla=True)
+    velas = GestorVelas(ApiFalsa(cliente, rest))
+    velas.diferir_huecos = True
+    assert velas.inicializar_par("BTCUSDT", "5m")
+    cola = GestorColaVelas(velas.actualizar_vela_en_tiempo_real)
+    cola.iniciar()
+    try:
+        cola.encolar("BTCUSDT", kline(inicio + 4 * INTERVALO))
+        cola.encolar("BTCUSDT", kline(inicio + 4 * INTERVALO, cerrada=True))
+        assert cola.esperar_vacia(timeout=2)
+        assert velas.historial["BTCUSDT"].ultimo_timestamp() == inicio + 4 * INTERVALO
+        assert rest.peso.estado()['usado'] == GestorPeso.peso_klines(4) # Una sola petición
+        assert velas.historial["BTCUSDT"].vista('cerrada')[-1] and cola.estado()['errores'] == 0
+        print("✅ 1 petición fallida, kline cosida sobre el hueco")
+    finally:
+        cola.detener()
+        rest.pool.shutdown()
+
+if __name__ == "__main__":
+    test_hueco_se_rellena_antes_de_coser()
+    test_hueco_con_cola_sin_candado()
+    test_hueco_con_rest_caido_no_reintenta_en_bucle()
+    test_supervisor_reabre_y_rellena_antes_de_operar()
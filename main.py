@@ -1,7 +1,12 @@
 import time
 from Estrategias.BotBase import BotBase 
+from Estrategias.LogicaRSI import LogicaRSI
+from Core.Utils.Config import Config
+from Core.Utils.GestorLogs import GestorLogs
 from binance.enums import SIDE_BUY, SIDE_SELL
 
+log = GestorLogs.obtener("estrategia") # Una línea por par y barrido: va por la cola, no bloquea el bucle
+
 class BotTrading(BotBase):
     """
     Clase Principal: CEREBRO DE TRADING
@@ -18,17 +23,40 @@ class BotTrading(BotBase):
             
             # 2. Bucle Infinito
             while True:
-                self.ejecutar_estrategia()
-                time.sleep(5) # "Pensar" cada 5 segundos
+                self.rotar_pares() # Modo scanner: solo actúa cada Config.INTERVALO_SCANNER
+                if Config.MODO_EVENTOS:
+                    # Despertamos solo cuando llegan datos nuevos y evaluamos solo esos pares
+                    pares = self.mercado.esperar_cambios(
+                        timeout=Config.INTERVALO_BARRIDO,
+                        debounce=Config.DEBOUNCE_EVENTOS
+                    )
+                    # Sin eventos en todo el intervalo: barrido completo de respaldo
+                    self.ejecutar_estrategia(pares or None)
+                else:
+                    self.ejecutar_estrategia()
+                    time.sleep(Config.INTERVALO_BARRIDO) # "Pensar" cada 5 segundos
 
         except KeyboardInterrupt:
             print("\n🛑 Deteniendo bot por orden del usuario...")
             self.detener_servicios()
 
-    def ejecutar_estrategia(self):
+    def ejecutar_estrategia(self, pares=None):
+        """Evalúa los pares indicados (Event-Driven) o todos los activos si no se indica ninguno."""
+        # Modo lote: indicadores de todo el barrido en una sola pasada (coste casi fijo con más pares)
+        inicio_barrido = time.perf_counter()
+        evaluados = 0
+        lote = self._analizar_en_lote(pares) if Config.ANALISIS_EN_LOTE else None
+
         for par in self.pares_activos:
+            if pares is not None and par not in pares:
+                continue
+            inicio = time.perf_counter()
+            llegada = self.trazas.ultima_llegada(par) # Dato que dispara esta evaluación (los ticks siguientes no cuentan)
+            evaluados += 1
+
             # 1. Seguridad
             if not self.mercado.verificar_salud_datos(par):
+                self.reportes.contar_omitido(par)
                 continue
             
             # 2. Datos y Estado
@@ -37,7 +65,6 @@ class BotTrading(BotBase):
             
             # --- NUEVA SEGURIDAD ---
             posicion_actual = self.ejecutor.obtener_posicion(par)
-            tengo_posicion = abs(posicion_actual) > 0
             
             # Consultamos si ya hay una orden puesta esperando llenarse
             tengo_ordenes_pendientes = self.ejecutor.verificar_ordenes_pendientes(par)
@@ -46,8 +73,16 @@ class BotTrading(BotBase):
             precios_cierre = self.velas.obtener_closes(par)
             if len(precios_cierre) < 50: continue
 
-            rsi_periodo = config["indicadores"].get("rsi_periodo", 14)
-            rsi_actual = self.analista.calcular_rsi(precios_cierre, rsi_periodo)
+            # RSI del lote, o instantáneo del motor en streaming; si aún no está sembrado, cálculo clásico
+            inicio_rsi = time.perf_counter()
+            if lote is not None:
+                rsi_actual = lote[par]['rsi']
+            elif self.indicadores.esta_listo(par):
+                rsi_actual = self.indicadores.obtener_rsi(par)
+            else:
+                rsi_periodo = config["indicadores"].get("rsi_periodo", 14)
+                rsi_actual = self.analista.calcular_rsi(precios_cierre, rsi_periodo)
+            self.trazas.desde(par, 'indicadores', inicio_rsi)
             if rsi_actual is None: continue
 
             # 4. LÓGICA DE DECISIÓN
@@ -58,41 +93,67 @@ class BotTrading(BotBase):
             leverage = config.get("apalancamiento", 1)
             decimales = config.get("decimales", 3)
 
+            accion = LogicaRSI.decidir(rsi_actual, rsi_compra, rsi_venta, posicion_actual, tengo_ordenes_pendientes)
+            self.trazas.desde(par, 'decision', inicio)
+            self.trazas.desde_llegada(par, 'dato_a_decision', llegada)
+
             # --- ESCENARIO A: BUSCAR ENTRADA ---
             # Solo entramos si NO tenemos posición Y TAMPOCO órdenes esperando
-            if not tengo_posicion and not tengo_ordenes_pendientes:
-                
-                if rsi_actual < rsi_compra:
-                    print(f"✅ {par}: RSI {rsi_actual:.2f} < {rsi_compra} -> ¡ABRIENDO LONG 🚀!")
-                    cant, _ = self.ejecutor.calcular_cantidad(par, porcentaje, precio, leverage, decimales)
-                    if cant > 0: 
-                        self.ejecutor.colocar_orden_limit(par, SIDE_BUY, cant, precio)
-                    
-                elif rsi_actual > rsi_venta:
-                    print(f"✅ {par}: RSI {rsi_actual:.2f} > {rsi_venta} -> ¡ABRIENDO SHORT 📉!")
-                    cant, _ = self.ejecutor.calcular_cantidad(par, porcentaje, precio, leverage, decimales)
-                    if cant > 0: 
-                        self.ejecutor.colocar_orden_limit(par, SIDE_SELL, cant, precio)
-                
+            if accion in (LogicaRSI.ABRIR_LONG, LogicaRSI.ABRIR_SHORT):
+                # Límite global de posiciones simultáneas (Config.MAX_POSICIONES)
+                if not self.capital.hay_cupo_disponible():
+                    log.info("🚫 %s: Señal RSI %.2f ignorada. Sin cupo (%d posiciones).", par, rsi_actual,
+                             Config.MAX_POSICIONES, extra={'clave': ('sin_cupo', par)})
+                    continue
+
+                datos = {'par': par, 'precio': precio, 'rsi': rsi_actual}
+                if accion == LogicaRSI.ABRIR_LONG:
+                    log.info("✅ %s: RSI %.2f < %s -> ¡ABRIENDO LONG 🚀!", par, rsi_actual, rsi_compra, extra={'datos': datos})
+                    side = SIDE_BUY
                 else:
-                    print(f"🤖 {par:<8} | ${precio:<10,.2f} | RSI: {rsi_actual:.2f} | 💤 Esperando...")
+                    log.info("✅ %s: RSI %.2f > %s -> ¡ABRIENDO SHORT 📉!", par, rsi_actual, rsi_venta, extra={'datos': datos})
+                    side = SIDE_SELL
+
+                cant, _ = self.ejecutor.calcular_cantidad(par, porcentaje, precio, leverage, decimales)
+                if cant > 0: 
+                    if self.ordenes:
+                        orden = self.ordenes.abrir(par, side, cant, precio, llegada=llegada) # Touch + reprecio + timeout
+                    else:
+                        orden = self.ejecutor.colocar_orden_limit(par, side, cant, precio, llegada=llegada)
+                    if orden:
+                        self.capital.registrar_entrada(par) # Ocupa cupo desde ya, aunque no se haya llenado
+
+            elif accion == LogicaRSI.ESPERAR:
+                log.info("🤖 %-8s | $%-10.2f | RSI: %.2f | 💤 Esperando...", par, precio, rsi_actual,
+                         extra={'clave': ('esperando', par), 'datos': {'par': par, 'precio': precio, 'rsi': rsi_actual}})
 
             # --- ESCENARIO B: BUSCAR SALIDA ---
-            elif tengo_posicion:
+            elif accion in (LogicaRSI.CERRAR, LogicaRSI.MANTENER):
                 tipo = "LONG 🟢" if posicion_actual > 0 else "SHORT 🔴"
-                print(f"🛡️ {par:<8} | EN {tipo} ({posicion_actual}) | RSI: {rsi_actual:.2f} | Gestionando salida...")
+                log.info("🛡️ %-8s | EN %s (%s) | RSI: %.2f | Gestionando salida...", par, tipo, posicion_actual,
+                         rsi_actual, extra={'clave': ('en_posicion', par)})
 
-                if posicion_actual > 0 and rsi_actual > rsi_venta:
-                    print(f"💰 CERRANDO LONG...")
-                    self.ejecutor.cerrar_posicion_mercado(par, posicion_actual)
-
-                elif posicion_actual < 0 and rsi_actual < rsi_compra:
-                    print(f"💰 CERRANDO SHORT...")
+                if accion == LogicaRSI.CERRAR:
+                    log.info("💰 CERRANDO %s...", 'LONG' if posicion_actual > 0 else 'SHORT',
+                             extra={'datos': {'par': par, 'posicion': posicion_actual, 'rsi': rsi_actual}})
                     self.ejecutor.cerrar_posicion_mercado(par, posicion_actual)
             
             # --- ESCENARIO C: ÓRDENES PENDIENTES ---
-            elif tengo_ordenes_pendientes:
-                print(f"⏳ {par}: Tiene una orden abierta esperando llenarse... (No hacemos nada)")
+            elif accion == LogicaRSI.PENDIENTE:
+                log.info("⏳ %s: Tiene una orden abierta esperando llenarse... (No hacemos nada)", par,
+                         extra={'clave': ('pendiente', par)})
+
+        self.reportes.registrar_barrido(time.perf_counter() - inicio_barrido, evaluados)
+
+    def _analizar_en_lote(self, pares=None):
+        """Matriz de cierres de los pares a evaluar -> {par: {'rsi', 'ema', 'senal'}}."""
+        cierres = {
+            par: self.velas.obtener_closes(par) for par in self.pares_activos
+            if pares is None or par in pares
+        }
+        configuraciones = {par: self.estrategias[par]["indicadores"] for par in cierres}
+        with self.trazas.tramo('*', 'indicadores'): # El lote es de todos los pares a la vez
+            return self.analista.evaluar_lote(cierres, configuraciones)
                 
 # -------------------------------------------------------------
 # PUNTO DE ENTRADA (ESTO ES LO QUE TE FALTABA)